@@ -88,9 +88,9 @@ def train_epoch(model, dataloader):
     dataloader.initializeBatches()
 
     counter = 0
-    while dataloader.hasNextBatch():
 
-        batch = dataloader.getBatch()
+    # batches are sampled by background threads while the model trains on the previous batch
+    for batch in dataloader.prefetch():
         model.train_batch(batch)
         dataloader.updateEmbeddings(batch)
 
@@ -107,9 +107,7 @@ def eval_epoch(model, dataloader):
     dataloader.initializeBatches()
 
     counter = 0
-    while dataloader.hasNextBatch():
-
-        batch = dataloader.getBatch()
+    for batch in dataloader.prefetch():
         model.evaluate_batch(batch)
 
         counter += 1
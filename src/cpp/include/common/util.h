@@ -5,6 +5,8 @@
 #ifndef MARIUS_UTIL_H
 #define MARIUS_UTIL_H
 
+#include <atomic>
+
 #include "datatypes.h"
 
 class Timer {
@@ -87,4 +89,66 @@ bool instance_of(std::shared_ptr<T1> instance) {
 std::tuple<torch::Tensor, std::vector<torch::Tensor>> map_tensors(std::vector<torch::Tensor> unmapped_tensors);
 
 std::vector<torch::Tensor> apply_tensor_map(torch::Tensor map, std::vector<torch::Tensor> unmapped_tensors);
+
+/**
+ * Fixed size table of spinlocks which guards concurrent updates to the rows of a table. Each row is mapped to a stripe by its id.
+ */
+class StripedLock {
+  private:
+    int64_t num_stripes_;
+    std::unique_ptr<std::atomic_flag[]> stripes_;
+
+  public:
+    StripedLock(int64_t num_stripes);
+
+    int64_t getNumStripes() {
+        return num_stripes_;
+    }
+
+    void lock(int64_t row) {
+        std::atomic_flag &stripe = stripes_[row % num_stripes_];
+        while (stripe.test_and_set(std::memory_order_acquire)) {}
+    }
+
+    void unlock(int64_t row) {
+        stripes_[row % num_stripes_].clear(std::memory_order_release);
+    }
+};
+
+/**
+ * Sums the gradients of duplicate indices with a sort based segment reduction.
+ * @param indices: Row ids of the gradients
+ * @param gradients: Gradient for each row id
+ * @return Tuple of unique row ids and the summed gradient for each. The inputs are returned unchanged if the ids are already unique.
+ */
+std::tuple<Indices, torch::Tensor> coalesceSparseGradients(Indices indices, torch::Tensor gradients);
+
+/**
+ * Adds rows of values into a float table on the CPU. Duplicate ids are summed before the update, so each row is written once,
+ * and if row_locks is provided each row update holds the stripe lock of the row, making concurrent calls on the same table safe.
+ * @param data: 2D float tensor which is updated in place
+ * @param indices: Rows of data to update
+ * @param values: Value to add for each row in indices
+ * @param row_locks: Optional striped locks guarding the rows of data
+ */
+void index_add_rows(torch::Tensor data, torch::Tensor indices, torch::Tensor values, StripedLock *row_locks = nullptr);
+
+/**
+ * Reads rows of a 2D table stored row major in a file. Each run of consecutive ids is read with a single pread.
+ * @param fd: File holding the table
+ * @param ids: Sorted unique int64 row ids on the CPU
+ * @param output: Contiguous tensor with a row for each id, the number of columns and dtype must match the table
+ * @return Number of bytes read, -1 if a read fails
+ */
+int64_t pread_rows(int fd, torch::Tensor ids, torch::Tensor output);
+
+/**
+ * Writes rows of a 2D table stored row major in a file. Each run of consecutive ids is written with a single pwrite.
+ * @param fd: File holding the table
+ * @param ids: Sorted unique int64 row ids on the CPU
+ * @param values: Contiguous tensor with a row for each id
+ * @return Number of bytes written, -1 if a write fails
+ */
+int64_t pwrite_rows(int fd, torch::Tensor ids, torch::Tensor values);
+
 #endif //MARIUS_UTIL_H
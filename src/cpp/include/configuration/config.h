@@ -104,6 +104,7 @@ struct PipelineConfig {
     int compute_threads;
     int gradient_transfer_threads;
     int gradient_update_threads;
+    int update_lock_stripes;
 };
 
 struct CheckpointConfig {
@@ -111,6 +112,10 @@ struct CheckpointConfig {
     bool save_best;
     int interval;
     bool save_state;
+    bool asynchronous;
+    bool incremental;
+    int compaction_interval;
+    int buffer_state_interval;
 };
 
 struct ModelConfig {
@@ -159,6 +164,7 @@ struct EvaluationConfig {
     int epochs_per_eval;
     string checkpoint_dir;
     bool full_graph_evaluation;
+    int ranking_tile_size;
 };
 
 struct MariusConfig {
@@ -173,6 +179,8 @@ bool check_missing(pyobj python_object);
 template <typename T>
 T cast_helper(pyobj python_object);
 
+std::vector<string> cast_string_list(pyobj python_object);
+
 PYBIND11_EXPORT shared_ptr<NeighborSamplingConfig> initNeighborSamplingConfig(pyobj python_object);
 
 // Lol at this name
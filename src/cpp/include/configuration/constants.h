@@ -13,6 +13,10 @@
 
 #define MAX_NODE_EMBEDDING_INIT_SIZE 1E7 // how many node embeddings to initialize at one time
 
+#define BATCH_POOL_MAX_FREE_BATCHES 16 // how many idle batch objects are kept for reuse by the dataloader, pipelines cap this at their depth
+#define REPORTER_MAX_QUEUED_CHUNKS 16 // how many chunks of evaluation outputs can wait to be written to disk
+#define CHECKPOINT_IN_MEMORY_BLOCKS 64 // how many blocks an in memory table is divided into for incremental checkpoints
+
 namespace PathConstants {
     const string model_file = "model.pt";
     const string model_state_file = "model_state.pt";
@@ -39,6 +43,11 @@ namespace PathConstants {
 
     const string file_ext = ".bin";
     const string checkpoint_metadata_file = "metadata.csv";
+    const string checkpoint_blocks_suffix = "_blocks.txt";
+    const string checkpoint_ordering_file = "ordering.pt";
+    const string checkpoint_rng_state_file = "rng_state.pt";
+    const string latest_checkpoint_file = "latest_checkpoint.txt";
+    const string orderings_directory = "orderings/";
     const string config_file = "config.yaml";
 
     const string output_metrics_file = "metrics.txt";
@@ -131,7 +131,8 @@ enum class StorageBackend {
     PARTITION_BUFFER,
     FLAT_FILE,
     HOST_MEMORY,
-    DEVICE_MEMORY
+    DEVICE_MEMORY,
+    TIERED
 };
 
 StorageBackend getStorageBackend(std::string string_val);
@@ -219,6 +220,7 @@ struct AdagradOptions : OptimizerOptions {
     float init_value;
     float lr_decay;
     float weight_decay;
+    bool row_wise = false;
 };
 
 struct AdamOptions : OptimizerOptions {
@@ -288,6 +290,25 @@ struct PartitionBufferOptions : StorageOptions {
     EdgeBucketOrdering edge_bucket_ordering;
     NodePartitionOrdering node_partition_ordering;
     bool randomly_assign_edge_buckets;
+    bool lazy_initialization = false;
+    int ordering_cache_size = 0;
+    int64_t num_hot_nodes = 0;
+    std::vector<string> stripe_directories = {};
+    int64_t stripe_size = 8388608;
+};
+
+struct FlatFileOptions : StorageOptions {
+    int64_t cache_size = 0;
+    std::vector<string> stripe_directories = {};
+    int64_t stripe_size = 8388608;
+};
+
+struct TieredStorageOptions : StorageOptions {
+    int64_t memory_capacity = 0;
+    string ssd_directory;
+    int64_t ssd_capacity = 0;
+    int64_t block_size = 1024;
+    int64_t rebalance_interval = 1000000;
 };
 
 struct NeighborSamplingOptions {
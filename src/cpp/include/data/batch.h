@@ -7,6 +7,7 @@
 
 #include "common/datatypes.h"
 #include "common/util.h"
+#include "configuration/constants.h"
 #include "graph.h"
 
 
@@ -50,11 +51,13 @@ class Batch {
     BatchStatus status_;                                    /**< Tracks location of the batch in the pipeline */
 
     Indices root_node_indices_;
+    Indices root_node_ids_;                                 /**< Global ids of the root nodes, root_node_indices_ holds buffer local ids when using the partition buffer */
     Indices unique_node_indices_;                           /**< Global node ids for each unique node in the batch. includes negative samples */
     torch::Tensor node_embeddings_;                         /**< Embedding tensor for each unique node in the the batch.  */
     torch::Tensor node_gradients_;                          /**< Gradients for each node embedding in the batch */
     torch::Tensor node_embeddings_state_;                   /**< Optimizer state for each node embedding in the batch */
     torch::Tensor node_state_update_;                       /**< Updates to adjust the optimizer state */
+    float sparse_learning_rate_;                            /**< Learning rate for the fused sparse optimizer update, used when the optimizer state is not loaded into the batch */
 
     torch::Tensor node_features_;                           /**< Feature vector for each unique node in the the batch.  */
     torch::Tensor node_labels_;                             /**< Label for each unique node in the the batch.  */
@@ -63,6 +66,7 @@ class Batch {
     Indices dst_neg_indices_mapping_;                       /**< Maps ids from the sampled nodes, which corrupt the destination nodes of edges, to global node ids */
 
     torch::Tensor edges_;
+    torch::Tensor global_edges_;                            /**< Edges of the batch with global node ids, edges_ is remapped to the unique nodes of the batch */
 
     // Encoder
     DENSEGraph dense_graph_;
@@ -77,17 +81,75 @@ class Batch {
     torch::Tensor src_neg_filter_;                          /**< Used to filter out false negatives for source corrupted negatives */
     torch::Tensor dst_neg_filter_;                          /**< Used to filter out false negatives for destination corrupted negatives */
 
+    // Blocked ranking against all nodes
+    int64_t ranking_tile_size_;                             /**< If > 0, edges are ranked against all candidate nodes in tiles of this size instead of against sampled negatives */
+    torch::Tensor candidate_node_embeddings_;               /**< Embeddings of the candidate nodes, a view of the in memory embedding table which is not moved by to() */
+    torch::Tensor candidate_node_features_;                 /**< Features of the candidate nodes, a view of the in memory feature table which is not moved by to() */
+    Indices candidate_node_ids_;                            /**< Sorted rows of the candidate tables which are ranked against, if undefined every row is a candidate */
+
+    // Host staging arena, retained across clear() so that recycled batches do not reallocate pinned memory
+    torch::Tensor host_gradients_buffer_;                   /**< Pinned host buffer which gradients are copied into from the device, sized to the high-water mark */
+    torch::Tensor host_state_update_buffer_;                /**< Pinned host buffer which optimizer state updates are copied into from the device, sized to the high-water mark */
+
     Batch(bool train);                                      /**< Constructor */
 
     ~Batch();                                               /**< Destructor */
 
     void to(torch::Device device);                          /**< Transfers embeddings, optimizer state, and indices to specified device */
 
-    void accumulateGradients(float learning_rate);          /**< Accumulates gradients into the unique_node_gradients, and applies optimizer update rule to create the unique_node_gradients2 tensor */
+    void accumulateGradients(float learning_rate);          /**< Accumulates gradients into the unique_node_gradients, and applies optimizer update rule to create the unique_node_gradients2 tensor. If the optimizer state was not loaded, the raw gradients are kept for a fused update in storage */
 
     void embeddingsToHost();                                /**< Transfers gradients and embedding updates to host */
 
     void clear();                                           /**< Clears all tensor data in the batch */
 
+    void reset(bool train);                                 /**< Clears the batch and resets its metadata so that it can be reused for a new batch */
+
+    void clearHostBuffers();                                /**< Releases the pinned host staging buffers */
+
+};
+
+/**
+ * Free list of Batch objects which are recycled across the pipeline.
+ * Batches handed out by acquire() are returned to the pool automatically when the last reference to them is dropped,
+ * retaining their pinned host staging buffers so that steady state training does not allocate per batch.
+ */
+class BatchPool : public std::enable_shared_from_this<BatchPool> {
+  private:
+    std::mutex *lock_;
+    std::vector<Batch *> free_batches_;                     /**< Batches which are not referenced outside of the pool */
+    int64_t max_free_batches_;                              /**< Upper bound on the number of idle batches kept in the free list */
+    int64_t num_allocated_;                                 /**< Number of batches which have been allocated by the pool */
+
+    void release(Batch *batch);
+
+  public:
+    BatchPool(int64_t max_free_batches = BATCH_POOL_MAX_FREE_BATCHES);
+
+    ~BatchPool();
+
+    /**
+     * Gets a cleared batch from the free list, or allocates a new batch if the free list is empty.
+     * @param train: If true, the batch is a training batch
+     * @return Batch which is returned to the pool once all references to it have been dropped
+     */
+    shared_ptr<Batch> acquire(bool train);
+
+    /**
+     * Sets the number of idle batches kept in the free list, deleting any idle batches beyond it.
+     * @param max_free_batches: Upper bound on the number of idle batches
+     */
+    void setMaxFreeBatches(int64_t max_free_batches);
+
+    /**
+     * Deletes all idle batches held by the pool.
+     */
+    void clear();
+
+    int64_t getNumFree();
+
+    int64_t getNumAllocated() {
+        return num_allocated_;
+    }
 };
 #endif //MARIUS_BATCH_H
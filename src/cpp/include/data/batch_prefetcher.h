@@ -0,0 +1,74 @@
+#ifndef MARIUS_BATCH_PREFETCHER_H
+#define MARIUS_BATCH_PREFETCHER_H
+
+#include <deque>
+#include <exception>
+
+#include "data/dataloader.h"
+
+/**
+ * Loads the batches of a dataloader ahead of their use with a pool of native loader threads, which sample and gather the batches
+ * into a bounded queue. Gives loops written in Python the same overlap of loading and compute as the pipeline trainer.
+ * There is no guarantee of input order: the dataloader shuffles the edges/nodes it batches (unless its shuffle_ flag is false), and
+ * with more than one loader thread the batches themselves may be returned out of order. Use the global_edges_ or root_node_ids_ of
+ * a batch to identify its rows.
+ */
+class BatchPrefetcher {
+  private:
+    shared_ptr<DataLoader> dataloader_;
+    at::optional<torch::Device> device_;
+    int num_threads_;
+    int queue_size_;
+    bool perform_map_;
+    bool finish_batches_;
+
+    std::vector<std::thread *> threads_;
+    std::deque<shared_ptr<Batch>> queue_;
+    std::mutex lock_;
+    std::condition_variable cv_;
+    int active_threads_;
+    int in_flight_;                                         /**< Number of batches being loaded, which have a reserved slot in the queue */
+    bool stopped_;
+    bool pending_finish_;                                   /**< True if the last batch returned by next() has not been marked finished */
+    std::exception_ptr error_;
+
+    void run();
+
+    void join();
+
+  public:
+    /**
+     * @param dataloader: Dataloader to load batches from, batches must have been initialized with initializeBatches()
+     * @param device: Device the batches are transferred to, if any
+     * @param num_threads: Number of loader threads
+     * @param queue_size: Maximum number of loaded batches waiting to be consumed
+     * @param perform_map: If true, maps the node ids of the batches to local ids
+     * @param finish_batches: If true, a batch is marked finished on the dataloader when the next batch is requested
+     */
+    BatchPrefetcher(shared_ptr<DataLoader> dataloader,
+                    at::optional<torch::Device> device = c10::nullopt,
+                    int num_threads = 2,
+                    int queue_size = 4,
+                    bool perform_map = true,
+                    bool finish_batches = true);
+
+    ~BatchPrefetcher();
+
+    /**
+     * Starts the loader threads, which run until the batches of the dataloader are exhausted.
+     */
+    void start();
+
+    /**
+     * Returns the next loaded batch, waiting for one if necessary.
+     * @return The next batch, or nullptr once all batches have been returned
+     */
+    shared_ptr<Batch> next();
+
+    /**
+     * Stops the loader threads and discards the loaded batches which have not been returned.
+     */
+    void stop();
+};
+
+#endif //MARIUS_BATCH_PREFETCHER_H
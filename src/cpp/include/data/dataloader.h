@@ -5,6 +5,7 @@
 #ifndef MARIUS_DATASET_H
 #define MARIUS_DATASET_H
 
+#include <functional>
 #include <map>
 #include <string>
 #include <tuple>
@@ -28,13 +29,16 @@ class DataLoader {
     int64_t batches_processed_;
     int64_t current_edge_;
     std::mutex *sampler_lock_;
-    vector<shared_ptr<Batch>> batches_;
+    shared_ptr<BatchPool> batch_pool_;                      /**< Recycles batch objects and their pinned host buffers across buffer states and epochs */
     int batch_size_;
 
     bool single_dataset_;
 
     int batch_id_offset_;
-    vector<shared_ptr<Batch>>::iterator batch_iterator_;
+    int64_t num_batch_items_;                               /**< Number of edges/nodes to be batched for the current buffer state */
+    int64_t next_batch_start_idx_;                          /**< Offset of the next batch to be created for the current buffer state */
+    int64_t next_batch_id_;                                 /**< ID of the next batch to be created for the current buffer state, relative to batch_id_offset_ */
+    bool prepare_encode_;                                   /**< If true, the batches for the current buffer state are encode batches */
     std::mutex *batch_lock_;
     std::condition_variable *batch_cv_;
     bool waiting_for_batches_;
@@ -43,6 +47,12 @@ class DataLoader {
     bool all_read_;
 
     vector<torch::Tensor> buffer_states_;
+    int64_t buffer_states_processed_;                       /**< Number of buffer states of the current training epoch whose batches have all been processed */
+    int64_t items_processed_;                               /**< Number of edges/nodes in the processed buffer states of the current training epoch */
+    std::function<void()> buffer_state_callback_;           /**< If set, called while training at each buffer swap, after all batches of the previous buffer state have been processed */
+    vector<torch::Tensor> resume_buffer_states_;            /**< If not empty, replaces the buffer ordering of the next training epoch */
+    vector<torch::Tensor> resume_items_per_buffer_;
+    string ordering_cache_dir_;                             /**< If not empty and the partition buffer options enable it, buffer orderings are cached in this directory */
 
     // Link prediction
     vector<torch::Tensor> edge_buckets_per_buffer_;
@@ -69,6 +79,9 @@ class DataLoader {
     shared_ptr<TrainingConfig> training_config_;
     shared_ptr<EvaluationConfig> evaluation_config_;
     bool only_root_features_;
+    bool fused_sparse_update_;                              /**< If true, node embeddings are updated with a fused sparse Adagrad step in storage and the optimizer state is not loaded into batches */
+    int64_t ranking_tile_size_;                             /**< If > 0, evaluation against all nodes ranks edges in tiles of this many candidate nodes instead of sampling all nodes as negatives */
+    bool shuffle_;                                          /**< If false, the active edges/nodes keep their storage order, so each batch covers rows [start_idx_, start_idx_ + batch_size_) of the storage */
 
     LearningTask learning_task_;
 
@@ -89,14 +102,47 @@ class DataLoader {
 
     void setBufferOrdering();
 
+    /**
+     * Returns the file the buffer ordering of the current epoch is cached in, which is keyed by the ordering parameters, the torch seed
+     * and the epoch. Empty if orderings are not cached.
+     * @param options: Options of the partition buffer
+     * @param node_ids: Nodes the ordering assigns to buffer states, only used for node classification. The key includes a hash of the
+     * ids since the validation and test sets can have the same size
+     */
+    string getOrderingCacheFile(shared_ptr<PartitionBufferOptions> options, torch::Tensor node_ids = torch::Tensor());
+
+    /**
+     * Saves the buffer states of the current epoch which have not been processed yet, along with their edge buckets or node ids.
+     * Used by sub-epoch checkpoints.
+     * @param filename: File to save the ordering to
+     */
+    void saveRemainingOrdering(string filename);
+
+    /**
+     * Loads an ordering saved by saveRemainingOrdering, which is used instead of a new ordering for the next training epoch.
+     * @param filename: File to load the ordering from
+     */
+    void loadRemainingOrdering(string filename);
+
     void setActiveEdges();
 
     void setActiveNodes();
 
+    /**
+     * Prepares the batches for the current buffer state. Batches are created lazily by getNextBatch(), so only the range of
+     * items to batch is computed here.
+     * @param prepare_encode: If true, the batches will cover all nodes for encoding
+     */
     void initializeBatches(bool prepare_encode = false);
 
     void clearBatches();
 
+    /**
+     * Creates the next batch of the current buffer state. Must be called with the batch lock held.
+     * @return The next batch, or nullptr if the buffer state has no batches left
+     */
+    shared_ptr<Batch> createNextBatch();
+
     /**
      * Check to see whether another batch exists.
      * @return True if batch exists, false if not
@@ -143,6 +189,26 @@ class DataLoader {
      */
     void negativeSample(shared_ptr<Batch> batch);
 
+    /**
+     * True if the batches should be ranked against all candidate nodes in tiles. Used when evaluating link prediction against
+     * all nodes with a model that does not sample neighbors.
+     */
+    bool useBlockedRanking();
+
+    /**
+     * Prepares a batch for blocked ranking: computes the false negative filters of the edges against all nodes and sets the tile size.
+     * The candidate nodes themselves are attached to the batch when its parameters are loaded.
+     * @param batch: Batch object to prepare
+     */
+    void rankingSample(shared_ptr<Batch> batch);
+
+    /**
+     * Attaches views of the in memory embedding and feature tables to a batch which is ranked against all nodes
+     * @param batch: Batch object to load candidates into
+     * @param gpu: If true, only tables stored on the GPU are attached
+     */
+    void loadRankingCandidates(shared_ptr<Batch> batch, bool gpu);
+
     /**
      * Loads CPU parameters into batch
      * @param batch: Batch object to load parameters into.
@@ -162,6 +228,13 @@ class DataLoader {
      */
     void updateEmbeddings(shared_ptr<Batch> batch, bool gpu);
 
+    /**
+     * Writes the embedding updates of a batch to storage. Batches which carry optimizer state updates are applied with indexAdd,
+     * otherwise the raw gradients are applied with a fused sparse Adagrad step.
+     * @param batch: Batch object to apply updates from.
+     */
+    void applyEmbeddingUpdates(shared_ptr<Batch> batch);
+
     /**
      * Notify that the epoch has been completed. Prepares dataset for a new epoch.
      */
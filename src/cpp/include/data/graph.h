@@ -37,6 +37,9 @@ class MariusGraph  {
     EdgeList all_src_sorted_edges_;
     EdgeList all_dst_sorted_edges_;
 
+    // sorted local ids negatives are drawn from, if undefined all ids in [0, num_nodes_in_memory_) are used
+    Indices valid_node_ids_;
+
     MariusGraph();
 
     MariusGraph(EdgeList edges);
@@ -57,4 +57,20 @@ std::tuple<vector<torch::Tensor>, vector<torch::Tensor>> getSequentialNodePartit
 
 std::tuple<vector<torch::Tensor>, vector<torch::Tensor>> getCustomNodePartitionOrdering();
 
+/**
+ * Saves a buffer ordering in compact form. The buffer states and the edge buckets or node ids of all states are each concatenated
+ * into one tensor, along with the offsets at which each state begins.
+ * @param filename: File to save the ordering to, which is replaced atomically
+ * @param buffer_states: Buffer states of the ordering
+ * @param items_per_buffer: Edge buckets or node ids processed in each buffer state
+ */
+void saveOrdering(string filename, vector<torch::Tensor> buffer_states, vector<torch::Tensor> items_per_buffer);
+
+/**
+ * Loads an ordering saved by saveOrdering.
+ * @param filename: File to load the ordering from
+ * @return Tuple of the buffer states and the items of each state
+ */
+std::tuple<vector<torch::Tensor>, vector<torch::Tensor>> loadOrdering(string filename);
+
 #endif //MARIUS_ORDERING_H
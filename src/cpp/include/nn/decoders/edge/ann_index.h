@@ -0,0 +1,68 @@
+#ifndef MARIUS_ANN_INDEX_H
+#define MARIUS_ANN_INDEX_H
+
+#include "common/datatypes.h"
+#include "nn/decoders/edge/edge_decoder.h"
+
+/**
+ * Inverted file (IVF-flat) index over node representations for approximate top-k link prediction queries.
+ * Nodes are clustered into lists with k-means. A query probes the lists whose centroids score highest under the decoder's
+ * comparator and scores the members of those lists exactly, so the geometry of the decoder (dot product for DistMult and ComplEx,
+ * L2 for TransE) is used for both the coarse and the fine search. Queries are relation adjusted with the decoder's relation operator.
+ */
+class IVFIndex {
+  public:
+    shared_ptr<EdgeDecoder> decoder_;
+    int64_t num_lists_;
+    int64_t num_probes_;
+
+    torch::Tensor centroids_;                               /**< Centroid of each list [num_lists, dim] */
+    torch::Tensor list_offsets_;                            /**< Offset of each list in list_ids_ and list_embeddings_ [num_lists + 1] */
+    torch::Tensor list_ids_;                                /**< Node ids grouped by list [num_nodes] */
+    torch::Tensor list_embeddings_;                         /**< Node representations grouped by list [num_nodes, dim] */
+    torch::Tensor node_positions_;                          /**< Position of each node in list_ids_ [num_nodes] */
+
+    IVFIndex(shared_ptr<EdgeDecoder> decoder, int64_t num_lists, int64_t num_probes);
+
+    /**
+     * Creates an index from previously built lists, e.g. tensors memory mapped from disk.
+     */
+    IVFIndex(shared_ptr<EdgeDecoder> decoder,
+             torch::Tensor centroids,
+             torch::Tensor list_offsets,
+             torch::Tensor list_ids,
+             torch::Tensor list_embeddings,
+             int64_t num_probes);
+
+    /**
+     * Clusters the node representations and groups them by list. Centroids are trained on a sample of the nodes and all nodes
+     * are assigned in chunks, so embeddings can be memory mapped from disk.
+     * @param embeddings: Node representations [num_nodes, dim]
+     * @param num_iterations: Number of k-means iterations
+     * @param sample_size: Number of nodes used to train the centroids
+     * @param chunk_size: Number of nodes assigned to lists at a time
+     */
+    void build(torch::Tensor embeddings, int64_t num_iterations = 10, int64_t sample_size = 100000, int64_t chunk_size = 65536);
+
+    /**
+     * Finds the approximate top k candidates of each relation adjusted query.
+     * @param queries: Relation adjusted query representations [num_queries, dim]
+     * @param k: Number of candidates to return for each query
+     * @return Scores and node ids of the top k candidates of each query, sorted by descending score. If the probed lists hold fewer
+     * than k nodes, the remaining entries have score -inf and id -1
+     */
+    std::tuple<torch::Tensor, torch::Tensor> search(torch::Tensor queries, int64_t k);
+
+    /**
+     * Finds the approximate top k destinations of (source node, relation) queries. The source representations are read from the index.
+     * @param node_ids: Source node ids [num_queries]
+     * @param relation_ids: Optional relation ids [num_queries]
+     * @param k: Number of candidates to return for each query
+     * @param inverse: If true, the inverse relations are applied, finding the top k sources of (destination node, relation) queries
+     */
+    std::tuple<torch::Tensor, torch::Tensor> query(torch::Tensor node_ids, torch::Tensor relation_ids, int64_t k, bool inverse = false);
+
+    int64_t getNumNodes();
+};
+
+#endif //MARIUS_ANN_INDEX_H
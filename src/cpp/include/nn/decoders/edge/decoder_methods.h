@@ -5,6 +5,8 @@
 #ifndef MARIUS_DECODER_METHODS_H
 #define MARIUS_DECODER_METHODS_H
 
+#include <functional>
+
 #include "common/datatypes.h"
 #include "nn/decoders/edge/edge_decoder.h"
 
@@ -28,4 +30,47 @@ std::tuple<torch::Tensor, torch::Tensor, torch::Tensor, torch::Tensor> rel_corru
                                                                                            torch::Tensor node_embeddings,
                                                                                            torch::Tensor neg_rel_ids);
 
+/**
+ * Ranks each positive edge against all candidate nodes without materializing the full score matrix. The candidates are read
+ * in tiles of tile_size nodes, scored against every query with a batched matrix multiply and only the number of candidates
+ * scoring at least as high as the positive is kept, so peak memory is O(num_queries x tile_size).
+ * Each tile is read once and shared by all query sets (e.g. destination and source corruption).
+ * @param decoder: Edge decoder used to score the candidates
+ * @param queries: For each query set, the relation adjusted representation of the uncorrupted node of each edge [num_edges, dim]
+ * @param pos_scores: For each query set, the score of each positive edge [num_edges]
+ * @param filters: For each query set, optional [*, 2] tensor of (edge id, candidate id) pairs which are excluded from the ranking
+ * @param get_candidates: Returns the representations of the candidates [size, dim] for a given offset and size
+ * @param num_candidates: Total number of candidate nodes
+ * @param tile_size: Number of candidate nodes scored at once
+ * @return For each query set, the rank of each positive edge
+ */
+std::vector<torch::Tensor> node_corrupt_ranks_blocked(shared_ptr<EdgeDecoder> decoder,
+                                                      std::vector<torch::Tensor> queries,
+                                                      std::vector<torch::Tensor> pos_scores,
+                                                      std::vector<torch::Tensor> filters,
+                                                      std::function<torch::Tensor(int64_t, int64_t)> get_candidates,
+                                                      int64_t num_candidates,
+                                                      int64_t tile_size);
+
+/**
+ * Finds the k highest scoring candidate nodes for each query without materializing the full score matrix. The candidates are
+ * read in tiles of tile_size nodes and each tile's best k are merged into a running [num_queries, k] buffer of the best
+ * candidates seen so far, so peak memory is O(num_queries x (tile_size + k)).
+ * @param decoder: Edge decoder used to score the candidates
+ * @param queries: The relation adjusted representation of the source node of each query [num_queries, dim]
+ * @param filter: Optional [*, 2] tensor of (query id, candidate id) pairs which are excluded from the results
+ * @param get_candidates: Returns the representations of the candidates [size, dim] for a given offset and size
+ * @param num_candidates: Total number of candidate nodes
+ * @param tile_size: Number of candidate nodes scored at once
+ * @param k: Number of candidates to return for each query, capped to num_candidates
+ * @return Scores and ids of the top k candidates of each query, sorted by descending score. Filtered candidates score -inf
+ */
+std::tuple<torch::Tensor, torch::Tensor> node_corrupt_topk_blocked(shared_ptr<EdgeDecoder> decoder,
+                                                                   torch::Tensor queries,
+                                                                   torch::Tensor filter,
+                                                                   std::function<torch::Tensor(int64_t, int64_t)> get_candidates,
+                                                                   int64_t num_candidates,
+                                                                   int64_t tile_size,
+                                                                   int64_t k);
+
 #endif //MARIUS_DECODER_METHODS_H
@@ -24,6 +24,7 @@ class Model : public torch::nn::Module {
     torch::Device device_;
     LearningTask learning_task_;
     float sparse_lr_;
+    bool sparse_row_wise_;                                  /**< If true, the node embedding optimizer state holds one Adagrad accumulator per node */
 
     // Multi-GPU training
     std::vector<shared_ptr<Model>> device_models_;
@@ -41,6 +42,22 @@ class Model : public torch::nn::Module {
 
     std::tuple<torch::Tensor, torch::Tensor, torch::Tensor, torch::Tensor> forward_lp(shared_ptr<Batch> batch, bool train);
 
+    /**
+     * Ranks the edges of a batch against all candidate nodes attached to the batch, scoring the candidates in tiles of
+     * batch->ranking_tile_size_ nodes so that the full score matrix is never materialized. Only supported for encoders which
+     * do not use neighborhood information.
+     * @return Positive scores, ranks, inverse positive scores and inverse ranks (undefined if inverse edges are not scored)
+     */
+    std::tuple<torch::Tensor, torch::Tensor, torch::Tensor, torch::Tensor> forward_lp_ranks(shared_ptr<Batch> batch);
+
+    /**
+     * Finds the k highest scoring destination nodes for the source node (and relation) of each edge of a batch, scoring the
+     * candidate nodes attached to the batch in tiles of batch->ranking_tile_size_ nodes. The destination of each edge is ignored.
+     * Candidates in batch->dst_neg_filter_ (e.g. known edges) are excluded and score -inf.
+     * @return Scores and in-memory node ids of the top k destinations of each edge [num_edges, k]
+     */
+    std::tuple<torch::Tensor, torch::Tensor> forward_lp_topk(shared_ptr<Batch> batch, int64_t k);
+
     void train_batch(shared_ptr<Batch> batch, bool call_step=true);
 
     void evaluate_batch(shared_ptr<Batch> batch);
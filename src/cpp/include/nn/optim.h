@@ -6,6 +6,7 @@
 #define MARIUS_OPTIM_H
 
 #include "common/datatypes.h"
+#include "common/util.h"
 #include "configuration/config.h"
 
 
@@ -114,4 +115,26 @@ public:
     std::shared_ptr<Optimizer> clone() override;
 };
 
+/**
+ * Applies a fused sparse Adagrad update to the rows of a parameter table and its optimizer state.
+ * Each row is read and written once: the state accumulates the squared gradient and the parameter is updated in place.
+ * @param params: Parameter table (e.g. node embeddings), updated in place
+ * @param state: Adagrad accumulator table, updated in place. Either the same shape as params, or a single column for row-wise Adagrad
+ *               where the accumulator of each row is incremented by the mean squared gradient of the row.
+ * @param indices: Rows of params to update. Duplicate ids are reduced before the update is applied.
+ * @param gradients: Raw gradient for each row in indices
+ * @param learning_rate: Learning rate
+ * @param eps: Term added to the denominator for numerical stability
+ * @param state_index_map: Optional map from rows of params to rows of state, used when the state is indexed differently than params
+ * @param row_locks: Optional striped locks guarding the rows of params, held while a row and its state are updated
+ */
+void sparseAdagradStep(torch::Tensor params,
+                       torch::Tensor state,
+                       Indices indices,
+                       torch::Tensor gradients,
+                       float learning_rate,
+                       float eps = 1e-10,
+                       torch::Tensor state_index_map = torch::Tensor(),
+                       StripedLock *row_locks = nullptr);
+
 #endif //MARIUS_OPTIM_H
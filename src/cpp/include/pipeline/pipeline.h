@@ -114,6 +114,17 @@ class Pipeline {
 
     void waitComplete();
 
+    /**
+     * Enables striped row locks on the node embeddings when multiple threads apply gradient updates.
+     */
+    void enableConcurrentUpdates();
+
+    /**
+     * Caps the dataloader's free list of batches at the number of batches which can be in the pipeline at once.
+     * Each idle batch keeps its pinned host buffers, so batches beyond the pipeline depth are released instead of pooled.
+     */
+    void capBatchPool();
+
     virtual void initialize() = 0;
 
     virtual void start() = 0;
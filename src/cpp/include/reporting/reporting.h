@@ -5,7 +5,14 @@
 #ifndef MARIUS_SRC_CPP_INCLUDE_REPORTING_H_
 #define MARIUS_SRC_CPP_INCLUDE_REPORTING_H_
 
+#include <condition_variable>
+#include <deque>
+#include <fstream>
+#include <mutex>
+#include <thread>
+
 #include "common/datatypes.h"
+#include "configuration/constants.h"
 
 class Metric {
   public:
@@ -18,6 +25,14 @@ class Metric {
 class RankingMetric : public Metric {
   public:
     virtual torch::Tensor computeMetric(torch::Tensor ranks) = 0;
+
+    /**
+     * Sum of the per-item contributions to the metric, used by reporters to aggregate the metric over many batches.
+     * Ranking metrics are means over the evaluated edges, so the metric equals the total sum divided by the number of ranks.
+     * @param ranks: Ranks of a batch of edges
+     * @return Sum of the metric over the batch
+     */
+    virtual double computeSum(torch::Tensor ranks);
 };
 
 class HitskMetric : public RankingMetric {
@@ -26,6 +41,8 @@ class HitskMetric : public RankingMetric {
     HitskMetric(int k);
 
     torch::Tensor computeMetric(torch::Tensor ranks);
+
+    double computeSum(torch::Tensor ranks) override;
 };
 
 class MeanRankMetric : public RankingMetric {
@@ -33,6 +50,8 @@ class MeanRankMetric : public RankingMetric {
     MeanRankMetric();
 
     torch::Tensor computeMetric(torch::Tensor ranks);
+
+    double computeSum(torch::Tensor ranks) override;
 };
 
 class MeanReciprocalRankMetric : public RankingMetric {
@@ -40,11 +59,21 @@ class MeanReciprocalRankMetric : public RankingMetric {
     MeanReciprocalRankMetric();
 
     torch::Tensor computeMetric(torch::Tensor ranks);
+
+    double computeSum(torch::Tensor ranks) override;
 };
 
 class ClassificationMetric : public Metric {
   public:
     virtual torch::Tensor computeMetric(torch::Tensor y_true, torch::Tensor y_pred) = 0;
+
+    /**
+     * Sum of the per-node contributions to the metric, the metric equals the total sum divided by the number of nodes.
+     * @param y_true: True labels of a batch of nodes
+     * @param y_pred: Predicted labels of a batch of nodes
+     * @return Sum of the metric over the batch
+     */
+    virtual double computeSum(torch::Tensor y_true, torch::Tensor y_pred);
 };
 
 class CategoricalAccuracyMetric : public ClassificationMetric {
@@ -52,6 +81,49 @@ class CategoricalAccuracyMetric : public ClassificationMetric {
     CategoricalAccuracyMetric();
 
     torch::Tensor computeMetric(torch::Tensor y_true, torch::Tensor y_pred) override;
+
+    double computeSum(torch::Tensor y_true, torch::Tensor y_pred) override;
+};
+
+/**
+ * Writes rows of a csv file in chunks from a background thread. Chunks are queued by write() and formatted and written by
+ * the writer thread, at most max_queued_chunks chunks are held in memory at once.
+ */
+class ChunkedCsvWriter {
+  private:
+    std::ofstream stream_;
+    std::thread writer_thread_;
+    std::mutex mutex_;
+    std::condition_variable cv_;
+    std::deque<std::tuple<torch::Tensor, torch::Tensor>> chunks_;
+    int max_queued_chunks_;
+    bool closed_;
+    int64_t rows_written_;
+
+    void run();
+
+    void writeChunk(torch::Tensor int_columns, torch::Tensor float_columns);
+
+  public:
+    ChunkedCsvWriter(string filename, string header, int max_queued_chunks = REPORTER_MAX_QUEUED_CHUNKS);
+
+    ~ChunkedCsvWriter();
+
+    /**
+     * Queues a chunk of rows, blocks while the queue is full.
+     * @param int_columns: Integer valued columns, written first
+     * @param float_columns: Optional floating point columns, written after the integer columns
+     */
+    void write(torch::Tensor int_columns, torch::Tensor float_columns = torch::Tensor());
+
+    /**
+     * Writes all queued chunks and closes the file.
+     */
+    void close();
+
+    int64_t getRowsWritten() {
+        return rows_written_;
+    }
 };
 
 class Reporter {
@@ -82,13 +154,27 @@ class Reporter {
 };
 
 class LinkPredictionReporter : public Reporter {
+  private:
+    int64_t num_ranks_;
+    std::vector<double> metric_sums_;
+
+    string output_directory_;
+    bool output_scores_;
+    bool output_ranks_;
+    shared_ptr<ChunkedCsvWriter> output_writer_;
+
+    void accumulateMetrics(torch::Tensor ranks);
+
+    string getMetricsString();
+
+    shared_ptr<ChunkedCsvWriter> createWriter(string directory, int64_t num_edge_columns, bool scores, bool ranks);
+
+    void writeEdges(shared_ptr<ChunkedCsvWriter> writer, torch::Tensor edges, torch::Tensor ranks, torch::Tensor scores, bool write_scores, bool write_ranks);
+
   public:
     std::vector<torch::Tensor> per_batch_ranks_;
     std::vector<torch::Tensor> per_batch_scores_;
     std::vector<torch::Tensor> per_batch_edges_;
-    torch::Tensor all_ranks_;
-    torch::Tensor all_scores_;
-    torch::Tensor all_edges_;
 
     LinkPredictionReporter();
 
@@ -98,25 +184,40 @@ class LinkPredictionReporter : public Reporter {
 
     torch::Tensor computeRanks(torch::Tensor pos_scores, torch::Tensor neg_scores);
 
+    /**
+     * Streams the scores and/or ranks of the edges passed to addResult to the scores file in the given directory while
+     * evaluating, instead of holding them in memory until save() is called.
+     */
+    void startOutput(string directory, bool scores, bool ranks);
+
     void addResult(torch::Tensor pos_scores, torch::Tensor neg_scores, torch::Tensor edges = torch::Tensor());
 
+    /**
+     * Adds edges whose ranks have already been computed, e.g. by ranking against all nodes in tiles.
+     */
+    void addRanks(torch::Tensor ranks, torch::Tensor pos_scores = torch::Tensor(), torch::Tensor edges = torch::Tensor());
+
     void report() override;
 
     void save(string directory, bool scores, bool ranks);
 };
 
 class NodeClassificationReporter : public Reporter {
+  private:
+    int64_t num_nodes_;
+    std::vector<double> metric_sums_;
 
-public:
+    string output_directory_;
+    shared_ptr<ChunkedCsvWriter> output_writer_;
 
+    void accumulateMetrics(torch::Tensor y_true, torch::Tensor y_pred);
 
+    string getMetricsString();
+
+  public:
     std::vector<torch::Tensor> per_batch_y_true_;
     std::vector<torch::Tensor> per_batch_y_pred_;
     std::vector<torch::Tensor> per_batch_nodes_;
-    torch::Tensor all_y_true_;
-    torch::Tensor all_y_pred_;
-    torch::Tensor all_nodes_;
-
 
     NodeClassificationReporter();
 
@@ -124,6 +225,11 @@ public:
 
     void clear();
 
+    /**
+     * Streams the predicted labels of the nodes passed to addResult to the labels file in the given directory while evaluating.
+     */
+    void startOutput(string directory);
+
     void addResult(torch::Tensor y_true, torch::Tensor y_pred, torch::Tensor node_ids = torch::Tensor());
 
     void report() override;
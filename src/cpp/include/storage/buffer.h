@@ -7,6 +7,7 @@
 
 #include "common/datatypes.h"
 #include "data/batch.h"
+#include "storage/striped_file.h"
 
 class Partition {
 public:
@@ -48,9 +49,33 @@ class PartitionedFile {
     int dtype_size_;                                                /**< Size in bytes of embedding element dtype */
     string filename_;                                               /**< Name of the backing file */
     int fd_;                                                        /**< File descriptor for the backing file */
+    std::function<void(int)> before_write_;                         /**< Optional callback invoked with the partition id before a partition is written */
+    std::function<void(Partition *)> initialize_partition_;         /**< Optional lazy initializer, generates a partition which has never been written when it is read */
+    std::vector<uint8_t> initialized_;                              /**< Per partition, true once the partition is known to hold data in the file */
+    unique_ptr<StripedFile> striped_file_;                          /**< Optional copy of the file striped over several disks, used in place of the file once loaded */
+    bool stripes_loaded_;                                           /**< True if the stripes hold the file */
+    std::atomic<bool> stripes_dirty_;                               /**< True if the stripes hold writes which are not yet in the file */
 
-    /** Constructor */
-    PartitionedFile(string filename, int num_partitions, int64_t partition_size, int embedding_size, int64_t total_embeddings, torch::Dtype dtype);
+    /** Constructor, if stripe_directories is not empty the file is striped over them in stripes of stripe_size bytes */
+    PartitionedFile(string filename, int num_partitions, int64_t partition_size, int embedding_size, int64_t total_embeddings, torch::Dtype dtype,
+                    std::vector<string> stripe_directories = {}, int64_t stripe_size = 0);
+
+    ~PartitionedFile();
+
+    /** Reads bytes of the file, from the stripes if they are loaded */
+    void read(void *addr, int64_t count, int64_t offset);
+
+    /** Writes bytes of the file, to the stripes if they are loaded */
+    void write(const void *addr, int64_t count, int64_t offset);
+
+    /** Copies the file into the stripes, if they do not hold it already */
+    void loadStripes();
+
+    /** Copies the writes held by the stripes back to the file */
+    void syncStripes();
+
+    /** Syncs the stripes and reads and writes the file directly until the stripes are loaded again, used before the file is modified elsewhere */
+    void unloadStripes();
 
     /** Loads a partition of the specified id into addr, assumes that addr has been allocated with sufficient memory */
     void readPartition(void *addr, Partition *partition);
@@ -111,6 +136,8 @@ class AsyncWriteBlock {
     void stop();
 
     void async_write(std::vector<Partition *> partitions);
+
+    void wait();
 };
 
 class PartitionBuffer {
@@ -124,7 +151,9 @@ class PartitionBuffer {
     int64_t total_embeddings_;
     torch::Dtype dtype_;                                            /**< Datatype of the embeddings */
     int dtype_size_;
-    
+    int64_t num_hot_nodes_;                                         /**< Nodes with ids below this are pinned in memory for the whole epoch */
+    int64_t hot_offset_;                                            /**< Buffer row of the first pinned node, after the partition slots */
+
     void *buff_mem_;
     bool loaded_;
 
@@ -144,8 +173,6 @@ class PartitionBuffer {
     std::vector<torch::Tensor> buffer_states_;
     std::vector<torch::Tensor>::iterator buffer_state_iterator_;
 
-    torch::Tensor getBufferState();
-
     void admit(std::vector<Partition *> admit_partitions, std::vector<int64_t> buffer_idxs);
 
     void evict(std::vector<Partition *> evict_partitions);
@@ -154,6 +181,10 @@ class PartitionBuffer {
 
     void stopThreads();
 
+    void loadHotNodes();
+
+    void writeHotNodes();
+
   public:
 
     PartitionBuffer(int capacity,
@@ -164,7 +195,10 @@ class PartitionBuffer {
                     int64_t total_embeddings,
                     torch::Dtype dtype,
                     string filename,
-                    bool prefetching);
+                    bool prefetching,
+                    int64_t num_hot_nodes = 0,
+                    std::vector<string> stripe_directories = {},
+                    int64_t stripe_size = 0);
 
     ~PartitionBuffer();
 
@@ -184,7 +218,7 @@ class PartitionBuffer {
 
     torch::Tensor getGlobalToLocalMap(bool get_current);
 
-    void indexAdd(torch::Tensor indices, torch::Tensor values);
+    void indexAdd(torch::Tensor indices, torch::Tensor values, StripedLock *row_locks = nullptr);
 
     void setBufferOrdering(std::vector<torch::Tensor> buffer_states);
 
@@ -194,9 +228,59 @@ class PartitionBuffer {
 
     void sync();
 
+    /**
+     * Writes the partitions in the buffer and the pinned nodes to the backing file without evicting them, so that the buffer
+     * can keep being used, e.g. after a checkpoint taken in the middle of an epoch. If the file is striped, the writes stay in the
+     * stripes, read them with readFileRows().
+     */
+    void flush();
+
+    /**
+     * Reads rows of the backing file, from its stripes if they hold the file. Rows in the buffer are read as of the last write.
+     * @param offset: First row to read
+     * @param n: Number of rows to read
+     * @return [n, embedding_size] tensor of the rows
+     */
+    torch::Tensor readFileRows(int64_t offset, int64_t n);
+
+    torch::Tensor getBufferState();
+
+    void setBeforePartitionWrite(std::function<void(int)> callback) {
+        partitioned_file_->before_write_ = callback;
+    }
+
+    /**
+     * Sets a lazy initializer for the partitions. A partition which reads as all zeros, e.g. from a sparse file, has never been
+     * written and is generated by the initializer when it is admitted. It is then written back on eviction as usual.
+     */
+    void setPartitionInitializer(std::function<void(Partition *)> initializer) {
+        partitioned_file_->initialize_partition_ = initializer;
+        partitioned_file_->initialized_ = std::vector<uint8_t>(num_partitions_, false);
+    }
+
+    void unloadStripes() {
+        partitioned_file_->unloadStripes();
+    }
+
+    int64_t getNumHotNodes() {
+        return num_hot_nodes_;
+    }
+
+    int64_t getHotOffset() {
+        return hot_offset_;
+    }
+
+    int64_t getPartitionSize() {
+        return partition_size_;
+    }
+
     int64_t getNumInMemory() {
         return buffer_tensor_view_.size(0);
     }
+
+    torch::Tensor getBufferTensor() {
+        return buffer_tensor_view_;
+    }
 };
 
 
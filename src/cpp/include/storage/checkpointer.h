@@ -5,6 +5,9 @@
 #ifndef MARIUS_CHECKPOINTER_H
 #define MARIUS_CHECKPOINTER_H
 
+#include <exception>
+#include <functional>
+
 #include "data/dataloader.h"
 #include "nn/model.h"
 #include "storage/storage.h"
@@ -18,17 +21,102 @@ struct CheckpointMeta {
     bool has_state = false;
     bool has_encoded = false;
     bool has_model = true;
+
+    string parent = "";                                     /**< Checkpoint the tables of this checkpoint are a delta of, empty if they are complete */
+
+    int64_t buffer_states_processed = 0;                    /**< For checkpoints taken within an epoch, the number of buffer states of the epoch which have been processed */
+    int64_t items_processed = 0;                            /**< For checkpoints taken within an epoch, the number of edges/nodes of the epoch which have been processed */
+};
+
+/**
+ * Snapshot of a table (node embeddings or their optimizer state) taken for a checkpoint. The table is divided into blocks of rows, which are
+ * captured and written to the checkpoint by a background thread while training continues. A block which is about to be updated in memory,
+ * or overwritten on disk by the partition buffer, is first captured by the updating thread (copy-on-write), so the checkpoint holds the
+ * table as it was when the snapshot was taken.
+ */
+class TableSnapshot {
+  private:
+    enum BlockState { PENDING, CAPTURING, CAPTURED, WRITTEN };
+
+    std::function<torch::Tensor(int64_t, int64_t)> read_rows_;
+    int64_t block_size_;
+    int64_t num_rows_;
+    int64_t row_bytes_;
+    int fd_;
+
+    std::vector<int64_t> block_ids_;
+    std::vector<int64_t> output_offsets_;
+    std::vector<int64_t> positions_;                        /**< Position of each block of the table in block_ids_, -1 if it is not in the snapshot */
+    std::vector<BlockState> states_;
+    std::vector<torch::Tensor> captured_;
+
+    std::mutex lock_;
+    std::condition_variable cv_;
+    std::atomic<int64_t> num_pending_;
+
+    void capture(int64_t position);
+
+  public:
+    /**
+     * @param output_filename: File the blocks are written to, in the order of block_ids
+     * @param block_ids: Ids of the blocks in the snapshot
+     * @param block_size: Number of rows in each block, the last block of the table may have fewer
+     * @param num_rows: Number of rows in the table
+     * @param row_bytes: Size in bytes of each row
+     * @param read_rows: Returns a copy of rows [offset, offset + n) of the table on the CPU
+     */
+    TableSnapshot(string output_filename,
+                  torch::Tensor block_ids,
+                  int64_t block_size,
+                  int64_t num_rows,
+                  int64_t row_bytes,
+                  std::function<torch::Tensor(int64_t, int64_t)> read_rows);
+
+    ~TableSnapshot();
+
+    /**
+     * Captures a block before it is changed, if it has not been captured yet. Blocks until the block has been captured.
+     */
+    void preserveBlock(int64_t block_id);
+
+    /**
+     * Captures the blocks of the given rows before they are changed.
+     */
+    void preserveRows(Indices indices);
+
+    /**
+     * Captures and writes all blocks of the snapshot.
+     */
+    void write();
+
+    std::vector<int64_t> getBlockIds() {
+        return block_ids_;
+    }
 };
 
 class Checkpointer {
-public:
+  private:
+    std::thread *writer_thread_;
+    std::exception_ptr writer_error_;
+    std::vector<shared_ptr<TableSnapshot>> snapshots_;
+
+    string last_checkpoint_;
+    int deltas_since_full_;
+
+    void snapshotTable(shared_ptr<Storage> storage, string table_name, string directory, bool delta);
+
+    void clearSnapshotCallbacks();
+
+  public:
     std::shared_ptr<Model> model_;
     shared_ptr<GraphModelStorage> storage_;
     std::shared_ptr<CheckpointConfig> config_;
 
     Checkpointer(std::shared_ptr<Model> model, shared_ptr<GraphModelStorage> storage, std::shared_ptr<CheckpointConfig> config);
 
-    Checkpointer() {};
+    Checkpointer();
+
+    ~Checkpointer();
 
     void saveMetadata(string directory, CheckpointMeta checkpoint_meta);
 
@@ -38,7 +126,36 @@ public:
 
     void save(string checkpoint_dir, CheckpointMeta checkpoint_meta);
 
-    void create_checkpoint(string checkpoint_dir, CheckpointMeta checkpoint_meta, int epochs);
+    /**
+     * Creates checkpoint_<epochs>/ in checkpoint_dir, or checkpoint_<epochs>_<buffer states>/ for checkpoints taken within an epoch,
+     * in which case the remaining buffer ordering of the dataloader is saved with the checkpoint. The model parameters are saved immediately and the tables are snapshotted and
+     * written in the background when checkpoint.asynchronous is set. With checkpoint.incremental, only the blocks of the tables updated
+     * since the previous checkpoint are stored, and every checkpoint.compaction_interval checkpoints the tables are stored in full.
+     * The checkpoint directory is renamed into place once it has been fully written.
+     */
+    void create_checkpoint(string checkpoint_dir, CheckpointMeta checkpoint_meta, int epochs, shared_ptr<DataLoader> dataloader = nullptr);
+
+    /**
+     * Waits for the checkpoint being written in the background, if any. Rethrows errors of the background writer.
+     */
+    void wait();
+
+    /**
+     * Reconstructs the complete tables of an incremental checkpoint in output_dir, by applying its chain of deltas to the last
+     * complete checkpoint of the chain. Does nothing for complete checkpoints.
+     */
+    void materialize(string checkpoint_dir, string output_dir);
+
+    /**
+     * Returns the directory of the most recent checkpoint in model_dir if it is newer than the model saved in model_dir, e.g. when
+     * training was interrupted, otherwise an empty string.
+     */
+    string latestCheckpoint(string model_dir);
+
+    /**
+     * Copies the complete tables of a checkpoint to output_dir. Incremental tables are reconstructed by materialize instead.
+     */
+    void copyTables(string checkpoint_dir, string output_dir);
 };
 
-#endif //MARIUS_CHECKPOINTER_H
\ No newline at end of file
+#endif //MARIUS_CHECKPOINTER_H
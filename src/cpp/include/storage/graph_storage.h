@@ -36,6 +36,7 @@ struct InMemorySubgraphState {
     torch::Tensor in_memory_edge_bucket_sizes_;
     torch::Tensor in_memory_edge_bucket_starts_;
     torch::Tensor global_to_local_index_map_;
+    torch::Tensor local_to_global_index_map_;               /**< Maps buffer local node ids back to global ids */
     shared_ptr<MariusGraph> in_memory_subgraph_;
 };
 
@@ -114,6 +115,17 @@ class GraphModelStorage {
 
     torch::Tensor getNodeFeaturesRange(int64_t start, int64_t size);
 
+    /**
+     * Returns a view of the in memory node embedding table, indexed by the same node ids as getNodeEmbeddings, without copying.
+     * Only the first getNumNodesInMemory() rows are valid.
+     */
+    torch::Tensor getNodeEmbeddingsTable();
+
+    /**
+     * Returns a view of the in memory node feature table, indexed by the same node ids as getNodeFeatures, without copying.
+     */
+    torch::Tensor getNodeFeaturesTable();
+
     torch::Tensor getEncodedNodes(Indices indices);
 
     torch::Tensor getEncodedNodesRange(int64_t start, int64_t size);
@@ -138,6 +150,39 @@ class GraphModelStorage {
 
     void updateAddNodeEmbeddingState(Indices indices, torch::Tensor values);
 
+    /**
+     * Applies a fused sparse Adagrad step directly to the node embedding and optimizer state tables, instead of
+     * scattering the embedding and state updates with separate indexAdd calls.
+     * @param indices: Node ids to update, in the same id space used by getNodeEmbeddings
+     * @param gradients: Raw gradient for each node
+     * @param learning_rate: Learning rate of the sparse optimizer
+     */
+    void updateNodeEmbeddingsSparseAdagrad(Indices indices, torch::Tensor gradients, float learning_rate);
+
+    /**
+     * Guards node embedding and optimizer state updates with striped row locks, required when multiple threads update embeddings concurrently.
+     * @param num_stripes: Number of row locks, a value <= 0 disables locking
+     */
+    void enableConcurrentUpdates(int64_t num_stripes);
+
+    /**
+     * True if the node embeddings are partitioned but the optimizer state is held in memory (e.g. row-wise Adagrad),
+     * in which case the state is indexed by global node ids instead of buffer local ids.
+     */
+    bool optimizerStateIndexedGlobally();
+
+    /**
+     * Builds the map from buffer local node ids to global node ids for the given subgraph. Used to index an optimizer state which is not
+     * partitioned and to report evaluated edges by their global ids.
+     */
+    void setLocalToGlobalMap(shared_ptr<InMemorySubgraphState> subgraph);
+
+    /**
+     * Restricts the node ids negatives are sampled from to the rows holding the current copy of each node. When hot nodes are pinned,
+     * partition slots still hold stale copies of them which must not be sampled.
+     */
+    void setValidNodeIds(shared_ptr<InMemorySubgraphState> subgraph);
+
     bool embeddingsOffDevice();
 
     void sortAllEdges();
@@ -197,7 +242,7 @@ class GraphModelStorage {
     void performSwap() {
         if (storage_ptrs_.node_embeddings != nullptr && instance_of<Storage, PartitionBufferStorage>(storage_ptrs_.node_embeddings)) {
             std::dynamic_pointer_cast<PartitionBufferStorage>(storage_ptrs_.node_embeddings)->performNextSwap();
-            if (storage_ptrs_.node_optimizer_state != nullptr && train_) {
+            if (storage_ptrs_.node_optimizer_state != nullptr && train_ && instance_of<Storage, PartitionBufferStorage>(storage_ptrs_.node_optimizer_state)) {
                 std::dynamic_pointer_cast<PartitionBufferStorage>(storage_ptrs_.node_optimizer_state)->performNextSwap();
             }
         }
@@ -210,7 +255,7 @@ class GraphModelStorage {
     void setBufferOrdering(vector<torch::Tensor> buffer_states) {
         if (storage_ptrs_.node_embeddings != nullptr && instance_of<Storage, PartitionBufferStorage>(storage_ptrs_.node_embeddings)) {
             std::dynamic_pointer_cast<PartitionBufferStorage>(storage_ptrs_.node_embeddings)->setBufferOrdering(buffer_states);
-            if (storage_ptrs_.node_optimizer_state != nullptr && !train_) {
+            if (storage_ptrs_.node_optimizer_state != nullptr && !train_ && instance_of<Storage, PartitionBufferStorage>(storage_ptrs_.node_optimizer_state)) {
                 std::dynamic_pointer_cast<PartitionBufferStorage>(storage_ptrs_.node_optimizer_state)->setBufferOrdering(buffer_states);
             }
         }
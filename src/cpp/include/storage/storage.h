@@ -6,7 +6,11 @@
 #ifndef MARIUS_STORAGE_H
 #define MARIUS_STORAGE_H
 
+#include <atomic>
 #include <fstream>
+#include <functional>
+#include <mutex>
+#include <shared_mutex>
 #include <string>
 #include <tuple>
 #include <vector>
@@ -43,6 +47,10 @@ class Storage {
     torch::Tensor data_;
     torch::Device device_;
     string filename_;
+    shared_ptr<StripedLock> row_locks_;                     /**< Optional striped row locks which make concurrent indexAdd calls safe */
+    torch::Tensor dirty_blocks_;                            /**< Optional flags of the blocks of rows updated since the last checkpoint */
+    int64_t block_size_;                                    /**< Number of rows in each block tracked by dirty_blocks_ */
+    std::function<void(Indices)> before_update_;            /**< Optional callback invoked with the rows about to be updated in place */
 
     Storage();
 
@@ -72,6 +80,42 @@ class Storage {
         return dim0_size_;
     }
 
+    /**
+     * Guard row updates with striped locks so that indexAdd can be called concurrently from multiple threads.
+     * @param num_stripes: Number of locks, a value <= 0 removes the locks
+     */
+    void setRowLocks(int64_t num_stripes) {
+        if (num_stripes > 0) {
+            row_locks_ = std::make_shared<StripedLock>(num_stripes);
+        } else {
+            row_locks_ = nullptr;
+        }
+    }
+
+    /**
+     * Tracks which blocks of block_size rows are updated, so checkpoints only need to store the changed blocks. All blocks start dirty.
+     */
+    void trackDirtyBlocks(int64_t block_size);
+
+    /**
+     * Must be called before rows are updated in place. Marks the blocks of the rows as dirty and invokes before_update_.
+     * @param indices: Ids of the rows about to be updated
+     */
+    virtual void beforeUpdate(Indices indices);
+
+    /**
+     * Returns the ids of the blocks updated since the last call and clears the dirty flags.
+     */
+    torch::Tensor takeDirtyBlocks();
+
+    bool tracksUpdates() {
+        return dirty_blocks_.defined() || before_update_ != nullptr;
+    }
+
+    int64_t getNumBlocks() {
+        return (dim0_size_ + block_size_ - 1) / block_size_;
+    }
+
     bool isInitialized() {
         return initialized_;
     }
@@ -135,6 +179,26 @@ class PartitionBufferStorage : public Storage {
 
     void sort(bool src) override;
 
+    void beforeUpdate(Indices indices) override;
+
+    /**
+     * Sets a callback invoked with the id of a partition before it is written to the backing file.
+     */
+    void setBeforePartitionWrite(std::function<void(int)> callback) {
+        buffer_->setBeforePartitionWrite(callback);
+    }
+
+    int64_t getPartitionSize() {
+        return buffer_->getPartitionSize();
+    }
+
+    /**
+     * Generates partitions which have never been written with the initializer when they are admitted to the buffer.
+     */
+    void setPartitionInitializer(std::function<void(Partition *)> initializer) {
+        buffer_->setPartitionInitializer(initializer);
+    }
+
     Indices getRandomIds(int64_t size) {
         return buffer_->getRandomIds(size);
     }
@@ -155,6 +219,22 @@ class PartitionBufferStorage : public Storage {
         buffer_->sync();
     }
 
+    /**
+     * Writes the table to the backing file while its partitions stay in the buffer.
+     */
+    void flush() {
+        if (loaded_) {
+            buffer_->flush();
+        }
+    }
+
+    /**
+     * Reads rows of the table from the backing file, or from its stripes if the file is striped.
+     */
+    torch::Tensor readFileRows(int64_t offset, int64_t n) {
+        return buffer_->readFileRows(offset, n);
+    }
+
     void setBufferOrdering(vector<torch::Tensor> buffer_states) {
         buffer_->setBufferOrdering(buffer_states);
     }
@@ -171,14 +251,90 @@ class PartitionBufferStorage : public Storage {
         return buffer_->getNumInMemory();
     }
 
+    int64_t getNumHotNodes() {
+        return buffer_->getNumHotNodes();
+    }
+
 };
 
-/** Flat File storage used for data that only requires sequential access. Can be used to store and access large amounts of edges. */
+/**
+ * Bounded in memory cache of the rows of a table on disk, keyed by row id. When full, rows are evicted with the CLOCK policy,
+ * which approximates LRU with a reference bit per slot. Safe to use from multiple threads.
+ */
+class RowCache {
+  private:
+    int64_t capacity_;
+    torch::Tensor data_;
+    vector<int64_t> slot_ids_;
+    vector<bool> referenced_;
+    unordered_map<int64_t, int64_t> slots_;
+    int64_t hand_;
+    std::mutex lock_;
+
+    std::atomic<int64_t> hits_;
+    std::atomic<int64_t> misses_;
+
+    int64_t getVictimSlot();
+
+  public:
+    RowCache(int64_t capacity, int64_t dim1_size, torch::Dtype dtype);
+
+    /**
+     * Copies the cached rows of the ids into the output.
+     * @param ids: Contiguous int64 row ids on the CPU
+     * @param output: Output tensor with a row for each id
+     * @return Positions in ids of the rows which are not cached
+     */
+    torch::Tensor lookup(torch::Tensor ids, torch::Tensor output);
+
+    /**
+     * Adds rows to the cache, evicting other rows if needed.
+     * @param ids: Unique contiguous int64 row ids on the CPU
+     * @param rows: Value of each row
+     */
+    void insert(torch::Tensor ids, torch::Tensor rows);
+
+    void clear();
+
+    int64_t getCapacity() {
+        return capacity_;
+    }
+
+    int64_t getHits() {
+        return hits_;
+    }
+
+    int64_t getMisses() {
+        return misses_;
+    }
+
+    double getHitRate() {
+        int64_t total = hits_ + misses_;
+        return total == 0 ? 0 : (double) hits_ / total;
+    }
+
+    void resetStats() {
+        hits_ = 0;
+        misses_ = 0;
+    }
+};
+
+/**
+ * Flat File storage used for data that is mostly accessed sequentially. Can be used to store and access large amounts of edges.
+ * Random row reads are supported for tables too large for memory, such as node features, optionally through a RowCache.
+ */
 class FlatFile : public Storage {
   private:
     int fd_;
 
     bool loaded_;
+
+    shared_ptr<RowCache> row_cache_;
+
+    shared_ptr<StripedFile> striped_file_;
+    bool stripes_loaded_;
+
+    void loadStripes();
   public:
     FlatFile(string filename, int64_t dim0_size, int64_t dim1_size, torch::Dtype dtype, bool alloc = false);
 
@@ -219,6 +375,144 @@ class FlatFile : public Storage {
     void mem_load();
 
     void mem_unload(bool write);
+
+    /**
+     * Caches the rows read with indexRead.
+     * @param cache_size: Size of the cache in bytes, a value <= 0 removes the cache
+     */
+    void setRowCache(int64_t cache_size);
+
+    shared_ptr<RowCache> getRowCache() {
+        return row_cache_;
+    }
+
+    /**
+     * Reads ranges of rows from a copy of the file striped over several directories, e.g. one on each disk, so the disks are read
+     * in parallel. The copy is made when the file is loaded, and writes go to both the file and the copy.
+     * @param directories: Directories to spread the stripes over, if empty the file is read directly
+     * @param stripe_size: Size of each stripe in bytes
+     */
+    void setStriping(vector<string> directories, int64_t stripe_size);
+
+    shared_ptr<StripedFile> getStripedFile() {
+        return striped_file_;
+    }
+};
+
+/**
+ * Storage for large read-mostly tables, such as node features, spread over three tiers: host memory, a file on a fast local disk
+ * and the backing file on a bulk disk. The table is split into blocks of rows. The most read blocks are copied to memory and the
+ * next most read to the fast disk, while the backing file always holds every row, so writes go through to every copy of a row.
+ * Blocks are moved between the tiers every rebalance_interval rows read, based on the rows read since, which decay by half at
+ * each move, and on hints of the rows which are known to be read.
+ */
+class TieredStorage : public Storage {
+  private:
+    int fd_;
+    int ssd_fd_;
+    string ssd_filename_;
+    bool loaded_;
+
+    int64_t tier_block_size_;                               /**< Number of rows in each block moved between tiers */
+    int64_t num_tier_blocks_;
+    int64_t memory_capacity_;                               /**< Number of blocks held in memory */
+    int64_t ssd_capacity_;                                  /**< Number of blocks held on the fast disk */
+    int64_t rebalance_interval_;
+
+    torch::Tensor memory_data_;                             /**< Rows of the blocks held in memory, block slot i holds rows [i * tier_block_size_, (i + 1) * tier_block_size_) */
+    torch::Tensor memory_slots_;                            /**< Per block, its slot in memory or -1 */
+    torch::Tensor ssd_slots_;                               /**< Per block, its slot in the fast disk file or -1 */
+    vector<int64_t> free_memory_slots_;
+    vector<int64_t> free_ssd_slots_;
+
+    torch::Tensor block_reads_;                             /**< Per block, decayed number of rows read or hinted */
+    std::mutex reads_lock_;                                 /**< Guards block_reads_ */
+
+    std::shared_mutex tier_lock_;                           /**< Held shared by reads, writes and while blocks are copied between tiers, and exclusively while the slots are remapped */
+    bool copying_;                                          /**< True while rebalance() copies blocks into their new slots */
+    torch::Tensor written_blocks_;                          /**< Per block, true if the block was written while rebalance() copied blocks */
+    std::mutex written_lock_;                               /**< Guards written_blocks_ */
+    std::atomic<int64_t> rows_since_rebalance_;
+    std::atomic<bool> rebalancing_;
+
+    std::atomic<int64_t> memory_reads_;
+    std::atomic<int64_t> ssd_reads_;
+    std::atomic<int64_t> disk_reads_;
+
+    int64_t getBlockRows(int64_t block_id) {
+        return std::min(tier_block_size_, dim0_size_ - block_id * tier_block_size_);
+    }
+
+    void readBlock(int64_t block_id, torch::Tensor output);
+
+    void readFileRows(int fd, string filename, torch::Tensor rows, torch::Tensor positions, torch::Tensor output);
+
+    void writeFileRows(int fd, string filename, torch::Tensor rows, torch::Tensor values);
+
+    void recordReads(torch::Tensor blocks);
+
+  public:
+    TieredStorage(string filename, int64_t dim0_size, int64_t dim1_size, shared_ptr<TieredStorageOptions> options);
+
+    ~TieredStorage();
+
+    void load() override;
+
+    void write() override;
+
+    void unload(bool perform_write) override;
+
+    torch::Tensor indexRead(Indices indices) override;
+
+    void indexAdd(Indices indices, torch::Tensor values) override;
+
+    torch::Tensor range(int64_t offset, int64_t n) override;
+
+    void indexPut(Indices indices, torch::Tensor values) override;
+
+    void rangePut(int64_t offset, int64_t n, torch::Tensor values) override;
+
+    void shuffle() override;
+
+    void sort(bool src) override;
+
+    /**
+     * Counts the rows as read once more when blocks are next moved between tiers. Used for rows which are known to be read,
+     * such as the features of the training nodes which are read every epoch.
+     */
+    void addAccessHint(Indices indices);
+
+    /**
+     * Moves the most read blocks to memory and the fast disk, and halves the read counts. The blocks are copied while reads and
+     * writes continue, the table is only locked exclusively to plan the moves and to map the new slots.
+     */
+    void rebalance();
+
+    int64_t getMemoryCapacity() {
+        return memory_capacity_;
+    }
+
+    int64_t getSsdCapacity() {
+        return ssd_capacity_;
+    }
+
+    int64_t getMemoryReads() {
+        return memory_reads_;
+    }
+
+    int64_t getSsdReads() {
+        return ssd_reads_;
+    }
+
+    int64_t getDiskReads() {
+        return disk_reads_;
+    }
+
+    void resetStats() {
+        memory_reads_ = 0;
+        ssd_reads_ = 0;
+        disk_reads_ = 0;
+    }
 };
 
 /** In memory storage for data which fits in either GPU or CPU memory. */
@@ -0,0 +1,82 @@
+#ifndef MARIUS_STRIPED_FILE_H
+#define MARIUS_STRIPED_FILE_H
+
+#include <condition_variable>
+#include <deque>
+#include <functional>
+#include <mutex>
+#include <thread>
+#include <tuple>
+#include <vector>
+
+#include "common/datatypes.h"
+
+/**
+ * A copy of a file split into stripes of stripe_size bytes, which are spread round-robin over a list of directories, e.g. one on each
+ * disk. Stripe i is stored in directory i % num_directories. Each directory has its own I/O thread, so a read or write which spans
+ * several stripes is served by all disks in parallel.
+ *
+ * The stripes are filled from the file with scatter() and copied back to it with gather(), which only copies the stripes written
+ * since the last scatter() or gather(). The stripe files are removed when the StripedFile is destroyed.
+ */
+class StripedFile {
+  private:
+    struct Disk {
+        string filename;
+        int fd;
+        std::thread thread;
+        std::mutex lock;
+        std::condition_variable cv;
+        std::deque<std::function<void()>> jobs;
+        bool done;
+    };
+
+    std::vector<unique_ptr<Disk>> disks_;
+    int64_t stripe_size_;
+    int64_t size_;
+    std::vector<uint8_t> dirty_stripes_;                 /**< Per stripe, true if it was written since the last scatter() or gather() */
+    std::mutex dirty_lock_;
+
+    void run(Disk *disk);
+
+    void transfer(char *buf, int64_t count, int64_t offset, bool write);
+
+  public:
+    /**
+     * @param name: Name of the stripe files, stripe file i is <directories[i]>/<name>.stripe<i>
+     * @param directories: Directories to spread the stripes over
+     * @param stripe_size: Size of each stripe in bytes
+     */
+    StripedFile(string name, std::vector<string> directories, int64_t stripe_size);
+
+    ~StripedFile();
+
+    /** Copies the first size bytes of a file into the stripes. Bytes past the end of the file read as zeros. */
+    void scatter(string filename, int64_t size);
+
+    /** Copies the stripes written since the last scatter() or gather() into a file */
+    void gather(string filename);
+
+    /** Reads count bytes starting at offset, in parallel from each disk holding some of the bytes */
+    void read(void *buf, int64_t count, int64_t offset);
+
+    /** Writes count bytes starting at offset, in parallel to each disk holding some of the bytes */
+    void write(const void *buf, int64_t count, int64_t offset);
+
+    int64_t getSize() {
+        return size_;
+    }
+
+    /** Number of stripes written since the last scatter() or gather() */
+    int64_t getNumDirtyStripes();
+
+    int64_t getStripeSize() {
+        return stripe_size_;
+    }
+
+    int getNumDisks() {
+        return disks_.size();
+    }
+};
+
+#endif //MARIUS_STRIPED_FILE_H
@@ -88,13 +88,18 @@ void init_config(py::module &m) {
         .def_readwrite("batch_transfer_threads", &PipelineConfig::batch_transfer_threads)
         .def_readwrite("compute_threads", &PipelineConfig::compute_threads)
         .def_readwrite("gradient_transfer_threads", &PipelineConfig::gradient_transfer_threads)
-        .def_readwrite("gradient_update_threads", &PipelineConfig::gradient_update_threads);
+        .def_readwrite("gradient_update_threads", &PipelineConfig::gradient_update_threads)
+        .def_readwrite("update_lock_stripes", &PipelineConfig::update_lock_stripes);
 
     py::class_<CheckpointConfig, std::shared_ptr<CheckpointConfig>>(m, "CheckpointConfig")
         .def(py::init<>())
         .def_readwrite("save_best", &CheckpointConfig::save_best)
         .def_readwrite("interval", &CheckpointConfig::interval)
-        .def_readwrite("save_state", &CheckpointConfig::save_state);
+        .def_readwrite("save_state", &CheckpointConfig::save_state)
+        .def_readwrite("asynchronous", &CheckpointConfig::asynchronous)
+        .def_readwrite("incremental", &CheckpointConfig::incremental)
+        .def_readwrite("compaction_interval", &CheckpointConfig::compaction_interval)
+        .def_readwrite("buffer_state_interval", &CheckpointConfig::buffer_state_interval);
 
     py::class_<ModelConfig, std::shared_ptr<ModelConfig>>(m, "ModelConfig")
         .def(py::init<>())
@@ -140,7 +145,8 @@ void init_config(py::module &m) {
         .def_readwrite("negative_sampling", &EvaluationConfig::negative_sampling)
         .def_readwrite("pipeline", &EvaluationConfig::pipeline)
         .def_readwrite("epochs_per_eval", &EvaluationConfig::epochs_per_eval)
-        .def_readwrite("full_graph_evaluation", &EvaluationConfig::full_graph_evaluation);
+        .def_readwrite("full_graph_evaluation", &EvaluationConfig::full_graph_evaluation)
+        .def_readwrite("ranking_tile_size", &EvaluationConfig::ranking_tile_size);
 
     py::class_<MariusConfig, std::shared_ptr<MariusConfig>>(m, "MariusConfig")
         .def(py::init<>())
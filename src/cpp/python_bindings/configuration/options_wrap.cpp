@@ -110,7 +110,8 @@ void init_options(py::module &m) {
         .value("PARTITION_BUFFER", StorageBackend::PARTITION_BUFFER)
         .value("FLAT_FILE", StorageBackend::FLAT_FILE)
         .value("HOST_MEMORY", StorageBackend::HOST_MEMORY)
-        .value("DEVICE_MEMORY", StorageBackend::DEVICE_MEMORY);
+        .value("DEVICE_MEMORY", StorageBackend::DEVICE_MEMORY)
+        .value("TIERED", StorageBackend::TIERED);
 
     m.def("getStorageBackend", &getStorageBackend, py::arg("string_val"));
 
@@ -173,7 +174,8 @@ void init_options(py::module &m) {
         .def_readwrite("eps", &AdagradOptions::eps)
         .def_readwrite("init_value", &AdagradOptions::init_value)
         .def_readwrite("lr_decay", &AdagradOptions::lr_decay)
-        .def_readwrite("weight_decay", &AdagradOptions::weight_decay);
+        .def_readwrite("weight_decay", &AdagradOptions::weight_decay)
+        .def_readwrite("row_wise", &AdagradOptions::row_wise);
 
     py::class_<AdamOptions, OptimizerOptions, std::shared_ptr<AdamOptions>>(m, "AdamOptions")
         .def(py::init<>())
@@ -236,7 +238,26 @@ void init_options(py::module &m) {
         .def_readwrite("prefetching", &PartitionBufferOptions::prefetching)
         .def_readwrite("fine_to_coarse_ratio", &PartitionBufferOptions::fine_to_coarse_ratio)
         .def_readwrite("edge_bucket_ordering", &PartitionBufferOptions::edge_bucket_ordering)
-        .def_readwrite("node_partition_ordering", &PartitionBufferOptions::node_partition_ordering);
+        .def_readwrite("node_partition_ordering", &PartitionBufferOptions::node_partition_ordering)
+        .def_readwrite("lazy_initialization", &PartitionBufferOptions::lazy_initialization)
+        .def_readwrite("ordering_cache_size", &PartitionBufferOptions::ordering_cache_size)
+        .def_readwrite("num_hot_nodes", &PartitionBufferOptions::num_hot_nodes)
+        .def_readwrite("stripe_directories", &PartitionBufferOptions::stripe_directories)
+        .def_readwrite("stripe_size", &PartitionBufferOptions::stripe_size);
+
+    py::class_<FlatFileOptions, StorageOptions, std::shared_ptr<FlatFileOptions>>(m, "FlatFileOptions")
+        .def(py::init<>())
+        .def_readwrite("cache_size", &FlatFileOptions::cache_size)
+        .def_readwrite("stripe_directories", &FlatFileOptions::stripe_directories)
+        .def_readwrite("stripe_size", &FlatFileOptions::stripe_size);
+
+    py::class_<TieredStorageOptions, StorageOptions, std::shared_ptr<TieredStorageOptions>>(m, "TieredStorageOptions")
+        .def(py::init<>())
+        .def_readwrite("memory_capacity", &TieredStorageOptions::memory_capacity)
+        .def_readwrite("ssd_directory", &TieredStorageOptions::ssd_directory)
+        .def_readwrite("ssd_capacity", &TieredStorageOptions::ssd_capacity)
+        .def_readwrite("block_size", &TieredStorageOptions::block_size)
+        .def_readwrite("rebalance_interval", &TieredStorageOptions::rebalance_interval);
 
     py::class_<NeighborSamplingOptions, std::shared_ptr<NeighborSamplingOptions>>(m, "NeighborSamplingOptions")
         .def(py::init<>());
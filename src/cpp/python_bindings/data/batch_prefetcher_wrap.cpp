@@ -0,0 +1,30 @@
+#include "common/pybind_headers.h"
+
+#include "data/batch_prefetcher.h"
+
+void init_batch_prefetcher(py::module &m) {
+
+    py::class_<BatchPrefetcher, shared_ptr<BatchPrefetcher>>(m, "BatchPrefetcher")
+        .def(py::init<shared_ptr<DataLoader>, at::optional<torch::Device>, int, int, bool, bool>(),
+             py::arg("dataloader"),
+             py::arg("device") = py::none(),
+             py::arg("num_threads") = 2,
+             py::arg("queue_size") = 4,
+             py::arg("perform_map") = true,
+             py::arg("finish_batches") = true)
+        .def("start", &BatchPrefetcher::start)
+        .def("next", &BatchPrefetcher::next, py::call_guard<py::gil_scoped_release>())
+        .def("stop", &BatchPrefetcher::stop, py::call_guard<py::gil_scoped_release>())
+        .def("__iter__", [](shared_ptr<BatchPrefetcher> prefetcher) { return prefetcher; })
+        .def("__next__", [](BatchPrefetcher &prefetcher) {
+            shared_ptr<Batch> batch;
+            {
+                py::gil_scoped_release release;
+                batch = prefetcher.next();
+            }
+            if (batch == nullptr) {
+                throw py::stop_iteration();
+            }
+            return batch;
+        });
+}
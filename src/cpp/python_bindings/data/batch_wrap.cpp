@@ -25,11 +25,13 @@ void init_batch(py::module &m) {
         .def_readwrite("status", &Batch::status_)
 
         .def_readwrite("root_node_indices", &Batch::root_node_indices_)
+        .def_readwrite("root_node_ids", &Batch::root_node_ids_)
         .def_readwrite("unique_node_indices", &Batch::unique_node_indices_)
         .def_readwrite("node_embeddings", &Batch::node_embeddings_)
         .def_readwrite("node_gradients", &Batch::node_gradients_)
         .def_readwrite("node_embeddings_state", &Batch::node_embeddings_state_)
         .def_readwrite("node_state_update", &Batch::node_state_update_)
+        .def_readwrite("sparse_learning_rate", &Batch::sparse_learning_rate_)
 
         .def_readwrite("node_features", &Batch::node_features_)
         .def_readwrite("node_labels", &Batch::node_labels_)
@@ -42,16 +44,22 @@ void init_batch(py::module &m) {
         .def_readwrite("dense_graph", &Batch::dense_graph_)
         .def_readwrite("encoded_uniques", &Batch::encoded_uniques_)
 
+        .def_readwrite("global_edges", &Batch::global_edges_)
         .def_readwrite("neg_edges", &Batch::neg_edges_)
         .def_readwrite("rel_neg_indices", &Batch::rel_neg_indices_)
         .def_readwrite("src_neg_indices", &Batch::src_neg_indices_)
         .def_readwrite("dst_neg_indices", &Batch::dst_neg_indices_)
         .def_readwrite("src_neg_filter", &Batch::src_neg_filter_)
         .def_readwrite("dst_neg_filter", &Batch::dst_neg_filter_)
+        .def_readwrite("ranking_tile_size", &Batch::ranking_tile_size_)
+        .def_readwrite("candidate_node_embeddings", &Batch::candidate_node_embeddings_)
+        .def_readwrite("candidate_node_features", &Batch::candidate_node_features_)
+        .def_readwrite("candidate_node_ids", &Batch::candidate_node_ids_)
 
         .def(py::init<bool>(), py::arg("train"))
         .def("to", &Batch::to, py::arg("device"))
         .def("accumulateGradients", &Batch::accumulateGradients, py::arg("learning_rate"))
         .def("embeddingsToHost", &Batch::embeddingsToHost)
-        .def("clear", &Batch::clear);
+        .def("clear", &Batch::clear)
+        .def("reset", &Batch::reset, py::arg("train"));
 }
\ No newline at end of file
@@ -1,5 +1,6 @@
 #include "common/pybind_headers.h"
 
+#include "data/batch_prefetcher.h"
 #include "data/dataloader.h"
 
 void init_dataloader(py::module &m) {
@@ -13,11 +14,12 @@ void init_dataloader(py::module &m) {
             .def_readwrite("evaluation_config", &DataLoader::evaluation_config_)
             .def_readwrite("train", &DataLoader::train_)
             .def_readwrite("epochs_processed", &DataLoader::epochs_processed_)
+            .def_readwrite("ordering_cache_dir", &DataLoader::ordering_cache_dir_)
             .def_readwrite("batches_processed", &DataLoader::batches_processed_)
             .def_readwrite("current_edge", &DataLoader::current_edge_)
-            .def_readwrite("batches", &DataLoader::batches_)
             .def_readwrite("batch_id_offset", &DataLoader::batch_id_offset_)
-//        .def_readwrite("batch_iterator", &DataLoader::batch_iterator_) # TODO Iterator needs bindings
+            .def_readonly("num_batch_items", &DataLoader::num_batch_items_)
+            .def_readonly("next_batch_start_idx", &DataLoader::next_batch_start_idx_)
             .def_readwrite("batches_left", &DataLoader::batches_left_)
             .def_readwrite("batches_processed", &DataLoader::total_batches_processed_)
             .def_readwrite("all_read", &DataLoader::all_read_)
@@ -27,6 +29,9 @@ void init_dataloader(py::module &m) {
             .def_readwrite("evaluation_neighbor_sampler", &DataLoader::evaluation_neighbor_sampler_)
             .def_readwrite("training_negative_sampler", &DataLoader::training_negative_sampler_)
             .def_readwrite("evaluation_negative_sampler", &DataLoader::evaluation_negative_sampler_)
+            .def_readwrite("fused_sparse_update", &DataLoader::fused_sparse_update_)
+            .def_readwrite("ranking_tile_size", &DataLoader::ranking_tile_size_)
+            .def_readwrite("shuffle", &DataLoader::shuffle_)
 
             .def(py::init([](shared_ptr<GraphModelStorage> graph_storage,
                              std::string learning_task,
@@ -193,17 +198,26 @@ void init_dataloader(py::module &m) {
             .def("setBufferOrdering", &DataLoader::setBufferOrdering)
             .def("setActiveEdges", &DataLoader::setActiveEdges)
             .def("setActiveNodes", &DataLoader::setActiveNodes)
-            .def("initializeBatches", &DataLoader::initializeBatches, py::arg("prepare_encode") = false)
+            .def("initializeBatches", &DataLoader::initializeBatches, py::arg("prepare_encode") = false, py::call_guard<py::gil_scoped_release>())
             .def("clearBatches", &DataLoader::clearBatches)
             .def("hasNextBatch", &DataLoader::hasNextBatch)
-            .def("getNextBatch", &DataLoader::getNextBatch, py::return_value_policy::reference)
-            .def("finishedBatch", &DataLoader::finishedBatch)
-            .def("getBatch", &DataLoader::getBatch, py::arg("device") = py::none(), py::arg("perform_map") = true, py::return_value_policy::reference)
-            .def("edgeSample", &DataLoader::edgeSample, py::arg("batch"))
-            .def("nodeSample", &DataLoader::nodeSample, py::arg("batch"))
-            .def("loadCPUParameters", &DataLoader::loadCPUParameters, py::arg("batch"))
-            .def("loadGPUParameters", &DataLoader::loadGPUParameters, py::arg("batch"))
-            .def("updateEmbeddings", &DataLoader::updateEmbeddings, py::arg("batch"), py::arg("gpu") = false)
+            .def("getNextBatch", &DataLoader::getNextBatch, py::return_value_policy::reference, py::call_guard<py::gil_scoped_release>())
+            .def("finishedBatch", &DataLoader::finishedBatch, py::call_guard<py::gil_scoped_release>())
+            .def("getBatch", &DataLoader::getBatch, py::arg("device") = py::none(), py::arg("perform_map") = true, py::return_value_policy::reference,
+                 py::call_guard<py::gil_scoped_release>())
+            .def("edgeSample", &DataLoader::edgeSample, py::arg("batch"), py::call_guard<py::gil_scoped_release>())
+            .def("nodeSample", &DataLoader::nodeSample, py::arg("batch"), py::call_guard<py::gil_scoped_release>())
+            .def("loadCPUParameters", &DataLoader::loadCPUParameters, py::arg("batch"), py::call_guard<py::gil_scoped_release>())
+            .def("loadGPUParameters", &DataLoader::loadGPUParameters, py::arg("batch"), py::call_guard<py::gil_scoped_release>())
+            .def("updateEmbeddings", &DataLoader::updateEmbeddings, py::arg("batch"), py::arg("gpu") = false, py::call_guard<py::gil_scoped_release>())
+            .def("prefetch", [](shared_ptr<DataLoader> dataloader, at::optional<torch::Device> device, int num_threads, int queue_size, bool perform_map) {
+                     auto prefetcher = std::make_shared<BatchPrefetcher>(dataloader, device, num_threads, queue_size, perform_map);
+                     prefetcher->start();
+                     return prefetcher;
+                 }, py::arg("device") = py::none(),
+                 py::arg("num_threads") = 2,
+                 py::arg("queue_size") = 4,
+                 py::arg("perform_map") = true)
             .def("nextEpoch", &DataLoader::nextEpoch)
             .def("loadStorage", &DataLoader::loadStorage)
             .def("epochComplete", &DataLoader::epochComplete)
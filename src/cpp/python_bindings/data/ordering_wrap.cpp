@@ -0,0 +1,41 @@
+#include "common/pybind_headers.h"
+
+#include "configuration/options.h"
+#include "data/ordering.h"
+
+void init_ordering(py::module &m) {
+
+    m.def("getEdgeBucketOrdering", [](std::string edge_bucket_ordering,
+                                      int num_partitions,
+                                      int buffer_capacity,
+                                      int fine_to_coarse_ratio,
+                                      int num_cache_partitions,
+                                      bool randomly_assign_edge_buckets) {
+              return getEdgeBucketOrdering(getEdgeBucketOrderingEnum(edge_bucket_ordering), num_partitions, buffer_capacity,
+                                           fine_to_coarse_ratio, num_cache_partitions, randomly_assign_edge_buckets);
+          }, py::arg("edge_bucket_ordering"),
+          py::arg("num_partitions"),
+          py::arg("buffer_capacity"),
+          py::arg("fine_to_coarse_ratio") = 1,
+          py::arg("num_cache_partitions") = 0,
+          py::arg("randomly_assign_edge_buckets") = true,
+          py::call_guard<py::gil_scoped_release>());
+
+    m.def("getNodePartitionOrdering", [](std::string node_partition_ordering,
+                                         torch::Tensor train_nodes,
+                                         int64_t total_num_nodes,
+                                         int num_partitions,
+                                         int buffer_capacity,
+                                         int fine_to_coarse_ratio,
+                                         int num_cache_partitions) {
+              return getNodePartitionOrdering(getNodePartitionOrderingEnum(node_partition_ordering), train_nodes, total_num_nodes,
+                                              num_partitions, buffer_capacity, fine_to_coarse_ratio, num_cache_partitions);
+          }, py::arg("node_partition_ordering"),
+          py::arg("train_nodes"),
+          py::arg("total_num_nodes"),
+          py::arg("num_partitions"),
+          py::arg("buffer_capacity"),
+          py::arg("fine_to_coarse_ratio") = 1,
+          py::arg("num_cache_partitions") = 0,
+          py::call_guard<py::gil_scoped_release>());
+}
@@ -2,8 +2,10 @@
 
 // data
 void init_batch(py::module &);
+void init_batch_prefetcher(py::module &);
 void init_dataloader(py::module &);
 void init_graph(py::module &);
+void init_ordering(py::module &);
 
 // data/samplers
 void init_edge_samplers(py::module &);
@@ -25,7 +27,9 @@ PYBIND11_MODULE(_data, m) {
     // data
     init_batch(m);
     init_dataloader(m);
+    init_batch_prefetcher(m);
     init_graph(m);
+    init_ordering(m);
 }
 
 
@@ -0,0 +1,39 @@
+#include "common/pybind_headers.h"
+
+#include "nn/decoders/edge/ann_index.h"
+
+void init_ann_index(py::module &m) {
+    py::class_<IVFIndex, std::shared_ptr<IVFIndex>>(m, "IVFIndex")
+            .def_readwrite("decoder", &IVFIndex::decoder_)
+            .def_readwrite("num_lists", &IVFIndex::num_lists_)
+            .def_readwrite("num_probes", &IVFIndex::num_probes_)
+            .def_readonly("centroids", &IVFIndex::centroids_)
+            .def_readonly("list_offsets", &IVFIndex::list_offsets_)
+            .def_readonly("list_ids", &IVFIndex::list_ids_)
+            .def_readonly("list_embeddings", &IVFIndex::list_embeddings_)
+            .def(py::init<shared_ptr<EdgeDecoder>, int64_t, int64_t>(),
+                 py::arg("decoder"),
+                 py::arg("num_lists"),
+                 py::arg("num_probes") = 8)
+            .def(py::init<shared_ptr<EdgeDecoder>, torch::Tensor, torch::Tensor, torch::Tensor, torch::Tensor, int64_t>(),
+                 py::arg("decoder"),
+                 py::arg("centroids"),
+                 py::arg("list_offsets"),
+                 py::arg("list_ids"),
+                 py::arg("list_embeddings"),
+                 py::arg("num_probes") = 8)
+            .def("build", &IVFIndex::build,
+                 py::arg("embeddings"),
+                 py::arg("num_iterations") = 10,
+                 py::arg("sample_size") = 100000,
+                 py::arg("chunk_size") = 65536,
+                 py::call_guard<py::gil_scoped_release>())
+            .def("search", &IVFIndex::search, py::arg("queries"), py::arg("k"), py::call_guard<py::gil_scoped_release>())
+            .def("query", &IVFIndex::query,
+                 py::arg("node_ids"),
+                 py::arg("relation_ids") = torch::Tensor(),
+                 py::arg("k") = 10,
+                 py::arg("inverse") = false,
+                 py::call_guard<py::gil_scoped_release>())
+            .def("get_num_nodes", &IVFIndex::getNumNodes);
+}
@@ -18,6 +18,6 @@ void init_edge_decoder(py::module &m) {
             .def_readwrite("tensor_options", &EdgeDecoder::tensor_options_)
             .def_readwrite("use_inverse_relations", &EdgeDecoder::use_inverse_relations_)
             .def("apply_relation", &EdgeDecoder::apply_relation, py::arg("nodes"), py::arg("relations"))
-            .def("compute_scores", &EdgeDecoder::apply_relation, py::arg("src"), py::arg("dst"))
-            .def("select_relations", &EdgeDecoder::apply_relation, py::arg("indices"), py::arg("inverse") = false);
+            .def("compute_scores", &EdgeDecoder::compute_scores, py::arg("src"), py::arg("dst"))
+            .def("select_relations", &EdgeDecoder::select_relations, py::arg("indices"), py::arg("inverse") = false);
 }
\ No newline at end of file
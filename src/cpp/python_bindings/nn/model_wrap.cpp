@@ -24,6 +24,7 @@ void init_model(py::module &m) {
         .def_readwrite("device", &Model::device_)
         .def_readwrite("learning_task", &Model::learning_task_)
         .def_readwrite("sparse_lr", &Model::sparse_lr_)
+        .def_readwrite("sparse_row_wise", &Model::sparse_row_wise_)
         .def_readwrite("device_models", &Model::device_models_)
         .def(py::init<shared_ptr<GeneralEncoder>, shared_ptr<Decoder>, shared_ptr<LossFunction>, shared_ptr<Reporter>>())
         .def(py::init([](shared_ptr<GeneralEncoder> encoder, shared_ptr<Decoder> decoder, shared_ptr<LossFunction> loss, shared_ptr<Reporter> reporter, float sparse_lr) {
@@ -34,6 +35,8 @@ void init_model(py::module &m) {
 
         .def("forward_nc", &Model::forward_nc, py::arg("node_embeddings"), py::arg("node_features"), py::arg("dense_graph"), py::arg("train"), py::call_guard<py::gil_scoped_release>())
         .def("forward_lp", &Model::forward_lp, py::arg("batch"), py::arg("train"), py::call_guard<py::gil_scoped_release>())
+        .def("forward_lp_ranks", &Model::forward_lp_ranks, py::arg("batch"), py::call_guard<py::gil_scoped_release>())
+        .def("forward_lp_topk", &Model::forward_lp_topk, py::arg("batch"), py::arg("k"), py::call_guard<py::gil_scoped_release>())
         .def("train_batch", &Model::train_batch, py::arg("batch"), py::arg("call_step") = true, py::call_guard<py::gil_scoped_release>())
         .def("evaluate_batch",&Model::evaluate_batch, py::arg("batch"), py::call_guard<py::gil_scoped_release>())
         .def("clear_grad", &Model::clear_grad)
@@ -16,6 +16,7 @@ void init_regularizer(py::module &);
 void init_decoder(py::module &);
 
 // nn/decoders/edge
+void init_ann_index(py::module &);
 void init_comparators(py::module &);
 void init_complex(py::module &);
 void init_distmult(py::module &);
@@ -82,6 +83,7 @@ PYBIND11_MODULE(_nn, m) {
     init_distmult(edge_m);
     init_relation_operators(edge_m);
     init_transe(edge_m);
+    init_ann_index(edge_m);
 
     // nn/decoders/node
     auto node_m = decoders_m.def_submodule("node");
@@ -21,7 +21,8 @@ void init_reporting(py::module &m) {
             .def_readwrite("unit", &Metric::unit_);
 
     py::class_<RankingMetric, Metric, std::shared_ptr<RankingMetric>>(m, "RankingMetric")
-            .def("compute_metric", &RankingMetric::computeMetric, py::arg("ranks"));
+            .def("compute_metric", &RankingMetric::computeMetric, py::arg("ranks"))
+            .def("compute_sum", &RankingMetric::computeSum, py::arg("ranks"));
     py::class_<HitskMetric, RankingMetric, std::shared_ptr<HitskMetric>>(m, "Hitsk")
             .def(py::init<int>(), py::arg("k"))
             .def("compute_metric", &HitskMetric::computeMetric, py::arg("ranks"));
@@ -33,7 +34,8 @@ void init_reporting(py::module &m) {
             .def("compute_metric", &MeanReciprocalRankMetric::computeMetric, py::arg("ranks"));
 
     py::class_<ClassificationMetric, Metric, std::shared_ptr<ClassificationMetric>>(m, "ClassificationMetric")
-            .def("compute_metric", &ClassificationMetric::computeMetric, py::arg("y_true"), py::arg("y_pred"));
+            .def("compute_metric", &ClassificationMetric::computeMetric, py::arg("y_true"), py::arg("y_pred"))
+            .def("compute_sum", &ClassificationMetric::computeSum, py::arg("y_true"), py::arg("y_pred"));
     py::class_<CategoricalAccuracyMetric, ClassificationMetric, std::shared_ptr<CategoricalAccuracyMetric>>(m, "CategoricalAccuracy")
             .def(py::init<>())
             .def("compute_metric", &CategoricalAccuracyMetric::computeMetric, py::arg("y_true"), py::arg("y_pred"));
@@ -49,12 +51,15 @@ void init_reporting(py::module &m) {
         .def(py::init<>())
         .def("clear", &LinkPredictionReporter::clear)
         .def("compute_ranks", &LinkPredictionReporter::computeRanks, py::arg("pos_scores"), py::arg("neg_scores"))
+        .def("start_output", &LinkPredictionReporter::startOutput, py::arg("directory"), py::arg("scores") = false, py::arg("ranks") = false)
         .def("add_result", &LinkPredictionReporter::addResult, py::arg("pos_scores"), py::arg("neg_scores"), py::arg("edges") = torch::Tensor())
+        .def("add_ranks", &LinkPredictionReporter::addRanks, py::arg("ranks"), py::arg("pos_scores") = torch::Tensor(), py::arg("edges") = torch::Tensor())
         .def("save", &LinkPredictionReporter::save, py::arg("directory"), py::arg("scores") = false, py::arg("ranks") = false);
 
     py::class_<NodeClassificationReporter, Reporter, std::shared_ptr<NodeClassificationReporter>>(m, "NodeClassificationReporter")
         .def(py::init<>())
         .def("clear", &NodeClassificationReporter::clear)
+        .def("start_output", &NodeClassificationReporter::startOutput, py::arg("directory"))
         .def("add_result", &NodeClassificationReporter::addResult, py::arg("y_true"), py::arg("y_pred"), py::arg("node_ids") = torch::Tensor())
         .def("save", &NodeClassificationReporter::save, py::arg("directory"), py::arg("labels") = false);
 
@@ -79,6 +79,19 @@ void init_storage(py::module &m) {
         .def("getNextEvict", &PartitionBufferStorage::getNextEvict)
         .def("getNumInMemory", &PartitionBufferStorage::getNumInMemory);
 
+    py::class_<RowCache, std::shared_ptr<RowCache>>(m, "RowCache")
+        .def("getCapacity", &RowCache::getCapacity)
+        .def("getHits", &RowCache::getHits)
+        .def("getMisses", &RowCache::getMisses)
+        .def("getHitRate", &RowCache::getHitRate)
+        .def("resetStats", &RowCache::resetStats)
+        .def("clear", &RowCache::clear);
+
+    py::class_<StripedFile, std::shared_ptr<StripedFile>>(m, "StripedFile")
+        .def("getSize", &StripedFile::getSize)
+        .def("getStripeSize", &StripedFile::getStripeSize)
+        .def("getNumDisks", &StripedFile::getNumDisks);
+
     py::class_<FlatFile, Storage, std::shared_ptr<FlatFile>>(m, "FlatFile")
         .def(py::init([](std::string filename,
                          std::vector<int64_t> shape,
@@ -119,8 +132,27 @@ void init_storage(py::module &m) {
         .def("move", &FlatFile::move, py::arg("new_filename"))
         .def("copy", &FlatFile::copy, py::arg("new_filename"), py::arg("rename"))
         .def("mem_load", &FlatFile::mem_load)
-        .def("mem_unload", &FlatFile::mem_unload, py::arg("write"));
+        .def("mem_unload", &FlatFile::mem_unload, py::arg("write"))
+        .def("setRowCache", &FlatFile::setRowCache, py::arg("cache_size"))
+        .def("getRowCache", &FlatFile::getRowCache)
+        .def("setStriping", &FlatFile::setStriping, py::arg("directories"), py::arg("stripe_size"))
+        .def("getStripedFile", &FlatFile::getStripedFile);
+
 
+    py::class_<TieredStorage, Storage, std::shared_ptr<TieredStorage>>(m, "TieredStorage")
+        .def(py::init<string, int64_t, int64_t, shared_ptr<TieredStorageOptions>>(),
+             py::arg("filename"),
+             py::arg("dim0_size"),
+             py::arg("dim1_size"),
+             py::arg("options"))
+        .def("addAccessHint", &TieredStorage::addAccessHint, py::arg("indices"))
+        .def("rebalance", &TieredStorage::rebalance)
+        .def("getMemoryCapacity", &TieredStorage::getMemoryCapacity)
+        .def("getSsdCapacity", &TieredStorage::getSsdCapacity)
+        .def("getMemoryReads", &TieredStorage::getMemoryReads)
+        .def("getSsdReads", &TieredStorage::getSsdReads)
+        .def("getDiskReads", &TieredStorage::getDiskReads)
+        .def("resetStats", &TieredStorage::resetStats);
 
     py::class_<InMemory, Storage, std::shared_ptr<InMemory>>(m, "InMemory")
         .def(py::init([](std::string filename,
@@ -207,4 +207,117 @@ std::vector<torch::Tensor> apply_tensor_map(torch::Tensor map, std::vector<torch
     }
 
     return mapped_tensors;
-}
\ No newline at end of file
+}
+
+StripedLock::StripedLock(int64_t num_stripes) {
+    num_stripes_ = num_stripes;
+    stripes_ = std::unique_ptr<std::atomic_flag[]>(new std::atomic_flag[num_stripes_]);
+    for (int64_t i = 0; i < num_stripes_; i++) {
+        stripes_[i].clear();
+    }
+}
+
+std::tuple<Indices, torch::Tensor> coalesceSparseGradients(Indices indices, torch::Tensor gradients) {
+    int64_t size = indices.size(0);
+
+    if (size < 2) {
+        return std::forward_as_tuple(indices, gradients);
+    }
+
+    auto sort_tup = torch::sort(indices);
+    torch::Tensor sorted_indices = std::get<0>(sort_tup);
+    torch::Tensor sort_order = std::get<1>(sort_tup);
+
+    // the common case: ids of a batch are already unique
+    if (sorted_indices.narrow(0, 1, size - 1).ne(sorted_indices.narrow(0, 0, size - 1)).all().item<bool>()) {
+        return std::forward_as_tuple(indices, gradients);
+    }
+
+    auto unique_tup = torch::unique_consecutive(sorted_indices, true, false);
+    torch::Tensor unique_indices = std::get<0>(unique_tup);
+    torch::Tensor segment_ids = std::get<1>(unique_tup);
+
+    torch::Tensor reduced_gradients = torch::zeros({unique_indices.size(0), gradients.size(1)}, gradients.options());
+    reduced_gradients.index_add_(0, segment_ids, gradients.index_select(0, sort_order));
+
+    return std::forward_as_tuple(unique_indices, reduced_gradients);
+}
+
+void index_add_rows(torch::Tensor data, torch::Tensor indices, torch::Tensor values, StripedLock *row_locks) {
+    auto tup = coalesceSparseGradients(indices, values);
+    indices = std::get<0>(tup).contiguous();
+    values = std::get<1>(tup).contiguous();
+
+    if (data.stride(1) != 1) {
+        throw MariusRuntimeException("index_add_rows requires the rows of the table to be contiguous");
+    }
+
+    // assumes this operation is only used on float valued data
+    float *data_ptr = data.data_ptr<float>();
+    float *values_ptr = values.data_ptr<float>();
+    int64_t *ids_ptr = indices.data_ptr<int64_t>();
+
+    int64_t row_stride = data.stride(0);
+    int64_t d = values.size(1);
+    int64_t size = indices.size(0);
+
+    #pragma omp parallel for
+    for (int64_t i = 0; i < size; i++) {
+        int64_t row = ids_ptr[i];
+        float *dst = data_ptr + row * row_stride;
+        float *src = values_ptr + i * d;
+
+        if (row_locks != nullptr) {
+            row_locks->lock(row);
+        }
+
+        #pragma omp simd
+        for (int64_t j = 0; j < d; j++) {
+            dst[j] += src[j];
+        }
+
+        if (row_locks != nullptr) {
+            row_locks->unlock(row);
+        }
+    }
+}
+
+// calls io on each run of consecutive ids with the rows of the run in buf
+template <typename F>
+static int64_t for_each_row_run(torch::Tensor ids, int64_t row_bytes, F io) {
+    int64_t num_ids = ids.size(0);
+    int64_t *ids_ptr = ids.data_ptr<int64_t>();
+
+    int64_t run_start = 0;
+    while (run_start < num_ids) {
+        int64_t run_end = run_start + 1;
+        while (run_end < num_ids && ids_ptr[run_end] == ids_ptr[run_end - 1] + 1) {
+            run_end++;
+        }
+
+        if (io(run_start * row_bytes, (run_end - run_start) * row_bytes, ids_ptr[run_start] * row_bytes) == -1) {
+            return -1;
+        }
+        run_start = run_end;
+    }
+
+    return num_ids * row_bytes;
+}
+
+int64_t pread_rows(int fd, torch::Tensor ids, torch::Tensor output) {
+    char *output_ptr = (char *) output.data_ptr();
+    int64_t row_bytes = output.size(1) * get_dtype_size_wrapper(output.scalar_type());
+
+    return for_each_row_run(ids, row_bytes, [fd, output_ptr](int64_t buf_offset, int64_t count, int64_t offset) {
+        return pread_wrapper(fd, output_ptr + buf_offset, count, offset);
+    });
+}
+
+int64_t pwrite_rows(int fd, torch::Tensor ids, torch::Tensor values) {
+    char *values_ptr = (char *) values.data_ptr();
+    int64_t row_bytes = values.size(1) * get_dtype_size_wrapper(values.scalar_type());
+
+    return for_each_row_run(ids, row_bytes, [fd, values_ptr](int64_t buf_offset, int64_t count, int64_t offset) {
+        return pwrite_wrapper(fd, values_ptr + buf_offset, count, offset);
+    });
+}
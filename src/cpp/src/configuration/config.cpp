@@ -34,6 +34,17 @@ T cast_helper(pyobj python_object) {
     }
 }
 
+std::vector<string> cast_string_list(pyobj python_object) {
+    std::vector<string> ret = {};
+
+    for (auto py_item : cast_helper<pybind11::list>(python_object)) {
+        pyobj item_object = pybind11::reinterpret_borrow<pyobj>(py_item);
+        ret.emplace_back(cast_helper<string>(item_object));
+    }
+
+    return ret;
+}
+
 shared_ptr<NeighborSamplingConfig> initNeighborSamplingConfig(pyobj python_object) {
     shared_ptr<NeighborSamplingConfig> ret_config = std::make_shared<NeighborSamplingConfig>();
 
@@ -110,6 +121,7 @@ shared_ptr<OptimizerConfig> initOptimizerConfig(pyobj python_config) {
         adagrad_options->lr_decay = cast_helper<float>(py_options.attr("lr_decay"));
         adagrad_options->init_value = cast_helper<float>(py_options.attr("init_value"));
         adagrad_options->eps = cast_helper<float>(py_options.attr("eps"));
+        adagrad_options->row_wise = cast_helper<bool>(py_options.attr("row_wise"));
         ret_config->options = adagrad_options;
     } else if (ret_config->type == OptimizerType::ADAM) {
         auto adam_options = std::make_shared<AdamOptions>();
@@ -351,8 +363,29 @@ shared_ptr<StorageBackendConfig> initStorageBackendConfig(pyobj python_config) {
         buffer_options->edge_bucket_ordering = getEdgeBucketOrderingEnum(cast_helper<string>(py_options.attr("edge_bucket_ordering")));
         buffer_options->node_partition_ordering = getNodePartitionOrderingEnum(cast_helper<string>(py_options.attr("node_partition_ordering")));
         buffer_options->randomly_assign_edge_buckets = cast_helper<bool>(py_options.attr("randomly_assign_edge_buckets"));
+        buffer_options->lazy_initialization = cast_helper<bool>(py_options.attr("lazy_initialization"));
+        buffer_options->ordering_cache_size = cast_helper<int>(py_options.attr("ordering_cache_size"));
+        buffer_options->num_hot_nodes = cast_helper<int64_t>(py_options.attr("num_hot_nodes"));
+        buffer_options->stripe_directories = cast_string_list(py_options.attr("stripe_directories"));
+        buffer_options->stripe_size = cast_helper<int64_t>(py_options.attr("stripe_size"));
         buffer_options->dtype = getDtype(cast_helper<string>(py_options.attr("dtype")));
         ret_config->options = buffer_options;
+    } else if (ret_config->type == StorageBackend::FLAT_FILE) {
+        auto flat_file_options = std::make_shared<FlatFileOptions>();
+        flat_file_options->cache_size = cast_helper<int64_t>(py_options.attr("cache_size"));
+        flat_file_options->stripe_directories = cast_string_list(py_options.attr("stripe_directories"));
+        flat_file_options->stripe_size = cast_helper<int64_t>(py_options.attr("stripe_size"));
+        flat_file_options->dtype = getDtype(cast_helper<string>(py_options.attr("dtype")));
+        ret_config->options = flat_file_options;
+    } else if (ret_config->type == StorageBackend::TIERED) {
+        auto tiered_options = std::make_shared<TieredStorageOptions>();
+        tiered_options->memory_capacity = cast_helper<int64_t>(py_options.attr("memory_capacity"));
+        tiered_options->ssd_directory = cast_helper<string>(py_options.attr("ssd_directory"));
+        tiered_options->ssd_capacity = cast_helper<int64_t>(py_options.attr("ssd_capacity"));
+        tiered_options->block_size = cast_helper<int64_t>(py_options.attr("block_size"));
+        tiered_options->rebalance_interval = cast_helper<int64_t>(py_options.attr("rebalance_interval"));
+        tiered_options->dtype = getDtype(cast_helper<string>(py_options.attr("dtype")));
+        ret_config->options = tiered_options;
     } else {
         auto options = std::make_shared<StorageOptions>();
         options->dtype = getDtype(cast_helper<string>(py_options.attr("dtype")));
@@ -404,6 +437,7 @@ shared_ptr<PipelineConfig> initPipelineConfig(pyobj python_config) {
         ret_config->compute_threads = cast_helper<int>(python_config.attr("compute_threads"));
         ret_config->gradient_transfer_threads = cast_helper<int>(python_config.attr("gradient_transfer_threads"));
         ret_config->gradient_update_threads = cast_helper<int>(python_config.attr("gradient_update_threads"));
+        ret_config->update_lock_stripes = cast_helper<int>(python_config.attr("update_lock_stripes"));
     }
 
     return ret_config;
@@ -420,6 +454,10 @@ shared_ptr<CheckpointConfig> initCheckpointConfig(pyobj python_config) {
     ret_config->save_best = cast_helper<bool>(python_config.attr("save_best"));
     ret_config->interval = cast_helper<int>(python_config.attr("interval"));
     ret_config->save_state = cast_helper<bool>(python_config.attr("save_state"));
+    ret_config->asynchronous = cast_helper<bool>(python_config.attr("asynchronous"));
+    ret_config->incremental = cast_helper<bool>(python_config.attr("incremental"));
+    ret_config->compaction_interval = cast_helper<int>(python_config.attr("compaction_interval"));
+    ret_config->buffer_state_interval = cast_helper<int>(python_config.attr("buffer_state_interval"));
     return ret_config;
 }
 
@@ -495,6 +533,7 @@ shared_ptr<EvaluationConfig> initEvaluationConfig(pyobj python_config) {
     ret_config->pipeline = initPipelineConfig(python_config.attr("pipeline"));
     ret_config->epochs_per_eval = cast_helper<int>(python_config.attr("epochs_per_eval"));
     ret_config->checkpoint_dir = cast_helper<string>(python_config.attr("checkpoint_dir"));
+    ret_config->ranking_tile_size = cast_helper<int>(python_config.attr("ranking_tile_size"));
     return ret_config;
 }
 
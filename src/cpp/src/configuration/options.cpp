@@ -242,6 +242,8 @@ StorageBackend getStorageBackend(std::string string_val) {
         return StorageBackend::HOST_MEMORY;
     } else if (string_val == "DEVICE_MEMORY") {
         return StorageBackend::DEVICE_MEMORY;
+    } else if (string_val == "TIERED") {
+        return StorageBackend::TIERED;
     } else {
         throw std::runtime_error("Unrecognized storage backend string");
     }
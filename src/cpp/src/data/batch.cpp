@@ -13,6 +13,8 @@ Batch::Batch(bool train) : device_transfer_(0), host_transfer_(0), timer_(false)
     status_ = BatchStatus::Waiting;
     train_ = train;
     device_id_ = -1;
+    sparse_learning_rate_ = 0;
+    ranking_tile_size_ = 0;
     clear();
 }
 
@@ -41,6 +43,14 @@ void Batch::to(torch::Device device) {
         root_node_indices_ = root_node_indices_.to(device);
     }
 
+    if (root_node_ids_.defined()) {
+        root_node_ids_ = root_node_ids_.to(device);
+    }
+
+    if (global_edges_.defined()) {
+        global_edges_ = global_edges_.to(device);
+    }
+
     if (unique_node_indices_.defined()) {
         unique_node_indices_ = unique_node_indices_.to(device);
     }
@@ -98,7 +108,19 @@ void Batch::accumulateGradients(float learning_rate) {
         node_gradients_ = node_embeddings_.grad();
         SPDLOG_TRACE("Batch: {} accumulated node gradients", batch_id_);
 
-        node_state_update_ = node_gradients_.pow(2);
+        if (!node_embeddings_state_.defined()) {
+            // the optimizer state was not loaded, the update rule will be applied in storage by a fused sparse optimizer step
+            sparse_learning_rate_ = learning_rate;
+            status_ = BatchStatus::AccumulatedGradients;
+            return;
+        }
+
+        if (node_embeddings_state_.size(-1) == 1 && node_gradients_.size(-1) != 1) {
+            // row-wise state, a single accumulator per node
+            node_state_update_ = node_gradients_.pow(2).mean(-1, true);
+        } else {
+            node_state_update_ = node_gradients_.pow(2);
+        }
         node_embeddings_state_.add_(node_state_update_);
         node_gradients_ = -learning_rate * (node_gradients_ / (node_embeddings_state_.sqrt().add_(1e-10)));
 
@@ -117,12 +139,28 @@ void Batch::embeddingsToHost() {
 
     if (node_gradients_.defined() && node_gradients_.device().is_cuda()) {
         auto grad_opts = torch::TensorOptions().dtype(torch::kFloat32).device(torch::kCPU).pinned_memory(true);
-        Gradients temp_grads = torch::empty(node_gradients_.sizes(), grad_opts);
+
+        // grow the pinned staging buffers only when this batch exceeds the previous high-water mark
+        int64_t grad_numel = node_gradients_.numel();
+        if (!host_gradients_buffer_.defined() || host_gradients_buffer_.numel() < grad_numel) {
+            host_gradients_buffer_ = torch::empty({grad_numel}, grad_opts);
+        }
+
+        Gradients temp_grads = host_gradients_buffer_.narrow(0, 0, grad_numel).view(node_gradients_.sizes());
         temp_grads.copy_(node_gradients_, true);
-        Gradients temp_grads2 = torch::empty(node_state_update_.sizes(), grad_opts);
-        temp_grads2.copy_(node_state_update_, true);
         node_gradients_ = temp_grads;
-        node_state_update_ = temp_grads2;
+
+        // not defined when the optimizer update is fused into storage
+        if (node_state_update_.defined()) {
+            int64_t state_numel = node_state_update_.numel();
+            if (!host_state_update_buffer_.defined() || host_state_update_buffer_.numel() < state_numel) {
+                host_state_update_buffer_ = torch::empty({state_numel}, grad_opts);
+            }
+
+            Gradients temp_grads2 = host_state_update_buffer_.narrow(0, 0, state_numel).view(node_state_update_.sizes());
+            temp_grads2.copy_(node_state_update_, true);
+            node_state_update_ = temp_grads2;
+        }
     }
 
     if (unique_node_indices_.defined()) {
@@ -140,6 +178,7 @@ void Batch::embeddingsToHost() {
 
 void Batch::clear() {
     root_node_indices_ = torch::Tensor();
+    root_node_ids_ = torch::Tensor();
     unique_node_indices_ = torch::Tensor();
     node_embeddings_ = torch::Tensor();
     node_gradients_ = torch::Tensor();
@@ -153,6 +192,7 @@ void Batch::clear() {
     dst_neg_indices_mapping_ = torch::Tensor();
 
     edges_ = torch::Tensor();
+    global_edges_ = torch::Tensor();
     neg_edges_ = torch::Tensor();
     src_neg_indices_ = torch::Tensor();
     dst_neg_indices_ = torch::Tensor();
@@ -162,4 +202,117 @@ void Batch::clear() {
 
     src_neg_filter_ = torch::Tensor();
     dst_neg_filter_ = torch::Tensor();
-}
\ No newline at end of file
+
+    candidate_node_embeddings_ = torch::Tensor();
+    candidate_node_features_ = torch::Tensor();
+    candidate_node_ids_ = torch::Tensor();
+}
+
+void Batch::reset(bool train) {
+    clear();
+    train_ = train;
+    status_ = BatchStatus::Waiting;
+    device_id_ = -1;
+    batch_id_ = -1;
+    start_idx_ = 0;
+    batch_size_ = 0;
+    ranking_tile_size_ = 0;
+}
+
+void Batch::clearHostBuffers() {
+    host_gradients_buffer_ = torch::Tensor();
+    host_state_update_buffer_ = torch::Tensor();
+}
+
+BatchPool::BatchPool(int64_t max_free_batches) {
+    lock_ = new std::mutex();
+    max_free_batches_ = max_free_batches;
+    num_allocated_ = 0;
+}
+
+BatchPool::~BatchPool() {
+    clear();
+    delete lock_;
+}
+
+shared_ptr<Batch> BatchPool::acquire(bool train) {
+    Batch *batch = nullptr;
+
+    lock_->lock();
+    if (!free_batches_.empty()) {
+        batch = free_batches_.back();
+        free_batches_.pop_back();
+    } else {
+        num_allocated_++;
+    }
+    lock_->unlock();
+
+    if (batch == nullptr) {
+        batch = new Batch(train);
+    } else {
+        batch->reset(train);
+    }
+
+    // return the batch to the free list once the pipeline drops its last reference, or free it if the pool is gone
+    std::weak_ptr<BatchPool> weak_pool = weak_from_this();
+    return shared_ptr<Batch>(batch, [weak_pool](Batch *b) {
+        if (auto pool = weak_pool.lock()) {
+            pool->release(b);
+        } else {
+            delete b;
+        }
+    });
+}
+
+void BatchPool::release(Batch *batch) {
+    batch->clear();
+
+    lock_->lock();
+    if (free_batches_.size() < max_free_batches_) {
+        free_batches_.emplace_back(batch);
+        batch = nullptr;
+    } else {
+        num_allocated_--;
+    }
+    lock_->unlock();
+
+    if (batch != nullptr) {
+        delete batch;
+    }
+}
+
+void BatchPool::setMaxFreeBatches(int64_t max_free_batches) {
+    std::vector<Batch *> to_delete;
+
+    lock_->lock();
+    max_free_batches_ = max_free_batches;
+    while (free_batches_.size() > max_free_batches_) {
+        to_delete.emplace_back(free_batches_.back());
+        free_batches_.pop_back();
+    }
+    num_allocated_ -= to_delete.size();
+    lock_->unlock();
+
+    for (auto batch : to_delete) {
+        delete batch;
+    }
+}
+
+void BatchPool::clear() {
+    lock_->lock();
+    std::vector<Batch *> to_delete = free_batches_;
+    free_batches_ = {};
+    num_allocated_ -= to_delete.size();
+    lock_->unlock();
+
+    for (auto batch : to_delete) {
+        delete batch;
+    }
+}
+
+int64_t BatchPool::getNumFree() {
+    lock_->lock();
+    int64_t num_free = free_batches_.size();
+    lock_->unlock();
+    return num_free;
+}
@@ -0,0 +1,166 @@
+#include "data/batch_prefetcher.h"
+
+#include "reporting/logger.h"
+
+BatchPrefetcher::BatchPrefetcher(shared_ptr<DataLoader> dataloader,
+                                 at::optional<torch::Device> device,
+                                 int num_threads,
+                                 int queue_size,
+                                 bool perform_map,
+                                 bool finish_batches) {
+    if (num_threads < 1) {
+        throw MariusRuntimeException("The batch prefetcher requires at least one loader thread");
+    }
+
+    if (queue_size < 1) {
+        throw MariusRuntimeException("The batch prefetcher queue must hold at least one batch");
+    }
+
+    dataloader_ = dataloader;
+    device_ = device;
+    num_threads_ = num_threads;
+    queue_size_ = queue_size;
+    perform_map_ = perform_map;
+    finish_batches_ = finish_batches;
+
+    active_threads_ = 0;
+    in_flight_ = 0;
+    stopped_ = true;
+    pending_finish_ = false;
+}
+
+BatchPrefetcher::~BatchPrefetcher() {
+    if (!threads_.empty()) {
+        stop();
+    }
+}
+
+void BatchPrefetcher::run() {
+    std::unique_lock lock(lock_);
+
+    while (true) {
+        cv_.wait(lock, [this] { return stopped_ || queue_.size() + in_flight_ < queue_size_; });
+        if (stopped_) {
+            break;
+        }
+
+        // a slot in the queue is reserved while the batch is loaded without holding the lock
+        in_flight_++;
+        lock.unlock();
+
+        shared_ptr<Batch> batch;
+        try {
+            batch = dataloader_->getBatch(device_, perform_map_);
+        } catch (...) {
+            lock.lock();
+            in_flight_--;
+            if (!error_) {
+                error_ = std::current_exception();
+            }
+            break;
+        }
+
+        lock.lock();
+        in_flight_--;
+
+        if (batch == nullptr) {
+            break;
+        }
+
+        if (stopped_) {
+            lock.unlock();
+            batch->clear();
+            dataloader_->finishedBatch();
+            lock.lock();
+            break;
+        }
+
+        queue_.emplace_back(batch);
+        cv_.notify_all();
+    }
+
+    active_threads_--;
+    cv_.notify_all();
+}
+
+void BatchPrefetcher::start() {
+    if (!threads_.empty()) {
+        throw MariusRuntimeException("The batch prefetcher has already been started");
+    }
+
+    stopped_ = false;
+    error_ = nullptr;
+    active_threads_ = num_threads_;
+    in_flight_ = 0;
+
+    for (int i = 0; i < num_threads_; i++) {
+        threads_.emplace_back(new std::thread(&BatchPrefetcher::run, this));
+    }
+}
+
+shared_ptr<Batch> BatchPrefetcher::next() {
+    if (threads_.empty()) {
+        throw MariusRuntimeException("The batch prefetcher has not been started");
+    }
+
+    if (pending_finish_) {
+        dataloader_->finishedBatch();
+        pending_finish_ = false;
+    }
+
+    std::unique_lock lock(lock_);
+    cv_.wait(lock, [this] { return !queue_.empty() || active_threads_ == 0 || error_; });
+
+    if (error_) {
+        std::exception_ptr error = error_;
+        error_ = nullptr;
+        lock.unlock();
+        stop();
+        std::rethrow_exception(error);
+    }
+
+    if (queue_.empty()) {
+        lock.unlock();
+        join();
+        return nullptr;
+    }
+
+    shared_ptr<Batch> batch = queue_.front();
+    queue_.pop_front();
+    lock.unlock();
+    cv_.notify_all();
+
+    pending_finish_ = finish_batches_;
+    return batch;
+}
+
+void BatchPrefetcher::stop() {
+    std::deque<shared_ptr<Batch>> discarded;
+    {
+        std::unique_lock lock(lock_);
+        stopped_ = true;
+        discarded.swap(queue_);
+    }
+    cv_.notify_all();
+
+    // loader threads may be waiting for all batches of the buffer state to finish before swapping partitions
+    for (auto batch : discarded) {
+        batch->clear();
+        dataloader_->finishedBatch();
+    }
+
+    if (pending_finish_) {
+        dataloader_->finishedBatch();
+        pending_finish_ = false;
+    }
+
+    join();
+}
+
+void BatchPrefetcher::join() {
+    for (auto thread : threads_) {
+        thread->join();
+        delete thread;
+    }
+    threads_.clear();
+}
@@ -4,6 +4,10 @@
 
 #include "data/dataloader.h"
 
+#include <ATen/CPUGeneratorImpl.h>
+
+#include <sstream>
+
 #include "common/util.h"
 #include "data/ordering.h"
 
@@ -22,6 +26,13 @@ DataLoader::DataLoader(shared_ptr<GraphModelStorage> graph_storage,
     batch_lock_ = new std::mutex;
     batch_cv_ = new std::condition_variable;
     waiting_for_batches_ = false;
+    batch_pool_ = std::make_shared<BatchPool>();
+    batch_id_offset_ = 0;
+    prepare_encode_ = false;
+    buffer_states_processed_ = 0;
+    items_processed_ = 0;
+    buffer_state_callback_ = nullptr;
+    clearBatches();
 
     single_dataset_ = false;
 
@@ -30,6 +41,9 @@ DataLoader::DataLoader(shared_ptr<GraphModelStorage> graph_storage,
     training_config_ = training_config;
     evaluation_config_ = evaluation_config;
     only_root_features_ = false;
+    fused_sparse_update_ = true;
+    ranking_tile_size_ = (evaluation_config_ != nullptr) ? evaluation_config_->ranking_tile_size : 0;
+    shuffle_ = true;
 
     edge_sampler_ = std::make_shared<RandomEdgeSampler>(graph_storage_);
 
@@ -86,6 +100,13 @@ DataLoader::DataLoader(shared_ptr<GraphModelStorage> graph_storage,
     batch_lock_ = new std::mutex;
     batch_cv_ = new std::condition_variable;
     waiting_for_batches_ = false;
+    batch_pool_ = std::make_shared<BatchPool>();
+    batch_id_offset_ = 0;
+    prepare_encode_ = false;
+    buffer_states_processed_ = 0;
+    items_processed_ = 0;
+    buffer_state_callback_ = nullptr;
+    clearBatches();
 
     batch_size_ = batch_size;
     single_dataset_ = true;
@@ -93,6 +114,9 @@ DataLoader::DataLoader(shared_ptr<GraphModelStorage> graph_storage,
     graph_storage_ = graph_storage;
     learning_task_ = learning_task;
     only_root_features_ = false;
+    fused_sparse_update_ = true;
+    ranking_tile_size_ = 0;
+    shuffle_ = true;
 
     edge_sampler_ = std::make_shared<RandomEdgeSampler>(graph_storage_);
     negative_sampler_ = negative_sampler;
@@ -116,6 +140,8 @@ DataLoader::~DataLoader() {
 void DataLoader::nextEpoch() {
     batch_id_offset_ = 0;
     total_batches_processed_ = 0;
+    buffer_states_processed_ = 0;
+    items_processed_ = 0;
     epochs_processed_++;
 
     if (graph_storage_->useInMemorySubGraph()) {
@@ -185,8 +211,10 @@ void DataLoader::setActiveEdges() {
     }
 
 
-    auto opts = torch::TensorOptions().dtype(torch::kInt64).device(active_edges.device());
-    active_edges = (active_edges.index_select(0, torch::randperm(active_edges.size(0), opts)));
+    if (shuffle_) {
+        auto opts = torch::TensorOptions().dtype(torch::kInt64).device(active_edges.device());
+        active_edges = (active_edges.index_select(0, torch::randperm(active_edges.size(0), opts)));
+    }
     graph_storage_->setActiveEdges(active_edges);
 }
 
@@ -202,14 +230,14 @@ void DataLoader::setActiveNodes() {
         }
     }
 
-    auto opts = torch::TensorOptions().dtype(torch::kInt64).device(node_ids.device());
-    node_ids = (node_ids.index_select(0, torch::randperm(node_ids.size(0), opts)));
+    if (shuffle_) {
+        auto opts = torch::TensorOptions().dtype(torch::kInt64).device(node_ids.device());
+        node_ids = (node_ids.index_select(0, torch::randperm(node_ids.size(0), opts)));
+    }
     graph_storage_->setActiveNodes(node_ids);
 }
 
 void DataLoader::initializeBatches(bool prepare_encode) {
-    int64_t batch_id = 0;
-    int64_t start_idx = 0;
 
     clearBatches();
 
@@ -228,32 +256,45 @@ void DataLoader::initializeBatches(bool prepare_encode) {
         }
     }
 
-    int64_t batch_size = batch_size_;
-    vector<shared_ptr<Batch>> batches;
-    while (start_idx < num_items) {
-        if (num_items - (start_idx + batch_size) < 0) {
-            batch_size = num_items - start_idx;
-        }
-        shared_ptr<Batch> curr_batch = std::make_shared<Batch>(train_);
-        curr_batch->batch_id_ = batch_id + batch_id_offset_;
-        curr_batch->start_idx_ = start_idx;
-        curr_batch->batch_size_ = batch_size;
+    num_batch_items_ = num_items;
+    prepare_encode_ = prepare_encode;
 
-        if (prepare_encode) {
-            curr_batch->task_ = LearningTask::ENCODE;
-        } else {
-            curr_batch->task_ = learning_task_;
-        }
+    batches_left_ = (num_items + batch_size_ - 1) / batch_size_;
+}
 
-        batches.emplace_back(curr_batch);
-        batch_id++;
-        start_idx += batch_size;
+shared_ptr<Batch> DataLoader::createNextBatch() {
+    if (next_batch_start_idx_ >= num_batch_items_) {
+        return nullptr;
     }
-    batches_ = batches;
 
-    batches_left_ = batches_.size();
-    batch_iterator_ = batches_.begin();
+    int64_t batch_size = std::min((int64_t) batch_size_, num_batch_items_ - next_batch_start_idx_);
 
+    shared_ptr<Batch> batch = batch_pool_->acquire(train_);
+    batch->batch_id_ = next_batch_id_ + batch_id_offset_;
+    batch->start_idx_ = next_batch_start_idx_;
+    batch->batch_size_ = batch_size;
+
+    if (prepare_encode_) {
+        batch->task_ = LearningTask::ENCODE;
+    } else {
+        batch->task_ = learning_task_;
+    }
+
+    next_batch_id_++;
+    next_batch_start_idx_ += batch_size;
+
+    // check if all batches have been read
+    if (next_batch_start_idx_ >= num_batch_items_) {
+        if (graph_storage_->useInMemorySubGraph()) {
+            if (!graph_storage_->hasSwap()) {
+                all_read_ = true;
+            }
+        } else {
+            all_read_ = true;
+        }
+    }
+
+    return batch;
 }
 
 void DataLoader::setBufferOrdering() {
@@ -269,14 +310,33 @@ void DataLoader::setBufferOrdering() {
     if (learning_task_ == LearningTask::LINK_PREDICTION) {
         if (graph_storage_->useInMemorySubGraph()) {
 
-            auto tup = getEdgeBucketOrdering(options->edge_bucket_ordering,
-                                             options->num_partitions,
-                                             options->buffer_capacity,
-                                             options->fine_to_coarse_ratio,
-                                             options->num_cache_partitions,
-                                             options->randomly_assign_edge_buckets);
-            buffer_states_ = std::get<0>(tup);
-            edge_buckets_per_buffer_ = std::get<1>(tup);
+            if (train_ && !resume_buffer_states_.empty()) {
+                buffer_states_ = resume_buffer_states_;
+                edge_buckets_per_buffer_ = resume_items_per_buffer_;
+                resume_buffer_states_.clear();
+                resume_items_per_buffer_.clear();
+            } else {
+                string cache_file = getOrderingCacheFile(options);
+
+                if (!cache_file.empty() && fileExists(cache_file)) {
+                    auto tup = loadOrdering(cache_file);
+                    buffer_states_ = std::get<0>(tup);
+                    edge_buckets_per_buffer_ = std::get<1>(tup);
+                } else {
+                    auto tup = getEdgeBucketOrdering(options->edge_bucket_ordering,
+                                                     options->num_partitions,
+                                                     options->buffer_capacity,
+                                                     options->fine_to_coarse_ratio,
+                                                     options->num_cache_partitions,
+                                                     options->randomly_assign_edge_buckets);
+                    buffer_states_ = std::get<0>(tup);
+                    edge_buckets_per_buffer_ = std::get<1>(tup);
+
+                    if (!cache_file.empty()) {
+                        saveOrdering(cache_file, buffer_states_, edge_buckets_per_buffer_);
+                    }
+                }
+            }
 
             edge_buckets_per_buffer_iterator_ = edge_buckets_per_buffer_.begin();
 
@@ -284,15 +344,35 @@ void DataLoader::setBufferOrdering() {
         }
     } else {
         if (graph_storage_->useInMemorySubGraph()) {
-            graph_storage_->storage_ptrs_.train_nodes->load();
-            int64_t num_train_nodes = graph_storage_->storage_ptrs_.nodes->getDim0();
-            auto tup = getNodePartitionOrdering(options->node_partition_ordering,
-                                                graph_storage_->storage_ptrs_.train_nodes->range(0, num_train_nodes).flatten(0, 1),
-                                                graph_storage_->getNumNodes(),
-                                                options->num_partitions,
-                                                options->buffer_capacity, options->fine_to_coarse_ratio, options->num_cache_partitions);
-            buffer_states_ = std::get<0>(tup);
-            node_ids_per_buffer_ = std::get<1>(tup);
+            if (train_ && !resume_buffer_states_.empty()) {
+                buffer_states_ = resume_buffer_states_;
+                node_ids_per_buffer_ = resume_items_per_buffer_;
+                resume_buffer_states_.clear();
+                resume_items_per_buffer_.clear();
+            } else {
+                graph_storage_->storage_ptrs_.train_nodes->load();
+                int64_t num_train_nodes = graph_storage_->storage_ptrs_.nodes->getDim0();
+                torch::Tensor train_nodes = graph_storage_->storage_ptrs_.train_nodes->range(0, num_train_nodes).flatten(0, 1);
+                string cache_file = getOrderingCacheFile(options, train_nodes);
+
+                if (!cache_file.empty() && fileExists(cache_file)) {
+                    auto tup = loadOrdering(cache_file);
+                    buffer_states_ = std::get<0>(tup);
+                    node_ids_per_buffer_ = std::get<1>(tup);
+                } else {
+                    auto tup = getNodePartitionOrdering(options->node_partition_ordering,
+                                                        train_nodes,
+                                                        graph_storage_->getNumNodes(),
+                                                        options->num_partitions,
+                                                        options->buffer_capacity, options->fine_to_coarse_ratio, options->num_cache_partitions);
+                    buffer_states_ = std::get<0>(tup);
+                    node_ids_per_buffer_ = std::get<1>(tup);
+
+                    if (!cache_file.empty()) {
+                        saveOrdering(cache_file, buffer_states_, node_ids_per_buffer_);
+                    }
+                }
+            }
 
             node_ids_per_buffer_iterator_ = node_ids_per_buffer_.begin();
 
@@ -301,8 +381,80 @@ void DataLoader::setBufferOrdering() {
     }
 }
 
+// FNV-1a hash of the node ids, which tells apart node sets of the same size
+static uint64_t hash_node_ids(torch::Tensor node_ids) {
+    torch::Tensor ids = node_ids.to(torch::kCPU).to(torch::kInt64).contiguous();
+    const int64_t *data = ids.data_ptr<int64_t>();
+
+    uint64_t hash = 14695981039346656037ULL;
+    for (int64_t i = 0; i < ids.numel(); i++) {
+        hash = (hash ^ (uint64_t) data[i]) * 1099511628211ULL;
+    }
+    return hash;
+}
+
+string DataLoader::getOrderingCacheFile(shared_ptr<PartitionBufferOptions> options, torch::Tensor node_ids) {
+    if (ordering_cache_dir_.empty() || options->ordering_cache_size <= 0) {
+        return "";
+    }
+
+    std::stringstream name;
+    if (learning_task_ == LearningTask::LINK_PREDICTION) {
+        name << "edge_buckets_" << (int) options->edge_bucket_ordering << "_" << options->randomly_assign_edge_buckets;
+    } else {
+        // the nodes differ between training, validation and test
+        name << "nodes_" << (int) options->node_partition_ordering << "_" << (train_ ? "train" : "eval") << "_" << node_ids.size(0) << "_"
+             << std::hex << hash_node_ids(node_ids) << std::dec;
+    }
+
+    name << "_" << options->num_partitions << "_" << options->buffer_capacity << "_" << options->fine_to_coarse_ratio
+         << "_" << options->num_cache_partitions << "_" << at::detail::getDefaultCPUGenerator().current_seed()
+         << "_" << epochs_processed_ % options->ordering_cache_size << ".pt";
+
+    createDir(ordering_cache_dir_, true);
+    return ordering_cache_dir_ + name.str();
+}
+
+void DataLoader::saveRemainingOrdering(string filename) {
+    int64_t next_state;
+    vector<torch::Tensor>::iterator items_begin;
+    vector<torch::Tensor>::iterator items_end;
+
+    // the iterators point at the items of the buffer state after the one being processed
+    if (learning_task_ == LearningTask::LINK_PREDICTION) {
+        next_state = edge_buckets_per_buffer_iterator_ - edge_buckets_per_buffer_.begin();
+        items_begin = edge_buckets_per_buffer_iterator_;
+        items_end = edge_buckets_per_buffer_.end();
+    } else {
+        next_state = node_ids_per_buffer_iterator_ - node_ids_per_buffer_.begin();
+        items_begin = node_ids_per_buffer_iterator_;
+        items_end = node_ids_per_buffer_.end();
+    }
+
+    // saved as the remaining buffer states followed by their items
+    vector<torch::Tensor> ordering(buffer_states_.begin() + next_state, buffer_states_.end());
+    ordering.insert(ordering.end(), items_begin, items_end);
+
+    torch::save(ordering, filename);
+}
+
+void DataLoader::loadRemainingOrdering(string filename) {
+    vector<torch::Tensor> ordering;
+    torch::load(ordering, filename);
+
+    if (ordering.empty() || ordering.size() % 2 != 0) {
+        throw MariusRuntimeException("Invalid buffer ordering in " + filename);
+    }
+
+    int64_t num_states = ordering.size() / 2;
+    resume_buffer_states_ = vector<torch::Tensor>(ordering.begin(), ordering.begin() + num_states);
+    resume_items_per_buffer_ = vector<torch::Tensor>(ordering.begin() + num_states, ordering.end());
+}
+
 void DataLoader::clearBatches() {
-    batches_ = std::vector<shared_ptr<Batch>>();
+    num_batch_items_ = 0;
+    next_batch_start_idx_ = 0;
+    next_batch_id_ = 0;
 }
 
 shared_ptr<Batch> DataLoader::getNextBatch() {
@@ -310,23 +462,8 @@ shared_ptr<Batch> DataLoader::getNextBatch() {
     std::unique_lock batch_lock(*batch_lock_);
     batch_cv_->wait(batch_lock, [this] { return !waiting_for_batches_; });
 
-    shared_ptr<Batch> batch;
-    if (batch_iterator_ != batches_.end()) {
-        batch = *batch_iterator_;
-        batch_iterator_++;
-
-        // check if all batches have been read
-        if (batch_iterator_ == batches_.end()) {
-            if (graph_storage_->useInMemorySubGraph()) {
-                if (!graph_storage_->hasSwap()) {
-                    all_read_ = true;
-                }
-            } else {
-                all_read_ = true;
-            }
-        }
-    } else {
-        batch = nullptr;
+    shared_ptr<Batch> batch = createNextBatch();
+    if (batch == nullptr) {
         if (graph_storage_->useInMemorySubGraph()) {
             if (graph_storage_->hasSwap()) {
 
@@ -335,22 +472,20 @@ shared_ptr<Batch> DataLoader::getNextBatch() {
                 batch_cv_->wait(batch_lock, [this] { return batches_left_ == 0; });
                 waiting_for_batches_ = false;
 
-                graph_storage_->updateInMemorySubGraph();
+                if (train_ && !prepare_encode_) {
+                    buffer_states_processed_++;
+                    items_processed_ += num_batch_items_;
 
-                initializeBatches();
-                batch = *batch_iterator_;
-                batch_iterator_++;
-
-                // check if all batches have been read
-                if (batch_iterator_ == batches_.end()) {
-                    if (graph_storage_->useInMemorySubGraph()) {
-                        if (!graph_storage_->hasSwap()) {
-                            all_read_ = true;
-                        }
-                    } else {
-                        all_read_ = true;
+                    // all partitions evicted so far are on disk, which makes this a cheap point to checkpoint
+                    if (buffer_state_callback_) {
+                        buffer_state_callback_();
                     }
                 }
+
+                graph_storage_->updateInMemorySubGraph();
+
+                initializeBatches();
+                batch = createNextBatch();
             } else {
                 all_read_ = true;
             }
@@ -414,8 +549,28 @@ void DataLoader::edgeSample(shared_ptr<Batch> batch) {
         batch->edges_ = edge_sampler_->getEdges(batch);
     }
 
+    // edges_ holds buffer local ids when using the partition buffer, the outputs report the global ids
+    torch::Tensor local_to_global;
+    if (graph_storage_->useInMemorySubGraph()) {
+        local_to_global = graph_storage_->current_subgraph_state_->local_to_global_index_map_;
+    }
+
+    if (local_to_global.defined()) {
+        local_to_global = local_to_global.to(batch->edges_.device());
+        torch::Tensor global_edges = batch->edges_.to(torch::kInt64).clone();
+        global_edges.select(1, 0).copy_(local_to_global.index_select(0, global_edges.select(1, 0)));
+        global_edges.select(1, -1).copy_(local_to_global.index_select(0, global_edges.select(1, -1)));
+        batch->global_edges_ = global_edges;
+    } else {
+        batch->global_edges_ = batch->edges_;
+    }
+
     if (negative_sampler_ != nullptr) {
-        negativeSample(batch);
+        if (useBlockedRanking()) {
+            rankingSample(batch);
+        } else {
+            negativeSample(batch);
+        }
     }
 
     std::vector<torch::Tensor> all_ids = {batch->edges_.select(1, 0), batch->edges_.select(1, -1)};
@@ -503,6 +658,7 @@ void DataLoader::nodeSample(shared_ptr<Batch> batch) {
     } else {
         batch->root_node_indices_ = graph_storage_->getNodeIdsRange(batch->start_idx_, batch->batch_size_).to(torch::kInt64);
     }
+    batch->root_node_ids_ = batch->root_node_indices_;
 
     if (graph_storage_->storage_ptrs_.node_labels != nullptr) {
         batch->node_labels_ = graph_storage_->getNodeLabels(batch->root_node_indices_).flatten(0, 1);
@@ -525,12 +681,69 @@ void DataLoader::negativeSample(shared_ptr<Batch> batch) {
     std::tie(batch->dst_neg_indices_, batch->dst_neg_filter_) = negative_sampler_->getNegatives(graph_storage_->current_subgraph_state_->in_memory_subgraph_, batch->edges_, false);
 }
 
+bool DataLoader::useBlockedRanking() {
+    if (train_ || ranking_tile_size_ <= 0 || learning_task_ != LearningTask::LINK_PREDICTION || neighbor_sampler_ != nullptr) {
+        return false;
+    }
+
+    if (!instance_of<NegativeSampler, CorruptNodeNegativeSampler>(negative_sampler_)) {
+        return false;
+    }
+
+    // the filters of the sampled path are reproduced for global filtering and for degree based local filtering, which is empty without degree negatives
+    auto sampler = std::dynamic_pointer_cast<CorruptNodeNegativeSampler>(negative_sampler_);
+    return sampler->num_negatives_ == -1 && (sampler->filtered_ || sampler->local_filter_mode_ == LocalFilterMode::DEG);
+}
+
+void DataLoader::rankingSample(shared_ptr<Batch> batch) {
+    auto sampler = std::dynamic_pointer_cast<CorruptNodeNegativeSampler>(negative_sampler_);
+
+    batch->ranking_tile_size_ = ranking_tile_size_;
+
+    // stale partition buffer copies of pinned nodes are not candidates, as in negative sampling
+    shared_ptr<MariusGraph> graph = graph_storage_->current_subgraph_state_->in_memory_subgraph_;
+    Indices valid_node_ids = graph->valid_node_ids_;
+    if (valid_node_ids.defined()) {
+        batch->candidate_node_ids_ = valid_node_ids;
+    }
+
+    if (sampler->filtered_) {
+        // the global filter only depends on the number of chunks of the corruption nodes, not on the nodes themselves
+        torch::Tensor corruption_nodes = torch::empty({1, 0}, batch->edges_.options());
+        batch->src_neg_filter_ = compute_filter_corruption(graph, batch->edges_, corruption_nodes, true, true);
+        batch->dst_neg_filter_ = compute_filter_corruption(graph, batch->edges_, corruption_nodes, false, true);
+
+        if (valid_node_ids.defined()) {
+            // the global filter holds the ids of the filtered nodes, convert them to their position in the candidates
+            for (torch::Tensor filter : {batch->src_neg_filter_, batch->dst_neg_filter_}) {
+                filter.select(1, 1).copy_(torch::searchsorted(valid_node_ids.to(filter.device()), filter.select(1, 1).contiguous()));
+            }
+        }
+    }
+}
+
+void DataLoader::loadRankingCandidates(shared_ptr<Batch> batch, bool gpu) {
+    int64_t num_nodes = graph_storage_->current_subgraph_state_->in_memory_subgraph_->num_nodes_in_memory_;
+
+    if (graph_storage_->storage_ptrs_.node_embeddings != nullptr) {
+        if ((graph_storage_->storage_ptrs_.node_embeddings->device_ == torch::kCUDA) == gpu) {
+            batch->candidate_node_embeddings_ = graph_storage_->getNodeEmbeddingsTable().narrow(0, 0, num_nodes);
+        }
+    }
+
+    if (graph_storage_->storage_ptrs_.node_features != nullptr) {
+        if ((graph_storage_->storage_ptrs_.node_features->device_ == torch::kCUDA) == gpu) {
+            batch->candidate_node_features_ = graph_storage_->getNodeFeaturesTable().narrow(0, 0, num_nodes);
+        }
+    }
+}
+
 void DataLoader::loadCPUParameters(shared_ptr<Batch> batch) {
 
     if (graph_storage_->storage_ptrs_.node_embeddings != nullptr) {
         if (graph_storage_->storage_ptrs_.node_embeddings->device_ != torch::kCUDA) {
             batch->node_embeddings_ = graph_storage_->getNodeEmbeddings(batch->unique_node_indices_);
-            if (train_) {
+            if (train_ && !fused_sparse_update_) {
                 batch->node_embeddings_state_ = graph_storage_->getNodeEmbeddingState(batch->unique_node_indices_);
             }
         }
@@ -546,6 +759,10 @@ void DataLoader::loadCPUParameters(shared_ptr<Batch> batch) {
         }
     }
 
+    if (batch->ranking_tile_size_ > 0) {
+        loadRankingCandidates(batch, false);
+    }
+
     batch->status_ = BatchStatus::LoadedEmbeddings;
     batch->load_timestamp_ = timestamp_;
 }
@@ -554,7 +771,7 @@ void DataLoader::loadGPUParameters(shared_ptr<Batch> batch) {
     if (graph_storage_->storage_ptrs_.node_embeddings != nullptr) {
         if (graph_storage_->storage_ptrs_.node_embeddings->device_ == torch::kCUDA) {
             batch->node_embeddings_ = graph_storage_->getNodeEmbeddings(batch->unique_node_indices_);
-            if (train_) {
+            if (train_ && !fused_sparse_update_) {
                 batch->node_embeddings_state_ = graph_storage_->getNodeEmbeddingState(batch->unique_node_indices_);
             }
         }
@@ -570,24 +787,35 @@ void DataLoader::loadGPUParameters(shared_ptr<Batch> batch) {
             }
         }
     }
+
+    if (batch->ranking_tile_size_ > 0) {
+        loadRankingCandidates(batch, true);
+    }
 }
 
 void DataLoader::updateEmbeddings(shared_ptr<Batch> batch, bool gpu) {
     if (gpu) {
         if (graph_storage_->storage_ptrs_.node_embeddings->device_ == torch::kCUDA) {
-            graph_storage_->updateAddNodeEmbeddings(batch->unique_node_indices_, batch->node_gradients_);
-            graph_storage_->updateAddNodeEmbeddingState(batch->unique_node_indices_, batch->node_state_update_);
+            applyEmbeddingUpdates(batch);
         }
     } else {
         batch->host_transfer_.synchronize();
         if (graph_storage_->storage_ptrs_.node_embeddings->device_ != torch::kCUDA) {
-            graph_storage_->updateAddNodeEmbeddings(batch->unique_node_indices_, batch->node_gradients_);
-            graph_storage_->updateAddNodeEmbeddingState(batch->unique_node_indices_, batch->node_state_update_);
+            applyEmbeddingUpdates(batch);
         }
         batch->clear();
     }
 }
 
+void DataLoader::applyEmbeddingUpdates(shared_ptr<Batch> batch) {
+    if (batch->node_state_update_.defined()) {
+        graph_storage_->updateAddNodeEmbeddings(batch->unique_node_indices_, batch->node_gradients_);
+        graph_storage_->updateAddNodeEmbeddingState(batch->unique_node_indices_, batch->node_state_update_);
+    } else {
+        graph_storage_->updateNodeEmbeddingsSparseAdagrad(batch->unique_node_indices_, batch->node_gradients_, batch->sparse_learning_rate_);
+    }
+}
+
 void DataLoader::loadStorage() {
     setBufferOrdering();
     graph_storage_->load();
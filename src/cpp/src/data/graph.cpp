@@ -104,10 +104,14 @@ void MariusGraph::clear() {
     in_num_neighbors_ = torch::Tensor();
     all_src_sorted_edges_ = torch::Tensor();
     all_dst_sorted_edges_ = torch::Tensor();
+    valid_node_ids_ = torch::Tensor();
 }
 
 void MariusGraph::to(torch::Device device) {
     node_ids_ = node_ids_.to(device);
+    if (valid_node_ids_.defined()) {
+        valid_node_ids_ = valid_node_ids_.to(device);
+    }
     src_sorted_edges_ = src_sorted_edges_.to(device);
     dst_sorted_edges_ = dst_sorted_edges_.to(device);
     out_sorted_uniques_= out_sorted_uniques_.to(device);
@@ -7,6 +7,11 @@
 
 #include "data/ordering.h"
 
+#include <unistd.h>
+
+#include <algorithm>
+#include <iterator>
+
 #include "common/datatypes.h"
 #include "reporting/logger.h"
 
@@ -83,77 +88,108 @@ std::tuple<vector<torch::Tensor>, vector<torch::Tensor>> convertEdgeBucketOrderT
     return std::forward_as_tuple(ret_buffer_states, ret_edge_buckets_per_buffer);
 }
 
+// permutes the values with a torch generated permutation, so that orderings only depend on the torch seed
+static void permute(vector<int> &values) {
+    torch::Tensor perm = torch::randperm(values.size(), torch::kInt64);
+    auto perm_accessor = perm.accessor<int64_t, 1>();
+
+    vector<int> permuted(values.size());
+    for (int i = 0; i < values.size(); i++) {
+        permuted[i] = values[perm_accessor[i]];
+    }
+    values = permuted;
+}
+
 vector<vector<int>> getBetaOrderingHelper(int num_partitions, int buffer_capacity) {
     vector<vector<int>> buffer_states;
     Indices all_partitions = torch::randperm(num_partitions, torch::kInt32);
+    int *data_ptr_ = (int *) all_partitions.data_ptr();
 
     // get all buffer states
-    Indices in_buffer = all_partitions.index_select(0, torch::arange(buffer_capacity));
-
-    Indices combined = torch::cat({all_partitions, in_buffer});
-    auto uniques = torch::_unique2(combined, true, false, true);
-    auto vals = std::get<0>(uniques);
-    auto counts = std::get<2>(uniques);
-    Indices on_disk = vals.masked_select(counts == 1);
-
-    int *data_ptr_ = (int *) in_buffer.data_ptr();
-    buffer_states.emplace_back(vector<int>(data_ptr_, data_ptr_ + in_buffer.size(0)));
+    vector<int> in_buffer(data_ptr_, data_ptr_ + buffer_capacity);
+    vector<int> on_disk(data_ptr_ + buffer_capacity, data_ptr_ + num_partitions);
+    std::sort(on_disk.begin(), on_disk.end());
 
-    while (on_disk.size(0) >= 1) {
-        in_buffer = in_buffer.index_select(0, torch::randperm(in_buffer.size(0), torch::kInt64));
-        on_disk = on_disk.index_select(0, torch::randperm(on_disk.size(0), torch::kInt64));
+    buffer_states.emplace_back(in_buffer);
 
-        for (int i = 0; i < on_disk.size(0); i++) {
-            auto admit_id = on_disk[i].clone();
+    while (on_disk.size() >= 1) {
+        permute(in_buffer);
+        permute(on_disk);
 
-            on_disk[i] = in_buffer[-1];
+        for (int i = 0; i < on_disk.size(); i++) {
+            int admit_id = on_disk[i];
+            on_disk[i] = in_buffer.back();
+            in_buffer.back() = admit_id;
 
-            in_buffer[-1] = admit_id;
-
-            data_ptr_ = (int *) in_buffer.data_ptr();
-            buffer_states.emplace_back(vector<int>(data_ptr_, data_ptr_ + in_buffer.size(0)));
+            buffer_states.emplace_back(in_buffer);
         }
 
-        on_disk = on_disk.index_select(0, torch::randperm(on_disk.size(0), torch::kInt64));
+        permute(on_disk);
 
         int num_replaced = 0;
         for (int i = 0; i < buffer_capacity - 1; i++) {
-            if (i >= on_disk.size(0)) {
+            if (i >= on_disk.size()) {
                 break;
             }
             num_replaced++;
             in_buffer[i] = on_disk[i];
 
-            data_ptr_ = (int *) in_buffer.data_ptr();
-            buffer_states.emplace_back(vector<int>(data_ptr_, data_ptr_ + in_buffer.size(0)));
+            buffer_states.emplace_back(in_buffer);
         }
-        on_disk = on_disk.narrow(0, num_replaced, on_disk.size(0) - num_replaced);
+        on_disk.erase(on_disk.begin(), on_disk.begin() + num_replaced);
     }
 
     return buffer_states;
 }
 
+// for each partition, the ids of the buffer states which hold it, in increasing order
+static vector<vector<int>> getBufferStatesPerPartition(const vector<vector<int>> &buffer_states, int num_partitions) {
+    vector<vector<int>> states_per_partition(num_partitions);
+    for (int i = 0; i < buffer_states.size(); i++) {
+        for (int partition : buffer_states[i]) {
+            states_per_partition[partition].emplace_back(i);
+        }
+    }
+    return states_per_partition;
+}
+
+// ids of the buffer states which hold both partitions of an edge bucket, in increasing order
+static void getCommonBufferStates(const vector<int> &src_states, const vector<int> &dst_states, vector<int> &common) {
+    common.clear();
+    std::set_intersection(src_states.begin(), src_states.end(), dst_states.begin(), dst_states.end(), std::back_inserter(common));
+}
+
 vector<vector<std::pair<int, int>>> greedyAssignEdgeBucketsToBuffers(vector<vector<int>> buffer_states,
                                                                      int num_partitions) {
 
+    // each edge bucket is assigned to the first buffer state which holds both of its partitions
+    vector<vector<int>> states_per_partition = getBufferStatesPerPartition(buffer_states, num_partitions);
+    vector<int> first_state((int64_t) num_partitions * num_partitions, -1);
+
+    #pragma omp parallel for
+    for (int src_part = 0; src_part < num_partitions; src_part++) {
+        vector<int> common;
+        for (int dst_part = 0; dst_part < num_partitions; dst_part++) {
+            getCommonBufferStates(states_per_partition[src_part], states_per_partition[dst_part], common);
+            if (!common.empty()) {
+                first_state[(int64_t) src_part * num_partitions + dst_part] = common[0];
+            }
+        }
+    }
+
     vector<vector<std::pair<int, int>>> edge_buckets_per_buffer(buffer_states.size());
-    torch::Tensor interacted = torch::zeros({num_partitions, num_partitions}, torch::kInt32);
-    auto interacted_accessor = interacted.accessor<int32_t, 2>();
 
+    #pragma omp parallel for
     for (int i = 0; i < buffer_states.size(); i++) {
-
         for (int j = 0; j < buffer_states[i].size(); j++) {
             for (int k = 0; k < buffer_states[i].size(); k++) {
                 int32_t src_part = buffer_states[i][j];
                 int32_t dst_part = buffer_states[i][k];
-                if (interacted_accessor[src_part][dst_part] == 1) {
-                    continue;
+                if (first_state[(int64_t) src_part * num_partitions + dst_part] == i) {
+                    edge_buckets_per_buffer[i].emplace_back(std::make_pair(src_part, dst_part));
                 }
-                interacted_accessor[src_part][dst_part] = 1;
-                edge_buckets_per_buffer[i].emplace_back(std::make_pair(src_part, dst_part));
             }
         }
-
     }
 
     return edge_buckets_per_buffer;
@@ -162,37 +198,12 @@ vector<vector<std::pair<int, int>>> greedyAssignEdgeBucketsToBuffers(vector<vect
 vector<vector<std::pair<int, int>>> randomlyAssignEdgeBucketsToBuffers(vector<vector<int>> buffer_states,
                                                                        int num_partitions) {
 
-    // get edge buckets from buffer states
-    Indices all_partitions = torch::arange(num_partitions, torch::kInt32);
-    torch::Tensor left_col = all_partitions.repeat_interleave(num_partitions);
-    torch::Tensor right_col  = all_partitions.repeat({num_partitions});
-    torch::Tensor all_buckets = torch::stack({left_col, right_col}, 1);
-    auto all_buckets_accessor = all_buckets.accessor<int32_t, 2>();
+    // each edge bucket is assigned to a random buffer state which holds both of its partitions
+    vector<vector<int>> states_per_partition = getBufferStatesPerPartition(buffer_states, num_partitions);
 
     int num_buffers = buffer_states.size();
-    int buffer_size = buffer_states[0].size();
-    int num_buckets = all_buckets.size(0);
-
-    torch::Tensor choices = torch::zeros({num_buckets, num_buffers}, torch::kInt32);
-    int32_t *choices_mem = choices.data_ptr<int32_t>();
-
-    #pragma omp parallel for
-    for (int i = 0; i < num_buffers; i++) {
-        for (int j = 0; j < buffer_size; j++) {
-            for (int k = j; k < buffer_size; k++) {
-                int src_part = buffer_states[i][j];
-                int dst_part = buffer_states[i][k];
-                *(choices_mem + (src_part*num_partitions + dst_part)*num_buffers + i) = 1;
-                *(choices_mem + (dst_part*num_partitions + src_part)*num_buffers + i) = 1;
-            }
-        }
-    }
-
-    torch::Tensor pick = torch::zeros({num_buckets}, torch::kInt32);
-    torch::Tensor pick_one_hot = torch::zeros({num_buckets, num_buffers}, torch::kInt32);
-    int32_t *pick_mem = pick.data_ptr<int32_t>();
-    int32_t *pick_one_hot_mem = pick_one_hot.data_ptr<int32_t>();
-    auto pick_accessor = pick.accessor<int32_t, 1>();
+    int64_t num_buckets = (int64_t) num_partitions * num_partitions;
+    vector<int> pick(num_buckets, -1);
 
     // setup seeds
     unsigned int num_threads = 1;
@@ -218,36 +229,36 @@ vector<vector<std::pair<int, int>>> randomlyAssignEdgeBucketsToBuffers(vector<ve
         unsigned int seed = tid_seeds[0];
         #endif
 
+        vector<int> common;
+
         #pragma omp for
-        for (int i = 0; i < num_buckets; i++) {
-            torch::Tensor buffer_choices = torch::nonzero(choices[i]);
-            buffer_choices = torch::reshape(buffer_choices, {buffer_choices.size(0)});
-            int32_t buffer_choice = buffer_choices[rand_r(&seed) % buffer_choices.size(0)].item<int32_t>();
-
-            int32_t src_part = all_buckets_accessor[i][0];
-            int32_t dst_part = all_buckets_accessor[i][1];
-            *(pick_mem + (src_part*num_partitions + dst_part)) = buffer_choice;
-            *(pick_one_hot_mem + (src_part*num_partitions + dst_part)*num_buffers + buffer_choice) = 1;
+        for (int64_t i = 0; i < num_buckets; i++) {
+            int32_t src_part = i / num_partitions;
+            int32_t dst_part = i % num_partitions;
+
+            getCommonBufferStates(states_per_partition[src_part], states_per_partition[dst_part], common);
+            if (!common.empty()) {
+                pick[i] = common[rand_r(&seed) % common.size()];
+            }
         }
     }
 
-    torch::Tensor num_edge_buckets_per_buffer = torch::sum(pick_one_hot, 0);
+    vector<int64_t> num_edge_buckets_per_buffer(num_buffers, 0);
+    for (int64_t i = 0; i < num_buckets; i++) {
+        if (pick[i] == -1) {
+            throw MariusRuntimeException("Edge bucket (" + std::to_string(i / num_partitions) + ", " + std::to_string(i % num_partitions) +
+                                         ") is not covered by any buffer state");
+        }
+        num_edge_buckets_per_buffer[pick[i]]++;
+    }
 
     vector<vector<std::pair<int, int>>> edge_buckets_per_buffer(num_buffers);
     for (int i = 0; i < num_buffers; i++) {
-        edge_buckets_per_buffer[i] = vector<std::pair<int, int>>(num_edge_buckets_per_buffer[i].item<int>());
+        edge_buckets_per_buffer[i].reserve(num_edge_buckets_per_buffer[i]);
     }
 
-    vector<int> indices(num_buffers, 0);
-    for (int i = 0; i < num_buckets; i++) {
-        int32_t src_part = all_buckets_accessor[i][0];
-        int32_t dst_part = all_buckets_accessor[i][1];
-        std::pair<int, int> pair = std::make_pair(src_part, dst_part);
-
-        int32_t buffer_choice = pick_accessor[i];
-
-        edge_buckets_per_buffer[buffer_choice][indices[buffer_choice]] = pair;
-        indices[buffer_choice] += 1;
+    for (int64_t i = 0; i < num_buckets; i++) {
+        edge_buckets_per_buffer[pick[i]].emplace_back(std::make_pair((int) (i / num_partitions), (int) (i % num_partitions)));
     }
 
     return edge_buckets_per_buffer;
@@ -374,37 +385,35 @@ std::tuple<vector<torch::Tensor>, vector<torch::Tensor>> getDispersedNodePartiti
     int64_t partition_size = ceil((double) total_num_nodes / num_partitions);
     torch::Tensor train_nodes_partition = train_nodes.divide(partition_size, "trunc");
 
-    std::vector<std::vector<int>> partition_buffer_states(num_partitions);
-
-    for (int i = 0; i < num_partitions; i++) {
-        for (int j = 0; j < buffer_states.size(); j++) {
-            bool partition_in_buffer = false;
-            auto buffer_state_accessor = buffer_states[j].accessor<int32_t, 1>();
-
-            for (int k = 0; k < buffer_capacity; k++) {
-                if (buffer_state_accessor[k] == i) {
-                    partition_in_buffer = true;
-                    break;
-                }
-            }
-            if (partition_in_buffer) {
-                partition_buffer_states[i].emplace_back(j);
-            }
-        }
+    vector<vector<int>> buffer_state_vectors(buffer_states.size());
+    for (int i = 0; i < buffer_states.size(); i++) {
+        int *state_ptr = (int *) buffer_states[i].data_ptr();
+        buffer_state_vectors[i] = vector<int>(state_ptr, state_ptr + buffer_states[i].size(0));
     }
+    vector<vector<int>> partition_buffer_states = getBufferStatesPerPartition(buffer_state_vectors, num_partitions);
 
-    torch::Tensor train_nodes_buffer_choice = torch::zeros_like(train_nodes);
-    std::vector<torch::Tensor> train_nodes_per_buffer(buffer_states.size());
-    auto train_nodes_partition_accessor = train_nodes_partition.accessor<int32_t, 1>(); //todo
+    torch::Tensor train_nodes_buffer_choice = torch::empty({train_nodes.size(0)}, torch::kInt64);
+    auto train_nodes_buffer_choice_accessor = train_nodes_buffer_choice.accessor<int64_t, 1>();
+    train_nodes_partition = train_nodes_partition.to(torch::kInt64);
+    auto train_nodes_partition_accessor = train_nodes_partition.accessor<int64_t, 1>();
 
-    for (int i = 0; i < train_nodes.size(0); i++) {
+    for (int64_t i = 0; i < train_nodes.size(0); i++) {
         int partition_id = train_nodes_partition_accessor[i];
         int rand_id = rand() % partition_buffer_states[partition_id].size();
-        train_nodes_buffer_choice[i] = partition_buffer_states[partition_id][rand_id];
+        train_nodes_buffer_choice_accessor[i] = partition_buffer_states[partition_id][rand_id];
     }
 
+    // group the train nodes by buffer state, keeping their order within each state
+    auto sorted = torch::sort(train_nodes_buffer_choice, c10::optional<bool>(true), 0, false);
+    torch::Tensor grouped_train_nodes = train_nodes.index_select(0, std::get<1>(sorted));
+    torch::Tensor counts = torch::bincount(train_nodes_buffer_choice, {}, buffer_states.size());
+    auto counts_accessor = counts.accessor<int64_t, 1>();
+
+    std::vector<torch::Tensor> train_nodes_per_buffer(buffer_states.size());
+    int64_t offset = 0;
     for (int i = 0; i < buffer_states.size(); i++) {
-        train_nodes_per_buffer[i] = train_nodes.masked_select(train_nodes_buffer_choice == i);
+        train_nodes_per_buffer[i] = grouped_train_nodes.narrow(0, offset, counts_accessor[i]);
+        offset += counts_accessor[i];
     }
 
     return std::forward_as_tuple(buffer_states, train_nodes_per_buffer);
@@ -449,3 +458,57 @@ std::tuple<vector<torch::Tensor>, vector<torch::Tensor>> getCustomEdgeBucketOrde
     return ret;
 }
 
+// concatenates the tensors along the first dimension, the returned offsets hold the start of each tensor followed by the total size
+static std::tuple<torch::Tensor, torch::Tensor> packTensors(vector<torch::Tensor> tensors) {
+    torch::Tensor offsets = torch::zeros({(int64_t) tensors.size() + 1}, torch::kInt64);
+    auto offsets_accessor = offsets.accessor<int64_t, 1>();
+
+    for (int i = 0; i < tensors.size(); i++) {
+        offsets_accessor[i + 1] = offsets_accessor[i] + tensors[i].size(0);
+    }
+
+    torch::Tensor packed = tensors.empty() ? torch::empty({0}, torch::kInt64) : torch::cat(tensors);
+    return std::forward_as_tuple(packed, offsets);
+}
+
+static vector<torch::Tensor> unpackTensors(torch::Tensor packed, torch::Tensor offsets) {
+    auto offsets_accessor = offsets.accessor<int64_t, 1>();
+
+    vector<torch::Tensor> tensors;
+    for (int i = 0; i < offsets.size(0) - 1; i++) {
+        tensors.emplace_back(packed.narrow(0, offsets_accessor[i], offsets_accessor[i + 1] - offsets_accessor[i]));
+    }
+    return tensors;
+}
+
+void saveOrdering(string filename, vector<torch::Tensor> buffer_states, vector<torch::Tensor> items_per_buffer) {
+    auto states = packTensors(buffer_states);
+    auto items = packTensors(items_per_buffer);
+
+    vector<torch::Tensor> ordering = {std::get<0>(states), std::get<1>(states), std::get<0>(items), std::get<1>(items)};
+
+    // concurrent runs may share the cache, so the file is written under a temporary name and renamed
+    string tmp_filename = filename + ".tmp" + std::to_string(getpid());
+    torch::save(ordering, tmp_filename);
+    if (rename(tmp_filename.c_str(), filename.c_str()) != 0) {
+        throw MariusRuntimeException("Unable to save buffer ordering to " + filename);
+    }
+}
+
+std::tuple<vector<torch::Tensor>, vector<torch::Tensor>> loadOrdering(string filename) {
+    vector<torch::Tensor> ordering;
+    torch::load(ordering, filename);
+
+    if (ordering.size() != 4) {
+        throw MariusRuntimeException("Invalid buffer ordering in " + filename);
+    }
+
+    vector<torch::Tensor> buffer_states = unpackTensors(ordering[0], ordering[1]);
+    vector<torch::Tensor> items_per_buffer = unpackTensors(ordering[2], ordering[3]);
+
+    if (buffer_states.size() != items_per_buffer.size()) {
+        throw MariusRuntimeException("Invalid buffer ordering in " + filename);
+    }
+
+    return std::forward_as_tuple(buffer_states, items_per_buffer);
+}
@@ -346,10 +346,20 @@ std::tuple<torch::Tensor, torch::Tensor> CorruptNodeNegativeSampler::getNegative
 
     torch::TensorOptions ind_opts = torch::TensorOptions().dtype(torch::kInt64).device(edges.device());
 
+    // rows outside of valid_node_ids_ (e.g. stale partition buffer copies of pinned nodes) are never returned as negatives
+    Indices valid_node_ids = graph->valid_node_ids_;
+    if (valid_node_ids.defined()) {
+        valid_node_ids = valid_node_ids.to(edges.device());
+        num_nodes = valid_node_ids.size(0);
+    }
+
     // sample uniform nodes
     for (int j = 0; j < num_chunks_; j++) {
         if (num_negatives_ != -1) {
             ret_indices[j] = torch::randint(num_nodes, {num_uni}, ind_opts);
+            if (valid_node_ids.defined()) {
+                ret_indices[j] = valid_node_ids.index_select(0, ret_indices[j]);
+            }
 
             if (degree_fraction_ > 0) {
                 auto tup = batch_sample(edges, num_batch, inverse);
@@ -361,6 +371,8 @@ std::tuple<torch::Tensor, torch::Tensor> CorruptNodeNegativeSampler::getNegative
                     deg_sample_indices_vec[j] = sample_edge_id;
                 }
             }
+        } else if (valid_node_ids.defined()) {
+            ret_indices[j] = valid_node_ids;
         } else {
             ret_indices[j] = torch::arange(num_nodes, ind_opts);
         }
@@ -373,5 +385,10 @@ std::tuple<torch::Tensor, torch::Tensor> CorruptNodeNegativeSampler::getNegative
     }
     torch::Tensor score_filter = compute_filter_corruption(graph, edges, output_ids, inverse, filtered_,
                                                            local_filter_mode_, deg_sample_indices);
+
+    if (filtered_ && valid_node_ids.defined()) {
+        // the global filter holds the ids of the filtered nodes, convert them to their column in output_ids
+        score_filter.select(1, 1).copy_(torch::searchsorted(valid_node_ids, score_filter.select(1, 1).contiguous()));
+    }
     return std::forward_as_tuple(output_ids, score_filter);
 }
\ No newline at end of file
@@ -55,6 +55,8 @@ std::tuple<shared_ptr<Model>, shared_ptr<GraphModelStorage>, shared_ptr<DataLoad
     shared_ptr<GraphModelStorage> graph_model_storage;
 
     int epochs_processed = 0;
+    CheckpointMeta resume_meta;
+    string resume_dir;
 
     if (train) {
         // initialize new model
@@ -73,6 +75,14 @@ std::tuple<shared_ptr<Model>, shared_ptr<GraphModelStorage>, shared_ptr<DataLoad
             string checkpoint_dir = marius_config->storage->model_dir;
             if (!marius_config->training->resume_from_checkpoint.empty()) {
                 checkpoint_dir = marius_config->training->resume_from_checkpoint;
+            } else {
+                // training may have been interrupted after the last checkpoint was written
+                string latest_checkpoint = checkpoint_loader->latestCheckpoint(marius_config->storage->model_dir);
+                if (!latest_checkpoint.empty()) {
+                    SPDLOG_INFO("Resuming from {}, which is newer than the saved model", latest_checkpoint);
+                    checkpoint_loader->copyTables(latest_checkpoint, marius_config->storage->model_dir);
+                    checkpoint_dir = latest_checkpoint;
+                }
             }
 
             auto tup = checkpoint_loader->load(checkpoint_dir, marius_config, true);
@@ -81,6 +91,8 @@ std::tuple<shared_ptr<Model>, shared_ptr<GraphModelStorage>, shared_ptr<DataLoad
 
             CheckpointMeta checkpoint_meta = std::get<2>(tup);
             epochs_processed = checkpoint_meta.num_epochs;
+            resume_meta = checkpoint_meta;
+            resume_dir = checkpoint_dir;
         }
     } else {
         auto checkpoint_loader = std::make_shared<Checkpointer>();
@@ -104,6 +116,14 @@ std::tuple<shared_ptr<Model>, shared_ptr<GraphModelStorage>, shared_ptr<DataLoad
                                                                      marius_config->model->encoder);
 
     dataloader->epochs_processed_ = epochs_processed;
+    dataloader->ordering_cache_dir_ = marius_config->storage->model_dir + PathConstants::orderings_directory;
+
+    if (resume_meta.buffer_states_processed > 0) {
+        SPDLOG_INFO("Resuming epoch {} after {} buffer states ({} processed)", epochs_processed + 1, resume_meta.buffer_states_processed, resume_meta.items_processed);
+        dataloader->loadRemainingOrdering(resume_dir + PathConstants::checkpoint_ordering_file);
+        dataloader->buffer_states_processed_ = resume_meta.buffer_states_processed;
+        dataloader->items_processed_ = resume_meta.items_processed;
+    }
 
     initialization_timer.stop();
     int64_t initialization_time = initialization_timer.getDuration();
@@ -145,6 +165,19 @@ void marius_train(shared_ptr<MariusConfig> marius_config) {
     }
 
     int checkpoint_interval = marius_config->training->checkpoint->interval;
+
+    int buffer_state_interval = marius_config->training->checkpoint->buffer_state_interval;
+    if (model_saver != nullptr && buffer_state_interval > 0 && graph_model_storage->useInMemorySubGraph()) {
+        dataloader->buffer_state_callback_ = [&]() {
+            if (dataloader->buffer_states_processed_ % buffer_state_interval == 0) {
+                CheckpointMeta sub_epoch_metadata = metadata;
+                sub_epoch_metadata.num_epochs = dataloader->epochs_processed_;
+                sub_epoch_metadata.buffer_states_processed = dataloader->buffer_states_processed_;
+                sub_epoch_metadata.items_processed = dataloader->items_processed_;
+                model_saver->create_checkpoint(marius_config->storage->model_dir, sub_epoch_metadata, dataloader->epochs_processed_, dataloader);
+            }
+        };
+    }
     for (int epoch = 0; epoch < marius_config->training->num_epochs; epoch++) {
         trainer->train(1);
 
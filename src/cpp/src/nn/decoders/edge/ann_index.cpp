@@ -0,0 +1,183 @@
+#include "nn/decoders/edge/ann_index.h"
+
+#include <limits>
+
+IVFIndex::IVFIndex(shared_ptr<EdgeDecoder> decoder, int64_t num_lists, int64_t num_probes) {
+    if (decoder == nullptr) {
+        throw MariusRuntimeException("An edge decoder is required to score index queries");
+    }
+
+    if (num_lists <= 0 || num_probes <= 0) {
+        throw MariusRuntimeException("Number of lists and number of probes must be positive");
+    }
+
+    decoder_ = decoder;
+    num_lists_ = num_lists;
+    num_probes_ = num_probes;
+}
+
+IVFIndex::IVFIndex(shared_ptr<EdgeDecoder> decoder,
+                   torch::Tensor centroids,
+                   torch::Tensor list_offsets,
+                   torch::Tensor list_ids,
+                   torch::Tensor list_embeddings,
+                   int64_t num_probes) : IVFIndex(decoder, centroids.size(0), num_probes) {
+
+    if (list_offsets.size(0) != centroids.size(0) + 1) {
+        throw TensorSizeMismatchException(list_offsets, "List offsets must have one more entry than the number of centroids");
+    }
+
+    if (list_ids.size(0) != list_embeddings.size(0)) {
+        throw TensorSizeMismatchException(list_ids, "Each node in the index must have an embedding");
+    }
+
+    centroids_ = centroids;
+    list_offsets_ = list_offsets.to(torch::kInt64);
+    list_ids_ = list_ids.to(torch::kInt64);
+    list_embeddings_ = list_embeddings;
+
+    node_positions_ = torch::empty_like(list_ids_);
+    node_positions_.index_put_({list_ids_}, torch::arange(list_ids_.size(0), list_ids_.options()));
+}
+
+// index of the closest centroid to each embedding, (x - c)^2 = x^2 - 2*x*c + c^2 where x^2 does not change the argmin
+static torch::Tensor assign_to_centroids(torch::Tensor embeddings, torch::Tensor centroids) {
+    torch::Tensor distances = centroids.pow(2).sum(1).unsqueeze(0) - 2 * torch::matmul(embeddings, centroids.transpose(0, 1));
+    return distances.argmin(1);
+}
+
+void IVFIndex::build(torch::Tensor embeddings, int64_t num_iterations, int64_t sample_size, int64_t chunk_size) {
+    torch::NoGradGuard no_grad;
+
+    int64_t num_nodes = embeddings.size(0);
+    if (num_nodes < num_lists_) {
+        throw MariusRuntimeException("Number of lists must not exceed the number of nodes in the index");
+    }
+
+    // centroids are trained on a random sample, reading only the sampled rows of memory mapped embeddings
+    torch::Tensor sample_ids = torch::randperm(num_nodes, torch::kInt64).narrow(0, 0, std::min(std::max(sample_size, num_lists_), num_nodes));
+    torch::Tensor sample = embeddings.index_select(0, std::get<0>(sample_ids.sort())).to(torch::kFloat32);
+
+    centroids_ = sample.index_select(0, torch::randperm(sample.size(0), torch::kInt64).narrow(0, 0, num_lists_)).clone();
+
+    for (int64_t iter = 0; iter < num_iterations; iter++) {
+        torch::Tensor assignments = assign_to_centroids(sample, centroids_);
+
+        torch::Tensor sums = torch::zeros_like(centroids_).index_add_(0, assignments, sample);
+        torch::Tensor counts = torch::bincount(assignments, {}, num_lists_);
+
+        torch::Tensor non_empty = counts > 0;
+        centroids_ = torch::where(non_empty.unsqueeze(1), sums / counts.clamp_min(1).unsqueeze(1).to(sums.dtype()), centroids_);
+
+        // empty lists are reseeded with random nodes of the sample
+        int64_t num_empty = num_lists_ - non_empty.sum().item<int64_t>();
+        if (num_empty > 0) {
+            torch::Tensor empty_ids = torch::nonzero(~non_empty).flatten();
+            torch::Tensor reseed = torch::randint(sample.size(0), {num_empty}, torch::kInt64);
+            centroids_.index_copy_(0, empty_ids, sample.index_select(0, reseed));
+        }
+    }
+
+    std::vector<torch::Tensor> all_assignments;
+    for (int64_t offset = 0; offset < num_nodes; offset += chunk_size) {
+        int64_t size = std::min(chunk_size, num_nodes - offset);
+        all_assignments.emplace_back(assign_to_centroids(embeddings.narrow(0, offset, size).to(torch::kFloat32), centroids_));
+    }
+    torch::Tensor assignments = torch::cat(all_assignments);
+
+    list_ids_ = std::get<1>(torch::sort(assignments, true, 0, false));
+    list_offsets_ = torch::cat({torch::zeros({1}, torch::kInt64), torch::bincount(assignments, {}, num_lists_).cumsum(0)});
+
+    std::vector<torch::Tensor> grouped;
+    for (int64_t offset = 0; offset < num_nodes; offset += chunk_size) {
+        int64_t size = std::min(chunk_size, num_nodes - offset);
+        grouped.emplace_back(embeddings.index_select(0, list_ids_.narrow(0, offset, size)).to(torch::kFloat32));
+    }
+    list_embeddings_ = torch::cat(grouped);
+
+    node_positions_ = torch::empty_like(list_ids_);
+    node_positions_.index_put_({list_ids_}, torch::arange(num_nodes, list_ids_.options()));
+}
+
+std::tuple<torch::Tensor, torch::Tensor> IVFIndex::search(torch::Tensor queries, int64_t k) {
+    torch::NoGradGuard no_grad;
+
+    if (!centroids_.defined()) {
+        throw MariusRuntimeException("Index must be built before it is searched");
+    }
+
+    if (k <= 0) {
+        throw MariusRuntimeException("Number of candidates to return must be positive");
+    }
+
+    queries = queries.to(centroids_.device()).to(torch::kFloat32);
+    int64_t num_queries = queries.size(0);
+
+    torch::Tensor centroid_scores = decoder_->compute_scores(queries, centroids_.unsqueeze(0));
+    torch::Tensor probes = std::get<1>(torch::topk(centroid_scores, std::min(num_probes_, num_lists_), 1)).to(torch::kCPU);
+
+    torch::Tensor scores = torch::full({num_queries, k}, -std::numeric_limits<float>::infinity(), torch::kFloat32);
+    torch::Tensor ids = torch::full({num_queries, k}, -1, torch::kInt64);
+
+    auto probes_accessor = probes.accessor<int64_t, 2>();
+    auto offsets_accessor = list_offsets_.accessor<int64_t, 1>();
+
+    // each query scores the members of its own probed lists, so queries are independent
+    #pragma omp parallel for
+    for (int64_t query_id = 0; query_id < num_queries; query_id++) {
+        torch::NoGradGuard thread_no_grad;
+
+        std::vector<torch::Tensor> candidate_embeddings;
+        std::vector<torch::Tensor> candidate_ids;
+
+        for (int64_t j = 0; j < probes.size(1); j++) {
+            int64_t list_id = probes_accessor[query_id][j];
+            int64_t start = offsets_accessor[list_id];
+            int64_t size = offsets_accessor[list_id + 1] - start;
+
+            if (size > 0) {
+                candidate_embeddings.emplace_back(list_embeddings_.narrow(0, start, size));
+                candidate_ids.emplace_back(list_ids_.narrow(0, start, size));
+            }
+        }
+
+        if (candidate_embeddings.empty()) {
+            continue;
+        }
+
+        torch::Tensor candidates = torch::cat(candidate_embeddings).to(queries.device());
+        torch::Tensor query_scores = decoder_->compute_scores(queries.narrow(0, query_id, 1), candidates.unsqueeze(0)).flatten();
+
+        auto top = torch::topk(query_scores, std::min(k, query_scores.size(0)));
+        int64_t num_found = std::get<0>(top).size(0);
+
+        scores[query_id].narrow(0, 0, num_found).copy_(std::get<0>(top));
+        ids[query_id].narrow(0, 0, num_found).copy_(torch::cat(candidate_ids).index_select(0, std::get<1>(top).to(torch::kCPU)));
+    }
+
+    return std::forward_as_tuple(scores, ids);
+}
+
+std::tuple<torch::Tensor, torch::Tensor> IVFIndex::query(torch::Tensor node_ids, torch::Tensor relation_ids, int64_t k, bool inverse) {
+    torch::NoGradGuard no_grad;
+
+    if (!node_positions_.defined()) {
+        throw MariusRuntimeException("Index must be built before it is queried");
+    }
+
+    torch::Tensor queries = list_embeddings_.index_select(0, node_positions_.index_select(0, node_ids.to(torch::kInt64)));
+
+    if (relation_ids.defined() && decoder_->relations_.defined()) {
+        torch::Tensor relations = decoder_->select_relations(relation_ids.to(torch::kInt64).to(decoder_->relations_.device()), inverse);
+        queries = decoder_->apply_relation(queries.to(relations.device()), relations);
+    }
+
+    return search(queries, k);
+}
+
+int64_t IVFIndex::getNumNodes() {
+    if (!list_ids_.defined()) {
+        return 0;
+    }
+    return list_ids_.size(0);
+}
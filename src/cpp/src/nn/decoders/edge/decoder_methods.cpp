@@ -4,6 +4,8 @@
 
 #include "nn/decoders/edge/decoder_methods.h"
 
+#include <limits>
+
 std::tuple<torch::Tensor, torch::Tensor> only_pos_forward(shared_ptr<EdgeDecoder> decoder,
                                                           torch::Tensor edges,
                                                           torch::Tensor node_embeddings) {
@@ -152,4 +154,129 @@ std::tuple<torch::Tensor, torch::Tensor, torch::Tensor, torch::Tensor> rel_corru
     }
 
     return std::forward_as_tuple(pos_scores, neg_scores, inv_pos_scores, inv_neg_scores);
-}
\ No newline at end of file
+}
+
+std::vector<torch::Tensor> node_corrupt_ranks_blocked(shared_ptr<EdgeDecoder> decoder,
+                                                      std::vector<torch::Tensor> queries,
+                                                      std::vector<torch::Tensor> pos_scores,
+                                                      std::vector<torch::Tensor> filters,
+                                                      std::function<torch::Tensor(int64_t, int64_t)> get_candidates,
+                                                      int64_t num_candidates,
+                                                      int64_t tile_size) {
+    if (tile_size <= 0) {
+        throw MariusRuntimeException("Tile size must be positive");
+    }
+
+    int64_t num_sets = queries.size();
+    int64_t num_tiles = (num_candidates + tile_size - 1) / tile_size;
+
+    std::vector<torch::Tensor> counts(num_sets);
+    std::vector<torch::Tensor> sorted_filters(num_sets);
+    std::vector<torch::Tensor> tile_offsets(num_sets);
+
+    for (int64_t i = 0; i < num_sets; i++) {
+        torch::TensorOptions count_opts = torch::TensorOptions().dtype(torch::kInt64).device(queries[i].device());
+        counts[i] = torch::zeros({queries[i].size(0)}, count_opts);
+        pos_scores[i] = pos_scores[i].unsqueeze(1);
+
+        // sort the filter by candidate id so that the entries of each tile are a contiguous range
+        if (filters[i].defined() && filters[i].size(0) > 0) {
+            torch::Tensor filter = filters[i].to(queries[i].device());
+            sorted_filters[i] = filter.index_select(0, filter.select(1, 1).argsort());
+            torch::Tensor tile_starts = torch::arange(num_tiles + 1, count_opts) * tile_size;
+            tile_offsets[i] = torch::searchsorted(sorted_filters[i].select(1, 1).contiguous(), tile_starts).to(torch::kCPU);
+        }
+    }
+
+    for (int64_t tile_id = 0; tile_id < num_tiles; tile_id++) {
+        int64_t offset = tile_id * tile_size;
+        int64_t size = std::min(tile_size, num_candidates - offset);
+
+        // [1, size, dim] so that the comparators score every query against every candidate with a single bmm
+        torch::Tensor candidates = get_candidates(offset, size).unsqueeze(0);
+
+        for (int64_t i = 0; i < num_sets; i++) {
+            torch::Tensor scores = decoder->compute_scores(queries[i], candidates);
+
+            if (tile_offsets[i].defined()) {
+                auto offsets_accessor = tile_offsets[i].accessor<int64_t, 1>();
+                int64_t filter_start = offsets_accessor[tile_id];
+                int64_t filter_end = offsets_accessor[tile_id + 1];
+
+                if (filter_end > filter_start) {
+                    torch::Tensor tile_filter = sorted_filters[i].narrow(0, filter_start, filter_end - filter_start);
+                    scores.index_put_({tile_filter.select(1, 0), tile_filter.select(1, 1) - offset}, -std::numeric_limits<float>::infinity());
+                }
+            }
+
+            counts[i] += (scores >= pos_scores[i]).sum(1);
+        }
+    }
+
+    for (int64_t i = 0; i < num_sets; i++) {
+        counts[i] = counts[i] + 1;
+    }
+    return counts;
+}
+
+std::tuple<torch::Tensor, torch::Tensor> node_corrupt_topk_blocked(shared_ptr<EdgeDecoder> decoder,
+                                                                   torch::Tensor queries,
+                                                                   torch::Tensor filter,
+                                                                   std::function<torch::Tensor(int64_t, int64_t)> get_candidates,
+                                                                   int64_t num_candidates,
+                                                                   int64_t tile_size,
+                                                                   int64_t k) {
+    if (tile_size <= 0) {
+        throw MariusRuntimeException("Tile size must be positive");
+    }
+
+    if (k <= 0) {
+        throw MariusRuntimeException("Number of candidates to return must be positive");
+    }
+
+    int64_t num_queries = queries.size(0);
+    int64_t num_tiles = (num_candidates + tile_size - 1) / tile_size;
+
+    torch::TensorOptions id_opts = torch::TensorOptions().dtype(torch::kInt64).device(queries.device());
+    torch::Tensor top_scores = torch::empty({num_queries, 0}, queries.options());
+    torch::Tensor top_ids = torch::empty({num_queries, 0}, id_opts);
+
+    // sort the filter by candidate id so that the entries of each tile are a contiguous range
+    torch::Tensor sorted_filter;
+    torch::Tensor tile_offsets;
+    if (filter.defined() && filter.size(0) > 0) {
+        filter = filter.to(queries.device());
+        sorted_filter = filter.index_select(0, filter.select(1, 1).argsort());
+        torch::Tensor tile_starts = torch::arange(num_tiles + 1, id_opts) * tile_size;
+        tile_offsets = torch::searchsorted(sorted_filter.select(1, 1).contiguous(), tile_starts).to(torch::kCPU);
+    }
+
+    for (int64_t tile_id = 0; tile_id < num_tiles; tile_id++) {
+        int64_t offset = tile_id * tile_size;
+        int64_t size = std::min(tile_size, num_candidates - offset);
+
+        torch::Tensor scores = decoder->compute_scores(queries, get_candidates(offset, size).unsqueeze(0));
+
+        if (tile_offsets.defined()) {
+            auto offsets_accessor = tile_offsets.accessor<int64_t, 1>();
+            int64_t filter_start = offsets_accessor[tile_id];
+            int64_t filter_end = offsets_accessor[tile_id + 1];
+
+            if (filter_end > filter_start) {
+                torch::Tensor tile_filter = sorted_filter.narrow(0, filter_start, filter_end - filter_start);
+                scores.index_put_({tile_filter.select(1, 0), tile_filter.select(1, 1) - offset}, -std::numeric_limits<float>::infinity());
+            }
+        }
+
+        // only the best k of a tile can enter the running top k, so the merge never touches more than 2k entries per query
+        auto tile_top = torch::topk(scores, std::min(k, size), 1);
+        torch::Tensor merged_scores = torch::cat({top_scores, std::get<0>(tile_top)}, 1);
+        torch::Tensor merged_ids = torch::cat({top_ids, std::get<1>(tile_top) + offset}, 1);
+
+        auto merged_top = torch::topk(merged_scores, std::min(k, merged_scores.size(1)), 1);
+        top_scores = std::get<0>(merged_top);
+        top_ids = merged_ids.gather(1, std::get<1>(merged_top));
+    }
+
+    return std::forward_as_tuple(top_scores, top_ids);
+}
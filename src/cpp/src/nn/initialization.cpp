@@ -23,7 +23,7 @@ std::tuple<int64_t, int64_t> compute_fans(std::vector<int64_t> shape) {
     return std::forward_as_tuple(fan_in, fan_out);
 }
 
-torch::Tensor glorot_uniform(std::vector<int64_t> shape, std::tuple<int64_t, int64_t> fans, torch::TensorOptions options) {
+torch::Tensor glorot_uniform(std::vector<int64_t> shape, std::tuple<int64_t, int64_t> fans, torch::TensorOptions options, c10::optional<at::Generator> generator) {
 
     int64_t fan_in = std::get<0>(fans);
     int64_t fan_out = std::get<1>(fans);
@@ -35,13 +35,13 @@ torch::Tensor glorot_uniform(std::vector<int64_t> shape, std::tuple<int64_t, int
     }
 
     float limit = sqrt(6.0 / (fan_in + fan_out));
-    torch::Tensor ret = torch::rand(shape, options);
+    torch::Tensor ret = torch::rand(shape, generator, options);
     ret = 2 * limit * (ret - .5);
 
     return ret;
 }
 
-torch::Tensor glorot_normal(std::vector<int64_t> shape, std::tuple<int64_t, int64_t> fans, torch::TensorOptions options) {
+torch::Tensor glorot_normal(std::vector<int64_t> shape, std::tuple<int64_t, int64_t> fans, torch::TensorOptions options, c10::optional<at::Generator> generator) {
     int64_t fan_in = std::get<0>(fans);
     int64_t fan_out = std::get<1>(fans);
 
@@ -53,22 +53,22 @@ torch::Tensor glorot_normal(std::vector<int64_t> shape, std::tuple<int64_t, int6
 
     float std = sqrt(2.0 / (fan_in + fan_out));
 
-    return torch::randn(shape, options).mul_(std);
+    return torch::randn(shape, generator, options).mul_(std);
 }
 
-torch::Tensor uniform_init(float scale_factor, std::vector<int64_t> shape, torch::TensorOptions options) {
-    return (2 * torch::rand(shape, options) - 1).mul_(scale_factor);
+torch::Tensor uniform_init(float scale_factor, std::vector<int64_t> shape, torch::TensorOptions options, c10::optional<at::Generator> generator) {
+    return (2 * torch::rand(shape, generator, options) - 1).mul_(scale_factor);
 
 }
-torch::Tensor normal_init(float mean, float std, std::vector<int64_t> shape, torch::TensorOptions options) {
-    return torch::randn(shape, options).mul_(std) + mean;
+torch::Tensor normal_init(float mean, float std, std::vector<int64_t> shape, torch::TensorOptions options, c10::optional<at::Generator> generator) {
+    return torch::randn(shape, generator, options).mul_(std) + mean;
 }
 
 torch::Tensor constant_init(float constant, std::vector<int64_t> shape, torch::TensorOptions options) {
     return torch::ones(shape, options) * constant;
 }
 
-torch::Tensor initialize_tensor(shared_ptr<InitConfig> init_config, std::vector<int64_t> shape, torch::TensorOptions tensor_options, std::tuple<int64_t, int64_t> fans) {
+torch::Tensor initialize_tensor(shared_ptr<InitConfig> init_config, std::vector<int64_t> shape, torch::TensorOptions tensor_options, std::tuple<int64_t, int64_t> fans, c10::optional<at::Generator> generator) {
 
     InitDistribution init_distribution = init_config->type;
     shared_ptr<InitOptions> init_options = init_config->options;
@@ -76,16 +76,16 @@ torch::Tensor initialize_tensor(shared_ptr<InitConfig> init_config, std::vector<
     torch::Tensor ret;
 
     if (init_distribution == InitDistribution::GLOROT_NORMAL) {
-        ret = glorot_normal(shape, fans, tensor_options);
+        ret = glorot_normal(shape, fans, tensor_options, generator);
     } else if (init_distribution == InitDistribution::GLOROT_UNIFORM) {
-        ret = glorot_uniform(shape, fans, tensor_options);
+        ret = glorot_uniform(shape, fans, tensor_options, generator);
     } else if (init_distribution == InitDistribution::UNIFORM) {
         float scale_factor = std::dynamic_pointer_cast<UniformInitOptions>(init_options)->scale_factor;
-        ret = uniform_init(scale_factor, shape, tensor_options);
+        ret = uniform_init(scale_factor, shape, tensor_options, generator);
     } else if (init_distribution == InitDistribution::NORMAL) {
         float mean = std::dynamic_pointer_cast<NormalInitOptions>(init_options)->mean;
         float std = std::dynamic_pointer_cast<NormalInitOptions>(init_options)->std;
-        ret = normal_init(mean, std, shape, tensor_options);
+        ret = normal_init(mean, std, shape, tensor_options, generator);
     } else if (init_distribution == InitDistribution::ZEROS) {
         ret = torch::zeros(shape, tensor_options);
     } else if (init_distribution == InitDistribution::ONES) {
@@ -102,7 +102,7 @@ torch::Tensor initialize_tensor(shared_ptr<InitConfig> init_config, std::vector<
 }
 
 // Allows for initialization of small pieces of a larger tensor, for initialization methods which scale based on the tensor size
-torch::Tensor initialize_subtensor(shared_ptr<InitConfig> init_config, std::vector<int64_t> sub_shape, std::vector<int64_t> full_shape, torch::TensorOptions tensor_options, std::tuple<int64_t, int64_t> fans) {
+torch::Tensor initialize_subtensor(shared_ptr<InitConfig> init_config, std::vector<int64_t> sub_shape, std::vector<int64_t> full_shape, torch::TensorOptions tensor_options, std::tuple<int64_t, int64_t> fans, c10::optional<at::Generator> generator) {
 
     InitDistribution init_distribution = init_config->type;
     torch::Tensor ret;
@@ -111,14 +111,14 @@ torch::Tensor initialize_subtensor(shared_ptr<InitConfig> init_config, std::vect
         if (std::get<0>(fans) == -1 || std::get<1>(fans) == -1) {
             fans = compute_fans(full_shape);
         }
-        ret = glorot_normal(sub_shape, fans, tensor_options);
+        ret = glorot_normal(sub_shape, fans, tensor_options, generator);
     } else if (init_distribution == InitDistribution::GLOROT_UNIFORM) {
         if (std::get<0>(fans) == -1 || std::get<1>(fans) == -1) {
             fans = compute_fans(full_shape);
         }
-        ret = glorot_uniform(sub_shape, fans, tensor_options);
+        ret = glorot_uniform(sub_shape, fans, tensor_options, generator);
     } else {
-        ret = initialize_tensor(init_config, sub_shape, tensor_options);
+        ret = initialize_tensor(init_config, sub_shape, tensor_options, {-1, -1}, generator);
     }
 
     return ret;
@@ -27,6 +27,7 @@ Model::Model(shared_ptr<GeneralEncoder> encoder,
     reporter_ = reporter;
     optimizers_ = optimizers;
     learning_task_ = decoder_->learning_task_;
+    sparse_row_wise_ = false;
 
     if (reporter_ == nullptr) {
         if (learning_task_ == LearningTask::LINK_PREDICTION) {
@@ -303,6 +304,138 @@ std::tuple<torch::Tensor, torch::Tensor, torch::Tensor, torch::Tensor> Model::fo
     return std::forward_as_tuple(pos_scores, neg_scores, inv_pos_scores, inv_neg_scores);
 }
 
+// number of candidate nodes attached to a batch for blocked ranking and top-k queries
+static int64_t get_num_candidates(shared_ptr<Batch> batch) {
+    if (batch->candidate_node_ids_.defined()) {
+        return batch->candidate_node_ids_.size(0);
+    } else if (batch->candidate_node_embeddings_.defined()) {
+        return batch->candidate_node_embeddings_.size(0);
+    } else if (batch->candidate_node_features_.defined()) {
+        return batch->candidate_node_features_.size(0);
+    } else {
+        throw MariusRuntimeException("Blocked scoring requires the candidate nodes to be loaded into the batch");
+    }
+}
+
+// candidate tiles are moved to the model device and encoded one at a time
+static std::function<torch::Tensor(int64_t, int64_t)> get_candidate_encoder(shared_ptr<GeneralEncoder> encoder, torch::Device device, shared_ptr<Batch> batch) {
+    return [encoder, device, batch](int64_t offset, int64_t size) {
+        torch::Tensor embeddings;
+        torch::Tensor features;
+
+        // with candidate ids, the tile is gathered from the rows of the tables instead of being a contiguous range of them
+        auto get_tile = [batch, offset, size](torch::Tensor table) {
+            if (batch->candidate_node_ids_.defined()) {
+                return table.index_select(0, batch->candidate_node_ids_.narrow(0, offset, size).to(table.device()));
+            }
+            return table.narrow(0, offset, size);
+        };
+
+        if (batch->candidate_node_embeddings_.defined()) {
+            embeddings = get_tile(batch->candidate_node_embeddings_).to(device);
+        }
+
+        if (batch->candidate_node_features_.defined()) {
+            features = get_tile(batch->candidate_node_features_).to(device);
+        }
+
+        return encoder->forward(embeddings, features, DENSEGraph(), false);
+    };
+}
+
+std::tuple<torch::Tensor, torch::Tensor, torch::Tensor, torch::Tensor> Model::forward_lp_ranks(shared_ptr<Batch> batch) {
+    torch::NoGradGuard no_grad;
+
+    torch::Tensor encoded_nodes = encoder_->forward(batch->node_embeddings_, batch->node_features_, batch->dense_graph_, false);
+
+    auto edge_decoder = std::dynamic_pointer_cast<EdgeDecoder>(decoder_);
+
+    torch::Tensor edges = batch->edges_;
+    if (edges.size(1) != 3 && edges.size(1) != 2) {
+        throw TensorSizeMismatchException(edges, "Edge list must be a 3 or 2 column tensor");
+    }
+
+    torch::Tensor src = encoded_nodes.index_select(0, edges.select(1, 0));
+    torch::Tensor dst = encoded_nodes.index_select(0, edges.select(1, -1));
+
+    std::vector<torch::Tensor> queries;
+    std::vector<torch::Tensor> pos_scores;
+    std::vector<torch::Tensor> filters;
+
+    if (edges.size(1) == 3) {
+        torch::Tensor rel_ids = edges.select(1, 1);
+        torch::Tensor adjusted_src = edge_decoder->apply_relation(src, edge_decoder->select_relations(rel_ids));
+
+        queries.emplace_back(adjusted_src);
+        pos_scores.emplace_back(edge_decoder->compute_scores(adjusted_src, dst));
+        filters.emplace_back(batch->dst_neg_filter_);
+
+        if (edge_decoder->use_inverse_relations_) {
+            torch::Tensor adjusted_dst = edge_decoder->apply_relation(dst, edge_decoder->select_relations(rel_ids, true));
+
+            queries.emplace_back(adjusted_dst);
+            pos_scores.emplace_back(edge_decoder->compute_scores(adjusted_dst, src));
+            filters.emplace_back(batch->src_neg_filter_);
+        }
+    } else {
+        queries.emplace_back(src);
+        pos_scores.emplace_back(edge_decoder->compute_scores(src, dst));
+        filters.emplace_back(batch->dst_neg_filter_);
+    }
+
+    int64_t num_candidates = get_num_candidates(batch);
+    auto get_candidates = get_candidate_encoder(encoder_, device_, batch);
+
+    std::vector<torch::Tensor> ranks = node_corrupt_ranks_blocked(edge_decoder, queries, pos_scores, filters, get_candidates, num_candidates, batch->ranking_tile_size_);
+
+    torch::Tensor inv_pos_scores;
+    torch::Tensor inv_ranks;
+    if (ranks.size() > 1) {
+        inv_pos_scores = pos_scores[1];
+        inv_ranks = ranks[1];
+    }
+
+    return std::forward_as_tuple(pos_scores[0], ranks[0], inv_pos_scores, inv_ranks);
+}
+
+std::tuple<torch::Tensor, torch::Tensor> Model::forward_lp_topk(shared_ptr<Batch> batch, int64_t k) {
+    torch::NoGradGuard no_grad;
+
+    if (batch->ranking_tile_size_ <= 0) {
+        throw MariusRuntimeException("Top-k queries require the batch to be sampled for blocked scoring");
+    }
+
+    torch::Tensor encoded_nodes = encoder_->forward(batch->node_embeddings_, batch->node_features_, batch->dense_graph_, false);
+
+    auto edge_decoder = std::dynamic_pointer_cast<EdgeDecoder>(decoder_);
+
+    torch::Tensor edges = batch->edges_;
+    if (edges.size(1) != 3 && edges.size(1) != 2) {
+        throw TensorSizeMismatchException(edges, "Edge list must be a 3 or 2 column tensor");
+    }
+
+    torch::Tensor queries = encoded_nodes.index_select(0, edges.select(1, 0));
+    if (edges.size(1) == 3) {
+        queries = edge_decoder->apply_relation(queries, edge_decoder->select_relations(edges.select(1, 1)));
+    }
+
+    int64_t num_candidates = get_num_candidates(batch);
+    auto get_candidates = get_candidate_encoder(encoder_, device_, batch);
+
+    torch::Tensor top_scores;
+    torch::Tensor top_ids;
+    std::tie(top_scores, top_ids) =
+        node_corrupt_topk_blocked(edge_decoder, queries, batch->dst_neg_filter_, get_candidates, num_candidates, batch->ranking_tile_size_, k);
+
+    // the ids are positions in the candidates, map them back to rows of the tables
+    if (batch->candidate_node_ids_.defined()) {
+        torch::Tensor candidate_node_ids = batch->candidate_node_ids_.to(top_ids.device());
+        top_ids = candidate_node_ids.index_select(0, top_ids.flatten()).view(top_ids.sizes());
+    }
+
+    return std::forward_as_tuple(top_scores, top_ids);
+}
+
 void Model::train_batch(shared_ptr<Batch> batch, bool call_step) {
 
     if (call_step) {
@@ -351,7 +484,17 @@ void Model::train_batch(shared_ptr<Batch> batch, bool call_step) {
 
 void Model::evaluate_batch(shared_ptr<Batch> batch) {
 
-    if (learning_task_ == LearningTask::LINK_PREDICTION) {
+    if (learning_task_ == LearningTask::LINK_PREDICTION && batch->ranking_tile_size_ > 0) {
+
+        auto all_ranks = forward_lp_ranks(batch);
+        auto reporter = std::dynamic_pointer_cast<LinkPredictionReporter>(reporter_);
+
+        reporter->addRanks(std::get<1>(all_ranks), std::get<0>(all_ranks));
+
+        if (std::get<3>(all_ranks).defined()) {
+            reporter->addRanks(std::get<3>(all_ranks), std::get<2>(all_ranks));
+        }
+    } else if (learning_task_ == LearningTask::LINK_PREDICTION) {
 
         auto all_scores = forward_lp(batch, true);
         torch::Tensor pos_scores = std::get<0>(all_scores);
@@ -392,6 +535,7 @@ void Model::broadcast(std::vector<torch::Device> devices) {
             for (auto optim : optimizers_) {
                 device_models_[i]->optimizers_.emplace_back(optim->clone());
                 device_models_[i]->sparse_lr_ = sparse_lr_;
+                device_models_[i]->sparse_row_wise_ = sparse_row_wise_;
             }
         } else {
             device_models_[i] = std::dynamic_pointer_cast<Model>(shared_from_this());
@@ -452,6 +596,10 @@ shared_ptr<Model> initModelFromConfig(shared_ptr<ModelConfig> model_config, std:
 
         if (model_config->sparse_optimizer != nullptr) {
             model->sparse_lr_ = model_config->sparse_optimizer->options->learning_rate;
+
+            if (model_config->sparse_optimizer->type == OptimizerType::ADAGRAD) {
+                model->sparse_row_wise_ = std::dynamic_pointer_cast<AdagradOptions>(model_config->sparse_optimizer->options)->row_wise;
+            }
         } else {
             model->sparse_lr_ = model_config->dense_optimizer->options->learning_rate;
         }
@@ -246,3 +246,92 @@ void AdamOptimizer::step() {
 std::shared_ptr<Optimizer> AdamOptimizer::clone() {
     return std::make_shared<AdamOptimizer>(*this);
 }
+
+void sparseAdagradStep(torch::Tensor params,
+                       torch::Tensor state,
+                       Indices indices,
+                       torch::Tensor gradients,
+                       float learning_rate,
+                       float eps,
+                       torch::Tensor state_index_map,
+                       StripedLock *row_locks) {
+    if (!gradients.defined() || indices.sizes().size() != 1 || indices.size(0) != gradients.size(0) || params.size(1) != gradients.size(1)) {
+        throw TensorSizeMismatchException(gradients, "Sparse gradients must have one row per index and match the parameter dimension");
+    }
+
+    bool row_wise = state.defined() && state.size(1) == 1 && params.size(1) != 1;
+
+    if (!state.defined() || (!row_wise && state.size(1) != params.size(1))) {
+        throw TensorSizeMismatchException(state, "Optimizer state must have the same dimension as the parameters, or a single column for row-wise Adagrad");
+    }
+
+    if (!state_index_map.defined() && state.size(0) != params.size(0)) {
+        throw TensorSizeMismatchException(state, "Optimizer state must have one row per parameter row when no state index map is given");
+    }
+
+    auto tup = coalesceSparseGradients(indices, gradients);
+    indices = std::get<0>(tup);
+    gradients = std::get<1>(tup);
+
+    Indices state_indices = indices;
+    if (state_index_map.defined()) {
+        state_indices = state_index_map.index_select(0, indices);
+    }
+
+    if (params.device().is_cuda()) {
+        torch::Tensor state_update;
+        if (row_wise) {
+            state_update = gradients.pow(2).mean(1, true);
+        } else {
+            state_update = gradients.pow(2);
+        }
+        torch::Tensor new_state = state.index_select(0, state_indices).add_(state_update);
+        state.index_copy_(0, state_indices, new_state);
+        params.index_add_(0, indices, -learning_rate * (gradients / new_state.sqrt().add_(eps)));
+    } else {
+        // assumes this operation is only used on float valued data
+        auto params_accessor = params.accessor<float, 2>();
+        auto state_accessor = state.accessor<float, 2>();
+        auto ids_accessor = indices.accessor<int64_t, 1>();
+        auto state_ids_accessor = state_indices.accessor<int64_t, 1>();
+        auto gradients_accessor = gradients.accessor<float, 2>();
+
+        int d = gradients.size(1);
+        int64_t size = indices.size(0);
+        #pragma omp parallel for
+        for (int64_t i = 0; i < size; i++) {
+            int64_t row = ids_accessor[i];
+            int64_t state_row = state_ids_accessor[i];
+
+            if (row_locks != nullptr) {
+                row_locks->lock(row);
+            }
+
+            if (row_wise) {
+                float sum_squares = 0;
+                for (int j = 0; j < d; j++) {
+                    float grad = gradients_accessor[i][j];
+                    sum_squares += grad * grad;
+                }
+                float row_state = state_accessor[state_row][0] + sum_squares / d;
+                state_accessor[state_row][0] = row_state;
+
+                float step = learning_rate / (std::sqrt(row_state) + eps);
+                for (int j = 0; j < d; j++) {
+                    params_accessor[row][j] -= step * gradients_accessor[i][j];
+                }
+            } else {
+                for (int j = 0; j < d; j++) {
+                    float grad = gradients_accessor[i][j];
+                    float row_state = state_accessor[state_row][j] + grad * grad;
+                    state_accessor[state_row][j] = row_state;
+                    params_accessor[row][j] -= learning_rate * grad / (std::sqrt(row_state) + eps);
+                }
+            }
+
+            if (row_locks != nullptr) {
+                row_locks->unlock(row);
+            }
+        }
+    }
+}
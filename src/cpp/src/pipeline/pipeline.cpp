@@ -116,6 +116,23 @@ Pipeline::~Pipeline() {
     delete pipeline_lock_;
 }
 
+void Pipeline::enableConcurrentUpdates() {
+    if (pipeline_options_->gradient_update_threads > 1 && pipeline_options_->update_lock_stripes > 0) {
+        dataloader_->graph_storage_->enableConcurrentUpdates(pipeline_options_->update_lock_stripes);
+    }
+}
+
+void Pipeline::capBatchPool() {
+    int64_t num_devices = std::max((int64_t) model_->device_models_.size(), (int64_t) 1);
+
+    int64_t queued = pipeline_options_->batch_host_queue_size + pipeline_options_->gradients_host_queue_size
+        + num_devices * (pipeline_options_->batch_device_queue_size + pipeline_options_->gradients_device_queue_size);
+    int64_t threads = pipeline_options_->batch_loader_threads + pipeline_options_->gradient_update_threads
+        + num_devices * (pipeline_options_->batch_transfer_threads + pipeline_options_->compute_threads + pipeline_options_->gradient_transfer_threads);
+
+    dataloader_->batch_pool_->setMaxFreeBatches(queued + threads);
+}
+
 shared_ptr<Worker> Pipeline::initWorkerOfType(int worker_type, int gpu_id) {
     shared_ptr<Worker> worker;
 
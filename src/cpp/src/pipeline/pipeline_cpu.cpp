@@ -97,6 +97,8 @@ PipelineCPU::PipelineCPU(shared_ptr<DataLoader> dataloader,
     admitted_batches_ = 0;
     curr_pos_ = 0;
 
+    capBatchPool();
+
     PipelineCPU::initialize();
 }
 
@@ -156,6 +158,7 @@ void PipelineCPU::initialize() {
             addWorkersToPool(0, LOAD_BATCH_ID, pipeline_options_->batch_loader_threads);
             addWorkersToPool(1, CPU_COMPUTE_ID, pipeline_options_->compute_threads);
             addWorkersToPool(2, UPDATE_BATCH_ID, pipeline_options_->gradient_update_threads);
+            enableConcurrentUpdates();
         } else {
             addWorkersToPool(0, LOAD_BATCH_ID, pipeline_options_->batch_loader_threads);
             addWorkersToPool(1, CPU_COMPUTE_ID, pipeline_options_->compute_threads);
@@ -184,6 +184,8 @@ PipelineGPU::PipelineGPU(shared_ptr<DataLoader> dataloader,
     admitted_batches_ = 0;
     curr_pos_ = 0;
 
+    capBatchPool();
+
     PipelineGPU::initialize();
 }
 
@@ -241,6 +243,7 @@ void PipelineGPU::initialize() {
             if (model_->has_embeddings()) {
                 addWorkersToPool(3, D2H_TRANSFER_ID, pipeline_options_->gradient_transfer_threads, model_->device_models_.size());
                 addWorkersToPool(4, UPDATE_BATCH_ID, pipeline_options_->gradient_update_threads);
+                enableConcurrentUpdates();
             }
         } else {
             addWorkersToPool(0, LOAD_BATCH_ID, pipeline_options_->batch_loader_threads);
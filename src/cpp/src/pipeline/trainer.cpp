@@ -9,6 +9,35 @@
 using std::tie;
 using std::get;
 
+// read statistics of node features stored on disk, logged after each training epoch
+void resetFeatureReadStats(shared_ptr<GraphModelStorage> graph_storage) {
+    shared_ptr<Storage> node_features = graph_storage->storage_ptrs_.node_features;
+
+    if (instance_of<Storage, FlatFile>(node_features)) {
+        shared_ptr<RowCache> row_cache = std::dynamic_pointer_cast<FlatFile>(node_features)->getRowCache();
+        if (row_cache != nullptr) {
+            row_cache->resetStats();
+        }
+    } else if (instance_of<Storage, TieredStorage>(node_features)) {
+        std::dynamic_pointer_cast<TieredStorage>(node_features)->resetStats();
+    }
+}
+
+void logFeatureReadStats(shared_ptr<GraphModelStorage> graph_storage) {
+    shared_ptr<Storage> node_features = graph_storage->storage_ptrs_.node_features;
+
+    if (instance_of<Storage, FlatFile>(node_features)) {
+        shared_ptr<RowCache> row_cache = std::dynamic_pointer_cast<FlatFile>(node_features)->getRowCache();
+        if (row_cache != nullptr) {
+            SPDLOG_INFO("Feature Cache Hit Rate: {:.4f} ({} hits, {} misses)", row_cache->getHitRate(), row_cache->getHits(), row_cache->getMisses());
+        }
+    } else if (instance_of<Storage, TieredStorage>(node_features)) {
+        shared_ptr<TieredStorage> tiered_features = std::dynamic_pointer_cast<TieredStorage>(node_features);
+        SPDLOG_INFO("Feature Rows Read from Memory: {}, Fast Disk: {}, Bulk Disk: {}",
+                    tiered_features->getMemoryReads(), tiered_features->getSsdReads(), tiered_features->getDiskReads());
+    }
+}
+
 PipelineTrainer::PipelineTrainer(shared_ptr<DataLoader> dataloader, shared_ptr<Model>model, shared_ptr<PipelineConfig> pipeline_config, int logs_per_epoch) {
     dataloader_ = dataloader;
     learning_task_ = dataloader_->learning_task_;
@@ -43,6 +72,7 @@ void PipelineTrainer::train(int num_epochs) {
     for (int epoch = 0; epoch < num_epochs; epoch++) {
         timer.start();
         SPDLOG_INFO("################ Starting training epoch {} ################", dataloader_->getEpochsProcessed() + 1);
+        resetFeatureReadStats(dataloader_->graph_storage_);
         pipeline_->start();
         pipeline_->waitComplete();
         pipeline_->pauseAndFlush();
@@ -70,6 +100,7 @@ void PipelineTrainer::train(int num_epochs) {
         float items_per_second = (float) num_items / ((float) epoch_time / 1000);
         SPDLOG_INFO("Epoch Runtime: {}ms", epoch_time);
         SPDLOG_INFO("{} per Second: {}", item_name, items_per_second);
+        logFeatureReadStats(dataloader_->graph_storage_);
     }
 }
 
@@ -104,6 +135,7 @@ void SynchronousTrainer::train(int num_epochs) {
     for (int epoch = 0; epoch < num_epochs; epoch++) {
         timer.start();
         SPDLOG_INFO("################ Starting training epoch {} ################", dataloader_->getEpochsProcessed() + 1);
+        resetFeatureReadStats(dataloader_->graph_storage_);
         while (dataloader_->hasNextBatch()) {
 
             // gets data and parameters for the next batch
@@ -165,5 +197,6 @@ void SynchronousTrainer::train(int num_epochs) {
         float items_per_second = (float) num_items / ((float) epoch_time / 1000);
         SPDLOG_INFO("Epoch Runtime: {}ms", epoch_time);
         SPDLOG_INFO("{} per Second: {}", item_name, items_per_second);
+        logFeatureReadStats(dataloader_->graph_storage_);
     }
 }
@@ -18,6 +18,10 @@ torch::Tensor HitskMetric::computeMetric(torch::Tensor ranks) {
     return torch::tensor((double) ranks.le(k_).nonzero().size(0) / ranks.size(0), torch::kFloat64);
 }
 
+double HitskMetric::computeSum(torch::Tensor ranks) {
+    return (double) ranks.le(k_).sum().item<int64_t>();
+}
+
 MeanRankMetric::MeanRankMetric() {
     name_ = "Mean Rank";
     unit_ = "";
@@ -27,6 +31,10 @@ torch::Tensor MeanRankMetric::computeMetric(torch::Tensor ranks) {
     return ranks.to(torch::kFloat64).mean();
 }
 
+double MeanRankMetric::computeSum(torch::Tensor ranks) {
+    return ranks.to(torch::kFloat64).sum().item<double>();
+}
+
 MeanReciprocalRankMetric::MeanReciprocalRankMetric() {
     name_ = "MRR";
     unit_ = "";
@@ -36,6 +44,17 @@ torch::Tensor MeanReciprocalRankMetric::computeMetric(torch::Tensor ranks) {
     return ranks.to(torch::kFloat32).reciprocal().mean();
 }
 
+double MeanReciprocalRankMetric::computeSum(torch::Tensor ranks) {
+    return ranks.to(torch::kFloat64).reciprocal().sum().item<double>();
+}
+
+double RankingMetric::computeSum(torch::Tensor ranks) {
+    if (ranks.size(0) == 0) {
+        return 0;
+    }
+    return computeMetric(ranks).item<double>() * ranks.size(0);
+}
+
 CategoricalAccuracyMetric::CategoricalAccuracyMetric() {
     name_ = "Accuracy";
     unit_ = "%";
@@ -45,12 +64,118 @@ torch::Tensor CategoricalAccuracyMetric::computeMetric(torch::Tensor y_true, tor
     return 100 * torch::tensor({(double) (y_true == y_pred).nonzero().size(0) / y_true.size(0)}, torch::kFloat64);
 }
 
+double CategoricalAccuracyMetric::computeSum(torch::Tensor y_true, torch::Tensor y_pred) {
+    return 100 * (double) (y_true == y_pred).sum().item<int64_t>();
+}
+
+double ClassificationMetric::computeSum(torch::Tensor y_true, torch::Tensor y_pred) {
+    if (y_true.size(0) == 0) {
+        return 0;
+    }
+    return computeMetric(y_true, y_pred).item<double>() * y_true.size(0);
+}
+
 Reporter::~Reporter() {
     delete lock_;
 }
 
-LinkPredictionReporter::LinkPredictionReporter() {
+ChunkedCsvWriter::ChunkedCsvWriter(string filename, string header, int max_queued_chunks) {
+    max_queued_chunks_ = max_queued_chunks;
+    closed_ = false;
+    rows_written_ = 0;
+
+    stream_.open(filename);
+    if (!stream_.is_open()) {
+        throw MariusRuntimeException("Unable to open output file: " + filename);
+    }
+    stream_ << header << "\n";
+
+    writer_thread_ = std::thread(&ChunkedCsvWriter::run, this);
+}
+
+ChunkedCsvWriter::~ChunkedCsvWriter() {
+    close();
+}
+
+void ChunkedCsvWriter::write(torch::Tensor int_columns, torch::Tensor float_columns) {
+    std::unique_lock lock(mutex_);
+    if (closed_) {
+        throw MariusRuntimeException("Cannot write to a closed output file");
+    }
+    cv_.wait(lock, [this] { return (int) chunks_.size() < max_queued_chunks_; });
+    chunks_.emplace_back(int_columns, float_columns);
+    lock.unlock();
+    cv_.notify_all();
+}
+
+void ChunkedCsvWriter::close() {
+    std::unique_lock lock(mutex_);
+    if (closed_) {
+        return;
+    }
+    closed_ = true;
+    lock.unlock();
+    cv_.notify_all();
+
+    writer_thread_.join();
+    stream_.close();
+}
+
+void ChunkedCsvWriter::run() {
+    while (true) {
+        std::unique_lock lock(mutex_);
+        cv_.wait(lock, [this] { return !chunks_.empty() || closed_; });
+
+        if (chunks_.empty()) {
+            // closed and all chunks written
+            return;
+        }
+
+        auto chunk = chunks_.front();
+        chunks_.pop_front();
+        lock.unlock();
+        cv_.notify_all();
+
+        writeChunk(std::get<0>(chunk), std::get<1>(chunk));
+    }
+}
+
+void ChunkedCsvWriter::writeChunk(torch::Tensor int_columns, torch::Tensor float_columns) {
+    int_columns = int_columns.to(torch::kInt64).contiguous();
+    auto int_accessor = int_columns.accessor<int64_t, 2>();
+    int64_t num_rows = int_columns.size(0);
+    int64_t num_int_cols = int_columns.size(1);
+
+    int64_t num_float_cols = 0;
+    if (float_columns.defined()) {
+        float_columns = float_columns.to(torch::kFloat32).contiguous();
+        num_float_cols = float_columns.size(1);
+    }
+
+    string chunk_string = "";
+    for (int64_t row = 0; row < num_rows; row++) {
+        for (int64_t col = 0; col < num_int_cols; col++) {
+            chunk_string += std::to_string(int_accessor[row][col]);
+            chunk_string += (col == num_int_cols - 1 && num_float_cols == 0) ? "\n" : ",";
+        }
+        if (num_float_cols > 0) {
+            auto float_accessor = float_columns.accessor<float, 2>();
+            for (int64_t col = 0; col < num_float_cols; col++) {
+                chunk_string += std::to_string(float_accessor[row][col]);
+                chunk_string += (col == num_float_cols - 1) ? "\n" : ",";
+            }
+        }
+    }
+
+    stream_ << chunk_string;
+    rows_written_ += num_rows;
+}
 
+LinkPredictionReporter::LinkPredictionReporter() {
+    num_ranks_ = 0;
+    output_scores_ = false;
+    output_ranks_ = false;
+    output_writer_ = nullptr;
 }
 
 LinkPredictionReporter::~LinkPredictionReporter() {
@@ -58,142 +183,204 @@ LinkPredictionReporter::~LinkPredictionReporter() {
 }
 
 void LinkPredictionReporter::clear() {
-    all_ranks_ = torch::Tensor();
+    num_ranks_ = 0;
+    metric_sums_ = {};
     per_batch_ranks_ = {};
     per_batch_scores_ = {};
-    all_scores_ = torch::Tensor();
+    per_batch_edges_ = {};
+
+    if (output_writer_ != nullptr) {
+        output_writer_->close();
+        output_writer_ = nullptr;
+    }
+    output_directory_ = "";
+    output_scores_ = false;
+    output_ranks_ = false;
 }
 
 torch::Tensor LinkPredictionReporter::computeRanks(torch::Tensor pos_scores, torch::Tensor neg_scores) {
     return (neg_scores >= pos_scores.unsqueeze(1)).sum(1) + 1;
 }
 
-void LinkPredictionReporter::addResult(torch::Tensor pos_scores, torch::Tensor neg_scores, torch::Tensor edges) {
-    lock();
+void LinkPredictionReporter::accumulateMetrics(torch::Tensor ranks) {
+    if (metric_sums_.size() != metrics_.size()) {
+        metric_sums_.resize(metrics_.size(), 0);
+    }
 
-    if (neg_scores.defined()) {
-        per_batch_ranks_.emplace_back(computeRanks(pos_scores, neg_scores));
+    for (int i = 0; i < metrics_.size(); i++) {
+        metric_sums_[i] += std::dynamic_pointer_cast<RankingMetric>(metrics_[i])->computeSum(ranks);
     }
+    num_ranks_ += ranks.size(0);
+}
 
-    if (edges.defined()) {
-        per_batch_scores_.emplace_back(pos_scores.to(torch::kCPU));
-        per_batch_edges_.emplace_back(edges.to(torch::kCPU));
+string LinkPredictionReporter::getMetricsString() {
+    string report_string = "Link Prediction: " + std::to_string(num_ranks_) + " edges evaluated\n";
+
+    for (int i = 0; i < metrics_.size(); i++) {
+        double result = 0;
+        if (num_ranks_ > 0 && i < metric_sums_.size()) {
+            result = metric_sums_[i] / num_ranks_;
+        }
+        report_string = report_string + metrics_[i]->name_ + ": " + std::to_string(result) + metrics_[i]->unit_ + "\n";
     }
-    unlock();
+    return report_string;
 }
 
-void LinkPredictionReporter::report() {
-    all_ranks_ = torch::cat(per_batch_ranks_).to(torch::kCPU);
-    if (per_batch_scores_.size() > 0) {
-        all_scores_ = torch::cat(per_batch_scores_);
+shared_ptr<ChunkedCsvWriter> LinkPredictionReporter::createWriter(string directory, int64_t num_edge_columns, bool scores, bool ranks) {
+    string header_string = "";
+    if (num_edge_columns == 3) {
+        header_string = "src,rel,dst";
+    } else {
+        header_string = "src,dst";
     }
-    per_batch_ranks_ = {};
-    per_batch_scores_ = {};
 
-    std::string report_string = "";
-    std::string header = "\n=================================\nLink Prediction: " + std::to_string(all_ranks_.size(0)) + " edges evaluated\n";
-    report_string = report_string + header;
+    if (ranks) {
+        header_string = header_string + ",rank";
+    }
 
-    std::string tmp;
-    for (auto m : metrics_) {
-        torch::Tensor result = std::dynamic_pointer_cast<RankingMetric>(m)->computeMetric(all_ranks_);
-        tmp = m->name_ + ": " + std::to_string(result.item<double>()) + m->unit_ + "\n";
-        report_string = report_string + tmp;
+    if (scores) {
+        header_string = header_string + ",score";
     }
-    std::string footer = "=================================";
-    report_string = report_string + footer;
 
-    SPDLOG_INFO(report_string);
+    return std::make_shared<ChunkedCsvWriter>(directory + PathConstants::output_scores_file, header_string);
 }
 
-void LinkPredictionReporter::save(string directory, bool scores, bool ranks) {
-    all_ranks_ = torch::cat(per_batch_ranks_).to(torch::kCPU);
-    if (per_batch_scores_.size() > 0) {
-	all_scores_ = torch::cat(per_batch_scores_);
+void LinkPredictionReporter::writeEdges(shared_ptr<ChunkedCsvWriter> writer, torch::Tensor edges, torch::Tensor ranks, torch::Tensor scores,
+                                        bool write_scores, bool write_ranks) {
+    torch::Tensor int_columns = edges.to(torch::kCPU).to(torch::kInt64);
+    if (write_ranks) {
+        if (!ranks.defined()) {
+            throw MariusRuntimeException("To save ranks, negative scores must be provided to addResult()");
+        }
+        int_columns = torch::cat({int_columns, ranks.to(torch::kCPU).to(torch::kInt64).unsqueeze(1)}, 1);
     }
-    per_batch_ranks_ = {};
-    per_batch_scores_ = {};
 
-    if (!metrics_.empty()) {
-        std::string report_string = "";
-        std::string header = "Link Prediction: " + std::to_string(all_ranks_.size(0)) + " edges evaluated\n";
-        report_string = report_string + header;
-
-        std::string tmp;
-        for (auto m : metrics_) {
-            torch::Tensor result = std::dynamic_pointer_cast<RankingMetric>(m)->computeMetric(all_ranks_);
-            tmp = m->name_ + ": " + std::to_string(result.item<double>()) + m->unit_ + "\n";
-            report_string = report_string + tmp;
+    torch::Tensor float_columns;
+    if (write_scores) {
+        if (!scores.defined()) {
+            throw MariusRuntimeException("To save scores, positive scores must be provided to addResult()");
         }
+        float_columns = scores.to(torch::kCPU).to(torch::kFloat32).unsqueeze(1);
+    }
 
-        string metrics_file = directory + PathConstants::output_metrics_file;
-
-        std::ofstream metrics_stream;
-        metrics_stream.open(metrics_file);
+    writer->write(int_columns, float_columns);
+}
 
-        metrics_stream << report_string;
-        metrics_stream.close();
+void LinkPredictionReporter::startOutput(string directory, bool scores, bool ranks) {
+    lock();
+    if (output_writer_ != nullptr) {
+        output_writer_->close();
+        output_writer_ = nullptr;
     }
+    output_directory_ = directory;
+    output_scores_ = scores;
+    output_ranks_ = ranks;
+    unlock();
+}
 
-    if (ranks || scores) {
-        if (per_batch_edges_.empty()) {
-            throw MariusRuntimeException("To save scores or ranks, the evaluated edges must be provided to addResult()");
-        }
+void LinkPredictionReporter::addResult(torch::Tensor pos_scores, torch::Tensor neg_scores, torch::Tensor edges) {
+    torch::Tensor ranks;
+    if (neg_scores.defined()) {
+        ranks = computeRanks(pos_scores, neg_scores);
+    }
+    addRanks(ranks, pos_scores, edges);
+}
 
-        all_edges_ = torch::cat({per_batch_edges_});
+void LinkPredictionReporter::addRanks(torch::Tensor ranks, torch::Tensor pos_scores, torch::Tensor edges) {
+    lock();
 
-        string output_scores_file = directory + PathConstants::output_scores_file;
-        std::ofstream scores_stream;
-        scores_stream.open(output_scores_file);
+    if (ranks.defined()) {
+        accumulateMetrics(ranks);
+    }
 
-        string header_string = "";
-        std::vector<torch::Dtype> dtypes;
-        if (all_edges_.size(1) == 3) {
-            header_string = "src,rel,dst";
-            dtypes = {torch::kInt64, torch::kInt64, torch::kInt64};
+    if (edges.defined()) {
+        if (output_scores_ || output_ranks_) {
+            try {
+                if (output_writer_ == nullptr) {
+                    output_writer_ = createWriter(output_directory_, edges.size(1), output_scores_, output_ranks_);
+                }
+                writeEdges(output_writer_, edges, ranks, pos_scores, output_scores_, output_ranks_);
+            } catch (...) {
+                unlock();
+                throw;
+            }
         } else {
-            header_string = "src,dst";
-            dtypes = {torch::kInt64, torch::kInt64};
+            // held until save() is called
+            if (ranks.defined()) {
+                per_batch_ranks_.emplace_back(ranks.to(torch::kCPU));
+            }
+            per_batch_scores_.emplace_back(pos_scores.defined() ? pos_scores.to(torch::kCPU) : torch::Tensor());
+            per_batch_edges_.emplace_back(edges.to(torch::kCPU));
         }
+    }
+    unlock();
+}
 
-        torch::Tensor output_tensor = all_edges_.to(torch::kFloat32);
-        if (ranks) {
-            output_tensor = torch::cat({output_tensor, all_ranks_.narrow(0, 0, all_edges_.size(0)).to(torch::kFloat32).unsqueeze(1)}, 1);
-            header_string = header_string + ",rank";
-            dtypes.emplace_back(torch::kInt64);
-        }
+void LinkPredictionReporter::report() {
+    lock();
+    string report_string = "\n=================================\n" + getMetricsString() + "=================================";
+    num_ranks_ = 0;
+    metric_sums_ = {};
+    unlock();
 
-        if (scores) {
-            output_tensor = torch::cat({output_tensor, all_scores_.narrow(0, 0, all_edges_.size(0)).to(torch::kFloat32).unsqueeze(1)}, 1);
-            header_string = header_string + ",score";
-            dtypes.emplace_back(torch::kFloat32);
-        }
+    SPDLOG_INFO(report_string);
+}
 
-        scores_stream << header_string << "\n";
-        auto accessor = output_tensor.accessor<float, 2>();
+void LinkPredictionReporter::save(string directory, bool scores, bool ranks) {
+    lock();
+
+    if (!metrics_.empty()) {
+        string metrics_file = directory + PathConstants::output_metrics_file;
 
-        int64_t num_rows = output_tensor.size(0);
-        int64_t num_cols = output_tensor.size(1);
-        for (int64_t row = 0; row < num_rows; row++) {
-            string row_string = "";
-            for (int64_t col = 0; col < num_cols - 1; col++) {
-                row_string = row_string + std::to_string((int)accessor[row][col]) + ",";
+        std::ofstream metrics_stream;
+        metrics_stream.open(metrics_file);
+
+        metrics_stream << getMetricsString();
+        metrics_stream.close();
+    }
+
+    if (ranks || scores) {
+        if (output_writer_ != nullptr) {
+            output_writer_->close();
+            output_writer_ = nullptr;
+        } else {
+            if (per_batch_edges_.empty()) {
+                unlock();
+                throw MariusRuntimeException("To save scores or ranks, the evaluated edges must be provided to addResult()");
             }
 
-            if (scores) {
-                row_string = row_string + std::to_string(accessor[row][num_cols - 1]) + "\n";
-            } else {
-                row_string = row_string + std::to_string((int)accessor[row][num_cols - 1]) + "\n";
+            if (ranks && per_batch_ranks_.size() != per_batch_edges_.size()) {
+                unlock();
+                throw MariusRuntimeException("To save ranks, negative scores must be provided to addResult()");
             }
 
-            scores_stream << row_string;
+            try {
+                shared_ptr<ChunkedCsvWriter> writer = createWriter(directory, per_batch_edges_[0].size(1), scores, ranks);
+                for (int i = 0; i < per_batch_edges_.size(); i++) {
+                    torch::Tensor batch_ranks = ranks ? per_batch_ranks_[i] : torch::Tensor();
+                    writeEdges(writer, per_batch_edges_[i], batch_ranks, per_batch_scores_[i], scores, ranks);
+                }
+                writer->close();
+            } catch (...) {
+                unlock();
+                throw;
+            }
         }
-        scores_stream.close();
     }
+
+    num_ranks_ = 0;
+    metric_sums_ = {};
+    per_batch_ranks_ = {};
+    per_batch_scores_ = {};
+    per_batch_edges_ = {};
+    output_scores_ = false;
+    output_ranks_ = false;
+    unlock();
 }
 
 NodeClassificationReporter::NodeClassificationReporter() {
-
+    num_nodes_ = 0;
+    output_writer_ = nullptr;
 }
 
 NodeClassificationReporter::~NodeClassificationReporter() {
@@ -201,107 +388,138 @@ NodeClassificationReporter::~NodeClassificationReporter() {
 }
 
 void NodeClassificationReporter::clear() {
-    all_y_true_ = torch::Tensor();
-    all_y_pred_ = torch::Tensor();
+    num_nodes_ = 0;
+    metric_sums_ = {};
     per_batch_y_true_ = {};
     per_batch_y_pred_ = {};
+    per_batch_nodes_ = {};
+
+    if (output_writer_ != nullptr) {
+        output_writer_->close();
+        output_writer_ = nullptr;
+    }
+    output_directory_ = "";
+}
+
+void NodeClassificationReporter::accumulateMetrics(torch::Tensor y_true, torch::Tensor y_pred) {
+    if (metric_sums_.size() != metrics_.size()) {
+        metric_sums_.resize(metrics_.size(), 0);
+    }
+
+    for (int i = 0; i < metrics_.size(); i++) {
+        metric_sums_[i] += std::dynamic_pointer_cast<ClassificationMetric>(metrics_[i])->computeSum(y_true, y_pred);
+    }
+    num_nodes_ += y_true.size(0);
+}
+
+string NodeClassificationReporter::getMetricsString() {
+    string report_string = "Node Classification: " + std::to_string(num_nodes_) + " nodes evaluated\n";
+
+    for (int i = 0; i < metrics_.size(); i++) {
+        double result = 0;
+        if (num_nodes_ > 0 && i < metric_sums_.size()) {
+            result = metric_sums_[i] / num_nodes_;
+        }
+        report_string = report_string + metrics_[i]->name_ + ": " + std::to_string(result) + metrics_[i]->unit_ + "\n";
+    }
+    return report_string;
+}
+
+void NodeClassificationReporter::startOutput(string directory) {
+    lock();
+    if (output_writer_ != nullptr) {
+        output_writer_->close();
+        output_writer_ = nullptr;
+    }
+    output_directory_ = directory;
+    try {
+        output_writer_ = std::make_shared<ChunkedCsvWriter>(directory + PathConstants::output_labels_file, "id,y_pred,y_true");
+    } catch (...) {
+        output_writer_ = nullptr;
+        unlock();
+        throw;
+    }
+    unlock();
 }
 
 void NodeClassificationReporter::addResult(torch::Tensor y_true, torch::Tensor y_pred, torch::Tensor node_ids) {
+    if (!y_true.defined()) {
+        throw MariusRuntimeException("Node labels are undefined, node classification results can only be reported for labeled nodes");
+    }
+
     lock();
-    per_batch_y_true_.emplace_back(y_true);
-    per_batch_y_pred_.emplace_back(y_pred.argmax(1));
+    y_pred = y_pred.argmax(1);
+    accumulateMetrics(y_true, y_pred);
 
     if (node_ids.defined()) {
-        per_batch_nodes_.emplace_back(node_ids);
+        if (output_writer_ != nullptr) {
+            output_writer_->write(torch::stack({node_ids.to(torch::kCPU).to(torch::kInt64),
+                                                y_pred.to(torch::kCPU).to(torch::kInt64),
+                                                y_true.to(torch::kCPU).to(torch::kInt64)}, 1));
+        } else {
+            // held until save() is called
+            per_batch_y_true_.emplace_back(y_true.to(torch::kCPU));
+            per_batch_y_pred_.emplace_back(y_pred.to(torch::kCPU));
+            per_batch_nodes_.emplace_back(node_ids.to(torch::kCPU));
+        }
     }
     unlock();
 }
 
 void NodeClassificationReporter::report() {
-    all_y_true_ = torch::cat(per_batch_y_true_);
-    all_y_pred_ = torch::cat(per_batch_y_pred_);
-    per_batch_y_true_ = {};
-    per_batch_y_pred_ = {};
-
-    std::string report_string = "";
-    std::string header = "\n=================================\nNode Classification: " + std::to_string(all_y_true_.size(0)) + " nodes evaluated\n";
-    report_string = report_string + header;
-
-    std::string tmp;
-    for (auto m : metrics_) {
-        torch::Tensor result = std::dynamic_pointer_cast<ClassificationMetric>(m)->computeMetric(all_y_true_, all_y_pred_);
-        tmp = m->name_ + ": " + std::to_string(result.item<double>()) + m->unit_ + "\n";
-        report_string = report_string + tmp;
-    }
-    std::string footer = "=================================";
-    report_string = report_string + footer;
+    lock();
+    string report_string = "\n=================================\n" + getMetricsString() + "=================================";
+    num_nodes_ = 0;
+    metric_sums_ = {};
+    unlock();
 
     SPDLOG_INFO(report_string);
 }
 
 void NodeClassificationReporter::save(string directory, bool labels) {
-    all_y_true_ = torch::cat(per_batch_y_true_).to(torch::kCPU);
-    all_y_pred_ = torch::cat(per_batch_y_pred_).to(torch::kCPU);
-    per_batch_y_true_ = {};
-    per_batch_y_pred_ = {};
+    lock();
 
     if (!metrics_.empty()) {
-        std::string report_string = "";
-        std::string header = "\n=================================\nNode Classification: " + std::to_string(all_y_true_.size(0)) + " nodes evaluated\n";
-        report_string = report_string + header;
-
-        std::string tmp;
-        for (auto m : metrics_) {
-            torch::Tensor result = std::dynamic_pointer_cast<ClassificationMetric>(m)->computeMetric(all_y_true_, all_y_pred_);
-            tmp = m->name_ + ": " + std::to_string(result.item<double>()) + m->unit_ + "\n";
-            report_string = report_string + tmp;
-        }
-        std::string footer = "=================================";
-        report_string = report_string + footer;
-
         string metrics_file = directory + PathConstants::output_metrics_file;
 
         std::ofstream metrics_stream;
         metrics_stream.open(metrics_file);
 
-        metrics_stream << report_string;
+        metrics_stream << "\n=================================\n" + getMetricsString() + "=================================";
         metrics_stream.close();
     }
 
     if (labels) {
-        if (per_batch_nodes_.empty()) {
-            throw MariusRuntimeException("To save labels, the evaluated node ids must be provided to add_result()");
-        }
-
-        all_nodes_ = torch::cat({per_batch_nodes_}).to(torch::kCPU);
-
-        string output_labels_file = directory + PathConstants::output_labels_file;
-        std::ofstream labels_stream;
-        labels_stream.open(output_labels_file);
-
-        string header_string = "id,y_pred,y_true";
-
-        torch::Tensor output_tensor = all_nodes_.to(torch::kFloat32).unsqueeze(1);
-        output_tensor = torch::cat({output_tensor, all_y_pred_.to(torch::kFloat32).unsqueeze(1)}, 1);
-        output_tensor = torch::cat({output_tensor, all_y_true_.to(torch::kFloat32).unsqueeze(1)}, 1);
-
-        labels_stream << header_string << "\n";
-        auto accessor = output_tensor.accessor<float, 2>();
-
-        int64_t num_rows = output_tensor.size(0);
-        int64_t num_cols = output_tensor.size(1);
-        for (int64_t row = 0; row < num_rows; row++) {
-            string row_string = "";
-            for (int64_t col = 0; col < num_cols - 1; col++) {
-                row_string = row_string + std::to_string((int)accessor[row][col]) + ",";
+        if (output_writer_ != nullptr) {
+            output_writer_->close();
+            output_writer_ = nullptr;
+        } else {
+            if (per_batch_nodes_.empty()) {
+                unlock();
+                throw MariusRuntimeException("To save labels, the evaluated node ids must be provided to add_result()");
             }
-            row_string = row_string + std::to_string((int)accessor[row][num_cols - 1]) + "\n";
 
-            labels_stream << row_string;
+            try {
+                ChunkedCsvWriter writer(directory + PathConstants::output_labels_file, "id,y_pred,y_true");
+                for (int i = 0; i < per_batch_nodes_.size(); i++) {
+                    writer.write(torch::stack({per_batch_nodes_[i].to(torch::kInt64),
+                                               per_batch_y_pred_[i].to(torch::kInt64),
+                                               per_batch_y_true_[i].to(torch::kInt64)}, 1));
+                }
+                writer.close();
+            } catch (...) {
+                unlock();
+                throw;
+            }
         }
-        labels_stream.close();
     }
+
+    num_nodes_ = 0;
+    metric_sums_ = {};
+    per_batch_y_true_ = {};
+    per_batch_y_pred_ = {};
+    per_batch_nodes_ = {};
+    unlock();
 }
 
 ProgressReporter::ProgressReporter(std::string item_name, int64_t total_items, int total_reports) {
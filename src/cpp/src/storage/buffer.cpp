@@ -63,7 +63,8 @@ torch::Tensor Partition::indexRead(Indices indices) {
     return ret;
 }
 
-PartitionedFile::PartitionedFile(string filename, int num_partitions, int64_t partition_size, int embedding_size, int64_t total_embeddings, torch::Dtype dtype) {
+PartitionedFile::PartitionedFile(string filename, int num_partitions, int64_t partition_size, int embedding_size, int64_t total_embeddings, torch::Dtype dtype,
+                                 std::vector<string> stripe_directories, int64_t stripe_size) {
     num_partitions_ = num_partitions;
     partition_size_ = partition_size;
     embedding_size_ = embedding_size;
@@ -79,6 +80,57 @@ PartitionedFile::PartitionedFile(string filename, int num_partitions, int64_t pa
         SPDLOG_ERROR("Unable to open {}\nError: {}", filename_, errno);
         throw std::runtime_error("");
     }
+
+    stripes_loaded_ = false;
+    stripes_dirty_ = false;
+    if (!stripe_directories.empty()) {
+        striped_file_ = std::make_unique<StripedFile>(filename_.substr(filename_.find_last_of('/') + 1), stripe_directories, stripe_size);
+    }
+}
+
+PartitionedFile::~PartitionedFile() {
+    syncStripes();
+    close(fd_);
+}
+
+void PartitionedFile::read(void *addr, int64_t count, int64_t offset) {
+    if (stripes_loaded_) {
+        striped_file_->read(addr, count, offset);
+    } else if (pread_wrapper(fd_, addr, count, offset) == -1) {
+        throw MariusRuntimeException(fmt::format("Unable to read {}\nError: {}", filename_, errno));
+    }
+}
+
+void PartitionedFile::write(const void *addr, int64_t count, int64_t offset) {
+    if (stripes_loaded_) {
+        stripes_dirty_ = true;
+        striped_file_->write(addr, count, offset);
+    } else if (pwrite_wrapper(fd_, addr, count, offset) == -1) {
+        throw MariusRuntimeException(fmt::format("Unable to write {}\nError: {}", filename_, errno));
+    }
+}
+
+void PartitionedFile::loadStripes() {
+    if (striped_file_ == nullptr || stripes_loaded_) {
+        return;
+    }
+
+    SPDLOG_INFO("Striping {} over {} directories", filename_, striped_file_->getNumDisks());
+    striped_file_->scatter(filename_, total_embeddings_ * embedding_size_ * dtype_size_);
+    stripes_loaded_ = true;
+    stripes_dirty_ = false;
+}
+
+void PartitionedFile::syncStripes() {
+    if (stripes_loaded_ && stripes_dirty_) {
+        stripes_dirty_ = false;
+        striped_file_->gather(filename_);
+    }
+}
+
+void PartitionedFile::unloadStripes() {
+    syncStripes();
+    stripes_loaded_ = false;
 }
 
 void PartitionedFile::readPartition(void* addr, Partition *partition) {
@@ -88,12 +140,17 @@ void PartitionedFile::readPartition(void* addr, Partition *partition) {
     }
 
     memset_wrapper(addr, 0, partition->total_size_);
-    if (pread_wrapper(fd_, addr, partition->total_size_, partition->file_offset_) == -1) {
-        SPDLOG_ERROR("Unable to read Block: {}\nError: {}", partition->partition_id_, errno);
-        throw std::runtime_error("");
-    }
+    read(addr, partition->total_size_, partition->file_offset_);
     partition->data_ptr_ = addr;
     partition->tensor_ = torch::from_blob(addr, {partition->partition_size_, embedding_size_}, dtype_);
+
+    // holes of a sparse file read as zeros, so a partition which is all zeros has never been written
+    if (initialize_partition_ && !initialized_[partition->partition_id_]) {
+        if (!partition->tensor_.any().item<bool>()) {
+            initialize_partition_(partition);
+        }
+        initialized_[partition->partition_id_] = true;
+    }
 }
 
 // writePartition accesses data pointed to by p->data_ptr_. Address p->data_ptr_ is expected to contain 
@@ -104,10 +161,12 @@ void PartitionedFile::writePartition(Partition *partition, bool clear_mem) {
         throw std::runtime_error("");
     }
 
-    if (pwrite_wrapper(fd_, partition->data_ptr_, partition->total_size_, partition->file_offset_) == -1) {
-        throw MariusRuntimeException(fmt::format("Unable to write partition: {}\nError: {}", partition->partition_id_, errno));
+    if (before_write_) {
+        before_write_(partition->partition_id_);
     }
 
+    write(partition->data_ptr_, partition->total_size_, partition->file_offset_);
+
     if (clear_mem) {
         memset_wrapper(partition->data_ptr_, 0, partition->total_size_);
         partition->data_ptr_ = nullptr;
@@ -294,6 +353,11 @@ void AsyncWriteBlock::stop() {
     }
 }
 
+void AsyncWriteBlock::wait() {
+    std::unique_lock lock(*lock_);
+    cv_.wait(lock, [this] { return present_ == false; });
+}
+
 void AsyncWriteBlock::async_write(std::vector<Partition *> partitions) {
     if(partitions.size() > mems_.size()) {
         // TODO: throw invalid inputs for function exception
@@ -333,7 +397,10 @@ PartitionBuffer::PartitionBuffer(int capacity,
                                  int64_t total_embeddings,
                                  torch::Dtype dtype,
                                  string filename,
-                                 bool prefetching) {
+                                 bool prefetching,
+                                 int64_t num_hot_nodes,
+                                 std::vector<string> stripe_directories,
+                                 int64_t stripe_size) {
     capacity_ = capacity;
     size_ = 0;
     num_partitions_ = num_partitions;
@@ -348,6 +415,10 @@ PartitionBuffer::PartitionBuffer(int capacity,
 
     prefetching_ = prefetching;
 
+    // pinned nodes are stored after the partition slots of the buffer
+    num_hot_nodes_ = std::max((int64_t) 0, std::min(num_hot_nodes, total_embeddings_));
+    hot_offset_ = capacity_ * partition_size_;
+
     int64_t curr_idx_offset = 0;
     int64_t curr_file_offset = 0;
     int64_t curr_partition_size = partition_size_;
@@ -369,7 +440,7 @@ PartitionBuffer::PartitionBuffer(int capacity,
 
 
     filename_ = filename;
-    partitioned_file_ = new PartitionedFile(filename_, num_partitions_, partition_size_, embedding_size_, total_embeddings_, dtype_);
+    partitioned_file_ = new PartitionedFile(filename_, num_partitions_, partition_size_, embedding_size_, total_embeddings_, dtype_, stripe_directories, stripe_size);
 
     loaded_ = false;
 }
@@ -387,12 +458,15 @@ PartitionBuffer::~PartitionBuffer() {
 void PartitionBuffer::load() {
     if (!loaded_) {
 
-        if (posix_memalign(&buff_mem_, 4096, capacity_ * partition_size_ * embedding_size_ * dtype_size_)) {
+        partitioned_file_->loadStripes();
+
+        int64_t num_rows = hot_offset_ + num_hot_nodes_;
+        if (posix_memalign(&buff_mem_, 4096, num_rows * embedding_size_ * dtype_size_)) {
             SPDLOG_ERROR("Unable to allocate buffer memory\nError: {}", errno);
             throw std::runtime_error("");
         }
-        memset_wrapper(buff_mem_, 0, capacity_ * partition_size_ * embedding_size_ * dtype_size_);
-        buffer_tensor_view_ = torch::from_blob(buff_mem_, {capacity_ * partition_size_, embedding_size_}, dtype_);
+        memset_wrapper(buff_mem_, 0, num_rows * embedding_size_ * dtype_size_);
+        buffer_tensor_view_ = torch::from_blob(buff_mem_, {num_rows, embedding_size_}, dtype_);
 
         // initialize buffer
         int partition_id;
@@ -420,6 +494,8 @@ void PartitionBuffer::load() {
 //            offset += partition->partition_size_;
 //        }
 
+        loadHotNodes();
+
         if (prefetching_) {
             lookahead_block_ = new LookaheadBlock(partition_size_ * embedding_size_ * dtype_size_, partitioned_file_, fine_to_coarse_ratio_);
             async_write_block_ = new AsyncWriteBlock(partition_size_ * embedding_size_ * dtype_size_, partitioned_file_, fine_to_coarse_ratio_);
@@ -436,9 +512,6 @@ void PartitionBuffer::unload(bool write) {
         if (write) {
             sync();
         }
-        buffer_tensor_view_ = torch::Tensor();
-        free(buff_mem_);
-        buff_mem_ = nullptr;
 
         if (prefetching_) {
             stopThreads();
@@ -446,6 +519,16 @@ void PartitionBuffer::unload(bool write) {
             delete async_write_block_;
         }
 
+        // evictions still being written may hold stale copies of the pinned nodes
+        if (write) {
+            writeHotNodes();
+            partitioned_file_->syncStripes();
+        }
+
+        buffer_tensor_view_ = torch::Tensor();
+        free(buff_mem_);
+        buff_mem_ = nullptr;
+
         size_ = 0;
         loaded_ = false;
     }
@@ -469,8 +552,8 @@ Indices PartitionBuffer::getRandomIds(int64_t size) {
     return torch::randint(in_buffer_ids_.size(0), size, torch::kInt64);
 }
 
-// indices must contain unique values, else there is a possibility of a race condition
-void PartitionBuffer::indexAdd(torch::Tensor indices, torch::Tensor values) {
+// duplicate indices are summed before the update, concurrent calls must provide row_locks to avoid racing on the same rows
+void PartitionBuffer::indexAdd(torch::Tensor indices, torch::Tensor values, StripedLock *row_locks) {
     if(!values.defined() || indices.sizes().size() != 1 || indices.size(0) != values.size(0) || buffer_tensor_view_.size(1) != values.size(1)) {
         // TODO: throw invalid inputs for function error
         throw std::runtime_error("");
@@ -478,18 +561,7 @@ void PartitionBuffer::indexAdd(torch::Tensor indices, torch::Tensor values) {
     // buffer_tensor_view_.index_add_(0, indices, values);
 
     // assumes this operation is only used on float valued data, and this op takes place on the CPU
-    auto data_accessor = buffer_tensor_view_.accessor<float, 2>();
-    auto ids_accessor = indices.accessor<int64_t, 1>();
-    auto values_accessor = values.accessor<float, 2>();
-
-    int d = values.size(1);
-    int64_t size = indices.size(0);
-    #pragma omp parallel for
-    for (int64_t i = 0; i < size; i++) {
-        for (int j = 0; j < d; j++) {
-            data_accessor[ids_accessor[i]][j] += values_accessor[i][j];
-        }
-    }
+    index_add_rows(buffer_tensor_view_, indices, values, row_locks);
 }
 
 void PartitionBuffer::setBufferOrdering(std::vector<torch::Tensor> buffer_states) {
@@ -644,6 +716,12 @@ torch::Tensor PartitionBuffer::getGlobalToLocalMap(bool get_current) {
             buffer_index_map.slice(0, partition_offset, partition_offset + admit_partition->partition_size_) = torch::arange(buffer_offset, buffer_offset + admit_partition->partition_size_);
         }
     }
+
+    // pinned nodes are always read from and updated in their own rows
+    if (num_hot_nodes_ > 0) {
+        buffer_index_map.slice(0, 0, num_hot_nodes_) = torch::arange(hot_offset_, hot_offset_ + num_hot_nodes_);
+    }
+
     return buffer_index_map;
 }
 
@@ -709,6 +787,91 @@ void PartitionBuffer::sync() {
             curr_partition->buffer_idx_ = -1;
         }
     }
+
+    // written after the partitions, which hold stale copies of the pinned nodes
+    writeHotNodes();
+
+    // the file is complete once the partitions held by the stripes are copied back
+    partitioned_file_->syncStripes();
+}
+
+void PartitionBuffer::flush() {
+    SPDLOG_DEBUG("Flushing buffer");
+
+    // evictions still being written hold stale copies of the pinned nodes, which must land before the pinned rows
+    if (prefetching_) {
+        async_write_block_->wait();
+    }
+
+    Partition *curr_partition;
+    for (int i = 0; i < num_partitions_; i++) {
+        curr_partition = partition_table_[i];
+        if (curr_partition->present_) {
+            partitioned_file_->writePartition(curr_partition, false);
+        }
+    }
+
+    writeHotNodes();
+}
+
+torch::Tensor PartitionBuffer::readFileRows(int64_t offset, int64_t n) {
+    torch::Tensor rows = torch::empty({n, embedding_size_}, dtype_);
+    int64_t row_bytes = embedding_size_ * dtype_size_;
+    partitioned_file_->read(rows.data_ptr(), n * row_bytes, offset * row_bytes);
+    return rows;
+}
+
+void PartitionBuffer::loadHotNodes() {
+    if (num_hot_nodes_ == 0) {
+        return;
+    }
+
+    torch::Tensor hot_rows = buffer_tensor_view_.narrow(0, hot_offset_, num_hot_nodes_);
+    void *tmp_mem = nullptr;
+
+    for (int i = 0; i < num_partitions_ && partition_table_[i]->idx_offset_ < num_hot_nodes_; i++) {
+        Partition *partition = partition_table_[i];
+        int64_t num_rows = std::min(partition->partition_size_, num_hot_nodes_ - partition->idx_offset_);
+
+        if (partition->present_) {
+            hot_rows.narrow(0, partition->idx_offset_, num_rows).copy_(buffer_tensor_view_.narrow(0, partition->buffer_idx_ * partition_size_, num_rows));
+            continue;
+        }
+
+        if (tmp_mem == nullptr && posix_memalign(&tmp_mem, 4096, partition_size_ * embedding_size_ * dtype_size_)) {
+            throw MariusRuntimeException(fmt::format("Unable to allocate memory for pinned nodes\nError: {}", errno));
+        }
+
+        // lazily initialized partitions are generated by the read, and written so that they are not generated again on admission
+        bool initialized = partitioned_file_->initialized_.empty() || partitioned_file_->initialized_[i];
+        partitioned_file_->readPartition(tmp_mem, partition);
+        hot_rows.narrow(0, partition->idx_offset_, num_rows).copy_(partition->tensor_.narrow(0, 0, num_rows));
+
+        if (!initialized) {
+            partitioned_file_->writePartition(partition, false);
+        }
+
+        partition->data_ptr_ = nullptr;
+        partition->tensor_ = torch::Tensor();
+    }
+
+    free(tmp_mem);
+}
+
+void PartitionBuffer::writeHotNodes() {
+    if (num_hot_nodes_ == 0 || !buffer_tensor_view_.defined()) {
+        return;
+    }
+
+    if (partitioned_file_->before_write_) {
+        for (int i = 0; i < num_partitions_ && partition_table_[i]->idx_offset_ < num_hot_nodes_; i++) {
+            partitioned_file_->before_write_(i);
+        }
+    }
+
+    // the pinned nodes are the first rows of the file
+    void *hot_ptr = (char *) buff_mem_ + hot_offset_ * embedding_size_ * dtype_size_;
+    partitioned_file_->write(hot_ptr, num_hot_nodes_ * embedding_size_ * dtype_size_, 0);
 }
 
 void PartitionBuffer::startThreads() {
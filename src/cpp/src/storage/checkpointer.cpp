@@ -4,39 +4,321 @@
 
 #include "storage/checkpointer.h"
 
+#include <ATen/CPUGeneratorImpl.h>
+#include <fcntl.h>
+#include <unistd.h>
+
+#include "common/util.h"
 #include "configuration/util.h"
 #include "reporting/logger.h"
 #include "storage/io.h"
 #include "storage/storage.h"
 
-Checkpointer::Checkpointer(std::shared_ptr<Model> model, shared_ptr<GraphModelStorage> storage, std::shared_ptr<CheckpointConfig> config) {
+TableSnapshot::TableSnapshot(string output_filename,
+                             torch::Tensor block_ids,
+                             int64_t block_size,
+                             int64_t num_rows,
+                             int64_t row_bytes,
+                             std::function<torch::Tensor(int64_t, int64_t)> read_rows) {
+    read_rows_ = read_rows;
+    block_size_ = block_size;
+    num_rows_ = num_rows;
+    row_bytes_ = row_bytes;
+
+    int64_t num_blocks = (num_rows_ + block_size_ - 1) / block_size_;
+    positions_ = std::vector<int64_t>(num_blocks, -1);
+
+    block_ids = std::get<0>(torch::sort(block_ids.to(torch::kInt64).to(torch::kCPU)));
+    auto block_ids_accessor = block_ids.accessor<int64_t, 1>();
+
+    int64_t output_offset = 0;
+    for (int64_t i = 0; i < block_ids.size(0); i++) {
+        int64_t block_id = block_ids_accessor[i];
+        positions_[block_id] = i;
+        block_ids_.emplace_back(block_id);
+        output_offsets_.emplace_back(output_offset);
+        output_offset += std::min(block_size_, num_rows_ - block_id * block_size_);
+    }
+
+    states_ = std::vector<BlockState>(block_ids_.size(), PENDING);
+    captured_ = std::vector<torch::Tensor>(block_ids_.size());
+    num_pending_ = block_ids_.size();
+
+    fd_ = open(output_filename.c_str(), O_RDWR | O_CREAT, 0644);
+    if (fd_ == -1) {
+        throw MariusRuntimeException(fmt::format("Unable to open {}\nError: {}", output_filename, errno));
+    }
+}
+
+TableSnapshot::~TableSnapshot() {
+    close(fd_);
+}
+
+void TableSnapshot::capture(int64_t position) {
+    std::unique_lock lock(lock_);
+
+    if (states_[position] == PENDING) {
+        states_[position] = CAPTURING;
+        num_pending_--;
+        lock.unlock();
+
+        int64_t offset = block_ids_[position] * block_size_;
+        torch::Tensor rows = read_rows_(offset, std::min(block_size_, num_rows_ - offset));
+
+        lock.lock();
+        captured_[position] = rows;
+        states_[position] = CAPTURED;
+        cv_.notify_all();
+    } else {
+        cv_.wait(lock, [this, position] { return states_[position] != CAPTURING; });
+    }
+}
+
+void TableSnapshot::preserveBlock(int64_t block_id) {
+    if (num_pending_ == 0 || block_id < 0 || block_id >= positions_.size() || positions_[block_id] == -1) {
+        return;
+    }
+
+    capture(positions_[block_id]);
+}
+
+void TableSnapshot::preserveRows(Indices indices) {
+    if (num_pending_ == 0) {
+        return;
+    }
+
+    torch::Tensor block_ids = std::get<0>(torch::_unique(torch::div(indices, block_size_, "floor"))).to(torch::kCPU);
+    auto block_ids_accessor = block_ids.accessor<int64_t, 1>();
+
+    for (int64_t i = 0; i < block_ids.size(0); i++) {
+        preserveBlock(block_ids_accessor[i]);
+    }
+}
+
+void TableSnapshot::write() {
+    for (int64_t position = 0; position < block_ids_.size(); position++) {
+        capture(position);
+
+        torch::Tensor rows;
+        {
+            std::unique_lock lock(lock_);
+            rows = captured_[position].contiguous();
+            captured_[position] = torch::Tensor();
+        }
+
+        if (pwrite_wrapper(fd_, rows.data_ptr(), rows.size(0) * row_bytes_, output_offsets_[position] * row_bytes_) == -1) {
+            throw MariusRuntimeException(fmt::format("Unable to write checkpoint block {}\nError: {}", block_ids_[position], errno));
+        }
+
+        std::unique_lock lock(lock_);
+        states_[position] = WRITTEN;
+    }
+}
+
+static int64_t get_checkpoint_block_size(shared_ptr<Storage> storage) {
+    if (instance_of<Storage, PartitionBufferStorage>(storage)) {
+        return std::dynamic_pointer_cast<PartitionBufferStorage>(storage)->getPartitionSize();
+    }
+    return std::max((storage->dim0_size_ + CHECKPOINT_IN_MEMORY_BLOCKS - 1) / CHECKPOINT_IN_MEMORY_BLOCKS, (int64_t) 1);
+}
+
+static void save_rng_state(string directory) {
+    auto generator = at::detail::getDefaultCPUGenerator();
+    torch::Tensor state;
+    {
+        std::lock_guard<std::mutex> lock(generator.mutex());
+        state = generator.get_state();
+    }
+    torch::save(state, directory + PathConstants::checkpoint_rng_state_file);
+}
+
+static void load_rng_state(string directory) {
+    torch::Tensor state;
+    torch::load(state, directory + PathConstants::checkpoint_rng_state_file);
+
+    auto generator = at::detail::getDefaultCPUGenerator();
+    std::lock_guard<std::mutex> lock(generator.mutex());
+    generator.set_state(state);
+}
+
+Checkpointer::Checkpointer() : writer_thread_(nullptr), deltas_since_full_(0) {}
+
+Checkpointer::Checkpointer(std::shared_ptr<Model> model, shared_ptr<GraphModelStorage> storage, std::shared_ptr<CheckpointConfig> config) : Checkpointer() {
     model_ = model;
     storage_ = storage;
     config_ = config;
+
+    if (config_ != nullptr && config_->incremental) {
+        for (auto table : {storage_->storage_ptrs_.node_embeddings, storage_->storage_ptrs_.node_optimizer_state}) {
+            if (table != nullptr) {
+                table->trackDirtyBlocks(get_checkpoint_block_size(table));
+            }
+        }
+    }
+}
+
+Checkpointer::~Checkpointer() {
+    if (writer_thread_ != nullptr) {
+        writer_thread_->join();
+        delete writer_thread_;
+    }
+}
+
+void Checkpointer::snapshotTable(shared_ptr<Storage> storage, string table_name, string directory, bool delta) {
+    if (storage == nullptr) {
+        return;
+    }
+
+    int64_t block_size = storage->dirty_blocks_.defined() ? storage->block_size_ : get_checkpoint_block_size(storage);
+    int64_t num_rows = storage->dim0_size_;
+    int64_t row_bytes = storage->dim1_size_ * get_dtype_size_wrapper(storage->dtype_);
+
+    torch::Tensor block_ids = torch::arange((num_rows + block_size - 1) / block_size, torch::kInt64);
+    if (storage->dirty_blocks_.defined()) {
+        // the dirty flags are reset for every checkpoint, so the next delta holds the blocks updated after this one
+        torch::Tensor dirty_block_ids = storage->takeDirtyBlocks();
+        if (delta) {
+            block_ids = dirty_block_ids;
+        }
+    }
+
+    std::function<torch::Tensor(int64_t, int64_t)> read_rows;
+    shared_ptr<PartitionBufferStorage> buffer_storage = std::dynamic_pointer_cast<PartitionBufferStorage>(storage);
+
+    if (buffer_storage != nullptr) {
+        // partitions in the buffer are written back, after which the backing file holds the whole table. they stay in the buffer
+        // since the checkpoint may be taken at a swap in the middle of an epoch. rows are read through the buffer, so a striped
+        // file is not copied back for each checkpoint
+        buffer_storage->flush();
+        read_rows = [buffer_storage](int64_t offset, int64_t n) { return buffer_storage->readFileRows(offset, n); };
+    } else if (instance_of<Storage, InMemory>(storage)) {
+        read_rows = [storage](int64_t offset, int64_t n) {
+            torch::Tensor rows = storage->data_.narrow(0, offset, n);
+            return rows.is_cuda() ? rows.to(torch::kCPU) : rows.clone();
+        };
+    } else {
+        throw MariusRuntimeException("Checkpoints require InMemory or PartitionBuffer storage for " + table_name);
+    }
+
+    if (delta) {
+        std::ofstream blocks_file(directory + table_name + PathConstants::checkpoint_blocks_suffix);
+        blocks_file << block_size << " " << row_bytes << " " << num_rows << "\n";
+        auto block_ids_accessor = block_ids.accessor<int64_t, 1>();
+        for (int64_t i = 0; i < block_ids.size(0); i++) {
+            blocks_file << block_ids_accessor[i] << "\n";
+        }
+    }
+
+    auto snapshot = std::make_shared<TableSnapshot>(directory + table_name + PathConstants::file_ext,
+                                                    block_ids,
+                                                    block_size,
+                                                    num_rows,
+                                                    row_bytes,
+                                                    read_rows);
+
+    if (buffer_storage != nullptr) {
+        buffer_storage->setBeforePartitionWrite([snapshot](int partition_id) { snapshot->preserveBlock(partition_id); });
+    } else {
+        storage->before_update_ = [snapshot](Indices indices) { snapshot->preserveRows(indices); };
+    }
+
+    SPDLOG_INFO("Checkpointing {} of {} blocks of {}", block_ids.size(0), (num_rows + block_size - 1) / block_size, table_name);
+
+    snapshots_.emplace_back(snapshot);
 }
 
-void Checkpointer::create_checkpoint(string checkpoint_dir, CheckpointMeta checkpoint_meta, int epochs) {
-    string tmp_checkpoint_dir = checkpoint_dir + "checkpoint_" + std::to_string(epochs) + "_tmp/";
+void Checkpointer::clearSnapshotCallbacks() {
+    for (auto table : {storage_->storage_ptrs_.node_embeddings, storage_->storage_ptrs_.node_optimizer_state}) {
+        if (table == nullptr) {
+            continue;
+        }
+
+        if (instance_of<Storage, PartitionBufferStorage>(table)) {
+            std::dynamic_pointer_cast<PartitionBufferStorage>(table)->setBeforePartitionWrite(nullptr);
+        } else {
+            table->before_update_ = nullptr;
+        }
+    }
+}
+
+void Checkpointer::wait() {
+    if (writer_thread_ != nullptr) {
+        writer_thread_->join();
+        delete writer_thread_;
+        writer_thread_ = nullptr;
+
+        clearSnapshotCallbacks();
+        snapshots_.clear();
+    }
+
+    if (writer_error_) {
+        std::exception_ptr error = writer_error_;
+        writer_error_ = nullptr;
+        std::rethrow_exception(error);
+    }
+}
+
+void Checkpointer::create_checkpoint(string checkpoint_dir, CheckpointMeta checkpoint_meta, int epochs, shared_ptr<DataLoader> dataloader) {
+    // only one checkpoint is written at a time
+    wait();
+
+    string checkpoint_name = "checkpoint_" + std::to_string(epochs);
+    if (checkpoint_meta.buffer_states_processed > 0) {
+        checkpoint_name += "_" + std::to_string(checkpoint_meta.buffer_states_processed);
+    }
+    string tmp_checkpoint_dir = checkpoint_dir + checkpoint_name + "_tmp/";
+    string final_checkpoint_dir = checkpoint_dir + checkpoint_name + "/";
     createDir(tmp_checkpoint_dir, false);
 
-    std::string new_embeddings_file = tmp_checkpoint_dir + PathConstants::embeddings_file + PathConstants::file_ext;
-    std::string new_embeddings_state_file = tmp_checkpoint_dir + PathConstants::embeddings_state_file + PathConstants::file_ext;
+    bool delta = config_->incremental && !last_checkpoint_.empty() && deltas_since_full_ + 1 < config_->compaction_interval;
+    checkpoint_meta.parent = delta ? last_checkpoint_ : "";
+
+    if (checkpoint_meta.has_model) {
+        snapshotTable(storage_->storage_ptrs_.node_embeddings, PathConstants::embeddings_file, tmp_checkpoint_dir, delta);
+        model_->save(tmp_checkpoint_dir);
+    }
+
+    if (config_->save_state) {
+        snapshotTable(storage_->storage_ptrs_.node_optimizer_state, PathConstants::embeddings_state_file, tmp_checkpoint_dir, delta);
+    }
 
-    std::string embeddings_file = checkpoint_dir + PathConstants::embeddings_file + PathConstants::file_ext;
-    std::string embeddings_state_file = checkpoint_dir + PathConstants::embeddings_state_file + PathConstants::file_ext;
+    saveMetadata(tmp_checkpoint_dir, checkpoint_meta);
+    save_rng_state(tmp_checkpoint_dir);
 
-    if (fileExists(embeddings_file)) {
-        copyFile(embeddings_file, new_embeddings_file);
-        if (this->config_->save_state) copyFile(embeddings_state_file, new_embeddings_state_file);
+    if (checkpoint_meta.buffer_states_processed > 0) {
+        if (dataloader == nullptr) {
+            throw MariusRuntimeException("Checkpoints taken within an epoch require the dataloader");
+        }
+        dataloader->saveRemainingOrdering(tmp_checkpoint_dir + PathConstants::checkpoint_ordering_file);
     }
 
-    this->save(tmp_checkpoint_dir, checkpoint_meta);
+    last_checkpoint_ = checkpoint_name;
+    deltas_since_full_ = delta ? deltas_since_full_ + 1 : 0;
+
+    std::vector<shared_ptr<TableSnapshot>> snapshots = snapshots_;
+    writer_thread_ = new std::thread([this, snapshots, checkpoint_dir, checkpoint_name, tmp_checkpoint_dir, final_checkpoint_dir] {
+        try {
+            for (auto snapshot : snapshots) {
+                snapshot->write();
+            }
+            renameFile(tmp_checkpoint_dir, final_checkpoint_dir);
+
+            string latest_file = checkpoint_dir + PathConstants::latest_checkpoint_file;
+            std::ofstream(latest_file + ".tmp") << checkpoint_name << "\n";
+            renameFile(latest_file + ".tmp", latest_file);
+        } catch (...) {
+            writer_error_ = std::current_exception();
+        }
+    });
 
-    string final_checkpoint_dir = checkpoint_dir + "checkpoint_" + std::to_string(epochs) + "/";
-    renameFile(tmp_checkpoint_dir, final_checkpoint_dir);
+    if (!config_->asynchronous) {
+        wait();
+    }
 }
 
 void Checkpointer::save(string checkpoint_dir, CheckpointMeta checkpoint_meta) {
+    wait();
+
     if (checkpoint_meta.has_model) {
         if (storage_->storage_ptrs_.node_embeddings != nullptr) {
             storage_->storage_ptrs_.node_embeddings->write();
@@ -53,11 +335,135 @@ void Checkpointer::save(string checkpoint_dir, CheckpointMeta checkpoint_meta) {
     saveMetadata(checkpoint_dir, checkpoint_meta);
 }
 
+void Checkpointer::materialize(string checkpoint_dir, string output_dir) {
+    if (checkpoint_dir.back() != '/') checkpoint_dir += "/";
+    if (output_dir.back() != '/') output_dir += "/";
+
+    for (string table_name : {PathConstants::embeddings_file, PathConstants::embeddings_state_file}) {
+        // collect the deltas from the newest to the oldest, the chain ends at a checkpoint with a complete table
+        std::vector<string> chain;
+        string directory = checkpoint_dir;
+        while (fileExists(directory + table_name + PathConstants::checkpoint_blocks_suffix)) {
+            chain.emplace_back(directory);
+
+            CheckpointMeta meta = loadMetadata(directory);
+            if (meta.parent.empty()) {
+                throw MariusRuntimeException("Incremental checkpoint " + directory + " does not reference its parent checkpoint");
+            }
+            directory = directory + "../" + meta.parent + "/";
+        }
+
+        if (chain.empty()) {
+            continue;
+        }
+
+        string base_file = directory + table_name + PathConstants::file_ext;
+        if (!fileExists(base_file)) {
+            throw MariusRuntimeException("Checkpoint " + directory + " of the incremental chain of " + checkpoint_dir + " is missing " + table_name);
+        }
+
+        SPDLOG_INFO("Reconstructing {} from {} and {} incremental checkpoints", table_name, directory, chain.size());
+
+        string output_file = output_dir + table_name + PathConstants::file_ext;
+        string tmp_file = output_file + ".tmp";
+        copyFile(base_file, tmp_file);
+
+        int output_fd = open(tmp_file.c_str(), O_RDWR);
+        if (output_fd == -1) {
+            throw MariusRuntimeException(fmt::format("Unable to open {}\nError: {}", tmp_file, errno));
+        }
+
+        for (auto it = chain.rbegin(); it != chain.rend(); it++) {
+            std::ifstream blocks_file(*it + table_name + PathConstants::checkpoint_blocks_suffix);
+            int64_t block_size;
+            int64_t row_bytes;
+            int64_t num_rows;
+            blocks_file >> block_size >> row_bytes >> num_rows;
+
+            string delta_file = *it + table_name + PathConstants::file_ext;
+            int delta_fd = open(delta_file.c_str(), O_RDONLY);
+            if (delta_fd == -1) {
+                close(output_fd);
+                throw MariusRuntimeException(fmt::format("Unable to open {}\nError: {}", delta_file, errno));
+            }
+
+            std::vector<char> block(block_size * row_bytes);
+            int64_t delta_offset = 0;
+            int64_t block_id;
+            while (blocks_file >> block_id) {
+                int64_t size = std::min(block_size, num_rows - block_id * block_size) * row_bytes;
+
+                if (pread_wrapper(delta_fd, block.data(), size, delta_offset) == -1 ||
+                    pwrite_wrapper(output_fd, block.data(), size, block_id * block_size * row_bytes) == -1) {
+                    close(delta_fd);
+                    close(output_fd);
+                    throw MariusRuntimeException(fmt::format("Unable to apply block {} of {}\nError: {}", block_id, delta_file, errno));
+                }
+                delta_offset += size;
+            }
+            close(delta_fd);
+        }
+
+        close(output_fd);
+        renameFile(tmp_file, output_file);
+
+        // the output now holds the complete table
+        string output_blocks_file = output_dir + table_name + PathConstants::checkpoint_blocks_suffix;
+        if (fileExists(output_blocks_file)) {
+            remove(output_blocks_file.c_str());
+        }
+    }
+}
+
+string Checkpointer::latestCheckpoint(string model_dir) {
+    std::ifstream latest_file(model_dir + PathConstants::latest_checkpoint_file);
+    string checkpoint_name;
+    if (!(latest_file >> checkpoint_name)) {
+        return "";
+    }
+
+    string latest_dir = model_dir + checkpoint_name + "/";
+    if (!fileExists(latest_dir + PathConstants::checkpoint_metadata_file)) {
+        return "";
+    }
+
+    if (fileExists(model_dir + PathConstants::checkpoint_metadata_file)) {
+        CheckpointMeta model_meta = loadMetadata(model_dir);
+        CheckpointMeta latest_meta = loadMetadata(latest_dir);
+
+        bool newer = latest_meta.num_epochs > model_meta.num_epochs ||
+                     (latest_meta.num_epochs == model_meta.num_epochs && latest_meta.buffer_states_processed > model_meta.buffer_states_processed);
+        if (!newer) {
+            return "";
+        }
+    }
+
+    return latest_dir;
+}
+
+void Checkpointer::copyTables(string checkpoint_dir, string output_dir) {
+    for (string table_name : {PathConstants::embeddings_file, PathConstants::embeddings_state_file}) {
+        string table_file = checkpoint_dir + table_name + PathConstants::file_ext;
+        if (fileExists(table_file) && !fileExists(checkpoint_dir + table_name + PathConstants::checkpoint_blocks_suffix)) {
+            copyFile(table_file, output_dir + table_name + PathConstants::file_ext);
+        }
+    }
+}
+
 std::tuple<std::shared_ptr<Model>, shared_ptr<GraphModelStorage>, CheckpointMeta> Checkpointer::load(string checkpoint_dir,
                                                                                                      std::shared_ptr<MariusConfig> marius_config,
                                                                                                      bool train) {
     CheckpointMeta checkpoint_meta = loadMetadata(checkpoint_dir);
 
+    // when resuming training the checkpoint has been copied to the model directory, whose tables must be complete
+    if (train) {
+        materialize(checkpoint_dir, marius_config->storage->model_dir);
+
+        if (fileExists(checkpoint_dir + PathConstants::checkpoint_rng_state_file)) {
+            load_rng_state(checkpoint_dir);
+        }
+    }
+
     std::vector<torch::Device> devices = devices_from_config(marius_config->storage);
     std::shared_ptr<Model> model = initModelFromConfig(marius_config->model,
                                                        devices,
@@ -107,6 +513,19 @@ CheckpointMeta Checkpointer::loadMetadata(string directory) {
     std::getline(input_file, line);
     std::istringstream(line) >> ret_meta.has_model;
 
+    // written by newer versions only
+    if (std::getline(input_file, line)) {
+        ret_meta.parent = line;
+    }
+
+    if (std::getline(input_file, line)) {
+        ret_meta.buffer_states_processed = std::stol(line);
+    }
+
+    if (std::getline(input_file, line)) {
+        ret_meta.items_processed = std::stol(line);
+    }
+
     return ret_meta;
 }
 
@@ -121,4 +540,7 @@ void Checkpointer::saveMetadata(string directory, CheckpointMeta checkpoint_meta
     output_file << checkpoint_meta.has_state << "\n";
     output_file << checkpoint_meta.has_encoded << "\n";
     output_file << checkpoint_meta.has_model << "\n";
-}
\ No newline at end of file
+    output_file << checkpoint_meta.parent << "\n";
+    output_file << checkpoint_meta.buffer_states_processed << "\n";
+    output_file << checkpoint_meta.items_processed << "\n";
+}
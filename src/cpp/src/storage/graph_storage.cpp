@@ -118,6 +118,11 @@ void GraphModelStorage::load() {
     if (train_) {
         _load(storage_ptrs_.node_embeddings);
         _load(storage_ptrs_.node_optimizer_state);
+
+        if (storage_ptrs_.nodes != nullptr && instance_of<Storage, TieredStorage>(storage_ptrs_.node_features)) {
+            // the features of the training nodes are read every epoch, so they are placed in the faster tiers on load
+            std::dynamic_pointer_cast<TieredStorage>(storage_ptrs_.node_features)->addAccessHint(getNodeIdsRange(0, storage_ptrs_.nodes->getDim0()));
+        }
         _load(storage_ptrs_.node_features);
     } else {
         if (storage_ptrs_.node_embeddings != nullptr) {
@@ -201,7 +206,11 @@ Indices GraphModelStorage::getRandomNodeIds(int64_t size) {
     torch::TensorOptions ind_opts = torch::TensorOptions().dtype(torch::kInt64).device(storage_ptrs_.edges->device_);
 
     Indices ret;
-    if (useInMemorySubGraph()) {
+    if (useInMemorySubGraph() && current_subgraph_state_ != nullptr && current_subgraph_state_->in_memory_subgraph_ != nullptr
+        && current_subgraph_state_->in_memory_subgraph_->valid_node_ids_.defined()) {
+        Indices valid_node_ids = current_subgraph_state_->in_memory_subgraph_->valid_node_ids_;
+        ret = valid_node_ids.index_select(0, torch::randint(valid_node_ids.size(0), {size}, valid_node_ids.options()));
+    } else if (useInMemorySubGraph()) {
         if (storage_ptrs_.node_embeddings != nullptr) {
             ret = std::dynamic_pointer_cast<PartitionBufferStorage>(storage_ptrs_.node_embeddings)->getRandomIds(size);
         } else {
@@ -323,6 +332,9 @@ void GraphModelStorage::updatePutEncodedNodesRange(int64_t start, int64_t size,
 
 OptimizerState GraphModelStorage::getNodeEmbeddingState(Indices indices) {
     if (storage_ptrs_.node_optimizer_state != nullptr) {
+        if (optimizerStateIndexedGlobally()) {
+            indices = current_subgraph_state_->local_to_global_index_map_.index_select(0, indices.to(torch::kCPU));
+        }
         return storage_ptrs_.node_optimizer_state->indexRead(indices);
     } else {
         return torch::Tensor();
@@ -345,10 +357,110 @@ void GraphModelStorage::updatePutNodeEmbeddingState(Indices indices, OptimizerSt
 
 void GraphModelStorage::updateAddNodeEmbeddingState(Indices indices, torch::Tensor values) {
     if (storage_ptrs_.node_optimizer_state != nullptr) {
+        if (optimizerStateIndexedGlobally()) {
+            indices = current_subgraph_state_->local_to_global_index_map_.index_select(0, indices.to(torch::kCPU));
+        }
         storage_ptrs_.node_optimizer_state->indexAdd(indices, values);
     }
 }
 
+// returns the in memory tensor backing a storage, which is read and updated in place by the sparse optimizer
+torch::Tensor getUpdatableTensor(shared_ptr<Storage> storage) {
+    if (instance_of<Storage, PartitionBufferStorage>(storage)) {
+        return std::dynamic_pointer_cast<PartitionBufferStorage>(storage)->buffer_->getBufferTensor();
+    } else if (instance_of<Storage, InMemory>(storage)) {
+        return storage->data_;
+    } else {
+        throw MariusRuntimeException("Direct access to the storage tensor requires InMemory or PartitionBuffer storage");
+    }
+}
+
+torch::Tensor GraphModelStorage::getNodeEmbeddingsTable() {
+    return getUpdatableTensor(storage_ptrs_.node_embeddings);
+}
+
+torch::Tensor GraphModelStorage::getNodeFeaturesTable() {
+    return getUpdatableTensor(storage_ptrs_.node_features);
+}
+
+void GraphModelStorage::updateNodeEmbeddingsSparseAdagrad(Indices indices, torch::Tensor gradients, float learning_rate) {
+    if (storage_ptrs_.node_optimizer_state == nullptr) {
+        storage_ptrs_.node_embeddings->indexAdd(indices, -learning_rate * gradients);
+        return;
+    }
+
+    torch::Tensor state_index_map;
+    if (optimizerStateIndexedGlobally()) {
+        state_index_map = current_subgraph_state_->local_to_global_index_map_;
+    }
+
+    // the tables are updated in place below, bypassing indexAdd
+    if (storage_ptrs_.node_embeddings->tracksUpdates()) {
+        storage_ptrs_.node_embeddings->beforeUpdate(indices);
+    }
+    if (storage_ptrs_.node_optimizer_state->tracksUpdates()) {
+        if (state_index_map.defined()) {
+            storage_ptrs_.node_optimizer_state->beforeUpdate(state_index_map.index_select(0, indices.to(torch::kCPU)));
+        } else {
+            storage_ptrs_.node_optimizer_state->beforeUpdate(indices);
+        }
+    }
+
+    sparseAdagradStep(getUpdatableTensor(storage_ptrs_.node_embeddings),
+                      getUpdatableTensor(storage_ptrs_.node_optimizer_state),
+                      indices,
+                      gradients,
+                      learning_rate,
+                      1e-10,
+                      state_index_map,
+                      storage_ptrs_.node_embeddings->row_locks_.get());
+}
+
+void GraphModelStorage::enableConcurrentUpdates(int64_t num_stripes) {
+    if (storage_ptrs_.node_embeddings != nullptr) {
+        storage_ptrs_.node_embeddings->setRowLocks(num_stripes);
+    }
+    if (storage_ptrs_.node_optimizer_state != nullptr) {
+        storage_ptrs_.node_optimizer_state->setRowLocks(num_stripes);
+    }
+}
+
+bool GraphModelStorage::optimizerStateIndexedGlobally() {
+    return storage_ptrs_.node_optimizer_state != nullptr
+           && instance_of<Storage, PartitionBufferStorage>(storage_ptrs_.node_embeddings)
+           && !instance_of<Storage, PartitionBufferStorage>(storage_ptrs_.node_optimizer_state);
+}
+
+void GraphModelStorage::setLocalToGlobalMap(shared_ptr<InMemorySubgraphState> subgraph) {
+    if (!subgraph->global_to_local_index_map_.defined()) {
+        return;
+    }
+
+    torch::Tensor global_to_local = subgraph->global_to_local_index_map_;
+    torch::Tensor global_ids = (global_to_local >= 0).nonzero().flatten(0, 1);
+    torch::Tensor local_ids = global_to_local.index_select(0, global_ids);
+
+    int64_t num_local = getNumNodesInMemory();
+    subgraph->local_to_global_index_map_ = -torch::ones({num_local}, torch::kInt64);
+    subgraph->local_to_global_index_map_.index_copy_(0, local_ids, global_ids);
+}
+
+void GraphModelStorage::setValidNodeIds(shared_ptr<InMemorySubgraphState> subgraph) {
+    shared_ptr<PartitionBufferStorage> buffer;
+    if (storage_ptrs_.node_embeddings != nullptr) {
+        buffer = std::dynamic_pointer_cast<PartitionBufferStorage>(storage_ptrs_.node_embeddings);
+    } else if (storage_ptrs_.node_features != nullptr) {
+        buffer = std::dynamic_pointer_cast<PartitionBufferStorage>(storage_ptrs_.node_features);
+    }
+
+    if (buffer == nullptr || buffer->getNumHotNodes() == 0 || !subgraph->global_to_local_index_map_.defined()) {
+        return;
+    }
+
+    torch::Tensor global_to_local = subgraph->global_to_local_index_map_;
+    subgraph->in_memory_subgraph_->valid_node_ids_ = std::get<0>(torch::sort(global_to_local.masked_select(global_to_local >= 0)));
+}
+
 bool GraphModelStorage::embeddingsOffDevice() {
 
     if (storage_ptrs_.node_embeddings != nullptr) {
@@ -427,6 +539,8 @@ void GraphModelStorage::initializeInMemorySubGraph(torch::Tensor buffer_state) {
             current_subgraph_state_->global_to_local_index_map_ = std::dynamic_pointer_cast<PartitionBufferStorage>(storage_ptrs_.node_features)->getGlobalToLocalMap(true);
         }
 
+        setLocalToGlobalMap(current_subgraph_state_);
+
         torch::Tensor mapped_edges;
         torch::Tensor mapped_edges_dst_sort;
         if (storage_ptrs_.edges->dim1_size_ == 3) {
@@ -459,6 +573,7 @@ void GraphModelStorage::initializeInMemorySubGraph(torch::Tensor buffer_state) {
         }
 
         current_subgraph_state_->in_memory_subgraph_ = std::make_shared<MariusGraph>(mapped_edges, mapped_edges_dst_sort, getNumNodesInMemory());
+        setValidNodeIds(current_subgraph_state_);
 
         current_subgraph_state_->in_memory_partition_ids_ = new_in_mem_partition_ids;
         current_subgraph_state_->in_memory_edge_bucket_ids_ = in_mem_edge_bucket_ids;
@@ -702,6 +817,8 @@ void GraphModelStorage::updateInMemorySubGraph_(shared_ptr<InMemorySubgraphState
         subgraph->global_to_local_index_map_ = std::dynamic_pointer_cast<PartitionBufferStorage>(storage_ptrs_.node_features)->getGlobalToLocalMap(!prefetch_);
     }
 
+    setLocalToGlobalMap(subgraph);
+
 
     torch::Tensor mapped_edges;
     torch::Tensor mapped_edges_dst_sort;
@@ -738,6 +855,7 @@ void GraphModelStorage::updateInMemorySubGraph_(shared_ptr<InMemorySubgraphState
     }
 
     subgraph->in_memory_subgraph_ = std::make_shared<MariusGraph>(mapped_edges, mapped_edges_dst_sort, getNumNodesInMemory());
+    setValidNodeIds(subgraph);
 
     // update state
     subgraph->in_memory_partition_ids_ = new_in_mem_partition_ids;
@@ -4,6 +4,11 @@
 
 #include "storage/io.h"
 
+#include <ATen/CPUGeneratorImpl.h>
+#include <fcntl.h>
+#include <unistd.h>
+
+#include "common/util.h"
 #include "configuration/constants.h"
 #include "nn/initialization.h"
 #include "nn/model.h"
@@ -55,6 +60,10 @@ std::tuple<shared_ptr<Storage>, shared_ptr<Storage>, shared_ptr<Storage>> initia
             SPDLOG_ERROR("Backend type not available for edges.");
             throw std::runtime_error("");
         }
+        case StorageBackend::TIERED: {
+            SPDLOG_ERROR("Backend type not available for edges.");
+            throw std::runtime_error("");
+        }
         case StorageBackend::FLAT_FILE: {
             if (num_train != -1) {
                 train_edge_storage = std::make_shared<FlatFile>(train_filename, num_train, num_columns, dtype);
@@ -65,6 +74,16 @@ std::tuple<shared_ptr<Storage>, shared_ptr<Storage>, shared_ptr<Storage>> initia
             if (num_test != -1) {
                 test_edge_storage = std::make_shared<FlatFile>(test_filename, num_test, num_columns, dtype);
             }
+
+            // edge buckets are read from stripes spread over several disks, if configured
+            auto flat_file_options = std::dynamic_pointer_cast<FlatFileOptions>(storage_config->edges->options);
+            if (flat_file_options != nullptr && !flat_file_options->stripe_directories.empty()) {
+                for (auto edge_storage : {train_edge_storage, valid_edge_storage, test_edge_storage}) {
+                    if (edge_storage != nullptr) {
+                        std::dynamic_pointer_cast<FlatFile>(edge_storage)->setStriping(flat_file_options->stripe_directories, flat_file_options->stripe_size);
+                    }
+                }
+            }
             break;
         }
         case StorageBackend::HOST_MEMORY: {
@@ -151,6 +170,21 @@ std::tuple<shared_ptr<Storage>, shared_ptr<Storage>, shared_ptr<Storage>> initia
     return std::forward_as_tuple(train_edge_storage, valid_edge_storage, test_edge_storage);
 }
 
+// creates a file of the given size without writing it, unwritten ranges of the file read as zeros
+static void createSparseFile(string filename, int64_t size) {
+    int fd = open(filename.c_str(), O_RDWR | O_CREAT | O_TRUNC, 0644);
+    if (fd == -1) {
+        throw MariusRuntimeException(fmt::format("Unable to create {}\nError: {}", filename, errno));
+    }
+
+    if (ftruncate(fd, size) == -1) {
+        close(fd);
+        throw MariusRuntimeException(fmt::format("Unable to resize {}\nError: {}", filename, errno));
+    }
+
+    close(fd);
+}
+
 std::tuple<shared_ptr<Storage>, shared_ptr<Storage> > initializeNodeEmbeddings(shared_ptr<Model> model,
                                                                                shared_ptr<StorageConfig> storage_config,
                                                                                bool reinitialize,
@@ -172,7 +206,18 @@ std::tuple<shared_ptr<Storage>, shared_ptr<Storage> > initializeNodeEmbeddings(s
     int embedding_dim = model->get_base_embedding_dim();
     torch::Dtype dtype = storage_config->embeddings->options->dtype;
 
-    if (reinitialize) {
+    // row-wise adagrad keeps a single accumulator per node
+    int state_dim = model->sparse_row_wise_ ? 1 : embedding_dim;
+
+    bool lazy_initialization = storage_config->embeddings->type == StorageBackend::PARTITION_BUFFER &&
+                               std::dynamic_pointer_cast<PartitionBufferOptions>(storage_config->embeddings->options)->lazy_initialization;
+
+    if (reinitialize && lazy_initialization) {
+        // partitions are generated when they are first admitted to the buffer, the optimizer state is initialized to zeros
+        int64_t dtype_size = get_dtype_size_wrapper(dtype);
+        createSparseFile(node_embedding_filename, num_nodes * embedding_dim * dtype_size);
+        createSparseFile(optimizer_state_filename, num_nodes * state_dim * dtype_size);
+    } else if (reinitialize) {
         shared_ptr<FlatFile> init_node_embeddings = std::make_shared<FlatFile>(node_embedding_filename, dtype);
         shared_ptr<FlatFile> init_optimizer_state_storage = std::make_shared<FlatFile>(optimizer_state_filename, dtype);
 
@@ -190,7 +235,7 @@ std::tuple<shared_ptr<Storage>, shared_ptr<Storage> > initializeNodeEmbeddings(s
                                                          {curr_num_nodes, embedding_dim},
                                                          {num_nodes, embedding_dim},
                                                          torch::TensorOptions());
-            OptimizerState emb_state = torch::zeros_like(weights);
+            OptimizerState emb_state = torch::zeros({curr_num_nodes, state_dim}, weights.options());
             init_node_embeddings->append(weights);
             init_optimizer_state_storage->append(emb_state);
 
@@ -207,11 +252,35 @@ std::tuple<shared_ptr<Storage>, shared_ptr<Storage> > initializeNodeEmbeddings(s
                                                                        num_nodes,
                                                                        embedding_dim,
                                                                        std::dynamic_pointer_cast<PartitionBufferOptions>(storage_config->embeddings->options));
+
+            if (lazy_initialization) {
+                // each partition has its own generator, so its initial values do not depend on when it is first admitted
+                uint64_t seed = at::detail::getDefaultCPUGenerator().current_seed();
+                std::dynamic_pointer_cast<PartitionBufferStorage>(node_embeddings)->setPartitionInitializer([init_config, seed, num_nodes, embedding_dim](Partition *partition) {
+                    at::Generator generator = at::detail::createCPUGenerator(seed + partition->partition_id_);
+                    torch::Tensor weights = initialize_subtensor(init_config,
+                                                                 {partition->partition_size_, embedding_dim},
+                                                                 {num_nodes, embedding_dim},
+                                                                 torch::TensorOptions(),
+                                                                 {-1, -1},
+                                                                 generator);
+                    partition->tensor_.copy_(weights);
+                });
+            }
             if (train) {
-                optimizer_state_storage = std::make_shared<PartitionBufferStorage>(optimizer_state_filename,
-                                                                                   num_nodes,
-                                                                                   embedding_dim,
-                                                                                   std::dynamic_pointer_cast<PartitionBufferOptions>(storage_config->embeddings->options));
+                if (model->sparse_row_wise_) {
+                    // the row-wise state is small enough to stay in memory while the embeddings are swapped
+                    optimizer_state_storage = std::make_shared<InMemory>(optimizer_state_filename,
+                                                                         num_nodes,
+                                                                         state_dim,
+                                                                         dtype,
+                                                                         torch::kCPU);
+                } else {
+                    optimizer_state_storage = std::make_shared<PartitionBufferStorage>(optimizer_state_filename,
+                                                                                       num_nodes,
+                                                                                       embedding_dim,
+                                                                                       std::dynamic_pointer_cast<PartitionBufferOptions>(storage_config->embeddings->options));
+                }
             }
             break;
         }
@@ -219,6 +288,10 @@ std::tuple<shared_ptr<Storage>, shared_ptr<Storage> > initializeNodeEmbeddings(s
             SPDLOG_ERROR("Backend type not available for embeddings.");
             throw std::runtime_error("");
         }
+        case StorageBackend::TIERED: {
+            SPDLOG_ERROR("Backend type not available for embeddings.");
+            throw std::runtime_error("");
+        }
         case StorageBackend::HOST_MEMORY: {
             node_embeddings = std::make_shared<InMemory>(node_embedding_filename,
                                                          num_nodes,
@@ -228,7 +301,7 @@ std::tuple<shared_ptr<Storage>, shared_ptr<Storage> > initializeNodeEmbeddings(s
             if (train) {
                 optimizer_state_storage = std::make_shared<InMemory>(optimizer_state_filename,
                                                                      num_nodes,
-                                                                     embedding_dim,
+                                                                     state_dim,
                                                                      dtype,
                                                                      torch::kCPU);
             }
@@ -243,7 +316,7 @@ std::tuple<shared_ptr<Storage>, shared_ptr<Storage> > initializeNodeEmbeddings(s
             if (train) {
                 optimizer_state_storage = std::make_shared<InMemory>(optimizer_state_filename,
                                                                      num_nodes,
-                                                                     embedding_dim,
+                                                                     state_dim,
                                                                      dtype,
                                                                      storage_config->device_type);
             }
@@ -290,6 +363,10 @@ std::tuple<shared_ptr<Storage>, shared_ptr<Storage>, shared_ptr<Storage> > initi
             SPDLOG_ERROR("Backend type not available for nodes.");
             throw std::runtime_error("");
         }
+        case StorageBackend::TIERED: {
+            SPDLOG_ERROR("Backend type not available for nodes.");
+            throw std::runtime_error("");
+        }
         case StorageBackend::HOST_MEMORY: {
 
             if (num_train != -1) {
@@ -379,8 +456,21 @@ shared_ptr<Storage> initializeNodeFeatures(shared_ptr<Model> model, shared_ptr<S
             break;
         }
         case StorageBackend::FLAT_FILE: {
-            SPDLOG_ERROR("Backend type not available for features.");
-            throw std::runtime_error("");
+            // rows are read from disk on demand, through a cache of the recently read rows if one is configured
+            auto flat_file = std::make_shared<FlatFile>(node_features_file, num_nodes, node_feature_dim, dtype);
+            auto flat_file_options = std::dynamic_pointer_cast<FlatFileOptions>(storage_config->features->options);
+            if (flat_file_options != nullptr) {
+                flat_file->setRowCache(flat_file_options->cache_size);
+            }
+            node_features = flat_file;
+            break;
+        }
+        case StorageBackend::TIERED: {
+            node_features = std::make_shared<TieredStorage>(node_features_file,
+                                                            num_nodes,
+                                                            node_feature_dim,
+                                                            std::dynamic_pointer_cast<TieredStorageOptions>(storage_config->features->options));
+            break;
         }
         case StorageBackend::HOST_MEMORY: {
             node_features = std::make_shared<InMemory>(node_features_file, num_nodes, node_feature_dim, dtype, torch::kCPU);
@@ -418,6 +508,10 @@ shared_ptr<Storage> initializeNodeLabels(shared_ptr<Model> model, shared_ptr<Sto
             SPDLOG_ERROR("Backend type not available for nodes/labels.");
             throw std::runtime_error("");
         }
+        case StorageBackend::TIERED: {
+            SPDLOG_ERROR("Backend type not available for nodes/labels.");
+            throw std::runtime_error("");
+        }
         case StorageBackend::HOST_MEMORY: {
             node_labels = std::make_shared<InMemory>(node_labels_file, num_nodes, 1, dtype, torch::kCPU);
             break;
@@ -62,7 +62,37 @@ void createDir(string path, bool exist_ok) {
     }
 }
 
-Storage::Storage() : device_(torch::kCPU) {}
+Storage::Storage() : device_(torch::kCPU), block_size_(0) {}
+
+void Storage::trackDirtyBlocks(int64_t block_size) {
+    if (block_size <= 0) {
+        throw MariusRuntimeException("Block size must be positive");
+    }
+
+    block_size_ = block_size;
+    dirty_blocks_ = torch::ones({getNumBlocks()}, torch::TensorOptions().dtype(torch::kBool).device(device_));
+}
+
+void Storage::beforeUpdate(Indices indices) {
+    if (dirty_blocks_.defined()) {
+        // concurrent updates may race here, but every writer only sets flags to true
+        dirty_blocks_.index_fill_(0, torch::div(indices, block_size_, "floor").to(dirty_blocks_.device()), true);
+    }
+
+    if (before_update_) {
+        before_update_(indices);
+    }
+}
+
+torch::Tensor Storage::takeDirtyBlocks() {
+    if (!dirty_blocks_.defined()) {
+        throw MariusRuntimeException("Dirty blocks are not tracked for this storage");
+    }
+
+    torch::Tensor block_ids = torch::nonzero(dirty_blocks_).flatten().to(torch::kCPU);
+    dirty_blocks_.fill_(false);
+    return block_ids;
+}
 
 PartitionBufferStorage::PartitionBufferStorage(string filename, int64_t dim0_size, int64_t dim1_size, shared_ptr<PartitionBufferOptions> options) {
     filename_ = filename;
@@ -83,7 +113,10 @@ PartitionBufferStorage::PartitionBufferStorage(string filename, int64_t dim0_siz
                                   dim0_size_,
                                   dtype_,
                                   filename_,
-                                  options_->prefetching);
+                                  options_->prefetching,
+                                  options_->num_hot_nodes,
+                                  options_->stripe_directories,
+                                  options_->stripe_size);
 }
 
 PartitionBufferStorage::PartitionBufferStorage(string filename, torch::Tensor data, shared_ptr<PartitionBufferOptions> options) {
@@ -92,6 +125,7 @@ PartitionBufferStorage::PartitionBufferStorage(string filename, torch::Tensor da
     dim1_size_ = data.size(1);
     options_ = options;
     dtype_ = options_->dtype;
+    buffer_ = nullptr;
     append(data);
     initialized_ = true;
     loaded_ = false;
@@ -106,7 +140,10 @@ PartitionBufferStorage::PartitionBufferStorage(string filename, torch::Tensor da
                                   dim0_size_,
                                   dtype_,
                                   filename_,
-                                  options_->prefetching);
+                                  options_->prefetching,
+                                  options_->num_hot_nodes,
+                                  options_->stripe_directories,
+                                  options_->stripe_size);
 }
 
 PartitionBufferStorage::PartitionBufferStorage(string filename, shared_ptr<PartitionBufferOptions> options) {
@@ -127,10 +164,17 @@ PartitionBufferStorage::PartitionBufferStorage(string filename, shared_ptr<Parti
                                   dim0_size_,
                                   dtype_,
                                   filename_,
-                                  options_->prefetching);
+                                  options_->prefetching,
+                                  options_->num_hot_nodes,
+                                  options_->stripe_directories,
+                                  options_->stripe_size);
 }
 
 void PartitionBufferStorage::rangePut(int64_t offset, torch::Tensor values) {
+    if (buffer_ != nullptr) {
+        buffer_->unloadStripes();
+    }
+
     int fd = open(filename_.c_str(), O_RDWR | IO_FLAGS);
     if (fd == -1) {
         SPDLOG_ERROR("Unable to open {}\nError: {}", filename_, errno);
@@ -149,6 +193,10 @@ void PartitionBufferStorage::rangePut(int64_t offset, torch::Tensor values) {
 }
 
 void PartitionBufferStorage::append(torch::Tensor values) {
+    if (buffer_ != nullptr) {
+        buffer_->unloadStripes();
+    }
+
     ios::openmode flags;
 
     if (dim0_size_ == 0) {
@@ -194,12 +242,31 @@ void PartitionBufferStorage::unload(bool perform_write) {
     }
 }
 
+// rows are indexed locally to the buffer, every partition in the buffer is treated as updated
+void PartitionBufferStorage::beforeUpdate(Indices indices) {
+    if (dirty_blocks_.defined()) {
+        dirty_blocks_.index_fill_(0, buffer_->getBufferState().to(torch::kInt64), true);
+
+        // pinned nodes are written back to their home partitions, which need not be in the buffer
+        int64_t num_hot_nodes = buffer_->getNumHotNodes();
+        if (num_hot_nodes > 0) {
+            int64_t hot_offset = buffer_->getHotOffset();
+            torch::Tensor local_ids = indices.to(torch::kCPU);
+            torch::Tensor hot_ids = local_ids.masked_select(local_ids >= hot_offset) - hot_offset;
+            if (hot_ids.size(0) > 0) {
+                dirty_blocks_.index_fill_(0, torch::div(hot_ids, buffer_->getPartitionSize(), "floor"), true);
+            }
+        }
+    }
+}
+
 torch::Tensor PartitionBufferStorage::indexRead(Indices indices) {
     return buffer_->indexRead(indices);
 }
 
 void PartitionBufferStorage::indexAdd(Indices indices, torch::Tensor values) {
-    return buffer_->indexAdd(indices, values);
+    beforeUpdate(indices);
+    return buffer_->indexAdd(indices, values, row_locks_.get());
 }
 
 torch::Tensor PartitionBufferStorage::range(int64_t offset, int64_t n) {
@@ -227,6 +294,105 @@ void PartitionBufferStorage::sort(bool src) {
     throw std::runtime_error("");
 };
 
+RowCache::RowCache(int64_t capacity, int64_t dim1_size, torch::Dtype dtype) {
+    capacity_ = capacity;
+    data_ = torch::empty({capacity_, dim1_size}, dtype);
+    slot_ids_ = vector<int64_t>(capacity_, -1);
+    referenced_ = vector<bool>(capacity_, false);
+    slots_.reserve(capacity_);
+    hand_ = 0;
+    hits_ = 0;
+    misses_ = 0;
+}
+
+int64_t RowCache::getVictimSlot() {
+    // advance the clock hand, giving referenced slots a second chance
+    while (referenced_[hand_]) {
+        referenced_[hand_] = false;
+        hand_ = (hand_ + 1) % capacity_;
+    }
+    int64_t slot = hand_;
+    hand_ = (hand_ + 1) % capacity_;
+    return slot;
+}
+
+torch::Tensor RowCache::lookup(torch::Tensor ids, torch::Tensor output) {
+    int64_t num_ids = ids.size(0);
+    int64_t *ids_ptr = ids.data_ptr<int64_t>();
+
+    vector<int64_t> hit_positions;
+    vector<int64_t> hit_slots;
+    vector<int64_t> miss_positions;
+
+    std::lock_guard<std::mutex> guard(lock_);
+
+    for (int64_t i = 0; i < num_ids; i++) {
+        auto itr = slots_.find(ids_ptr[i]);
+        if (itr != slots_.end()) {
+            hit_positions.emplace_back(i);
+            hit_slots.emplace_back(itr->second);
+            referenced_[itr->second] = true;
+        } else {
+            miss_positions.emplace_back(i);
+        }
+    }
+
+    if (!hit_positions.empty()) {
+        auto opts = torch::TensorOptions().dtype(torch::kInt64);
+        torch::Tensor hit_positions_tensor = torch::from_blob(hit_positions.data(), {(int64_t) hit_positions.size()}, opts);
+        torch::Tensor hit_slots_tensor = torch::from_blob(hit_slots.data(), {(int64_t) hit_slots.size()}, opts);
+        output.index_copy_(0, hit_positions_tensor, data_.index_select(0, hit_slots_tensor));
+    }
+
+    hits_ += hit_positions.size();
+    misses_ += miss_positions.size();
+
+    return torch::tensor(miss_positions, torch::kInt64);
+}
+
+void RowCache::insert(torch::Tensor ids, torch::Tensor rows) {
+    // inserting more rows than fit would only evict rows of the same call
+    int64_t num_ids = std::min(ids.size(0), capacity_);
+    int64_t *ids_ptr = ids.data_ptr<int64_t>();
+
+    vector<int64_t> row_positions;
+    vector<int64_t> row_slots;
+
+    std::lock_guard<std::mutex> guard(lock_);
+
+    for (int64_t i = 0; i < num_ids; i++) {
+        if (slots_.find(ids_ptr[i]) != slots_.end()) {
+            continue;
+        }
+
+        int64_t slot = getVictimSlot();
+        if (slot_ids_[slot] != -1) {
+            slots_.erase(slot_ids_[slot]);
+        }
+        slot_ids_[slot] = ids_ptr[i];
+        slots_[ids_ptr[i]] = slot;
+        referenced_[slot] = true;
+
+        row_positions.emplace_back(i);
+        row_slots.emplace_back(slot);
+    }
+
+    if (!row_positions.empty()) {
+        auto opts = torch::TensorOptions().dtype(torch::kInt64);
+        torch::Tensor row_positions_tensor = torch::from_blob(row_positions.data(), {(int64_t) row_positions.size()}, opts);
+        torch::Tensor row_slots_tensor = torch::from_blob(row_slots.data(), {(int64_t) row_slots.size()}, opts);
+        data_.index_copy_(0, row_slots_tensor, rows.index_select(0, row_positions_tensor));
+    }
+}
+
+void RowCache::clear() {
+    std::lock_guard<std::mutex> guard(lock_);
+    slots_.clear();
+    std::fill(slot_ids_.begin(), slot_ids_.end(), -1);
+    std::fill(referenced_.begin(), referenced_.end(), false);
+    hand_ = 0;
+}
+
 FlatFile::FlatFile(string filename, int64_t dim0_size, int64_t dim1_size, torch::Dtype dtype, bool alloc) {
     filename_ = filename;
     dim0_size_ = dim0_size;
@@ -234,6 +400,7 @@ FlatFile::FlatFile(string filename, int64_t dim0_size, int64_t dim1_size, torch:
     dtype_ = dtype;
     initialized_ = true;
     loaded_ = false;
+    stripes_loaded_ = false;
     device_ = torch::kCPU;
 
     if (alloc) {
@@ -265,6 +432,7 @@ FlatFile::FlatFile(string filename, torch::Tensor data) {
     dim1_size_ = data.size(1);
     dtype_ = data.scalar_type();
     loaded_ = false;
+    stripes_loaded_ = false;
     append(data);
     initialized_ = true;
     device_ = torch::kCPU;
@@ -275,6 +443,7 @@ FlatFile::FlatFile(string filename, torch::Dtype dtype) {
     dim0_size_ = 0;
     initialized_ = false;
     loaded_ = false;
+    stripes_loaded_ = false;
     dtype_ = dtype;
     device_ = torch::kCPU;
 }
@@ -285,6 +454,10 @@ void FlatFile::rangePut(int64_t offset, torch::Tensor values) {
         throw std::runtime_error("");
     }
 
+    if (row_cache_ != nullptr) {
+        row_cache_->clear();
+    }
+
     int64_t dtype_size = get_dtype_size_wrapper(dtype_);
 
     int64_t ptr_offset = offset * dim1_size_ * dtype_size;
@@ -293,11 +466,22 @@ void FlatFile::rangePut(int64_t offset, torch::Tensor values) {
         SPDLOG_ERROR("Unable to write {}\nError: {}", filename_, errno);
         throw std::runtime_error("");
     }
+
+    if (stripes_loaded_) {
+        striped_file_->write(values.data_ptr(), values.size(0) * dim1_size_ * dtype_size, ptr_offset);
+    }
 }
 
 void FlatFile::append(torch::Tensor values) {
     ios::openmode flags = dim0_size_ == 0 ? ios::trunc | ios::binary : ios::binary | ios_base::app;
 
+    if (row_cache_ != nullptr) {
+        row_cache_->clear();
+    }
+
+    // the stripes are copied from the file again when it is next loaded
+    stripes_loaded_ = false;
+
     dim0_size_ += values.size(0);
     dim1_size_ = values.size(1);
     dtype_ = values.scalar_type();
@@ -319,6 +503,31 @@ void FlatFile::load() {
             return;
         }
         loaded_ = true;
+        loadStripes();
+    }
+}
+
+void FlatFile::loadStripes() {
+    if (striped_file_ == nullptr || stripes_loaded_) {
+        return;
+    }
+
+    SPDLOG_INFO("Striping {} over {} directories", filename_, striped_file_->getNumDisks());
+    striped_file_->scatter(filename_, dim0_size_ * dim1_size_ * get_dtype_size_wrapper(dtype_));
+    stripes_loaded_ = true;
+}
+
+void FlatFile::setStriping(vector<string> directories, int64_t stripe_size) {
+    stripes_loaded_ = false;
+
+    if (directories.empty()) {
+        striped_file_ = nullptr;
+        return;
+    }
+
+    striped_file_ = std::make_shared<StripedFile>(filename_.substr(filename_.find_last_of('/') + 1), directories, stripe_size);
+    if (loaded_) {
+        loadStripes();
     }
 }
 
@@ -335,8 +544,56 @@ void FlatFile::unload(bool perform_write) {
 }
 
 torch::Tensor FlatFile::indexRead(Indices indices) {
-    SPDLOG_ERROR("Unsupported operation for FlatFile, only sequential access is supported");
-    throw std::runtime_error("");
+    if (data_.defined()) {
+        return data_.index_select(0, indices.to(torch::kCPU));
+    }
+
+    if (!loaded_) {
+        throw MariusRuntimeException(fmt::format("{} must be loaded before it is read", filename_));
+    }
+
+    torch::Tensor ids = indices.to(torch::kCPU, torch::kInt64).contiguous();
+    torch::Tensor output = torch::empty({ids.size(0), dim1_size_}, dtype_);
+
+    torch::Tensor miss_positions;
+    if (row_cache_ != nullptr) {
+        miss_positions = row_cache_->lookup(ids, output);
+    } else {
+        miss_positions = torch::arange(ids.size(0), torch::kInt64);
+    }
+
+    if (miss_positions.size(0) > 0) {
+        // each missing row is read once in id order, duplicates are filled in from the inverse mapping
+        auto unique_tup = torch::_unique2(ids.index_select(0, miss_positions), true, true, false);
+        torch::Tensor unique_ids = std::get<0>(unique_tup);
+        torch::Tensor inverse = std::get<1>(unique_tup);
+
+        torch::Tensor rows = torch::empty({unique_ids.size(0), dim1_size_}, dtype_);
+        if (pread_rows(fd_, unique_ids, rows) == -1) {
+            SPDLOG_ERROR("Unable to read {}\nError: {}", filename_, errno);
+            throw std::runtime_error("");
+        }
+        output.index_copy_(0, miss_positions, rows.index_select(0, inverse));
+
+        if (row_cache_ != nullptr) {
+            row_cache_->insert(unique_ids, rows);
+        }
+    }
+
+    return output;
+}
+
+void FlatFile::setRowCache(int64_t cache_size) {
+    int64_t row_bytes = dim1_size_ * get_dtype_size_wrapper(dtype_);
+    int64_t capacity = row_bytes > 0 ? std::min(cache_size / row_bytes, dim0_size_) : 0;
+
+    if (cache_size <= 0 || capacity <= 0) {
+        row_cache_ = nullptr;
+        return;
+    }
+
+    row_cache_ = std::make_shared<RowCache>(capacity, dim1_size_, dtype_);
+    SPDLOG_DEBUG("Caching {} rows of {}", capacity, filename_);
 }
 
 void FlatFile::indexAdd(Indices indices, torch::Tensor values) {
@@ -378,7 +635,9 @@ torch::Tensor FlatFile::range(int64_t offset, int64_t n) {
     int64_t ptr_offset = offset * dim1_size_ * dtype_size;
 
     torch::Tensor output_tensor = torch::empty({n, dim1_size_}, dtype_);
-    if (pread_wrapper(fd_, output_tensor.data_ptr(), n * dim1_size_ * dtype_size, ptr_offset) == -1) {
+    if (stripes_loaded_) {
+        striped_file_->read(output_tensor.data_ptr(), n * dim1_size_ * dtype_size, ptr_offset);
+    } else if (pread_wrapper(fd_, output_tensor.data_ptr(), n * dim1_size_ * dtype_size, ptr_offset) == -1) {
         SPDLOG_ERROR("Unable to read {}\nError: {}", filename_, errno);
         throw std::runtime_error("");
     }
@@ -386,6 +645,9 @@ torch::Tensor FlatFile::range(int64_t offset, int64_t n) {
 }
 
 void FlatFile::rangePut(int64_t offset, int64_t n, torch::Tensor values) {
+    if (row_cache_ != nullptr) {
+        row_cache_->clear();
+    }
 
     int dtype_size = get_dtype_size_wrapper(dtype_);
 
@@ -395,6 +657,10 @@ void FlatFile::rangePut(int64_t offset, int64_t n, torch::Tensor values) {
         SPDLOG_ERROR("Unable to write {}\nError: {}", filename_, errno);
         throw std::runtime_error("");
     }
+
+    if (stripes_loaded_) {
+        striped_file_->write(values.data_ptr(), n * dim1_size_ * dtype_size, ptr_offset);
+    }
 }
 
 void FlatFile::shuffle() {
@@ -515,6 +781,7 @@ void FlatFile::mem_unload(bool write) {
                 SPDLOG_ERROR("Unable to write {}\nError: {}", filename_, errno);
                 throw std::runtime_error("");
             }
+            stripes_loaded_ = false;
         }
 
         close(fd_);
@@ -529,6 +796,416 @@ void FlatFile::mem_unload(bool write) {
     }
 }
 
+TieredStorage::TieredStorage(string filename, int64_t dim0_size, int64_t dim1_size, shared_ptr<TieredStorageOptions> options) {
+    filename_ = filename;
+    dim0_size_ = dim0_size;
+    dim1_size_ = dim1_size;
+    dtype_ = options->dtype;
+    initialized_ = true;
+    loaded_ = false;
+    device_ = torch::kCPU;
+    fd_ = -1;
+    ssd_fd_ = -1;
+
+    tier_block_size_ = options->block_size;
+    num_tier_blocks_ = (dim0_size_ + tier_block_size_ - 1) / tier_block_size_;
+    rebalance_interval_ = options->rebalance_interval;
+
+    int64_t block_bytes = tier_block_size_ * dim1_size_ * get_dtype_size_wrapper(dtype_);
+    memory_capacity_ = std::min(options->memory_capacity / block_bytes, num_tier_blocks_);
+    ssd_capacity_ = 0;
+    if (!options->ssd_directory.empty()) {
+        ssd_capacity_ = std::min(options->ssd_capacity / block_bytes, num_tier_blocks_);
+        ssd_filename_ = options->ssd_directory + "/" + filename_.substr(filename_.find_last_of('/') + 1) + ".tier";
+    }
+
+    memory_slots_ = torch::full({num_tier_blocks_}, -1, torch::kInt64);
+    ssd_slots_ = torch::full({num_tier_blocks_}, -1, torch::kInt64);
+    block_reads_ = torch::zeros({num_tier_blocks_}, torch::kInt64);
+
+    written_blocks_ = torch::zeros({num_tier_blocks_}, torch::kBool);
+    copying_ = false;
+
+    rows_since_rebalance_ = 0;
+    rebalancing_ = false;
+    resetStats();
+}
+
+TieredStorage::~TieredStorage() {
+    unload(false);
+}
+
+void TieredStorage::load() {
+    if (loaded_) {
+        return;
+    }
+
+    fd_ = open(filename_.c_str(), O_RDWR | IO_FLAGS);
+    if (fd_ == -1) {
+        throw MariusRuntimeException(fmt::format("Unable to open {}\nError: {}", filename_, errno));
+    }
+
+    if (ssd_capacity_ > 0) {
+        ssd_fd_ = open(ssd_filename_.c_str(), O_RDWR | O_CREAT | O_TRUNC | IO_FLAGS, 0644);
+        if (ssd_fd_ == -1) {
+            close(fd_);
+            throw MariusRuntimeException(fmt::format("Unable to create {}\nError: {}", ssd_filename_, errno));
+        }
+    }
+
+    memory_data_ = torch::empty({memory_capacity_ * tier_block_size_, dim1_size_}, dtype_);
+    memory_slots_.fill_(-1);
+    ssd_slots_.fill_(-1);
+    free_memory_slots_.clear();
+    free_ssd_slots_.clear();
+    for (int64_t i = memory_capacity_ - 1; i >= 0; i--) {
+        free_memory_slots_.emplace_back(i);
+    }
+    for (int64_t i = ssd_capacity_ - 1; i >= 0; i--) {
+        free_ssd_slots_.emplace_back(i);
+    }
+
+    loaded_ = true;
+
+    // places the blocks read before the storage was last unloaded, and the hinted blocks
+    rebalance();
+}
+
+void TieredStorage::write() {
+    // writes go through to the backing file
+    return;
+}
+
+void TieredStorage::unload(bool perform_write) {
+    (void) perform_write;
+
+    std::unique_lock lock(tier_lock_);
+    if (!loaded_) {
+        return;
+    }
+
+    close(fd_);
+    fd_ = -1;
+    if (ssd_fd_ != -1) {
+        close(ssd_fd_);
+        remove(ssd_filename_.c_str());
+        ssd_fd_ = -1;
+    }
+
+    memory_data_ = torch::Tensor();
+    memory_slots_.fill_(-1);
+    ssd_slots_.fill_(-1);
+    free_memory_slots_.clear();
+    free_ssd_slots_.clear();
+    loaded_ = false;
+}
+
+void TieredStorage::readBlock(int64_t block_id, torch::Tensor output) {
+    int64_t num_rows = output.size(0);
+    int64_t memory_slot = memory_slots_[block_id].item<int64_t>();
+    int64_t ssd_slot = ssd_slots_[block_id].item<int64_t>();
+
+    if (memory_slot >= 0) {
+        output.copy_(memory_data_.narrow(0, memory_slot * tier_block_size_, num_rows));
+        return;
+    }
+
+    int64_t row_bytes = dim1_size_ * get_dtype_size_wrapper(dtype_);
+    int fd = fd_;
+    string filename = filename_;
+    int64_t offset = block_id * tier_block_size_ * row_bytes;
+    if (ssd_slot >= 0) {
+        fd = ssd_fd_;
+        filename = ssd_filename_;
+        offset = ssd_slot * tier_block_size_ * row_bytes;
+    }
+
+    if (pread_wrapper(fd, output.data_ptr(), num_rows * row_bytes, offset) == -1) {
+        throw MariusRuntimeException(fmt::format("Unable to read {}\nError: {}", filename, errno));
+    }
+}
+
+void TieredStorage::readFileRows(int fd, string filename, torch::Tensor rows, torch::Tensor positions, torch::Tensor output) {
+    if (rows.size(0) == 0) {
+        return;
+    }
+
+    // each row is read once in row order, duplicates are filled in from the inverse mapping
+    auto unique_tup = torch::_unique2(rows, true, true, false);
+    torch::Tensor unique_rows = std::get<0>(unique_tup);
+    torch::Tensor inverse = std::get<1>(unique_tup);
+
+    torch::Tensor values = torch::empty({unique_rows.size(0), dim1_size_}, dtype_);
+    if (pread_rows(fd, unique_rows, values) == -1) {
+        throw MariusRuntimeException(fmt::format("Unable to read {}\nError: {}", filename, errno));
+    }
+    output.index_copy_(0, positions, values.index_select(0, inverse));
+}
+
+void TieredStorage::writeFileRows(int fd, string filename, torch::Tensor rows, torch::Tensor values) {
+    if (rows.size(0) == 0) {
+        return;
+    }
+
+    auto sort_tup = torch::sort(rows);
+    torch::Tensor sorted_rows = std::get<0>(sort_tup);
+    torch::Tensor sorted_values = values.index_select(0, std::get<1>(sort_tup)).contiguous();
+
+    if (pwrite_rows(fd, sorted_rows, sorted_values) == -1) {
+        throw MariusRuntimeException(fmt::format("Unable to write {}\nError: {}", filename, errno));
+    }
+}
+
+void TieredStorage::recordReads(torch::Tensor blocks) {
+    {
+        std::lock_guard<std::mutex> guard(reads_lock_);
+        block_reads_.index_add_(0, blocks, torch::ones_like(blocks));
+    }
+
+    if (rebalance_interval_ > 0 && (rows_since_rebalance_ += blocks.size(0)) >= rebalance_interval_) {
+        // only one of the reading threads moves the blocks
+        bool expected = false;
+        if (rebalancing_.compare_exchange_strong(expected, true)) {
+            rows_since_rebalance_ = 0;
+            rebalance();
+            rebalancing_ = false;
+        }
+    }
+}
+
+torch::Tensor TieredStorage::indexRead(Indices indices) {
+    if (!loaded_) {
+        throw MariusRuntimeException(fmt::format("{} must be loaded before it is read", filename_));
+    }
+
+    torch::Tensor ids = indices.to(torch::kCPU, torch::kInt64).contiguous();
+    torch::Tensor blocks = torch::div(ids, tier_block_size_, "floor");
+    torch::Tensor block_offsets = ids - blocks * tier_block_size_;
+    torch::Tensor output = torch::empty({ids.size(0), dim1_size_}, dtype_);
+
+    {
+        std::shared_lock lock(tier_lock_);
+
+        torch::Tensor memory_slots = memory_slots_.index_select(0, blocks);
+        torch::Tensor ssd_slots = ssd_slots_.index_select(0, blocks);
+        torch::Tensor in_memory = memory_slots >= 0;
+        torch::Tensor on_ssd = ~in_memory & (ssd_slots >= 0);
+
+        torch::Tensor memory_positions = in_memory.nonzero().flatten(0, 1);
+        torch::Tensor ssd_positions = on_ssd.nonzero().flatten(0, 1);
+        torch::Tensor disk_positions = (~in_memory & ~on_ssd).nonzero().flatten(0, 1);
+
+        if (memory_positions.size(0) > 0) {
+            torch::Tensor memory_rows = (memory_slots * tier_block_size_ + block_offsets).index_select(0, memory_positions);
+            output.index_copy_(0, memory_positions, memory_data_.index_select(0, memory_rows));
+        }
+        readFileRows(ssd_fd_, ssd_filename_, (ssd_slots * tier_block_size_ + block_offsets).index_select(0, ssd_positions), ssd_positions, output);
+        readFileRows(fd_, filename_, ids.index_select(0, disk_positions), disk_positions, output);
+
+        memory_reads_ += memory_positions.size(0);
+        ssd_reads_ += ssd_positions.size(0);
+        disk_reads_ += disk_positions.size(0);
+    }
+
+    recordReads(blocks);
+
+    return output;
+}
+
+torch::Tensor TieredStorage::range(int64_t offset, int64_t n) {
+    if (n + offset > dim0_size_) {
+        throw MariusRuntimeException(fmt::format("Range [{}, {}) is out of bounds for {} rows", offset, offset + n, dim0_size_));
+    }
+    return indexRead(torch::arange(offset, offset + n, torch::kInt64));
+}
+
+void TieredStorage::indexPut(Indices indices, torch::Tensor values) {
+    if (!loaded_) {
+        throw MariusRuntimeException(fmt::format("{} must be loaded before it is written", filename_));
+    }
+
+    torch::Tensor ids = indices.to(torch::kCPU, torch::kInt64).contiguous();
+    values = values.to(torch::kCPU, dtype_);
+    torch::Tensor blocks = torch::div(ids, tier_block_size_, "floor");
+    torch::Tensor block_offsets = ids - blocks * tier_block_size_;
+
+    std::shared_lock lock(tier_lock_);
+
+    if (copying_) {
+        // blocks written while rebalance() copies them into a tier are copied again before they are mapped
+        std::lock_guard<std::mutex> guard(written_lock_);
+        written_blocks_.index_fill_(0, blocks, true);
+    }
+
+    writeFileRows(fd_, filename_, ids, values);
+
+    torch::Tensor memory_slots = memory_slots_.index_select(0, blocks);
+    torch::Tensor memory_positions = (memory_slots >= 0).nonzero().flatten(0, 1);
+    if (memory_positions.size(0) > 0) {
+        torch::Tensor memory_rows = (memory_slots * tier_block_size_ + block_offsets).index_select(0, memory_positions);
+        memory_data_.index_copy_(0, memory_rows, values.index_select(0, memory_positions));
+    }
+
+    torch::Tensor ssd_slots = ssd_slots_.index_select(0, blocks);
+    torch::Tensor ssd_positions = (ssd_slots >= 0).nonzero().flatten(0, 1);
+    writeFileRows(ssd_fd_, ssd_filename_, (ssd_slots * tier_block_size_ + block_offsets).index_select(0, ssd_positions), values.index_select(0, ssd_positions));
+}
+
+void TieredStorage::rangePut(int64_t offset, int64_t n, torch::Tensor values) {
+    indexPut(torch::arange(offset, offset + n, torch::kInt64), values.narrow(0, 0, n));
+}
+
+void TieredStorage::indexAdd(Indices indices, torch::Tensor values) {
+    throw MariusRuntimeException("Unsupported operation for TieredStorage, rows can only be overwritten");
+}
+
+void TieredStorage::shuffle() {
+    throw MariusRuntimeException("Unsupported operation for TieredStorage");
+}
+
+void TieredStorage::sort(bool src) {
+    throw MariusRuntimeException("Unsupported operation for TieredStorage");
+}
+
+void TieredStorage::addAccessHint(Indices indices) {
+    torch::Tensor blocks = torch::div(indices.to(torch::kCPU, torch::kInt64), tier_block_size_, "floor");
+
+    std::lock_guard<std::mutex> guard(reads_lock_);
+    block_reads_.index_add_(0, blocks, torch::ones_like(blocks));
+}
+
+void TieredStorage::rebalance() {
+    torch::Tensor ssd_admitted;
+    torch::Tensor memory_admitted;
+    vector<int64_t> ssd_admitted_slots;
+    vector<int64_t> memory_admitted_slots;
+
+    // the moves are planned under the exclusive lock. evicted blocks are unmapped right away and read from the backing file, which
+    // always holds the latest rows, and the slots of admitted blocks are reserved but only mapped once the blocks are copied
+    {
+        std::unique_lock lock(tier_lock_);
+
+        if (!loaded_ || (memory_capacity_ == 0 && ssd_capacity_ == 0)) {
+            return;
+        }
+
+        torch::Tensor ranked_blocks;
+        {
+            std::lock_guard<std::mutex> guard(reads_lock_);
+
+            // blocks held by a tier win ties, so blocks with equal reads are not moved back and forth
+            torch::Tensor scores = block_reads_ * 4 + (memory_slots_ >= 0).to(torch::kInt64) * 2 + (ssd_slots_ >= 0).to(torch::kInt64);
+            ranked_blocks = torch::argsort(scores, 0, true);
+            ranked_blocks = ranked_blocks.masked_select(block_reads_.index_select(0, ranked_blocks) > 0);
+
+            block_reads_ = torch::div(block_reads_, 2, "floor");
+        }
+
+        torch::Tensor want_memory = torch::zeros({num_tier_blocks_}, torch::kBool);
+        want_memory.index_fill_(0, ranked_blocks.narrow(0, 0, std::min(memory_capacity_, ranked_blocks.size(0))), true);
+        torch::Tensor want_ssd = torch::zeros({num_tier_blocks_}, torch::kBool);
+        want_ssd.index_fill_(0, ranked_blocks.narrow(0, 0, std::min(ssd_capacity_, ranked_blocks.size(0))), true);
+
+        auto memory_slots_accessor = memory_slots_.accessor<int64_t, 1>();
+        auto ssd_slots_accessor = ssd_slots_.accessor<int64_t, 1>();
+
+        torch::Tensor ssd_evicted = ((ssd_slots_ >= 0) & ~want_ssd).nonzero().flatten(0, 1);
+        auto ssd_evicted_accessor = ssd_evicted.accessor<int64_t, 1>();
+        for (int64_t i = 0; i < ssd_evicted.size(0); i++) {
+            free_ssd_slots_.emplace_back(ssd_slots_accessor[ssd_evicted_accessor[i]]);
+            ssd_slots_accessor[ssd_evicted_accessor[i]] = -1;
+        }
+
+        torch::Tensor memory_evicted = ((memory_slots_ >= 0) & ~want_memory).nonzero().flatten(0, 1);
+        auto memory_evicted_accessor = memory_evicted.accessor<int64_t, 1>();
+        for (int64_t i = 0; i < memory_evicted.size(0); i++) {
+            free_memory_slots_.emplace_back(memory_slots_accessor[memory_evicted_accessor[i]]);
+            memory_slots_accessor[memory_evicted_accessor[i]] = -1;
+        }
+
+        ssd_admitted = (want_ssd & (ssd_slots_ < 0)).nonzero().flatten(0, 1);
+        for (int64_t i = 0; i < ssd_admitted.size(0); i++) {
+            ssd_admitted_slots.emplace_back(free_ssd_slots_.back());
+            free_ssd_slots_.pop_back();
+        }
+
+        memory_admitted = (want_memory & (memory_slots_ < 0)).nonzero().flatten(0, 1);
+        for (int64_t i = 0; i < memory_admitted.size(0); i++) {
+            memory_admitted_slots.emplace_back(free_memory_slots_.back());
+            free_memory_slots_.pop_back();
+        }
+
+        std::lock_guard<std::mutex> guard(written_lock_);
+        written_blocks_.fill_(false);
+        copying_ = true;
+    }
+
+    auto ssd_admitted_accessor = ssd_admitted.accessor<int64_t, 1>();
+    auto memory_admitted_accessor = memory_admitted.accessor<int64_t, 1>();
+    int64_t row_bytes = dim1_size_ * get_dtype_size_wrapper(dtype_);
+    torch::Tensor block = torch::empty({tier_block_size_, dim1_size_}, dtype_);
+
+    auto copy_to_ssd = [&](int64_t i) {
+        int64_t block_id = ssd_admitted_accessor[i];
+        torch::Tensor block_rows = block.narrow(0, 0, getBlockRows(block_id));
+        readBlock(block_id, block_rows);
+
+        if (pwrite_wrapper(ssd_fd_, block_rows.data_ptr(), block_rows.size(0) * row_bytes, ssd_admitted_slots[i] * tier_block_size_ * row_bytes) == -1) {
+            throw MariusRuntimeException(fmt::format("Unable to write {}\nError: {}", ssd_filename_, errno));
+        }
+    };
+
+    auto copy_to_memory = [&](int64_t i) {
+        int64_t block_id = memory_admitted_accessor[i];
+        readBlock(block_id, memory_data_.narrow(0, memory_admitted_slots[i] * tier_block_size_, getBlockRows(block_id)));
+    };
+
+    // the blocks are copied under the shared lock, so reads and writes of the table continue meanwhile. nothing else uses the
+    // reserved slots, since they are not mapped yet
+    {
+        std::shared_lock lock(tier_lock_);
+
+        for (int64_t i = 0; i < ssd_admitted.size(0); i++) {
+            copy_to_ssd(i);
+        }
+
+        for (int64_t i = 0; i < memory_admitted.size(0); i++) {
+            copy_to_memory(i);
+        }
+    }
+
+    // the exclusive lock is only taken to map the new slots. blocks written while they were copied are copied again first
+    std::unique_lock lock(tier_lock_);
+    copying_ = false;
+
+    // the storage was unloaded while the blocks were copied
+    if (!loaded_) {
+        return;
+    }
+
+    auto written_accessor = written_blocks_.accessor<bool, 1>();
+    auto memory_slots_accessor = memory_slots_.accessor<int64_t, 1>();
+    auto ssd_slots_accessor = ssd_slots_.accessor<int64_t, 1>();
+
+    for (int64_t i = 0; i < ssd_admitted.size(0); i++) {
+        int64_t block_id = ssd_admitted_accessor[i];
+        if (written_accessor[block_id]) {
+            copy_to_ssd(i);
+        }
+        ssd_slots_accessor[block_id] = ssd_admitted_slots[i];
+    }
+
+    for (int64_t i = 0; i < memory_admitted.size(0); i++) {
+        int64_t block_id = memory_admitted_accessor[i];
+        if (written_accessor[block_id]) {
+            copy_to_memory(i);
+        }
+        memory_slots_accessor[block_id] = memory_admitted_slots[i];
+    }
+
+    SPDLOG_DEBUG("Moved {} blocks of {} to memory and {} to the fast disk", memory_admitted.size(0), filename_, ssd_admitted.size(0));
+}
+
 InMemory::InMemory(string filename, int64_t dim0_size, int64_t dim1_size, torch::Dtype dtype, torch::Device device) {
     filename_ = filename;
     dim0_size_ = dim0_size;
@@ -667,22 +1344,12 @@ void InMemory::indexAdd(Indices indices, torch::Tensor values) {
         // TODO: throw invalid input to func exception
         throw std::runtime_error("");
     }
+    beforeUpdate(indices);
     if (values.device().is_cuda()) {
         data_.index_add_(0, indices, values);
     } else {
         // assumes this operation is only used on float valued data.
-        auto data_accessor = data_.accessor<float, 2>();
-        auto ids_accessor = indices.accessor<int64_t, 1>();
-        auto values_accessor = values.accessor<float, 2>();
-
-        int d = values.size(1);
-        int64_t size = indices.size(0);
-        #pragma omp parallel for
-        for (int64_t i = 0; i < size; i++) {
-            for (int j = 0; j < d; j++) {
-                data_accessor[ids_accessor[i]][j] += values_accessor[i][j];
-            }
-        }
+        index_add_rows(data_, indices, values, row_locks_.get());
     }
 }
 
@@ -691,6 +1358,7 @@ void InMemory::indexPut(Indices indices, torch::Tensor values) {
         // TODO: throw invalid input to func exception
         throw std::runtime_error("");
     }
+    beforeUpdate(indices);
     if (values.device().is_cuda()) {
         data_[indices] = values;
     } else {
@@ -719,6 +1387,9 @@ torch::Tensor InMemory::range(int64_t offset, int64_t n) {
 }
 
 void InMemory::rangePut(int64_t offset, int64_t n, torch::Tensor values) {
+    if (tracksUpdates()) {
+        beforeUpdate(torch::arange(offset, offset + n, torch::TensorOptions().dtype(torch::kInt64).device(data_.device())));
+    }
     data_.narrow(0, offset, n).copy_(values);
 }
 
@@ -0,0 +1,247 @@
+#include "storage/striped_file.h"
+
+#include <algorithm>
+#include <fcntl.h>
+#include <unistd.h>
+
+#include "common/util.h"
+#include "reporting/logger.h"
+
+StripedFile::StripedFile(string name, std::vector<string> directories, int64_t stripe_size) {
+    if (directories.empty()) {
+        throw MariusRuntimeException(fmt::format("No directories given to stripe {} over", name));
+    }
+    if (stripe_size <= 0) {
+        throw MariusRuntimeException(fmt::format("Stripe size must be positive, got: {}", stripe_size));
+    }
+
+    stripe_size_ = stripe_size;
+    size_ = 0;
+
+    for (int i = 0; i < directories.size(); i++) {
+        auto disk = std::make_unique<Disk>();
+        disk->filename = directories[i] + "/" + name + ".stripe" + std::to_string(i);
+        disk->done = false;
+        disk->fd = open(disk->filename.c_str(), O_RDWR | O_CREAT | O_TRUNC | IO_FLAGS, 0644);
+        if (disk->fd == -1) {
+            int error = errno;
+            for (auto &opened : disks_) {
+                close(opened->fd);
+                remove(opened->filename.c_str());
+            }
+            throw MariusRuntimeException(fmt::format("Unable to create {}\nError: {}", disk->filename, error));
+        }
+        disks_.emplace_back(std::move(disk));
+    }
+
+    for (auto &disk : disks_) {
+        disk->thread = std::thread(&StripedFile::run, this, disk.get());
+    }
+}
+
+StripedFile::~StripedFile() {
+    for (auto &disk : disks_) {
+        {
+            std::lock_guard<std::mutex> guard(disk->lock);
+            disk->done = true;
+        }
+        disk->cv.notify_all();
+        disk->thread.join();
+
+        close(disk->fd);
+        remove(disk->filename.c_str());
+    }
+}
+
+void StripedFile::run(Disk *disk) {
+    while (true) {
+        std::function<void()> job;
+        {
+            std::unique_lock<std::mutex> lock(disk->lock);
+            disk->cv.wait(lock, [disk] { return disk->done || !disk->jobs.empty(); });
+            if (disk->jobs.empty()) {
+                return;
+            }
+            job = std::move(disk->jobs.front());
+            disk->jobs.pop_front();
+        }
+        job();
+    }
+}
+
+void StripedFile::transfer(char *buf, int64_t count, int64_t offset, bool write) {
+    int num_disks = disks_.size();
+
+    // (buffer offset, offset in the stripe file, bytes) of each stripe the request touches, grouped by disk
+    std::vector<std::vector<std::tuple<int64_t, int64_t, int64_t>>> segments(num_disks);
+    for (int64_t done = 0; done < count;) {
+        int64_t stripe = (offset + done) / stripe_size_;
+        int64_t stripe_offset = (offset + done) % stripe_size_;
+        int64_t n = std::min(stripe_size_ - stripe_offset, count - done);
+        segments[stripe % num_disks].emplace_back(done, (stripe / num_disks) * stripe_size_ + stripe_offset, n);
+        done += n;
+    }
+
+    auto transfer_segments = [this, buf, write, &segments](int disk_id) -> int {
+        int fd = disks_[disk_id]->fd;
+        for (auto &segment : segments[disk_id]) {
+            int64_t ret;
+            if (write) {
+                ret = pwrite_wrapper(fd, buf + std::get<0>(segment), std::get<2>(segment), std::get<1>(segment));
+            } else {
+                ret = pread_wrapper(fd, buf + std::get<0>(segment), std::get<2>(segment), std::get<1>(segment));
+            }
+            if (ret == -1) {
+                return errno;
+            }
+        }
+        return 0;
+    };
+
+    std::vector<int> disk_ids;
+    for (int i = 0; i < num_disks; i++) {
+        if (!segments[i].empty()) {
+            disk_ids.emplace_back(i);
+        }
+    }
+
+    int error = 0;
+    if (disk_ids.size() == 1) {
+        // no parallelism to gain, skip the hand off to the disk thread
+        error = transfer_segments(disk_ids[0]);
+    } else if (disk_ids.size() > 1) {
+        std::mutex lock;
+        std::condition_variable cv;
+        int remaining = disk_ids.size();
+
+        for (int disk_id : disk_ids) {
+            Disk *disk = disks_[disk_id].get();
+            {
+                std::lock_guard<std::mutex> guard(disk->lock);
+                disk->jobs.emplace_back([&, disk_id] {
+                    int disk_error = transfer_segments(disk_id);
+
+                    std::lock_guard<std::mutex> done_guard(lock);
+                    if (disk_error != 0) {
+                        error = disk_error;
+                    }
+                    if (--remaining == 0) {
+                        cv.notify_all();
+                    }
+                });
+            }
+            disk->cv.notify_all();
+        }
+
+        std::unique_lock<std::mutex> done_lock(lock);
+        cv.wait(done_lock, [&remaining] { return remaining == 0; });
+    }
+
+    if (error != 0) {
+        throw MariusRuntimeException(fmt::format("Unable to {} {} bytes at offset {} of the stripes\nError: {}", write ? "write" : "read", count, offset, error));
+    }
+}
+
+void StripedFile::read(void *buf, int64_t count, int64_t offset) {
+    transfer((char *) buf, count, offset, false);
+}
+
+void StripedFile::write(const void *buf, int64_t count, int64_t offset) {
+    if (count > 0) {
+        int64_t first_stripe = offset / stripe_size_;
+        int64_t last_stripe = (offset + count - 1) / stripe_size_;
+
+        std::lock_guard<std::mutex> guard(dirty_lock_);
+        if (dirty_stripes_.size() <= last_stripe) {
+            dirty_stripes_.resize(last_stripe + 1, false);
+        }
+        std::fill(dirty_stripes_.begin() + first_stripe, dirty_stripes_.begin() + last_stripe + 1, true);
+    }
+
+    transfer((char *) buf, count, offset, true);
+}
+
+int64_t StripedFile::getNumDirtyStripes() {
+    std::lock_guard<std::mutex> guard(dirty_lock_);
+    return std::count(dirty_stripes_.begin(), dirty_stripes_.end(), true);
+}
+
+void StripedFile::scatter(string filename, int64_t size) {
+    int fd = open(filename.c_str(), O_RDONLY | IO_FLAGS);
+    if (fd == -1) {
+        throw MariusRuntimeException(fmt::format("Unable to open {}\nError: {}", filename, errno));
+    }
+
+    // one stripe for each disk at a time, so all disks are written in parallel
+    int64_t chunk_size = stripe_size_ * disks_.size();
+    std::vector<char> chunk(std::min(chunk_size, std::max(size, (int64_t) 1)));
+
+    for (int64_t offset = 0; offset < size; offset += chunk_size) {
+        int64_t n = std::min(chunk_size, size - offset);
+
+        // the file may be sparse or shorter than size, short reads leave zeros
+        memset_wrapper(chunk.data(), 0, n);
+        if (pread_wrapper(fd, chunk.data(), n, offset) == -1) {
+            int error = errno;
+            close(fd);
+            throw MariusRuntimeException(fmt::format("Unable to read {}\nError: {}", filename, error));
+        }
+        write(chunk.data(), n, offset);
+    }
+
+    close(fd);
+    size_ = size;
+
+    // the stripes match the file
+    std::lock_guard<std::mutex> guard(dirty_lock_);
+    dirty_stripes_.assign(dirty_stripes_.size(), false);
+}
+
+void StripedFile::gather(string filename) {
+    std::vector<uint8_t> dirty_stripes;
+    {
+        // stripes written while the copy runs are marked dirty again, and copied by the next gather
+        std::lock_guard<std::mutex> guard(dirty_lock_);
+        dirty_stripes.swap(dirty_stripes_);
+        dirty_stripes_.resize(dirty_stripes.size(), false);
+    }
+
+    int fd = open(filename.c_str(), O_RDWR | O_CREAT | IO_FLAGS, 0644);
+    if (fd == -1) {
+        throw MariusRuntimeException(fmt::format("Unable to open {}\nError: {}", filename, errno));
+    }
+
+    int64_t chunk_size = stripe_size_ * disks_.size();
+    std::vector<char> chunk(std::min(chunk_size, std::max(size_, (int64_t) 1)));
+
+    // consecutive dirty stripes are copied together, at most one stripe for each disk at a time
+    int64_t num_stripes = dirty_stripes.size();
+    for (int64_t stripe = 0; stripe < num_stripes;) {
+        if (!dirty_stripes[stripe]) {
+            stripe++;
+            continue;
+        }
+
+        int64_t end_stripe = stripe;
+        while (end_stripe < num_stripes && dirty_stripes[end_stripe] && (end_stripe - stripe) * stripe_size_ < chunk_size) {
+            end_stripe++;
+        }
+
+        int64_t offset = stripe * stripe_size_;
+        int64_t n = std::min(end_stripe * stripe_size_, size_) - offset;
+        stripe = end_stripe;
+
+        if (n <= 0) {
+            continue;
+        }
+
+        read(chunk.data(), n, offset);
+        if (pwrite_wrapper(fd, chunk.data(), n, offset) == -1) {
+            int error = errno;
+            close(fd);
+            throw MariusRuntimeException(fmt::format("Unable to write {}\nError: {}", filename, error));
+        }
+    }
+
+    close(fd);
+}
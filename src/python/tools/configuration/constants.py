@@ -21,6 +21,9 @@ class PathConstants:
     node_embeddings_state_file_name: str = "embeddings_state"
     saved_full_config_file_name: str = "full_config.yaml"
     file_ext: str = ".bin"
+    output_topk_file: str = "topk.csv"
+    encoded_nodes_file_name: str = "encoded_nodes"
+    ann_index_directory: str = "ann_index/"
 
     train_edges_path: str = edges_directory + training_file_prefix + edge_file_name + file_ext
     valid_edges_path: str = edges_directory + validation_file_prefix + edge_file_name + file_ext
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List
 # This file contains enums and detailed option settings for each enum value, where applicable
 
 
@@ -58,6 +59,7 @@ class AdagradOptions(OptimizerOptions):
     init_value: float = 0
     lr_decay: float = 0
     weight_decay: float = 0
+    row_wise: bool = False
 
     def __post_init__(self):
         if self.init_value < 0:
@@ -167,6 +169,11 @@ class PartitionBufferOptions(StorageOptions):
     edge_bucket_ordering: str = "NEW_BETA"
     node_partition_ordering: str = "DISPERSED"
     randomly_assign_edge_buckets: bool = True
+    lazy_initialization: bool = False
+    ordering_cache_size: int = 0
+    num_hot_nodes: int = 0
+    stripe_directories: List[str] = field(default_factory=list)
+    stripe_size: int = 8388608
 
     def __post_init__(self):
         if self.num_partitions < 2:
@@ -175,12 +182,50 @@ class PartitionBufferOptions(StorageOptions):
         if self.buffer_capacity < 2:
             raise ValueError("The partition buffer must have capacity of at least 2, got: {}".format(
                 self.buffer_capacity))
+        if self.ordering_cache_size < 0:
+            raise ValueError("ordering_cache_size must be non-negative, got: {}".format(self.ordering_cache_size))
+        if self.num_hot_nodes < 0:
+            raise ValueError("num_hot_nodes must be non-negative, got: {}".format(self.num_hot_nodes))
+        if self.stripe_size < 1:
+            raise ValueError("stripe_size must be positive, got: {}".format(self.stripe_size))
 
         # no need to have a buffer capacity larger than the number of partitions
         if self.num_partitions < self.buffer_capacity:
             self.buffer_capacity = self.num_partitions
 
 
+@dataclass
+class FlatFileOptions(StorageOptions):
+    cache_size: int = 0
+    stripe_directories: List[str] = field(default_factory=list)
+    stripe_size: int = 8388608
+
+    def __post_init__(self):
+        if self.cache_size < 0:
+            raise ValueError("cache_size must be non-negative, got: {}".format(self.cache_size))
+        if self.stripe_size < 1:
+            raise ValueError("stripe_size must be positive, got: {}".format(self.stripe_size))
+
+
+@dataclass
+class TieredStorageOptions(StorageOptions):
+    memory_capacity: int = 0
+    ssd_directory: str = ""
+    ssd_capacity: int = 0
+    block_size: int = 1024
+    rebalance_interval: int = 1000000
+
+    def __post_init__(self):
+        if self.memory_capacity < 0:
+            raise ValueError("memory_capacity must be non-negative, got: {}".format(self.memory_capacity))
+        if self.ssd_capacity < 0:
+            raise ValueError("ssd_capacity must be non-negative, got: {}".format(self.ssd_capacity))
+        if self.block_size < 1:
+            raise ValueError("block_size must be positive, got: {}".format(self.block_size))
+        if self.rebalance_interval < 0:
+            raise ValueError("rebalance_interval must be non-negative, got: {}".format(self.rebalance_interval))
+
+
 @dataclass
 class NeighborSamplingOptions:
     pass
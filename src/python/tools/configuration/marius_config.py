@@ -373,6 +373,10 @@ class StorageBackendConfig:
 
         if self.type == "PARTITION_BUFFER":
             new_options = PartitionBufferOptions()
+        elif self.type == "FLAT_FILE":
+            new_options = FlatFileOptions(dtype=self.options.dtype)
+        elif self.type == "TIERED":
+            new_options = TieredStorageOptions(dtype=self.options.dtype)
 
         if "options" in input_config.keys():
             for key in new_options.__dict__.keys():
@@ -599,6 +603,17 @@ class CheckpointConfig:
     save_best: bool = False
     interval: int = -1
     save_state: bool = False
+    asynchronous: bool = False
+    incremental: bool = False
+    compaction_interval: int = 5
+    buffer_state_interval: int = -1
+
+    def __post_init__(self):
+        if self.compaction_interval <= 0:
+            raise ValueError("compaction_interval must be positive")
+
+        if self.buffer_state_interval == 0 or self.buffer_state_interval < -1:
+            raise ValueError("buffer_state_interval must be positive, or -1 to disable sub-epoch checkpoints")
 
     def merge(self, input_config: DictConfig):
         """
@@ -615,7 +630,21 @@ class CheckpointConfig:
 
         if "save_state" in input_config.keys():
             self.save_state = input_config.save_state
-        
+
+        if "asynchronous" in input_config.keys():
+            self.asynchronous = input_config.asynchronous
+
+        if "incremental" in input_config.keys():
+            self.incremental = input_config.incremental
+
+        if "compaction_interval" in input_config.keys():
+            self.compaction_interval = input_config.compaction_interval
+
+        if "buffer_state_interval" in input_config.keys():
+            self.buffer_state_interval = input_config.buffer_state_interval
+
+        self.__post_init__()
+
 
 @dataclass
 class PipelineConfig:
@@ -632,6 +661,7 @@ class PipelineConfig:
     compute_threads: int = 1
     gradient_transfer_threads: int = 2
     gradient_update_threads: int = 4
+    update_lock_stripes: int = 4096
 
     def __post_init__(self):
         # for the sync setting, pipeline values can be ignored
@@ -654,6 +684,8 @@ class PipelineConfig:
                 raise ValueError("gradient_transfer_threads must be positive")
             if self.gradient_update_threads <= 0:
                 raise ValueError("gradient_update_threads must be positive")
+            if self.update_lock_stripes < 0:
+                raise ValueError("update_lock_stripes must be non-negative")
 
     def merge(self, input_config: DictConfig):
         """
@@ -729,10 +761,13 @@ class EvaluationConfig:
     pipeline: PipelineConfig = PipelineConfig()
     epochs_per_eval: int = 1
     checkpoint_dir: str = ""
+    ranking_tile_size: int = 65536
 
     def __post_init__(self):
         if self.batch_size <= 0:
             raise ValueError("batch_size must be positive")
+        if self.ranking_tile_size < 0:
+            raise ValueError("ranking_tile_size must be non-negative")
 
     def merge(self, input_config: DictConfig):
         """
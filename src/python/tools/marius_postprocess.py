@@ -1,77 +1,93 @@
 from pathlib import Path
+import argparse
+
 import numpy as np
 import torch
-import argparse
+import marius as m
 
+from marius.tools.configuration.constants import PathConstants
+from marius.tools.postprocess.exporter import export_table, memmap_table, SUPPORTED_EXPORT_FORMATS, TORCH_TO_NUMPY_DTYPES
 
-def get_embs(mapping_file, embs_file):
-    try:
-        mapping = np.loadtxt(mapping_file, dtype=str, delimiter='\t')
-        mapping_dict = dict(mapping)
-
-        num = len(mapping_dict)
-        embs = np.fromfile(embs_file, np.float32).reshape((num, -1))
-    except FileNotFoundError:
-        raise FileNotFoundError("Incorrect file passed in.")
-
-    return embs
-
-
-def output_embeddings(data_dir, dataset_dir, output_dir, fmt):
-    node_mapping_file = Path(dataset_dir) / Path("node_mapping.txt")
-    rel_mapping_file = Path(dataset_dir) / Path("rel_mapping.txt")
-    node_embs_file = Path(data_dir) / Path("marius/embeddings/embeddings.bin")
-    lhs_embs_file = Path(data_dir) / Path("marius/relations/src_relations.bin")
-    rhs_embs_file = Path(data_dir) / Path("marius/relations/dst_relations.bin")
-
-    node_embs = get_embs(node_mapping_file, node_embs_file)
-    lhs_embs = get_embs(rel_mapping_file, lhs_embs_file)
-    rhs_embs = get_embs(rel_mapping_file, rhs_embs_file)
-
-    if fmt == "CSV":
-        np.savetxt(Path(output_dir) / Path("node_embeddings.csv"), node_embs, delimiter=',')
-        np.savetxt(Path(output_dir) / Path("src_relations_embeddings.csv"), lhs_embs, delimiter=',')
-        np.savetxt(Path(output_dir) / Path("dst_relations_embeddings.csv"), rhs_embs, delimiter=',')
-    elif fmt == "TSV":
-        np.savetxt(Path(output_dir) / Path("node_embeddings.tsv"), node_embs, delimiter='\t')
-        np.savetxt(Path(output_dir) / Path("src_relations_embeddings.tsv"), lhs_embs, delimiter='\t')
-        np.savetxt(Path(output_dir) / Path("dst_relations_embeddings.tsv"), rhs_embs, delimiter='\t')
-    elif fmt == "TXT":
-        np.savetxt(Path(output_dir) / Path("node_embeddings.txt"), node_embs, delimiter='\t')
-        np.savetxt(Path(output_dir) / Path("src_relations_embeddings.txt"), lhs_embs, delimiter='\t')
-        np.savetxt(Path(output_dir) / Path("dst_relations_embeddings.txt"), rhs_embs, delimiter='\t')
+
+def get_output_dtype(str_dtype):
+    if str_dtype is None:
+        return None
+    elif str_dtype.lower() in ["float16", "half", "fp16"]:
+        return np.float16
+    elif str_dtype.lower() in ["float32", "float", "fp32"]:
+        return np.float32
     else:
-        torch.save(torch.tensor(node_embs), Path(output_dir) / Path('node_embeddings.pt'))
-        torch.save(torch.tensor(lhs_embs), Path(output_dir) / Path('src_relations_embeddings.pt'))
-        torch.save(torch.tensor(rhs_embs), Path(output_dir) / Path('dst_relations_embeddings.pt'))
+        raise RuntimeError("Unsupported output dtype {}".format(str_dtype))
+
+
+def output_embeddings(config_path, output_dir, fmt, dtype=None, chunk_size=1000000, num_workers=None):
+    config = m.config.loadConfig(config_path)
+
+    dataset_dir = config.storage.dataset.dataset_dir
+    node_mapping_file = Path(dataset_dir) / PathConstants.node_mapping_path
+    rel_mapping_file = Path(dataset_dir) / PathConstants.relation_mapping_path
+
+    outputs = []
+
+    node_embs_file = Path(config.storage.model_dir) / (PathConstants.node_embeddings_file_name + PathConstants.file_ext)
+    if node_embs_file.exists():
+        # memory mapped, rows are only read as their chunk is exported
+        node_embs = memmap_table(node_embs_file, config.storage.dataset.num_nodes, TORCH_TO_NUMPY_DTYPES[config.storage.embeddings.options.dtype])
+        outputs.append(export_table(node_embs, output_dir, "node_embeddings", fmt, node_mapping_file, dtype, chunk_size, num_workers))
 
-    return node_embs, lhs_embs, rhs_embs
+    if config.model.learning_task == m.config.LearningTask.LINK_PREDICTION:
+        model = m.storage.load_model(config_path, train=False)
+
+        relations = {"relation_embeddings": model.decoder.relations}
+        if model.decoder.use_inverse_relations:
+            relations["inverse_relation_embeddings"] = model.decoder.inverse_relations
+
+        for name, rel_embs in relations.items():
+            if rel_embs is None or rel_embs.numel() == 0:
+                continue
+            rel_embs = rel_embs.detach().cpu().numpy()
+            outputs.append(export_table(rel_embs, output_dir, name, fmt, rel_mapping_file, dtype, chunk_size, num_workers))
+
+    return outputs
 
 
 def set_args():
     parser = argparse.ArgumentParser(
-        description='Retrieve trained embeddings',
+        description='Export trained embeddings, joined with the raw ids of the dataset',
         prog='postprocess'
     )
-    parser.add_argument('trained_embeddings_directory',
-                        metavar='trained_embeddings_directory',
-                        type=str,
-                        help='Directory containing trained embeddings')
-    parser.add_argument('dataset_directory',
-                        metavar='dataset_directory',
+    parser.add_argument('--config',
+                        metavar='config',
                         type=str,
-                        help='Directory containing the dataset for training')
+                        required=True,
+                        help='Configuration file of the trained model')
     parser.add_argument('--output_directory', '-o',
                         metavar='output_directory',
                         type=str,
-                        help='Directory to put retrieved embeddings. ' + 
+                        help='Directory to put retrieved embeddings. ' +
                              'If is not set, will output retrieved embeddings' +
-                             ' to dataset directory.')
+                             ' to the model directory.')
     parser.add_argument('--format', '-f',
                         metavar='format',
-                        choices=["CSV", "TSV", "TXT", "Tensor"],
+                        type=str.upper,
+                        choices=SUPPORTED_EXPORT_FORMATS,
                         default="CSV",
-                        help="Data format to store retrieved embeddings")
+                        help="Data format to store retrieved embeddings: {}".format(", ".join(SUPPORTED_EXPORT_FORMATS)))
+    parser.add_argument('--dtype',
+                        metavar='dtype',
+                        type=str,
+                        default=None,
+                        help="Datatype of the exported embeddings, float32 or float16. Defaults to the datatype of the trained embeddings")
+    parser.add_argument('--chunk_size',
+                        metavar='chunk_size',
+                        type=int,
+                        default=1000000,
+                        help="Number of rows exported at a time by each worker")
+    parser.add_argument('--num_workers',
+                        metavar='num_workers',
+                        type=int,
+                        default=None,
+                        help="Number of worker threads, defaults to the number of cpus")
 
     return parser
 
@@ -79,18 +95,15 @@ def set_args():
 def main():
     parser = set_args()
     args = parser.parse_args()
-    data_dir = args.trained_embeddings_directory
-    dataset_dir = args.dataset_directory
-    output_dir = args.output_directory
-    fmt = args.format
 
+    output_dir = args.output_directory
     if output_dir is None:
-        output_dir = dataset_dir
-    else:
-        if not Path(output_dir).exists():
-            Path(output_dir).mkdir()
+        output_dir = m.config.loadConfig(args.config).storage.model_dir
+    elif not Path(output_dir).exists():
+        Path(output_dir).mkdir(parents=True)
 
-    output_embeddings(data_dir, dataset_dir, output_dir, fmt)
+    for output in output_embeddings(args.config, output_dir, args.format, get_output_dtype(args.dtype), args.chunk_size, args.num_workers):
+        print("Exported: {}".format(output))
 
 
 if __name__ == '__main__':
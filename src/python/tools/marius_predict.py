@@ -8,10 +8,11 @@ import pandas as pd
 import torch
 import marius as m
 
-from marius.tools.prediction.link_prediction import infer_lp
+from marius.tools.prediction.link_prediction import infer_lp, topk_lp
 from marius.tools.prediction.node_classification import infer_nc
+from marius.tools.prediction.api import load_id_mappings, map_raw_edges, map_raw_ids, to_id_tensor
 
-from marius.tools.preprocess.converters.torch_converter import apply_mapping_edges, apply_mapping1d, dataframe_to_tensor, SUPPORTED_DELIM_FORMATS
+from marius.tools.preprocess.converters.torch_converter import SUPPORTED_DELIM_FORMATS
 from marius.tools.preprocess.converters.partitioners.torch_partitioner import partition_edges
 from marius.tools.configuration.constants import PathConstants
 from marius.tools.preprocess.converters.readers.pandas_readers import PandasDelimitedFileReader
@@ -39,6 +40,10 @@ def set_args():
                     'marius_predict <trained_config> --output_dir results/ --metrics accuracy --save_labels \n'
                     'This command will perform node classification evaluation over the test set of nodes provided in the config file. '
                     'Metrics are saved to results/metrics.txt and labels for each test node are saved to results/labels.csv \n\n'
+                    'Top-k link prediction example usage: \n'
+                    'marius_predict <trained_config> --output_dir results/ --topk 100 --input_file sources.csv --input_format csv --preprocess_input true \n'
+                    'For each source node (and edge-type) in sources.csv, this command finds the 100 highest scoring destination nodes over all nodes in the graph, '
+                    'excluding known edges unless --filtered false is given. Results are saved to results/topk.csv \n\n'
                     'Custom inputs: \n'
                     'The test set can be directly specified setting --input_file <test_set_file>. '
                     'If the test set has not been preprocessed, then --preprocess_input should be enabled. '
@@ -128,6 +133,20 @@ def set_args():
                         help='(Link Prediction) If true, then false negative samples will be filtered out. '
                              'This is only supported when evaluating with all nodes.')
 
+    parser.add_argument('--topk',
+                        metavar='topk',
+                        type=int,
+                        default=0,
+                        help='(Link Prediction) If positive, the k highest scoring destination nodes are found for each query in the input file '
+                             'instead of evaluating edges. Queries are source nodes, or source nodes and edge-types for graphs with edge-types. '
+                             'Results are saved to <output_dir>/topk.csv using the raw node ids of the dataset.')
+
+    parser.add_argument('--num_threads',
+                        metavar='num_threads',
+                        type=int,
+                        default=2,
+                        help='(Link Prediction) Number of threads which score top-k queries concurrently.')
+
     parser.add_argument('--input_file',
                         metavar='input_file',
                         type=str,
@@ -363,26 +382,10 @@ def preprocess_input_file(config, args):
     shape = infer_input_shape(config, args)
     str_dtype, numpy_dtype = get_dtype(storage_backend, args)
 
-    node_mapping_file = config.storage.dataset.dataset_dir + PathConstants.node_mapping_path
-    rel_mapping_file = config.storage.dataset.dataset_dir + PathConstants.relation_mapping_path
-
-    node_mapping_df = None
-    rel_mapping_df = None
-
-    if pathlib.Path(node_mapping_file).exists():
-        node_mapping_df = pd.read_csv(node_mapping_file, sep=",", header=None)
-
-    if pathlib.Path(rel_mapping_file).exists():
-        rel_mapping_df = pd.read_csv(rel_mapping_file, sep=",", header=None)
+    node_mapping_df, rel_mapping_df = load_id_mappings(config.storage.dataset.dataset_dir)
 
     if args.input_format.upper() == "BINARY" or args.input_format.upper() == "BIN":
-        input_tensor = torch.from_file(np.fromfile(args.filename, numpy_dtype)).resize(shape)
-
-        if node_mapping_df is not None:
-            if len(input_tensor.shape) == 2:
-                input_tensor = apply_mapping_edges(input_tensor, node_mapping_df, rel_mapping_df)
-            else:
-                input_tensor = apply_mapping1d(input_tensor, node_mapping_df)
+        input_array = np.fromfile(args.input_file, numpy_dtype).reshape(shape)
     else:
         columns = get_columns(config, args)
 
@@ -405,18 +408,18 @@ def preprocess_input_file(config, args):
         )
 
         input_df, _, _ = reader.read()
+        input_array = input_df.to_numpy()
 
-        if node_mapping_df is not None:
-            if len(input_df.shape) == 2:
-                input_df = apply_mapping_edges(input_df, node_mapping_df, rel_mapping_df)
-            else:
-                input_df = apply_mapping1d(input_df, node_mapping_df)
-
-        input_tensor = dataframe_to_tensor(input_df)
+    if node_mapping_df is not None:
+        if len(input_array.shape) == 2:
+            input_tensor = map_raw_edges(input_array, node_mapping_df, rel_mapping_df)
+        else:
+            input_tensor = map_raw_ids(input_array, node_mapping_df)
+    else:
+        input_tensor = to_id_tensor(input_array.astype(np.int64))
 
-    # TODO probably not a great way to name the preprocessed file
-    input_file = "preproc_" + args.input_file.split(".")[-2] + ".bin"
-    input_file_offsets = None
+    input_tensor = input_tensor.to(storage_backend.dtype)
+    edge_bucket_sizes = None
 
     num_partitions = 1
     if config.storage.embeddings is not None and config.storage.embeddings.type == m.config.StorageBackend.PARTITION_BUFFER:
@@ -425,34 +428,37 @@ def preprocess_input_file(config, args):
         num_partitions = config.storage.features.options.num_partitions
 
     if num_partitions > 1 and len(input_tensor.shape) == 2:
-        input_file_offsets = args.input_file.split(".")[-2] + "_offsets.txt"
-        input_tensor, offsets = partition_edges(input_tensor, config.storage.dataset.num_nodes, num_partitions)
-
-        with open(config.storage.dataset.dataset_dir + input_file_offsets, "w") as f:
-            f.writelines([str(o) + "\n" for o in offsets])
+        input_tensor, edge_bucket_sizes = partition_edges(input_tensor, config.storage.dataset.num_nodes, num_partitions)
 
-    with open(config.storage.dataset.dataset_dir + input_file, "wb") as f:
-        f.write(bytes(input_tensor.numpy()))
-
-    return input_file, input_file_offsets, storage_backend, shape
+    return input_tensor, edge_bucket_sizes, storage_backend
 
 
 def get_input_file_storage(config, args):
     assert pathlib.Path(args.input_file).exists()
 
     if args.preprocess_input:
-        input_file, input_file_offsets, storage_backend, shape = preprocess_input_file(config, args)
-    else:
-        input_file = args.input_file
-        input_file_offsets = None
+        # the preprocessed input is kept in memory instead of being written back to disk
+        input_tensor, edge_bucket_sizes, storage_backend = preprocess_input_file(config, args)
 
-        is_edges = config.model.learning_task == m.config.LearningTask.LINK_PREDICTION
-        if is_edges:
-            storage_backend = config.storage.edges
-        else:
-            storage_backend = config.storage.nodes
+        if storage_backend.type is m.config.StorageBackend.DEVICE_MEMORY:
+            input_tensor = input_tensor.to(config.storage.device)
+
+        input_storage = m.storage.InMemory(input_tensor)
+
+        if edge_bucket_sizes is not None:
+            input_storage.edge_bucket_sizes = [int(s) for s in edge_bucket_sizes]
+
+        return input_storage
+
+    input_file = args.input_file
+
+    is_edges = config.model.learning_task == m.config.LearningTask.LINK_PREDICTION
+    if is_edges:
+        storage_backend = config.storage.edges
+    else:
+        storage_backend = config.storage.nodes
 
-        shape = infer_input_shape(config, args)
+    shape = infer_input_shape(config, args)
 
     if storage_backend.type is m.config.StorageBackend.DEVICE_MEMORY:
         input_storage = m.storage.InMemory(input_file, shape, storage_backend.dtype, config.storage.device)
@@ -463,8 +469,93 @@ def get_input_file_storage(config, args):
     else:
         raise RuntimeError("Unexpected storage backend for input_file.")
 
-    if input_file_offsets is not None:
-        input_storage.read_edge_bucket_sizes(input_file_offsets)
+    return input_storage
+
+
+def get_topk_queries(config, args):
+    assert pathlib.Path(args.input_file).exists()
+
+    has_relations = config.storage.dataset.num_relations > 1
+
+    columns = [int(c) for c in args.columns]
+    if len(columns) == 0:
+        columns = [0, 1] if has_relations else [0]
+    elif len(columns) != (2 if has_relations else 1):
+        raise RuntimeError("Top-k queries require a source node column{}.".format(" and an edge-type column" if has_relations else ""))
+
+    node_mapping_df, rel_mapping_df = load_id_mappings(config.storage.dataset.dataset_dir)
+    if not has_relations:
+        rel_mapping_df = None
+
+    if args.input_format.upper() == "BINARY" or args.input_format.upper() == "BIN":
+        _, numpy_dtype = get_dtype(config.storage.edges, args)
+        queries = torch.from_numpy(np.fromfile(args.input_file, numpy_dtype).astype(np.int64))
+        if has_relations:
+            queries = queries.reshape([-1, 2])
+    elif args.input_format.upper() in SUPPORTED_DELIM_FORMATS:
+        delim = args.delim
+
+        if delim is None:
+            if args.input_format.upper() == "CSV":
+                delim = ","
+            elif args.input_format.upper() == "TSV":
+                delim = "\t"
+            else:
+                raise RuntimeError("Delimiter must be specified.")
+
+        input_df = pd.read_csv(args.input_file, sep=delim, header=None, skiprows=args.header_length, usecols=columns, dtype=str)
+        input_df = input_df[columns]
+
+        if args.preprocess_input and node_mapping_df is not None:
+            # map the raw ids of the queries to the ids used by the model
+            columns = [map_raw_ids(input_df.iloc[:, 0].to_numpy(), node_mapping_df)]
+            if has_relations:
+                if rel_mapping_df is not None:
+                    columns.append(map_raw_ids(input_df.iloc[:, 1].to_numpy(), rel_mapping_df))
+                else:
+                    columns.append(to_id_tensor(input_df.iloc[:, 1].to_numpy().astype(np.int64)))
+            queries = torch.stack(columns, dim=1)
+        else:
+            queries = torch.from_numpy(input_df.to_numpy().astype(np.int64))
+
+        if not has_relations:
+            queries = queries.flatten()
+    else:
+        raise RuntimeError("Unsupported input format. ")
+
+    return queries, node_mapping_df, rel_mapping_df
+
+
+def run_topk(config, args, model, graph_storage, output_dir, nbrs):
+    if config.model.learning_task != m.config.LearningTask.LINK_PREDICTION:
+        raise RuntimeError("Top-k queries are only supported for link prediction.")
+
+    if args.input_file == "":
+        raise RuntimeError("Top-k queries must be provided with --input_file.")
+
+    if nbrs is not None and len(nbrs) > 0:
+        raise RuntimeError("Top-k queries are only supported for models which do not use neighbor sampling.")
+
+    # candidates are read from the in-memory node tables, which only hold a subset of the nodes when partitioned
+    for storage_backend in [config.storage.embeddings, config.storage.features]:
+        if storage_backend is not None and storage_backend.type == m.config.StorageBackend.PARTITION_BUFFER:
+            raise RuntimeError("Top-k queries are not supported with the partition buffer.")
+
+    queries, node_mapping_df, rel_mapping_df = get_topk_queries(config, args)
+
+    graph_storage.setTestSet()
+
+    topk_lp(model=model,
+            graph_storage=graph_storage,
+            output_file=str(pathlib.Path(output_dir) / PathConstants.output_topk_file),
+            queries=queries,
+            k=args.topk,
+            node_mapping_df=node_mapping_df,
+            rel_mapping_df=rel_mapping_df,
+            batch_size=args.batch_size,
+            filtered=args.filtered,
+            ranking_tile_size=config.evaluation.ranking_tile_size,
+            num_threads=args.num_threads)
 
 
 def run_predict(args):
@@ -478,6 +569,17 @@ def run_predict(args):
     model: m.nn.Model = m.storage.load_model(args.config, train=False)
     graph_storage: m.storage.GraphModelStorage = m.storage.load_storage(args.config, train=False)
 
+    output_dir = args.output_dir
+    if output_dir == "":
+        output_dir = config.storage.model_dir
+
+    nbrs = get_nbrs_config(config, args)
+
+    if args.topk > 0:
+        run_topk(config, args, model, graph_storage, output_dir, nbrs)
+        print("Results output to: {}".format(output_dir))
+        return
+
     if args.input_file != "":
         input_storage = get_input_file_storage(config, args)
 
@@ -490,12 +592,6 @@ def run_predict(args):
     else:
         graph_storage.setTestSet()
 
-    output_dir = args.output_dir
-    if output_dir == "":
-        output_dir = config.storage.model_dir
-
-    nbrs = get_nbrs_config(config, args)
-
     if config.model.learning_task == m.config.LearningTask.LINK_PREDICTION:
         num_negs, num_chunks, deg_frac, filtered = get_neg_config(config, args)
         infer_lp(model=model,
@@ -509,7 +605,8 @@ def run_predict(args):
                  num_negs=num_negs,
                  num_chunks=num_chunks,
                  deg_frac=deg_frac,
-                 filtered=filtered)
+                 filtered=filtered,
+                 ranking_tile_size=config.evaluation.ranking_tile_size)
 
     elif config.model.learning_task == m.config.LearningTask.NODE_CLASSIFICATION:
         infer_nc(model=model,
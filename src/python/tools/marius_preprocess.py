@@ -43,6 +43,26 @@ def set_args():
                         default=False,
                         help='If true, the validation and/or the test set will be partitioned.')
 
+    parser.add_argument('--partitioning_method',
+                        metavar='partitioning_method',
+                        required=False,
+                        type=str,
+                        default="contiguous",
+                        choices=["contiguous", "label_propagation"],
+                        help='How nodes are assigned to partitions. contiguous partitions the randomly assigned node ids into contiguous '
+                             'ranges. label_propagation assigns node ids with balanced label propagation so that most edges fall within '
+                             'a partition, reducing partition swaps and the size of the in memory subgraphs.')
+
+    parser.add_argument('--node_ordering',
+                        metavar='node_ordering',
+                        required=False,
+                        type=str,
+                        default="random",
+                        choices=["random", "degree", "bfs", "rcm"],
+                        help='Order in which remapped node ids are assigned. random assigns random ids. degree, bfs and rcm assign ids by '
+                             'decreasing degree, breadth first search order or reverse Cuthill-McKee order, so that neighboring nodes have '
+                             'nearby ids and embedding and feature gathers are more local.')
+
     parser.add_argument('--delim',
                         '-d',
                         metavar='delim',
@@ -123,7 +143,9 @@ def main():
                            remap_ids=not args.no_remap_ids,
                            splits=args.dataset_split,
                            sequential_train_nodes=args.sequential_train_nodes,
-                           partitioned_eval=args.partitioned_eval)
+                           partitioned_eval=args.partitioned_eval,
+                           partitioning_method=args.partitioning_method,
+                           node_ordering=args.node_ordering)
     else:
         print("Preprocess custom dataset")
 
@@ -139,6 +161,8 @@ def main():
                            remap_ids=not args.no_remap_ids,
                            splits=args.dataset_split,
                            partitioned_eval=args.partitioned_eval,
+                           partitioning_method=args.partitioning_method,
+                           node_ordering=args.node_ordering,
                            sequential_train_nodes=args.sequential_train_nodes,
                            columns=args.columns)
 
@@ -0,0 +1,105 @@
+import argparse
+from argparse import RawDescriptionHelpFormatter
+
+import marius as m
+
+from marius.tools.marius_predict import get_nbrs_config, str2bool
+from marius.tools.prediction.server import Predictor, serve
+
+
+def set_args():
+    parser = argparse.ArgumentParser(
+        description='Long running inference server for link prediction and node classification models trained with the configuration API.\n\n'
+                    'The model and graph storage are loaded once and requests are answered over HTTP or a local Unix socket. '
+                    'Concurrent requests are collected into micro-batches which are run once they hold --max_batch_size items '
+                    'or once the oldest request has waited --max_latency_ms.\n\n'
+                    'Example usage: \n'
+                    'marius_serve --config <trained_config> --port 8080 \n'
+                    'curl -X POST localhost:8080/score -d \'{"edges": [[0, 1, 2]]}\' \n'
+                    'curl -X POST localhost:8080/topk -d \'{"nodes": [0, 5], "relations": [1, 1], "k": 10}\' \n'
+                    'curl -X POST localhost:8080/classify -d \'{"nodes": [0, 5]}\'',
+        prog='serve',
+        formatter_class=RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--config',
+                        metavar='config',
+                        required=True,
+                        type=str,
+                        help='Configuration file for trained model')
+
+    parser.add_argument('--host',
+                        metavar='host',
+                        type=str,
+                        default="127.0.0.1",
+                        help='Address the HTTP server listens on.')
+
+    parser.add_argument('--port',
+                        metavar='port',
+                        type=int,
+                        default=8080,
+                        help='Port the HTTP server listens on.')
+
+    parser.add_argument('--unix_socket',
+                        metavar='unix_socket',
+                        type=str,
+                        default=None,
+                        help='If provided, requests are served over a Unix socket at this path instead of over TCP.')
+
+    parser.add_argument('--max_batch_size',
+                        metavar='max_batch_size',
+                        type=int,
+                        default=10000,
+                        help='Maximum number of edges or nodes in a micro-batch.')
+
+    parser.add_argument('--max_latency_ms',
+                        metavar='max_latency_ms',
+                        type=float,
+                        default=5.0,
+                        help='Maximum time in milliseconds a request waits for other requests to join its micro-batch.')
+
+    parser.add_argument('--timeout',
+                        metavar='timeout',
+                        type=float,
+                        default=None,
+                        help='Time in seconds after which a request fails. Requests do not time out by default.')
+
+    parser.add_argument('--num_nbrs',
+                        metavar='num_nbrs',
+                        type=int,
+                        nargs='*',
+                        default=None,
+                        help='Number of neighbors to sample for each GNN layer. '
+                             'If not provided, the neighbor sampling configuration of the model is used.')
+
+    parser.add_argument('--filtered',
+                        metavar='filtered',
+                        type=str2bool,
+                        default=True,
+                        help='(Link Prediction) If true, known edges are excluded from top-k results.')
+
+    return parser
+
+
+def main():
+    parser = set_args()
+    args = parser.parse_args()
+
+    config = m.config.loadConfig(args.config)
+
+    predictor = Predictor(args.config,
+                          num_nbrs=get_nbrs_config(config, args),
+                          filtered=args.filtered,
+                          ranking_tile_size=config.evaluation.ranking_tile_size,
+                          max_batch_size=args.max_batch_size)
+
+    serve(predictor,
+          host=args.host,
+          port=args.port,
+          unix_socket=args.unix_socket,
+          max_batch_size=args.max_batch_size,
+          max_latency_ms=args.max_latency_ms,
+          timeout=args.timeout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+import argparse
+from argparse import RawDescriptionHelpFormatter
+from pathlib import Path
+
+import psutil
+import torch
+from omegaconf import OmegaConf
+
+from marius.tools.configuration.constants import PathConstants
+from marius.tools.configuration.marius_config import load_config
+from marius.tools.tuning.benchmarks import measure_hardware
+from marius.tools.tuning.cost_model import search
+from marius.tools.tuning.simulator import format_report, simulate_ordering
+
+
+def set_args():
+    parser = argparse.ArgumentParser(
+        description='Chooses storage and pipeline settings for a configuration from short microbenchmarks of this machine.\n\n'
+                    'The disk bandwidth, random gather bandwidth of host memory and the time to sample and compute a training batch are '
+                    'measured. These are combined with the partition swaps of the configured buffer ordering to predict the training '
+                    'throughput of each setting of num_partitions, buffer_capacity and fine_to_coarse_ratio which fits in the memory budget. '
+                    'The configuration is written with the fastest setting and the pipeline queue sizes, loader threads and staleness '
+                    'bound it needs.\n\n'
+                    'With --simulate, the buffer ordering of the configuration is replayed without training and the partitions read '
+                    'and written, bytes moved, items per buffer state and achievable prefetch overlap are reported.\n\n'
+                    'Example usage: \n'
+                    'marius_tune --config configs/fb15k237.yaml --memory_budget 32 --output configs/fb15k237_tuned.yaml \n'
+                    'marius_tune --config configs/fb15k237.yaml --simulate --disk_bandwidth 2000 --throughput 1000000',
+        prog='tune',
+        formatter_class=RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--config',
+                        metavar='config',
+                        required=True,
+                        type=str,
+                        help='Configuration file to tune. The dataset must have been preprocessed.')
+
+    parser.add_argument('--output',
+                        metavar='output',
+                        type=str,
+                        default=None,
+                        help='Path of the tuned configuration file. Defaults to <config>_tuned.yaml.')
+
+    parser.add_argument('--memory_budget',
+                        metavar='memory_budget',
+                        type=float,
+                        default=None,
+                        help='Host memory in GB available for training. Defaults to 80% of the currently available memory.')
+
+    parser.add_argument('--disk_directory',
+                        metavar='disk_directory',
+                        type=str,
+                        default=None,
+                        help='Directory on the disk the partitions are stored on. Defaults to the dataset directory.')
+
+    parser.add_argument('--disk_benchmark_size',
+                        metavar='disk_benchmark_size',
+                        type=float,
+                        default=1.0,
+                        help='Size in GB of the file used to measure disk bandwidth.')
+
+    parser.add_argument('--max_partitions',
+                        metavar='max_partitions',
+                        type=int,
+                        default=256,
+                        help='Largest number of partitions considered.')
+
+    parser.add_argument('--simulate',
+                        action='store_true',
+                        help='If set, replays the buffer ordering of the configuration as is and reports its swap costs '
+                             'instead of tuning it. No microbenchmarks are run.')
+
+    parser.add_argument('--partition_offsets',
+                        metavar='partition_offsets',
+                        type=str,
+                        default=None,
+                        help='(Simulation) Edge bucket sizes of the training edges. Defaults to the train_partition_offsets.txt '
+                             'file of the dataset.')
+
+    parser.add_argument('--disk_bandwidth',
+                        metavar='disk_bandwidth',
+                        type=float,
+                        default=None,
+                        help='(Simulation) Disk bandwidth in MB/s used to compute swap times and prefetch overlap.')
+
+    parser.add_argument('--throughput',
+                        metavar='throughput',
+                        type=float,
+                        default=None,
+                        help='(Simulation) Training throughput in edges (or nodes) per second used to compute the training time '
+                             'of each buffer state.')
+
+    parser.add_argument('--num_candidates',
+                        metavar='num_candidates',
+                        type=int,
+                        default=5,
+                        help='Number of the best settings to print.')
+
+    return parser
+
+
+def format_bytes(num_bytes):
+    return "{:.2f} GB".format(num_bytes / (1 << 30))
+
+
+def apply_candidate(input_cfg, config, candidate):
+    """
+    Writes the storage and pipeline settings of a candidate into the (underspecified) input configuration.
+    """
+    learning_task_lp = config.model.learning_task == "LINK_PREDICTION"
+    tables = []
+    if config.model.encoder.embedding_dim > 0:
+        tables.append("embeddings")
+    if config.storage.dataset.node_feature_dim > 0:
+        tables.append("features")
+
+    for table in tables:
+        if candidate.partitioned:
+            OmegaConf.update(input_cfg, "storage.{}.type".format(table), "PARTITION_BUFFER", merge=True)
+            OmegaConf.update(input_cfg, "storage.{}.options.num_partitions".format(table), candidate.num_partitions, merge=True)
+            OmegaConf.update(input_cfg, "storage.{}.options.buffer_capacity".format(table), candidate.buffer_capacity, merge=True)
+            OmegaConf.update(input_cfg, "storage.{}.options.fine_to_coarse_ratio".format(table), candidate.fine_to_coarse_ratio,
+                             merge=True)
+        elif getattr(config.storage, table).type == "PARTITION_BUFFER":
+            OmegaConf.update(input_cfg, "storage.{}".format(table), {"type": "HOST_MEMORY"}, merge=False)
+
+    if candidate.partitioned and learning_task_lp:
+        OmegaConf.update(input_cfg, "storage.edges.type", "FLAT_FILE", merge=True)
+
+    if not config.training.pipeline.sync:
+        OmegaConf.update(input_cfg, "training.pipeline.batch_loader_threads", candidate.batch_loader_threads, merge=True)
+        OmegaConf.update(input_cfg, "training.pipeline.batch_host_queue_size", candidate.batch_host_queue_size, merge=True)
+        OmegaConf.update(input_cfg, "training.pipeline.batch_device_queue_size", candidate.batch_device_queue_size, merge=True)
+        OmegaConf.update(input_cfg, "training.pipeline.staleness_bound", candidate.staleness_bound, merge=True)
+
+    return input_cfg
+
+
+def get_dataset_num_partitions(config):
+    offsets_file = Path(config.storage.dataset.dataset_dir) / Path(PathConstants.train_edge_buckets_path)
+    if not offsets_file.exists():
+        return 1
+
+    with open(offsets_file) as f:
+        num_buckets = sum(1 for _ in f)
+    return int(round(num_buckets ** .5))
+
+
+def run_tune(args):
+    config = load_config(args.config)
+
+    if args.memory_budget is None:
+        memory_budget = .8 * psutil.virtual_memory().available
+    else:
+        memory_budget = args.memory_budget * (1 << 30)
+
+    disk_directory = args.disk_directory
+    if disk_directory is None:
+        disk_directory = config.storage.dataset.dataset_dir
+
+    device = torch.device("cuda" if config.storage.device_type == "cuda" else "cpu")
+
+    print("Running microbenchmarks")
+    profile = measure_hardware(config, disk_directory, device, disk_bytes=int(args.disk_benchmark_size * (1 << 30)))
+    print("Disk read bandwidth: {}/s, write bandwidth: {}/s".format(format_bytes(profile.disk_read_bandwidth),
+                                                                   format_bytes(profile.disk_write_bandwidth)))
+    print("Memory gather bandwidth: {}/s".format(format_bytes(profile.memory_bandwidth)))
+    print("Batch sampling time: {:.2f} ms, batch compute time: {:.2f} ms".format(1000 * profile.batch_sample_time,
+                                                                                 1000 * profile.batch_compute_time))
+
+    candidates = search(config, profile, memory_budget, max_partitions=args.max_partitions)
+    if len(candidates) == 0:
+        raise RuntimeError("No storage configuration fits in the memory budget of {}.".format(format_bytes(memory_budget)))
+
+    unit = "Edges" if config.model.learning_task == "LINK_PREDICTION" else "Nodes"
+    print("Best settings under a memory budget of {}:".format(format_bytes(memory_budget)))
+    for c in candidates[:args.num_candidates]:
+        print("num_partitions={}, buffer_capacity={}, fine_to_coarse_ratio={}: {} per second {:.0f}, epoch time {:.1f} s, "
+              "partition reads {}, memory {}".format(c.num_partitions, c.buffer_capacity, c.fine_to_coarse_ratio, unit,
+                                                     c.throughput, c.epoch_time, c.partition_reads, format_bytes(c.memory_bytes)))
+
+    best = candidates[0]
+    input_cfg = apply_candidate(OmegaConf.load(args.config), config, best)
+
+    output = args.output
+    if output is None:
+        output = str(Path(args.config).with_suffix("")) + "_tuned.yaml"
+    OmegaConf.save(input_cfg, output)
+    print("Wrote tuned configuration to {}".format(output))
+
+    if best.partitioned and get_dataset_num_partitions(config) != best.num_partitions:
+        print("The dataset must be preprocessed with --num_partitions {} to use the tuned configuration".format(best.num_partitions))
+
+    return best
+
+
+def run_simulate(args):
+    config = load_config(args.config)
+
+    disk_bandwidth = None
+    if args.disk_bandwidth is not None:
+        disk_bandwidth = args.disk_bandwidth * (1 << 20)
+
+    report = simulate_ordering(config,
+                               partition_offsets_file=args.partition_offsets,
+                               disk_read_bandwidth=disk_bandwidth,
+                               throughput=args.throughput)
+    print(format_report(report))
+
+    return report
+
+
+def main():
+    parser = set_args()
+    args = parser.parse_args()
+
+    if args.simulate:
+        run_simulate(args)
+    else:
+        run_tune(args)
+
+
+if __name__ == "__main__":
+    main()
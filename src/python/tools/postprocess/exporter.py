@@ -0,0 +1,225 @@
+import collections
+import os
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import torch
+
+SUPPORTED_EXPORT_FORMATS = ["CSV", "TSV", "TXT", "TENSOR", "NPY", "PARQUET", "ARROW"]
+
+TORCH_TO_NUMPY_DTYPES = {torch.float32: np.float32, torch.float16: np.float16, torch.float64: np.float64}
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Exporting to Parquet or Arrow requires pyarrow, install it with pip install pyarrow")
+
+    return pyarrow
+
+
+def memmap_table(filename, num_rows: int, dtype):
+    """
+    Memory maps a [num_rows, dim] table written by marius, the dimension is inferred from the size of the file.
+    """
+    if not pathlib.Path(filename).exists():
+        raise RuntimeError("{} does not exist.".format(filename))
+
+    dtype = np.dtype(dtype)
+    dim = os.stat(filename).st_size // (num_rows * dtype.itemsize)
+
+    return np.memmap(filename, dtype=dtype, mode="r", shape=(num_rows, dim))
+
+
+def read_mapping_chunks(mapping_file, num_rows: int, chunk_size: int):
+    """
+    Yields (raw ids, mapped ids) chunks of a mapping file written by marius_preprocess, in the order of the file. Without a mapping
+    file, the raw ids are the mapped ids.
+    """
+    if mapping_file is None or not pathlib.Path(mapping_file).exists():
+        for offset in range(0, num_rows, chunk_size):
+            ids = np.arange(offset, min(offset + chunk_size, num_rows), dtype=np.int64)
+            yield ids.astype(str), ids
+        return
+
+    for chunk in pd.read_csv(mapping_file, sep=",", header=None, dtype={0: str, 1: np.int64}, chunksize=chunk_size):
+        yield chunk.iloc[:, 0].to_numpy(), chunk.iloc[:, 1].to_numpy()
+
+
+def gather_rows(table, mapped_ids, dtype):
+    # reading the rows in ascending order keeps the reads of a memory mapped table mostly sequential
+    order = np.argsort(mapped_ids, kind="stable")
+    rows = np.empty([mapped_ids.shape[0], table.shape[1]], dtype=dtype)
+    rows[order] = table[mapped_ids[order]]
+    return rows
+
+
+class DelimitedWriter:
+    """
+    Writes chunks as delimited text, raw id first. Chunks are formatted by the workers and appended to the file in order.
+    """
+
+    def __init__(self, output_file, delim):
+        self.delim = delim
+        self.file = open(output_file, "w")
+
+    def write(self, index, offset, raw_ids, rows):
+        df = pd.DataFrame(rows)
+        df.insert(0, "id", raw_ids)
+        return df.to_csv(None, sep=self.delim, header=False, index=False)
+
+    def finish(self, result):
+        self.file.write(result)
+
+    def close(self):
+        self.file.close()
+
+
+class NpyWriter:
+    """
+    Writes chunks into a memory mapped .npy file in place, so chunks are written concurrently. The raw id of each row is written to a
+    text file with one id per line.
+    """
+
+    def __init__(self, output_file, ids_file, num_rows, dim, dtype):
+        self.table = np.lib.format.open_memmap(output_file, mode="w+", dtype=dtype, shape=(num_rows, dim))
+        self.ids_file = open(ids_file, "w")
+
+    def write(self, index, offset, raw_ids, rows):
+        self.table[offset:offset + rows.shape[0]] = rows
+        return raw_ids
+
+    def finish(self, result):
+        self.ids_file.write("\n".join(result) + "\n")
+
+    def close(self):
+        self.table.flush()
+        del self.table
+        self.ids_file.close()
+
+
+class ColumnarWriter:
+    """
+    Writes each chunk as its own Parquet or Arrow IPC file of a dataset directory, so chunks are written concurrently. Each file has an
+    id column with the raw ids and an embedding column of fixed size lists.
+    """
+
+    def __init__(self, output_dir, fmt):
+        self.pa = import_pyarrow()
+        self.output_dir = pathlib.Path(output_dir)
+        self.fmt = fmt
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def write(self, index, offset, raw_ids, rows):
+        pa = self.pa
+
+        embeddings = pa.FixedSizeListArray.from_arrays(pa.array(rows.reshape(-1)), rows.shape[1])
+        table = pa.Table.from_arrays([pa.array(raw_ids, type=pa.string()), embeddings], names=["id", "embedding"])
+
+        if self.fmt == "PARQUET":
+            pa.parquet.write_table(table, self.output_dir / "part-{:05d}.parquet".format(index))
+        else:
+            with pa.ipc.new_file(str(self.output_dir / "part-{:05d}.arrow".format(index)), table.schema) as writer:
+                writer.write_table(table)
+
+        return None
+
+    def finish(self, result):
+        pass
+
+    def close(self):
+        pass
+
+
+def get_output_path(output_dir, name, fmt):
+    if fmt == "CSV":
+        return pathlib.Path(output_dir) / "{}.csv".format(name)
+    elif fmt == "TSV":
+        return pathlib.Path(output_dir) / "{}.tsv".format(name)
+    elif fmt == "TXT":
+        return pathlib.Path(output_dir) / "{}.txt".format(name)
+    elif fmt == "TENSOR":
+        return pathlib.Path(output_dir) / "{}.pt".format(name)
+    elif fmt == "NPY":
+        return pathlib.Path(output_dir) / "{}.npy".format(name)
+    elif fmt == "PARQUET":
+        return pathlib.Path(output_dir) / "{}.parquet".format(name)
+    elif fmt == "ARROW":
+        return pathlib.Path(output_dir) / "{}.arrow".format(name)
+    else:
+        raise RuntimeError("Unsupported export format {}, must be one of {}".format(fmt, SUPPORTED_EXPORT_FORMATS))
+
+
+def export_table(table,
+                 output_dir,
+                 name: str,
+                 fmt: str = "NPY",
+                 mapping_file=None,
+                 dtype=None,
+                 chunk_size: int = 1000000,
+                 num_workers: int = None):
+    """
+    Exports a [num_rows, dim] table, e.g. a memory mapped embeddings.bin, joined with the raw ids of a mapping file. The mapping is read
+    and the rows are gathered, converted and written in chunks by a pool of workers, so neither the table nor the mapping is ever fully
+    held in memory. Rows are written in the order of the mapping file.
+
+    :param table: Table indexed by mapped id, a numpy array or memmap
+    :param output_dir: Directory the output is written to
+    :param name: Name of the output, e.g. node_embeddings
+    :param fmt: One of SUPPORTED_EXPORT_FORMATS
+    :param mapping_file: Mapping from raw to mapped ids written by marius_preprocess, if None the raw ids are the mapped ids
+    :param dtype: Output dtype, e.g. np.float16 to halve the size of the output. Defaults to the dtype of the table
+    :param chunk_size: Number of rows per chunk
+    :param num_workers: Number of worker threads, defaults to the number of cpus
+    :return: Path of the output
+    """
+    fmt = fmt.upper()
+    output_path = get_output_path(output_dir, name, fmt)
+
+    if dtype is None:
+        dtype = table.dtype
+
+    num_rows, dim = table.shape
+
+    if fmt == "TENSOR":
+        rows = np.concatenate([gather_rows(table, mapped_ids, dtype) for _, mapped_ids in read_mapping_chunks(mapping_file, num_rows, chunk_size)])
+        torch.save(torch.from_numpy(rows), output_path)
+        return output_path
+
+    if fmt == "CSV":
+        writer = DelimitedWriter(output_path, ",")
+    elif fmt == "TSV" or fmt == "TXT":
+        writer = DelimitedWriter(output_path, "\t")
+    elif fmt == "NPY":
+        writer = NpyWriter(output_path, pathlib.Path(output_dir) / "{}_ids.txt".format(name), num_rows, dim, dtype)
+    else:
+        writer = ColumnarWriter(output_path, fmt)
+
+    if num_workers is None:
+        num_workers = os.cpu_count()
+
+    def process(index, offset, raw_ids, mapped_ids):
+        return writer.write(index, offset, raw_ids, gather_rows(table, mapped_ids, dtype))
+
+    # at most 2 * num_workers chunks are in flight, results are finished in order
+    pending = collections.deque()
+    offset = 0
+    try:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            for index, (raw_ids, mapped_ids) in enumerate(read_mapping_chunks(mapping_file, num_rows, chunk_size)):
+                pending.append(executor.submit(process, index, offset, raw_ids, mapped_ids))
+                offset += raw_ids.shape[0]
+
+                while len(pending) >= 2 * num_workers:
+                    writer.finish(pending.popleft().result())
+
+            while len(pending) > 0:
+                writer.finish(pending.popleft().result())
+    finally:
+        writer.close()
+
+    return output_path
@@ -0,0 +1,116 @@
+import json
+import os
+import pathlib
+
+import numpy as np
+import torch
+import marius as m
+
+from marius.tools.configuration.constants import PathConstants
+
+INDEX_METADATA_FILE = "index.json"
+INDEX_TENSORS = ["centroids", "list_offsets", "list_ids", "list_embeddings"]
+
+
+def get_index_dir(config, index_dir: str = None):
+    if index_dir is None:
+        index_dir = config.storage.model_dir + PathConstants.ann_index_directory
+    return index_dir
+
+
+def read_node_representations(config, use_encoded_nodes: bool = False):
+    num_nodes = config.storage.dataset.num_nodes
+
+    if use_encoded_nodes:
+        filename = config.storage.model_dir + PathConstants.encoded_nodes_file_name + PathConstants.file_ext
+        dtype = torch.float32
+    else:
+        filename = config.storage.model_dir + PathConstants.node_embeddings_file_name + PathConstants.file_ext
+        dtype = config.storage.embeddings.options.dtype
+
+    if not pathlib.Path(filename).exists():
+        raise RuntimeError("Node representations {} do not exist.".format(filename))
+
+    item_size = torch.tensor([], dtype=dtype).element_size()
+    dim = os.stat(filename).st_size // (num_nodes * item_size)
+
+    # memory mapped, rows are only read when they are sampled or assigned to a list
+    return torch.from_file(filename, shared=False, size=num_nodes * dim, dtype=dtype).view(num_nodes, dim)
+
+
+def build_ann_index(config_path: str,
+                    num_lists: int = None,
+                    num_probes: int = 8,
+                    num_iterations: int = 10,
+                    sample_size: int = 100000,
+                    use_encoded_nodes: bool = False,
+                    index_dir: str = None):
+
+    config = m.config.loadConfig(config_path)
+
+    if config.model.learning_task != m.config.LearningTask.LINK_PREDICTION:
+        raise RuntimeError("Nearest neighbor indexes are only supported for link prediction models.")
+
+    model = m.storage.load_model(config_path, train=False)
+    embeddings = read_node_representations(config, use_encoded_nodes)
+
+    num_nodes = embeddings.shape[0]
+    if num_lists is None:
+        num_lists = min(num_nodes, max(1, int(4 * np.sqrt(num_nodes))))
+
+    index = m.nn.decoders.edge.IVFIndex(model.decoder, num_lists, num_probes)
+    index.build(embeddings, num_iterations=num_iterations, sample_size=sample_size)
+
+    save_ann_index(index, get_index_dir(config, index_dir), use_encoded_nodes)
+
+    return index
+
+
+def save_ann_index(index, index_dir: str, use_encoded_nodes: bool = False):
+    pathlib.Path(index_dir).mkdir(parents=True, exist_ok=True)
+
+    for name in INDEX_TENSORS:
+        getattr(index, name).numpy().tofile(index_dir + name + PathConstants.file_ext)
+
+    metadata = {
+        "num_nodes": index.list_embeddings.shape[0],
+        "dim": index.list_embeddings.shape[1],
+        "num_lists": index.num_lists,
+        "use_encoded_nodes": use_encoded_nodes
+    }
+
+    with open(index_dir + INDEX_METADATA_FILE, "w") as f:
+        json.dump(metadata, f)
+
+
+def load_ann_index(config_path: str, num_probes: int = 8, index_dir: str = None):
+    config = m.config.loadConfig(config_path)
+    index_dir = get_index_dir(config, index_dir)
+
+    with open(index_dir + INDEX_METADATA_FILE) as f:
+        metadata = json.load(f)
+
+    num_nodes = metadata["num_nodes"]
+    num_lists = metadata["num_lists"]
+    dim = metadata["dim"]
+
+    shapes = {
+        "centroids": ([num_lists, dim], torch.float32),
+        "list_offsets": ([num_lists + 1], torch.int64),
+        "list_ids": ([num_nodes], torch.int64),
+        "list_embeddings": ([num_nodes, dim], torch.float32)
+    }
+
+    # the lists are memory mapped, only the lists probed by queries are paged in
+    tensors = {}
+    for name, (shape, dtype) in shapes.items():
+        tensors[name] = torch.from_file(index_dir + name + PathConstants.file_ext, shared=False, size=int(np.prod(shape)), dtype=dtype).view(shape)
+
+    model = m.storage.load_model(config_path, train=False)
+
+    return m.nn.decoders.edge.IVFIndex(model.decoder,
+                                       tensors["centroids"],
+                                       tensors["list_offsets"],
+                                       tensors["list_ids"],
+                                       tensors["list_embeddings"],
+                                       num_probes)
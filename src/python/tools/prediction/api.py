@@ -0,0 +1,212 @@
+import pathlib
+
+import numpy as np
+import pandas as pd
+import torch
+import marius as m
+
+from marius.tools.configuration.constants import PathConstants
+
+
+def to_id_tensor(ids):
+    """
+    Converts a numpy array, torch tensor or list of mapped ids to a contiguous int64 tensor. Arrays which are already contiguous int64
+    are wrapped without copying.
+    """
+    if isinstance(ids, np.ndarray):
+        ids = torch.from_numpy(np.ascontiguousarray(ids))
+    elif not isinstance(ids, torch.Tensor):
+        ids = torch.as_tensor(ids)
+
+    if ids.dtype != torch.int64:
+        ids = ids.to(torch.int64)
+
+    return ids.contiguous()
+
+
+def load_id_mappings(dataset_dir: str):
+    """
+    Reads the node and relation mappings written by marius_preprocess. Either is None if the dataset does not have it.
+    """
+    node_mapping_df = None
+    rel_mapping_df = None
+
+    node_mapping_file = pathlib.Path(dataset_dir) / PathConstants.node_mapping_path
+    if node_mapping_file.exists():
+        node_mapping_df = pd.read_csv(node_mapping_file, sep=",", header=None, dtype={0: str})
+
+    rel_mapping_file = pathlib.Path(dataset_dir) / PathConstants.relation_mapping_path
+    if rel_mapping_file.exists():
+        rel_mapping_df = pd.read_csv(rel_mapping_file, sep=",", header=None, dtype={0: str})
+
+    return node_mapping_df, rel_mapping_df
+
+
+def map_raw_ids(raw_ids, mapping_df: pd.DataFrame):
+    """
+    Maps a 1D array of raw ids to the ids used by the model. Raw ids are compared as strings, as they are in the mapping files.
+    """
+    if isinstance(raw_ids, torch.Tensor):
+        raw_ids = raw_ids.numpy()
+
+    raw_ids = np.asarray(raw_ids).astype(str)
+
+    positions = pd.Index(mapping_df.iloc[:, 0].astype(str)).get_indexer(raw_ids)
+    if (positions < 0).any():
+        raise RuntimeError("Input contains ids which are not in the dataset: {}".format(raw_ids[positions < 0][:10].tolist()))
+
+    return torch.from_numpy(mapping_df.iloc[:, 1].to_numpy().astype(np.int64)[positions])
+
+
+def map_raw_edges(raw_edges, node_mapping_df: pd.DataFrame, rel_mapping_df: pd.DataFrame = None):
+    """
+    Maps a [num_edges, 2] or [num_edges, 3] array of raw (src, [rel,] dst) ids to the ids used by the model.
+    """
+    raw_edges = np.asarray(raw_edges.numpy() if isinstance(raw_edges, torch.Tensor) else raw_edges)
+
+    if len(raw_edges.shape) != 2 or raw_edges.shape[1] not in [2, 3]:
+        raise RuntimeError("Edges must be a [num_edges, 2] or [num_edges, 3] array.")
+
+    columns = [map_raw_ids(raw_edges[:, 0], node_mapping_df)]
+    if raw_edges.shape[1] == 3:
+        if rel_mapping_df is None:
+            columns.append(to_id_tensor(raw_edges[:, 1].astype(np.int64)))
+        else:
+            columns.append(map_raw_ids(raw_edges[:, 1], rel_mapping_df))
+    columns.append(map_raw_ids(raw_edges[:, -1], node_mapping_df))
+
+    return torch.stack(columns, dim=1)
+
+
+def check_in_memory_prediction(graph_storage: m.storage.GraphModelStorage):
+    # batches of a partitioned graph are ordered by edge bucket, so outputs could not be returned in input order
+    if graph_storage.useInMemorySubGraph():
+        raise RuntimeError("In-memory prediction is not supported with the partition buffer, use marius_predict instead.")
+
+
+def run_batches(model: m.nn.Model, dataloader: m.data.DataLoader, forward):
+    outputs = []
+
+    # without shuffling, the batch starting at start_idx holds the input rows from start_idx onwards
+    dataloader.shuffle = False
+    dataloader.initializeBatches()
+
+    for batch in dataloader.prefetch(model.device, num_threads=1):
+        outputs.append((batch.start_idx, forward(batch)))
+        batch.clear()
+
+    # the prefetcher does not guarantee the order of the batches, so the outputs are put back in input order
+    outputs.sort(key=lambda o: o[0])
+    return [o[1] for o in outputs]
+
+
+def predict_lp(model: m.nn.Model,
+               graph_storage: m.storage.GraphModelStorage,
+               edges,
+               num_negs: int = None,
+               num_chunks: int = 1,
+               deg_frac: float = 0.0,
+               filtered: bool = True,
+               batch_size: int = 10000,
+               num_nbrs: list = None,
+               ranking_tile_size: int = 65536):
+    """
+    Scores and optionally ranks edges held in memory, without writing them to disk.
+
+    :param edges: Mapped [num_edges, 2] or [num_edges, 3] ids as a numpy array or torch tensor. Use map_raw_edges for raw ids
+    :param num_negs: Number of negatives each edge is ranked against, -1 ranks against all nodes. If None, the edges are only scored
+    :return: Tuple of the scores [num_edges] and the ranks [num_edges] of the edges, ranks is None if num_negs is None. If the model
+             also ranks the corrupted sources, the ranks are [num_edges, 2] with the destination ranks in the first column
+    """
+    check_in_memory_prediction(graph_storage)
+
+    edges = to_id_tensor(edges)
+    graph_storage.setTestSet()
+    graph_storage.set_edge_storage(m.storage.InMemory(edges))
+
+    neg_sampler = None
+    if num_negs is None:
+        model.decoder.mode = m.config.EdgeDecoderMethod.ONLY_POS
+    else:
+        model.decoder.mode = m.config.EdgeDecoderMethod.CORRUPT_NODE
+        neg_sampler = m.samplers.CorruptNodeNegativeSampler(num_chunks, num_negs, deg_frac, filtered)
+
+    nbr_sampler = None
+    if num_nbrs is not None and len(num_nbrs) > 0:
+        nbr_sampler = m.samplers.LayeredNeighborSampler(graph_storage, num_nbrs)
+
+    dataloader = m.data.DataLoader(graph_storage=graph_storage,
+                                   neg_sampler=neg_sampler,
+                                   nbr_sampler=nbr_sampler,
+                                   batch_size=batch_size,
+                                   learning_task="lp")
+    dataloader.ranking_tile_size = ranking_tile_size
+
+    reporter = m.report.LinkPredictionReporter()
+
+    def forward(batch):
+        if num_negs is None:
+            pos = model.forward_lp(batch, train=False)[0]
+            return pos.cpu(), None
+
+        if batch.ranking_tile_size > 0:
+            pos, ranks, _, inv_ranks = model.forward_lp_ranks(batch)
+        else:
+            pos, neg, inv_pos, inv_neg = model.forward_lp(batch, train=False)
+            ranks = reporter.compute_ranks(pos, neg)
+            inv_ranks = reporter.compute_ranks(inv_pos, inv_neg) if inv_pos is not None else None
+
+        if inv_ranks is not None:
+            ranks = torch.stack([ranks, inv_ranks], dim=1)
+
+        return pos.cpu(), ranks.cpu()
+
+    with torch.no_grad():
+        outputs = run_batches(model, dataloader, forward)
+
+    scores = torch.cat([o[0] for o in outputs])
+    ranks = None
+    if num_negs is not None:
+        ranks = torch.cat([o[1] for o in outputs])
+
+    return scores, ranks
+
+
+def predict_nc(model: m.nn.Model,
+               graph_storage: m.storage.GraphModelStorage,
+               nodes,
+               batch_size: int = 10000,
+               num_nbrs: list = None,
+               return_scores: bool = False):
+    """
+    Classifies nodes held in memory, without writing them to disk.
+
+    :param nodes: Mapped 1D node ids as a numpy array or torch tensor. Use map_raw_ids for raw ids
+    :param return_scores: If true, the per class outputs of the model [num_nodes, num_classes] are returned instead of the labels
+    :return: Predicted label of each node [num_nodes]
+    """
+    check_in_memory_prediction(graph_storage)
+
+    nodes = to_id_tensor(nodes)
+    graph_storage.setTestSet()
+    graph_storage.set_node_storage(m.storage.InMemory(nodes))
+
+    nbr_sampler = None
+    if num_nbrs is not None and len(num_nbrs) > 0:
+        nbr_sampler = m.samplers.LayeredNeighborSampler(graph_storage, num_nbrs)
+
+    dataloader = m.data.DataLoader(graph_storage=graph_storage,
+                                   nbr_sampler=nbr_sampler,
+                                   batch_size=batch_size,
+                                   learning_task="nc")
+
+    def forward(batch):
+        y_pred = model.forward_nc(batch.node_embeddings, batch.node_features, batch.dense_graph, train=False)
+        if return_scores:
+            return y_pred.cpu()
+        return y_pred.argmax(1).cpu()
+
+    with torch.no_grad():
+        outputs = run_batches(model, dataloader, forward)
+
+    return torch.cat(outputs)
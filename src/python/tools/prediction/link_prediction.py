@@ -1,3 +1,7 @@
+import threading
+
+import numpy as np
+import pandas as pd
 import torch
 import marius as m
 
@@ -13,7 +17,8 @@ def infer_lp(model: m.nn.Model,
              num_negs: int = None,
              num_chunks: int = 1,
              deg_frac: float = 0.0,
-             filtered: bool = True
+             filtered: bool = True,
+             ranking_tile_size: int = 65536
              ):
 
     reporter = m.report.LinkPredictionReporter()
@@ -21,6 +26,10 @@ def infer_lp(model: m.nn.Model,
     for metric in metrics:
         reporter.add_metric(metric)
 
+    if save_scores or save_ranks:
+        # stream the per edge outputs to disk instead of holding them in memory until the end of evaluation
+        reporter.start_output(output_dir, save_scores, save_ranks)
+
     neg_sampler = None
     if num_negs is None:
         for metric in metrics:
@@ -37,7 +46,7 @@ def infer_lp(model: m.nn.Model,
                                                             filtered)
 
     nbr_sampler = None
-    if num_nbrs is not None:
+    if num_nbrs is not None and len(num_nbrs) > 0:
         nbr_sampler = m.samplers.LayeredNeighborSampler(graph_storage, num_nbrs)
     # if not graph_storage.has_encoded() and num_nbrs is not None:
     #     nbr_sampler = m.samplers.LayeredNeighborSampler(graph_storage, num_nbrs)
@@ -48,10 +57,24 @@ def infer_lp(model: m.nn.Model,
                                    batch_size=batch_size,
                                    learning_task="lp")
 
+    # when ranking against all nodes, score the candidates in tiles instead of materializing batch_size x num_nodes scores
+    dataloader.ranking_tile_size = ranking_tile_size
+
     dataloader.initializeBatches()
 
-    while dataloader.hasNextBatch():
-        batch = dataloader.getBatch(model.device)
+    # batches are loaded by native threads while the model computes on the previous batch
+    for batch in dataloader.prefetch(model.device):
+
+        # batch.edges index the unique nodes of the batch, the outputs report the global ids
+        if batch.ranking_tile_size > 0:
+            pos, ranks, inv_pos, inv_ranks = model.forward_lp_ranks(batch)
+
+            reporter.add_ranks(ranks, pos, batch.global_edges)
+            if inv_ranks is not None:
+                reporter.add_ranks(inv_ranks, inv_pos, batch.global_edges)
+
+            batch.clear()
+            continue
 
         pos, neg, inv_pos, inv_neg = model.forward_lp(batch, train=False)
 
@@ -61,12 +84,132 @@ def infer_lp(model: m.nn.Model,
         # else:
         #     pos, neg, inv_pos, inv_neg = model.forward_lp(batch, train=False)
 
-        reporter.add_result(pos, neg, batch.edges)
+        reporter.add_result(pos, neg, batch.global_edges)
         if inv_pos is not None:
-            reporter.add_result(inv_pos, inv_neg, batch.edges)
+            reporter.add_result(inv_pos, inv_neg, batch.global_edges)
 
         batch.clear()
-        dataloader.finishedBatch()
 
     reporter.save(output_dir, save_scores, save_ranks)
 
+
+
+def topk_lp(model: m.nn.Model,
+            graph_storage: m.storage.GraphModelStorage,
+            output_file: str,
+            queries: torch.Tensor,
+            k: int,
+            node_mapping_df: pd.DataFrame = None,
+            rel_mapping_df: pd.DataFrame = None,
+            batch_size: int = 10000,
+            filtered: bool = True,
+            ranking_tile_size: int = 65536,
+            num_threads: int = 2
+            ):
+
+    if k <= 0:
+        raise RuntimeError("k must be positive for top-k queries.")
+
+    if ranking_tile_size <= 0:
+        raise RuntimeError("Top-k queries require a positive ranking_tile_size.")
+
+    # queries are either a 1D tensor of source nodes or a [num_queries, 2] tensor of (source node, relation) pairs
+    has_relations = len(queries.shape) == 2
+    queries = queries.to(torch.int64)
+
+    # the destination column of the query edges is ignored when finding the top-k destinations
+    if has_relations:
+        src = queries[:, 0]
+        query_edges = torch.stack([src, queries[:, 1], src], dim=1)
+    else:
+        src = queries
+        query_edges = torch.stack([src, src], dim=1)
+
+    graph_storage.set_edge_storage(m.storage.InMemory(query_edges))
+
+    # all nodes are candidates, the filter (if any) removes the known edges of each query
+    neg_sampler = m.samplers.CorruptNodeNegativeSampler(num_chunks=1,
+                                                        num_negatives=-1,
+                                                        degree_fraction=0.0,
+                                                        filtered=filtered)
+
+    dataloader = m.data.DataLoader(graph_storage=graph_storage,
+                                   neg_sampler=neg_sampler,
+                                   batch_size=batch_size,
+                                   learning_task="lp")
+    dataloader.ranking_tile_size = ranking_tile_size
+
+    # internal node ids are mapped back to the raw ids of the input dataset
+    raw_node_ids = None
+    if node_mapping_df is not None:
+        raw_node_ids = node_mapping_df.iloc[:, 0].to_numpy()[np.argsort(node_mapping_df.iloc[:, 1].to_numpy())]
+
+    raw_rel_ids = None
+    if rel_mapping_df is not None:
+        raw_rel_ids = rel_mapping_df.iloc[:, 0].to_numpy()[np.argsort(rel_mapping_df.iloc[:, 1].to_numpy())]
+
+    columns = ["src", "rel", "rank", "dst", "score"] if has_relations else ["src", "rank", "dst", "score"]
+
+    output_lock = threading.Lock()
+    errors = []
+
+    dataloader.initializeBatches()
+
+    with open(output_file, "w") as f:
+        f.write(",".join(columns) + "\n")
+
+        # the dataloader shuffles the queries, so the query of each row is taken from the batch edges
+        def write_results(batch_edges, scores, ids):
+            num_queries, num_results = ids.shape
+
+            valid = torch.isfinite(scores).flatten().numpy()
+
+            output = {}
+            output["src"] = batch_edges[:, 0].numpy().repeat(num_results)
+            if has_relations:
+                output["rel"] = batch_edges[:, 1].numpy().repeat(num_results)
+            output["rank"] = np.tile(np.arange(1, num_results + 1), num_queries)
+            output["dst"] = ids.flatten().numpy()
+            output["score"] = scores.flatten().numpy()
+
+            if raw_node_ids is not None:
+                output["src"] = raw_node_ids[output["src"]]
+                output["dst"] = raw_node_ids[output["dst"]]
+
+            if raw_rel_ids is not None:
+                output["rel"] = raw_rel_ids[output["rel"]]
+
+            df = pd.DataFrame(output, columns=columns)[valid]
+
+            with output_lock:
+                df.to_csv(f, header=False, index=False)
+
+        # each worker keeps the running top-k of its own batches; the scoring releases the GIL so workers overlap
+        def worker():
+            try:
+                while dataloader.hasNextBatch():
+                    batch = dataloader.getBatch(model.device)
+                    if batch is None:
+                        break
+
+                    if batch.ranking_tile_size <= 0:
+                        raise RuntimeError("Top-k queries are only supported for models which do not use neighbor sampling.")
+
+                    scores, ids = model.forward_lp_topk(batch, k)
+                    batch_edges = batch.global_edges.cpu()
+
+                    batch.clear()
+                    dataloader.finishedBatch()
+
+                    write_results(batch_edges, scores.cpu(), ids.cpu())
+            except Exception as err:
+                errors.append(err)
+
+        workers = [threading.Thread(target=worker) for _ in range(max(num_threads, 1))]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+
+    if len(errors) > 0:
+        raise errors[0]
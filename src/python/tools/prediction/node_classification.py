@@ -16,6 +16,9 @@ def infer_nc(model: m.nn.Model,
     for metric in metrics:
         reporter.add_metric(metric)
 
+    if save_labels:
+        reporter.start_output(output_dir)
+
     nbr_sampler = None
     if num_nbrs is not None:
         nbr_sampler = m.samplers.LayeredNeighborSampler(graph_storage, num_nbrs)
@@ -27,11 +30,11 @@ def infer_nc(model: m.nn.Model,
 
     dataloader.initializeBatches()
 
-    while dataloader.hasNextBatch():
-        batch = dataloader.getBatch(model.device)
+    # batches are loaded by native threads while the model computes on the previous batch
+    for batch in dataloader.prefetch(model.device):
         labels = model.forward_nc(batch.node_embeddings, batch.node_features, batch.dense_graph, train=False)
-        reporter.add_result(labels)
+        # root_node_indices are buffer local ids when using the partition buffer, the outputs report the global ids
+        reporter.add_result(batch.node_labels, labels, batch.root_node_ids)
         batch.clear()
-        dataloader.finishedBatch()
 
     reporter.save(output_dir, save_labels)
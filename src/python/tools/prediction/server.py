@@ -0,0 +1,388 @@
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import torch
+import marius as m
+
+from marius.tools.prediction.api import check_in_memory_prediction
+
+SCORE_REQUEST = "score"
+TOPK_REQUEST = "topk"
+CLASSIFY_REQUEST = "classify"
+
+
+class PredictionRequest:
+    def __init__(self, request_type: str, ids: torch.Tensor, k: int = 0):
+        self.request_type = request_type
+        self.ids = ids
+        self.k = k
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def size(self):
+        return self.ids.shape[0]
+
+    def finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.done.set()
+
+
+class Predictor:
+    """
+    Holds a trained model and its graph storage for the lifetime of the server. Each request type has its own dataloader, which is
+    pointed at the ids of a micro-batch before the micro-batch is run. The dataloaders do not shuffle, so the outputs of a micro-batch
+    are returned in the order of its ids.
+    """
+
+    def __init__(self,
+                 config_path: str,
+                 num_nbrs: list = None,
+                 filtered: bool = True,
+                 ranking_tile_size: int = 65536,
+                 max_batch_size: int = 10000):
+
+        self.config = m.config.loadConfig(config_path)
+        self.learning_task = self.config.model.learning_task
+
+        self.model = m.storage.load_model(config_path, train=False)
+        self.graph_storage = m.storage.load_storage(config_path, train=False)
+        # requests replace the edge and node storage with their own ids, which does not work with the partition buffer
+        check_in_memory_prediction(self.graph_storage)
+        self.graph_storage.setTestSet()
+
+        nbr_sampler = None
+        if num_nbrs is not None and len(num_nbrs) > 0:
+            nbr_sampler = m.samplers.LayeredNeighborSampler(self.graph_storage, num_nbrs)
+
+        self.score_dataloader = None
+        self.topk_dataloader = None
+        self.classify_dataloader = None
+
+        if self.learning_task == m.config.LearningTask.LINK_PREDICTION:
+            self.model.decoder.mode = m.config.EdgeDecoderMethod.ONLY_POS
+
+            self.score_dataloader = m.data.DataLoader(graph_storage=self.graph_storage,
+                                                      nbr_sampler=nbr_sampler,
+                                                      batch_size=max_batch_size,
+                                                      learning_task="lp")
+            self.score_dataloader.shuffle = False
+
+            # top-k queries score all nodes in tiles, which is only supported without neighbor sampling
+            if nbr_sampler is None:
+                neg_sampler = m.samplers.CorruptNodeNegativeSampler(num_chunks=1,
+                                                                    num_negatives=-1,
+                                                                    degree_fraction=0.0,
+                                                                    filtered=filtered)
+
+                self.topk_dataloader = m.data.DataLoader(graph_storage=self.graph_storage,
+                                                         neg_sampler=neg_sampler,
+                                                         batch_size=max_batch_size,
+                                                         learning_task="lp")
+                self.topk_dataloader.ranking_tile_size = ranking_tile_size
+                self.topk_dataloader.shuffle = False
+
+        elif self.learning_task == m.config.LearningTask.NODE_CLASSIFICATION:
+            self.classify_dataloader = m.data.DataLoader(graph_storage=self.graph_storage,
+                                                         nbr_sampler=nbr_sampler,
+                                                         batch_size=max_batch_size,
+                                                         learning_task="nc")
+            self.classify_dataloader.shuffle = False
+        else:
+            raise RuntimeError("Unsupported learning task for inference.")
+
+    def run(self, dataloader, forward):
+        outputs = []
+
+        dataloader.initializeBatches()
+        while dataloader.hasNextBatch():
+            batch = dataloader.getBatch(self.model.device)
+            if batch is None:
+                break
+
+            outputs.append((batch.start_idx, forward(batch)))
+            batch.clear()
+            dataloader.finishedBatch()
+
+        # without shuffling, the batch starting at start_idx holds the ids from start_idx onwards
+        outputs.sort(key=lambda o: o[0])
+        return [o[1] for o in outputs]
+
+    def score(self, edges: torch.Tensor):
+        if self.score_dataloader is None:
+            raise RuntimeError("Scoring edges is only supported for link prediction models.")
+
+        self.graph_storage.set_edge_storage(m.storage.InMemory(edges))
+
+        with torch.no_grad():
+            outputs = self.run(self.score_dataloader, lambda batch: self.model.forward_lp(batch, train=False)[0].cpu())
+
+        return torch.cat(outputs)
+
+    def topk(self, queries: torch.Tensor, k: int):
+        if self.topk_dataloader is None:
+            raise RuntimeError("Top-k queries are only supported for link prediction models which do not use neighbor sampling.")
+
+        # the destination column of the query edges is ignored when finding the top-k destinations
+        if len(queries.shape) == 2:
+            query_edges = torch.stack([queries[:, 0], queries[:, 1], queries[:, 0]], dim=1)
+        else:
+            query_edges = torch.stack([queries, queries], dim=1)
+
+        self.graph_storage.set_edge_storage(m.storage.InMemory(query_edges))
+
+        def forward(batch):
+            if batch.ranking_tile_size <= 0:
+                raise RuntimeError("Top-k queries are not supported for this model and storage configuration.")
+            scores, ids = self.model.forward_lp_topk(batch, k)
+            return scores.cpu(), ids.cpu()
+
+        outputs = self.run(self.topk_dataloader, forward)
+
+        return torch.cat([o[0] for o in outputs]), torch.cat([o[1] for o in outputs])
+
+    def classify(self, nodes: torch.Tensor):
+        if self.classify_dataloader is None:
+            raise RuntimeError("Classifying nodes is only supported for node classification models.")
+
+        self.graph_storage.set_node_storage(m.storage.InMemory(nodes))
+
+        def forward(batch):
+            y_pred = self.model.forward_nc(batch.node_embeddings, batch.node_features, batch.dense_graph, train=False)
+            return y_pred.argmax(1).cpu()
+
+        with torch.no_grad():
+            outputs = self.run(self.classify_dataloader, forward)
+
+        return torch.cat(outputs)
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests into micro-batches. A micro-batch is run once it holds max_batch_size items or once its oldest
+    request has waited max_latency_ms. Requests of different types or shapes are run separately and all are run on a single thread,
+    since the dataloaders of the predictor share the graph storage.
+    """
+
+    def __init__(self, predictor: Predictor, max_batch_size: int = 10000, max_latency_ms: float = 5.0):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+
+        self.requests = queue.Queue()
+        self.pending = None
+        self.running = True
+        self.thread = threading.Thread(target=self.worker, daemon=True)
+        self.thread.start()
+
+    def submit(self, request: PredictionRequest, timeout: float = None):
+        self.requests.put(request)
+
+        if not request.done.wait(timeout):
+            raise TimeoutError("Request timed out.")
+
+        if request.error is not None:
+            raise request.error
+
+        return request.result
+
+    def stop(self):
+        self.running = False
+        self.requests.put(None)
+        self.thread.join()
+
+    def next_micro_batch(self):
+        if self.pending is not None:
+            first, self.pending = self.pending, None
+        else:
+            first = self.requests.get()
+
+        if first is None:
+            return []
+
+        micro_batch = [first]
+        num_items = first.size()
+        deadline = time.monotonic() + self.max_latency
+
+        while num_items < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+            if request is None:
+                self.running = False
+                break
+
+            # requests of another type start the next micro-batch
+            if request.request_type != first.request_type:
+                self.pending = request
+                break
+
+            micro_batch.append(request)
+            num_items += request.size()
+
+        return micro_batch
+
+    def group_requests(self, micro_batch):
+        # requests of one type can still differ in shape, e.g. edges with and without a relation column, so each shape is run separately
+        groups = {}
+        for r in micro_batch:
+            groups.setdefault((r.request_type, tuple(r.ids.shape[1:])), []).append(r)
+        return list(groups.values())
+
+    def run_micro_batch(self, micro_batch):
+        request_type = micro_batch[0].request_type
+        ids = torch.cat([r.ids for r in micro_batch])
+
+        if request_type == SCORE_REQUEST:
+            results = self.predictor.score(ids)
+        elif request_type == TOPK_REQUEST:
+            # a micro-batch is scored with the largest k of its requests, the results of each request are truncated to its own k
+            k = max(r.k for r in micro_batch)
+            results = self.predictor.topk(ids, k)
+        elif request_type == CLASSIFY_REQUEST:
+            results = self.predictor.classify(ids)
+        else:
+            raise RuntimeError("Unsupported request type: {}".format(request_type))
+
+        offset = 0
+        for r in micro_batch:
+            if request_type == TOPK_REQUEST:
+                r.finish((results[0][offset:offset + r.size(), :r.k], results[1][offset:offset + r.size(), :r.k]))
+            else:
+                r.finish(results[offset:offset + r.size()])
+            offset += r.size()
+
+    def worker(self):
+        while self.running or self.pending is not None:
+            micro_batch = self.next_micro_batch()
+            if len(micro_batch) == 0:
+                break
+
+            for group in self.group_requests(micro_batch):
+                try:
+                    self.run_micro_batch(group)
+                except Exception as err:
+                    for r in group:
+                        r.finish(error=err)
+
+
+def parse_request(request_type: str, body: dict):
+    if request_type == SCORE_REQUEST:
+        edges = torch.tensor(body["edges"], dtype=torch.int64)
+        if len(edges.shape) != 2 or edges.shape[0] == 0 or edges.shape[1] not in [2, 3]:
+            raise ValueError("edges must be a list of [src, dst] or [src, rel, dst] lists.")
+        return PredictionRequest(request_type, edges)
+
+    elif request_type == TOPK_REQUEST:
+        nodes = torch.tensor(body["nodes"], dtype=torch.int64)
+        if len(nodes.shape) != 1 or nodes.shape[0] == 0:
+            raise ValueError("nodes must be a non-empty list of node ids.")
+
+        if "relations" in body:
+            relations = torch.tensor(body["relations"], dtype=torch.int64)
+            if relations.shape != nodes.shape:
+                raise ValueError("relations must be a list of relation ids of the same length as nodes.")
+            nodes = torch.stack([nodes, relations], dim=1)
+
+        k = int(body.get("k", 10))
+        if k <= 0:
+            raise ValueError("k must be positive.")
+        return PredictionRequest(request_type, nodes, k)
+
+    elif request_type == CLASSIFY_REQUEST:
+        nodes = torch.tensor(body["nodes"], dtype=torch.int64)
+        if len(nodes.shape) != 1 or nodes.shape[0] == 0:
+            raise ValueError("nodes must be a non-empty list of node ids.")
+        return PredictionRequest(request_type, nodes)
+
+    raise ValueError("Unsupported request type: {}".format(request_type))
+
+
+def format_response(request: PredictionRequest, result):
+    if request.request_type == TOPK_REQUEST:
+        scores, ids = result
+        return {"scores": scores.tolist(), "ids": ids.tolist()}
+    elif request.request_type == SCORE_REQUEST:
+        return {"scores": result.tolist()}
+    else:
+        return {"labels": result.tolist()}
+
+
+def make_handler(batcher: MicroBatcher, timeout: float):
+
+    class PredictionHandler(BaseHTTPRequestHandler):
+
+        def send_json(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length))
+                request = parse_request(self.path.strip("/"), body)
+            except (ValueError, KeyError, TypeError) as err:
+                self.send_json(400, {"error": str(err)})
+                return
+
+            try:
+                result = batcher.submit(request, timeout)
+            except Exception as err:
+                self.send_json(500, {"error": str(err)})
+                return
+
+            self.send_json(200, format_response(request, result))
+
+        def log_message(self, format, *args):
+            # requests are not logged, unix socket clients do not have an address
+            pass
+
+    return PredictionHandler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(predictor: Predictor,
+          host: str = "127.0.0.1",
+          port: int = 8080,
+          unix_socket: str = None,
+          max_batch_size: int = 10000,
+          max_latency_ms: float = 5.0,
+          timeout: float = None):
+
+    batcher = MicroBatcher(predictor, max_batch_size, max_latency_ms)
+    handler = make_handler(batcher, timeout)
+
+    if unix_socket is not None:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = ThreadingUnixHTTPServer(unix_socket, handler)
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        batcher.stop()
+
+        if unix_socket is not None and os.path.exists(unix_socket):
+            os.remove(unix_socket)
@@ -1,6 +1,7 @@
 from marius.tools.preprocess.converters.partitioners.partitioner import Partitioner
-from pyspark.sql.functions import floor
+from pyspark.sql.functions import floor, col, coalesce, lit, least, row_number
 from pyspark.sql.dataframe import DataFrame
+from pyspark.sql.window import Window
 import math
 
 from marius.tools.preprocess.converters.spark_constants import *
@@ -17,12 +18,103 @@ def get_edge_buckets(edges_df: DataFrame, partition_size):
         .withColumn(DST_EDGE_BUCKET_COL, floor(edges_df.dst / partition_size))
     return partitioned_edges
 
+def label_propagation(edges_df: DataFrame, nodes_df: DataFrame, num_partitions, num_iterations=10):
+    """
+    Balanced label propagation. Nodes start in contiguous partitions of their ids and each iteration moves nodes to the partition
+    holding most of their neighbors. Moves are paired between partitions so that partition sizes stay those of the contiguous
+    assignment.
+    :return: DataFrame of the node index and partition of each node
+    """
+    partition_size = get_partition_size(nodes_df, num_partitions)
+    partitions = nodes_df.select(INDEX_COL, floor(col(INDEX_COL) / partition_size).alias(PARTITION_ID)).cache()
+
+    neighbors = edges_df.select(SRC_COL, DST_COL).union(edges_df.select(DST_COL, SRC_COL)).cache()
+
+    for i in range(num_iterations):
+        # number of neighbors of each node in each partition
+        counts = neighbors.join(partitions, neighbors.dst == partitions.index) \
+            .groupBy(SRC_COL, PARTITION_ID).count()
+
+        current = partitions.join(counts.withColumnRenamed(SRC_COL, INDEX_COL), [INDEX_COL, PARTITION_ID], "left") \
+            .select(INDEX_COL, col(PARTITION_ID).alias("current_partition"), coalesce(col("count"), lit(0)).alias("current_count"))
+
+        best = counts.withColumn("rank", row_number().over(Window.partitionBy(SRC_COL).orderBy(col("count").desc(),
+                                                                                                  col(PARTITION_ID).desc()))) \
+            .where(col("rank") == 1) \
+            .withColumnRenamed(SRC_COL, INDEX_COL)
+
+        moves = best.join(current, INDEX_COL) \
+            .withColumn("gain", col("count") - col("current_count")) \
+            .where(col("gain") > 0) \
+            .select(INDEX_COL, "current_partition", col(PARTITION_ID).alias("target_partition"), "gain") \
+            .cache()
+
+        # as many nodes move from partition a to b as from b to a, keeping those with the largest gains
+        pair_counts = moves.groupBy("current_partition", "target_partition").count()
+        reverse_counts = pair_counts.select(col("target_partition").alias("current_partition"),
+                                            col("current_partition").alias("target_partition"),
+                                            col("count").alias("reverse_count"))
+        allowed = pair_counts.join(reverse_counts, ["current_partition", "target_partition"]) \
+            .select("current_partition", "target_partition", least(col("count"), col("reverse_count")).alias("allowed"))
+
+        accepted = moves.withColumn("rank", row_number().over(Window.partitionBy("current_partition", "target_partition")
+                                                              .orderBy(col("gain").desc(), col(INDEX_COL)))) \
+            .join(allowed, ["current_partition", "target_partition"]) \
+            .where(col("rank") <= col("allowed")) \
+            .select(INDEX_COL, "target_partition") \
+            .cache()
+
+        num_moved = accepted.count()
+        print("Label propagation iteration {}: moved {} nodes".format(i + 1, num_moved))
+
+        if num_moved == 0:
+            break
+
+        previous = partitions
+        partitions = partitions.join(accepted, INDEX_COL, "left") \
+            .select(INDEX_COL, coalesce(col("target_partition"), col(PARTITION_ID)).alias(PARTITION_ID)) \
+            .localCheckpoint()
+        previous.unpersist()
+        moves.unpersist()
+        accepted.unpersist()
+
+    neighbors.unpersist()
+    return partitions
+
+
+def get_locality_nodes_df(edges_df: DataFrame, nodes_df: DataFrame, num_partitions, num_iterations=10):
+    """
+    Reassigns node indices such that partitioning the indices into contiguous ranges keeps most edges within a partition.
+    :return: nodes_df with the new indices
+    """
+    partitions = label_propagation(edges_df, nodes_df, num_partitions, num_iterations)
+
+    # partition sizes match the contiguous ranges, so the nodes of partition i are given indices i * partition_size onwards
+    new_indices = partitions.withColumn("new_index", row_number().over(Window.orderBy(PARTITION_ID, INDEX_COL)) - 1) \
+        .drop(PARTITION_ID)
+
+    return nodes_df.join(new_indices, INDEX_COL) \
+        .drop(INDEX_COL) \
+        .withColumnRenamed("new_index", INDEX_COL) \
+        .cache()
+
+
 class SparkPartitioner(Partitioner):
-    def __init__(self, spark, partitioned_evaluation):
+    def __init__(self, spark, partitioned_evaluation, partitioning_method="contiguous", num_iterations=10):
         super().__init__()
 
         self.spark = spark
         self.partitioned_evaluation = partitioned_evaluation
+        self.partitioning_method = partitioning_method
+        self.num_iterations = num_iterations
+
+    def assign_node_ids(self, edges_df, nodes_df, num_partitions):
+        """
+        Reassigns the node indices of nodes_df for the partitioning method. edges_df must be remapped with the current indices.
+        """
+        if self.partitioning_method.upper() == "LABEL_PROPAGATION":
+            return get_locality_nodes_df(edges_df, nodes_df, num_partitions, self.num_iterations)
+        return nodes_df
 
     def partition_edges(self,
                         train_edges_df,
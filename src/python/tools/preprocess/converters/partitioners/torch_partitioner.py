@@ -44,11 +44,112 @@ def partition_edges(edges, num_nodes, num_partitions):
     return edges, offsets
 
 
+def get_balanced_moves(src_partitions, dst_partitions, gains, num_partitions):
+    """
+    Selects moves such that for each pair of partitions (a, b), as many nodes move from a to b as from b to a. The moves with the
+    largest gains are kept, so partition sizes are unchanged.
+    :return: Boolean mask of the accepted moves
+    """
+    pairs = src_partitions * num_partitions + dst_partitions
+    pair_counts = torch.bincount(pairs, minlength=num_partitions * num_partitions)
+    allowed = torch.minimum(pair_counts, pair_counts.view(num_partitions, num_partitions).t().flatten())
+
+    # rank the moves of each pair by decreasing gain
+    _, order = torch.sort(gains, descending=True, stable=True)
+    _, pair_order = torch.sort(pairs[order], stable=True)
+    order = order[pair_order]
+
+    pair_offsets = torch.cumsum(pair_counts, 0) - pair_counts
+    ranks = torch.empty_like(order)
+    ranks[order] = torch.arange(order.size(0)) - pair_offsets[pairs[order]]
+
+    return ranks < allowed[pairs]
+
+
+def label_propagation(edges, num_nodes, num_partitions, num_iterations=10):
+    """
+    Balanced label propagation. Nodes start in contiguous partitions of their ids and each iteration moves nodes to the partition
+    holding most of their neighbors. Moves are paired between partitions so that partition sizes stay those of the contiguous
+    assignment.
+    :return: Partition of each node
+    """
+    partition_size = int(np.ceil(num_nodes / num_partitions))
+    partitions = torch.div(torch.arange(num_nodes), partition_size, rounding_mode='trunc')
+
+    src = edges[:, 0].to(torch.int64)
+    dst = edges[:, -1].to(torch.int64)
+    nodes = torch.cat([src, dst])
+    neighbors = torch.cat([dst, src])
+    src = None
+    dst = None
+
+    for i in range(num_iterations):
+        # number of neighbors of each node in each partition
+        keys, counts = torch.unique(nodes * num_partitions + partitions[neighbors], return_counts=True)
+        key_nodes = torch.div(keys, num_partitions, rounding_mode='trunc')
+        key_partitions = keys % num_partitions
+
+        current = key_partitions == partitions[key_nodes]
+        current_counts = torch.zeros(num_nodes, dtype=counts.dtype)
+        current_counts[key_nodes[current]] = counts[current]
+
+        # the partition with the most neighbors is the last key of each node after sorting by count
+        _, order = torch.sort(counts, stable=True)
+        _, node_order = torch.sort(key_nodes[order], stable=True)
+        order = order[node_order]
+        sorted_nodes = key_nodes[order]
+        last = torch.ones_like(sorted_nodes, dtype=torch.bool)
+        last[:-1] = sorted_nodes[1:] != sorted_nodes[:-1]
+        best = order[last]
+
+        move_nodes = key_nodes[best]
+        gains = counts[best] - current_counts[move_nodes]
+        positive = gains > 0
+        move_nodes = move_nodes[positive]
+        gains = gains[positive]
+        targets = key_partitions[best][positive]
+
+        accepted = get_balanced_moves(partitions[move_nodes], targets, gains, num_partitions)
+        num_moved = int(accepted.sum())
+        print("Label propagation iteration {}: moved {} nodes".format(i + 1, num_moved))
+
+        if num_moved == 0:
+            break
+
+        partitions[move_nodes[accepted]] = targets[accepted]
+
+    return partitions
+
+
+def get_locality_node_ids(edges, num_nodes, num_partitions, num_iterations=10):
+    """
+    Assigns node ids such that partitioning the ids into contiguous ranges keeps most edges within a partition.
+    :return: New id of each node
+    """
+    partitions = label_propagation(edges, num_nodes, num_partitions, num_iterations)
+
+    # partition sizes match the contiguous ranges, so the nodes of partition i are given ids i * partition_size onwards
+    _, order = torch.sort(partitions, stable=True)
+    new_ids = torch.empty(num_nodes, dtype=torch.int64)
+    new_ids[order] = torch.arange(num_nodes)
+    return new_ids
+
+
 class TorchPartitioner(Partitioner):
-    def __init__(self, partitioned_evaluation):
+    def __init__(self, partitioned_evaluation, partitioning_method="contiguous", num_iterations=10):
         super().__init__()
 
         self.partitioned_evaluation = partitioned_evaluation
+        self.partitioning_method = partitioning_method
+        self.num_iterations = num_iterations
+
+    def assign_node_ids(self, edges, num_nodes, num_partitions):
+        """
+        Computes new node ids for the partitioning method, None if the current ids are kept.
+        """
+        if self.partitioning_method.upper() == "LABEL_PROPAGATION":
+            return get_locality_node_ids(edges, num_nodes, num_partitions, self.num_iterations)
+        return None
 
     def partition_edges(self,
                         train_edges_tens,
@@ -84,7 +84,9 @@ class SparkEdgeListConverter(object):
                  num_partitions: int = 1,
                  splits: list = None,
                  partitioned_evaluation: bool = False,
+                 partitioning_method: str = "contiguous",
                  remap_ids: bool = True,
+                 node_ordering: str = "random",
                  spark_driver_memory: str = "32g",
                  spark_executor_memory: str = "4g"):
 
@@ -112,8 +114,14 @@ class SparkEdgeListConverter(object):
 
         self.num_partitions = num_partitions
 
+        if node_ordering.upper() != "RANDOM":
+            raise RuntimeError("node_ordering {} is not supported by the spark converter".format(node_ordering))
+
+        if partitioning_method.upper() not in ["CONTIGUOUS", "LABEL_PROPAGATION"]:
+            raise RuntimeError("Unrecognized partitioning method {}".format(partitioning_method))
+
         if self.num_partitions > 1:
-            self.partitioner = SparkPartitioner(self.spark, partitioned_evaluation)
+            self.partitioner = SparkPartitioner(self.spark, partitioned_evaluation, partitioning_method)
         else:
             self.partitioner = None
 
@@ -167,6 +175,12 @@ class SparkEdgeListConverter(object):
         else:
             rels_df = None
 
+        if self.partitioner is not None:
+            # node indices are reassigned before the edges are remapped
+            partition_edges_df = train_edges_df if train_edges_df is not None else all_edges_df
+            nodes_df = self.partitioner.assign_node_ids(remap_edges(partition_edges_df, nodes_df, rels_df),
+                                                        nodes_df,
+                                                        self.num_partitions)
 
         print("Remapping edges")
 
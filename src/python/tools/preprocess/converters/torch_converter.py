@@ -74,6 +74,113 @@ def apply_mapping1d(input_ids, mapping_df):
         raise RuntimeError("Unsupported datatype for input. Must be a pandas.Series or a 1D torch.Tensor")
 
 
+def get_adjacency(edges, num_nodes):
+    """
+    Builds the undirected adjacency of the edges in CSR form.
+    :return: (offsets of the neighbors of each node, neighbors, degree of each node)
+    """
+    src = edges[:, 0].to(torch.int64)
+    dst = edges[:, -1].to(torch.int64)
+    nodes = torch.cat([src, dst])
+    neighbors = torch.cat([dst, src])
+
+    _, order = torch.sort(nodes, stable=True)
+    neighbors = neighbors[order]
+
+    degrees = torch.bincount(nodes, minlength=num_nodes)
+    offsets = torch.cumsum(degrees, 0) - degrees
+    return offsets, neighbors, degrees
+
+
+def get_traversal_order(edges, num_nodes, cuthill_mckee=False):
+    """
+    Orders nodes by a level synchronous breadth first search, starting each connected component from its highest degree node.
+    With cuthill_mckee, components start from their lowest degree node and the new nodes of each parent are visited by increasing
+    degree. Nodes without edges are placed last.
+    :return: Nodes in visiting order
+    """
+    offsets, neighbors, degrees = get_adjacency(edges, num_nodes)
+
+    _, roots = torch.sort(degrees, descending=not cuthill_mckee, stable=True)
+    roots = roots[degrees[roots] > 0].numpy()
+
+    visited = torch.zeros(num_nodes, dtype=torch.bool)
+    visited_np = visited.numpy()
+
+    order = []
+    for root in roots:
+        if visited_np[root]:
+            continue
+
+        frontier = torch.tensor([root], dtype=torch.int64)
+        visited[frontier] = True
+
+        while frontier.size(0) > 0:
+            order.append(frontier)
+
+            counts = degrees[frontier]
+            parents = torch.repeat_interleave(torch.arange(frontier.size(0)), counts)
+            starts = torch.repeat_interleave(offsets[frontier] - (torch.cumsum(counts, 0) - counts), counts)
+            children = neighbors[starts + torch.arange(parents.size(0))]
+
+            if cuthill_mckee:
+                _, degree_order = torch.sort(degrees[children], stable=True)
+                _, parent_order = torch.sort(parents[degree_order], stable=True)
+                children = children[degree_order[parent_order]]
+
+            children = children[~visited[children]]
+
+            # keep the first occurrence of each child
+            sorted_children, child_order = torch.sort(children, stable=True)
+            first = torch.ones_like(sorted_children, dtype=torch.bool)
+            first[1:] = sorted_children[1:] != sorted_children[:-1]
+            frontier = children[torch.sort(child_order[first]).values]
+
+            visited[frontier] = True
+
+    order.append(torch.nonzero(degrees == 0).flatten())
+    return torch.cat(order)
+
+
+def get_node_order(edges, num_nodes, node_ordering):
+    """
+    Orders the nodes for assigning ids.
+    :param node_ordering: "degree" for decreasing degree, "bfs" for breadth first search order or "rcm" for reverse Cuthill-McKee order
+    :return: Nodes in order of their new ids
+    """
+    if node_ordering.upper() == "DEGREE":
+        degrees = torch.bincount(torch.cat([edges[:, 0], edges[:, -1]]).to(torch.int64), minlength=num_nodes)
+        return torch.sort(degrees, descending=True, stable=True)[1]
+    elif node_ordering.upper() == "BFS":
+        return get_traversal_order(edges, num_nodes)
+    elif node_ordering.upper() == "RCM":
+        return torch.flip(get_traversal_order(edges, num_nodes, cuthill_mckee=True), [0])
+    else:
+        raise RuntimeError("Unrecognized node ordering {}".format(node_ordering))
+
+
+def reorder_node_ids(edge_lists, node_mapping, node_ordering, num_fixed_nodes=0):
+    """
+    Reassigns the mapped node ids in the order given by node_ordering, based on the first (training) edge list. Ids below
+    num_fixed_nodes are kept.
+    """
+    if node_ordering.upper() == "RANDOM":
+        return edge_lists, node_mapping
+
+    print("Ordering node ids by {}".format(node_ordering))
+
+    num_nodes = node_mapping.shape[0]
+    order = get_node_order(edge_lists[0], num_nodes, node_ordering)
+    order = order[order >= num_fixed_nodes]
+
+    new_ids = torch.arange(num_nodes)
+    new_ids[order] = torch.arange(num_fixed_nodes, num_nodes)
+
+    edge_lists = [apply_node_ids(edge_list, new_ids) for edge_list in edge_lists]
+    node_mapping[:, 1] = new_ids.numpy()[node_mapping[:, 1].astype(np.int64)]
+    return edge_lists, node_mapping
+
+
 def map_edge_list_dfs(edge_lists: list, known_node_ids=None, sequential_train_nodes=False, sequential_deg_nodes=0):
     if sequential_train_nodes or sequential_deg_nodes > 0:
         raise RuntimeError("sequential_train_nodes not yet supported for map_edge_list_dfs")
@@ -131,7 +238,12 @@ def map_edge_list_dfs(edge_lists: list, known_node_ids=None, sequential_train_no
     return output_edge_lists, node_mapping, rel_mapping
 
 
-def map_edge_lists(edge_lists: list, perform_unique=True, known_node_ids=None, sequential_train_nodes=False, sequential_deg_nodes=0):
+def map_edge_lists(edge_lists: list,
+                   perform_unique=True,
+                   known_node_ids=None,
+                   sequential_train_nodes=False,
+                   sequential_deg_nodes=0,
+                   node_ordering="random"):
     print("Remapping Edges")
 
     defined_edges = []
@@ -144,7 +256,12 @@ def map_edge_lists(edge_lists: list, perform_unique=True, known_node_ids=None, s
     if isinstance(edge_lists[0], pd.DataFrame):
         if isinstance(edge_lists[0].iloc[0][0], str):
             # need to take uniques using pandas for string datatypes, since torch doesn't support strings
-            return map_edge_list_dfs(edge_lists, known_node_ids, sequential_train_nodes, sequential_deg_nodes)
+            output_edge_lists, node_mapping, rel_mapping = map_edge_list_dfs(edge_lists,
+                                                                             known_node_ids,
+                                                                             sequential_train_nodes,
+                                                                             sequential_deg_nodes)
+            output_edge_lists, node_mapping = reorder_node_ids(output_edge_lists, node_mapping, node_ordering)
+            return output_edge_lists, node_mapping, rel_mapping
 
         new_edge_lists = []
         for edge_list in edge_lists:
@@ -184,6 +301,7 @@ def map_edge_lists(edge_lists: list, perform_unique=True, known_node_ids=None, s
             num_rels = torch.max(all_edges[:, 1])[0]
             unique_rels = torch.arange(num_rels).to(output_dtype)
 
+    num_seq_nodes = 0
     if sequential_train_nodes or sequential_deg_nodes > 0:
         seq_nodes = None
 
@@ -223,6 +341,7 @@ def map_edge_lists(edge_lists: list, perform_unique=True, known_node_ids=None, s
         mapped_node_ids = -1 * torch.ones(num_nodes, dtype=output_dtype)
         mapped_node_ids[seq_nodes.to(torch.int64)] = torch.arange(seq_nodes.shape[0], dtype=output_dtype)
         mapped_node_ids[all_other_nodes.to(torch.int64)] = seq_nodes.shape[0] + torch.randperm(num_nodes - seq_nodes.shape[0], dtype=output_dtype)
+        num_seq_nodes = seq_nodes.shape[0]
     else:
         mapped_node_ids = torch.randperm(num_nodes, dtype=output_dtype)
 
@@ -255,9 +374,19 @@ def map_edge_lists(edge_lists: list, perform_unique=True, known_node_ids=None, s
     if has_rels:
         rel_mapping = np.stack([unique_rels.numpy(), mapped_rel_ids.numpy()], axis=1)
 
+    # the sequential train and high degree nodes keep their ids
+    output_edge_lists, node_mapping = reorder_node_ids(output_edge_lists, node_mapping, node_ordering, num_seq_nodes)
+
     return output_edge_lists, node_mapping, rel_mapping
 
 
+def apply_node_ids(edges, new_ids):
+    edges = edges.clone()
+    edges[:, 0] = new_ids[edges[:, 0].to(torch.int64)].to(edges.dtype)
+    edges[:, -1] = new_ids[edges[:, -1].to(torch.int64)].to(edges.dtype)
+    return edges
+
+
 def split_edges(edges, splits):
     train_edges_tens = None
     valid_edges_tens = None
@@ -314,7 +443,9 @@ class TorchEdgeListConverter(object):
                  dtype: str = "int32",
                  num_partitions: int = 1,
                  partitioned_evaluation: bool = False,
+                 partitioning_method: str = "contiguous",
                  remap_ids: bool = True,
+                 node_ordering: str = "random",
                  sequential_train_nodes: bool = False,
                  sequential_deg_nodes: int = 0,
                  num_nodes: int = None,
@@ -326,7 +457,8 @@ class TorchEdgeListConverter(object):
 
         Steps of conversion process:
         1. Read in input dataset and convert to a pytorch tensor
-        2. Remap node and relation ids to randomly assigned integer ids (optional). Write mappings to the output directory.
+        2. Remap node and relation ids to randomly assigned integer ids (optional). With label propagation partitioning, node ids are then
+           reassigned so that neighboring nodes share partitions. Write mappings to the output directory.
         3. Perform data set splitting into train/valid/test sets (optional)
         4. Reorder/partition edge list(s) according to their edge buckets (optional)
         5. Write contents of the edge list(s) tensors to a file in the specified output directory
@@ -366,8 +498,16 @@ class TorchEdgeListConverter(object):
                                                 E.g. edge bucket (0,0) will be first, then (0, 1), (0, 2) ... (0, n-1), (1, 0) .... (1, n-1), ... (n-1, 0) ... (n-1, n-1).
                                                 The sizes of the edge buckets are stored in <output_dir>/edges/<type>_partition_offsets.txt
         :param partitioned_evaluation:          If true, the edge buckets for the validation and test sets will be computed and the edge lists will be reordered.
+        :param partitioning_method:             How nodes are assigned to partitions. "contiguous" partitions the randomly assigned node ids into
+                                                contiguous ranges. "label_propagation" runs balanced label propagation over the training edges and
+                                                assigns ids so that most edges fall in the diagonal edge buckets, with the same partition sizes.
+                                                Requires remap_ids and cannot be combined with sequential_train_nodes or sequential_deg_nodes.
         :param remap_ids:                       If true, then the raw entity ids of the input edge lists will be remapped to random integer ids. The mapping of
                                                 the node ids is stored as a two column CSV in <output_dir>/nodes/node_mapping.txt
+        :param node_ordering:                   Order in which the remapped node ids are assigned. "random" assigns random ids. "degree" assigns ids by
+                                                decreasing degree, "bfs" by breadth first search order and "rcm" by reverse Cuthill-McKee order of the
+                                                training edges, so that neighboring nodes have nearby ids and embedding and feature gathers are more
+                                                local. Sequential train and high degree nodes keep their ids. Requires remap_ids.
         :param sequential_train_nodes           If true, the train nodes will be given ids 0 to num train nodes. Applicable to node classification datasets. If set,
                                                 remap_ids must also be set.
         :param sequential_deg_nodes             If greater than zero, this number of the highest degree nodes based on the train edges will be given ids 0 to this number. If
@@ -422,8 +562,11 @@ class TorchEdgeListConverter(object):
             raise RuntimeError("Unsupported input format")
         self.num_partitions = num_partitions
 
+        if partitioning_method.upper() not in ["CONTIGUOUS", "LABEL_PROPAGATION"]:
+            raise RuntimeError("Unrecognized partitioning method {}".format(partitioning_method))
+
         if self.num_partitions > 1:
-            self.partitioner = TorchPartitioner(partitioned_evaluation)
+            self.partitioner = TorchPartitioner(partitioned_evaluation, partitioning_method)
         else:
             self.partitioner = None
 
@@ -460,6 +603,22 @@ class TorchEdgeListConverter(object):
         if self.sequential_deg_nodes > 0 and self.remap_ids is False:
             raise RuntimeError("remap_ids must be true when sequential_deg_nodes is greater than zero")
 
+        if node_ordering.upper() not in ["RANDOM", "DEGREE", "BFS", "RCM"]:
+            raise RuntimeError("Unrecognized node ordering {}".format(node_ordering))
+
+        self.node_ordering = node_ordering
+
+        if self.node_ordering.upper() != "RANDOM" and self.remap_ids is False:
+            raise RuntimeError("remap_ids must be true when node_ordering is {}".format(node_ordering))
+
+        if partitioning_method.upper() != "CONTIGUOUS":
+            if self.remap_ids is False:
+                raise RuntimeError("remap_ids must be true when partitioning_method is {}".format(partitioning_method))
+
+            if self.sequential_train_nodes or self.sequential_deg_nodes > 0:
+                raise RuntimeError("partitioning_method {} cannot be combined with sequential_train_nodes or sequential_deg_nodes"
+                                   .format(partitioning_method))
+
         if known_node_ids is not None:
             self.known_node_ids = []
             for node_id in known_node_ids:
@@ -472,6 +631,21 @@ class TorchEdgeListConverter(object):
         else:
             self.known_node_ids = None
 
+    def assign_partition_node_ids(self, edge_lists, node_mapping):
+        """
+        Reassigns the node ids of the edge lists and the node mapping for the partitioning method. The training edges are partitioned.
+        """
+        if self.partitioner is None:
+            return edge_lists, node_mapping
+
+        new_ids = self.partitioner.assign_node_ids(edge_lists[0], self.num_nodes, self.num_partitions)
+        if new_ids is None:
+            return edge_lists, node_mapping
+
+        edge_lists = [apply_node_ids(edge_list, new_ids) for edge_list in edge_lists]
+        node_mapping[:, 1] = new_ids.numpy()[node_mapping[:, 1].astype(np.int64)]
+        return edge_lists, node_mapping
+
     def convert(self):
 
         train_edges_tens = None
@@ -489,9 +663,11 @@ class TorchEdgeListConverter(object):
                 edge_lists, node_mapping, rel_mapping = map_edge_lists([train_edges_df, valid_edges_df, test_edges_df],
                                                                        known_node_ids=self.known_node_ids,
                                                                        sequential_train_nodes=self.sequential_train_nodes,
-                                                                       sequential_deg_nodes=self.sequential_deg_nodes)
+                                                                       sequential_deg_nodes=self.sequential_deg_nodes,
+                                                                       node_ordering=self.node_ordering)
 
                 self.num_nodes = node_mapping.shape[0]
+                edge_lists, node_mapping = self.assign_partition_node_ids(edge_lists, node_mapping)
 
                 if rel_mapping is None:
                     self.num_rels = 1
@@ -529,9 +705,11 @@ class TorchEdgeListConverter(object):
                 edge_lists, node_mapping, rel_mapping = map_edge_lists([train_edges_tens, valid_edges_tens, test_edges_tens],
                                                                        known_node_ids=self.known_node_ids,
                                                                        sequential_train_nodes=self.sequential_train_nodes,
-                                                                       sequential_deg_nodes=self.sequential_deg_nodes)
+                                                                       sequential_deg_nodes=self.sequential_deg_nodes,
+                                                                       node_ordering=self.node_ordering)
 
                 self.num_nodes = node_mapping.shape[0]
+                edge_lists, node_mapping = self.assign_partition_node_ids(edge_lists, node_mapping)
 
                 if rel_mapping is None:
                     self.num_rels = 1
@@ -34,7 +34,7 @@ class CustomLinkPredictionDataset(LinkPredictionDataset):
         pass
 
     def preprocess(self, num_partitions=1, remap_ids=True, splits=[.9, .05, .05], 
-                   partitioned_eval=False, sequential_train_nodes=False, columns=[0, 1, 2]):
+                   partitioned_eval=False, partitioning_method="contiguous", node_ordering="random", sequential_train_nodes=False, columns=[0, 1, 2]):
         converter = SparkEdgeListConverter if self.spark else TorchEdgeListConverter
         converter = converter(
             output_dir=self.output_directory,
@@ -46,7 +46,9 @@ class CustomLinkPredictionDataset(LinkPredictionDataset):
             num_partitions=num_partitions,
             splits=splits,
             remap_ids=remap_ids,
-            partitioned_evaluation=partitioned_eval
+            partitioned_evaluation=partitioned_eval,
+            partitioning_method=partitioning_method,
+            node_ordering=node_ordering
         )
         
         converter.convert()
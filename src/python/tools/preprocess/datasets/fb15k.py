@@ -37,7 +37,7 @@ class FB15K(LinkPredictionDataset):
 
             (self.output_directory / Path("FB15k")).rmdir()
 
-    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False):
+    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False, partitioning_method="contiguous", node_ordering="random"):
         converter = SparkEdgeListConverter if self.spark else TorchEdgeListConverter
         converter = converter(
             output_dir=self.output_directory,
@@ -46,7 +46,9 @@ class FB15K(LinkPredictionDataset):
             test_edges=self.input_test_edges_file,
             num_partitions=num_partitions,
             remap_ids=remap_ids,
-            partitioned_evaluation=partitioned_eval
+            partitioned_evaluation=partitioned_eval,
+            partitioning_method=partitioning_method,
+            node_ordering=node_ordering
         )
 
         return converter.convert()
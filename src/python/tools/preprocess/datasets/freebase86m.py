@@ -36,7 +36,7 @@ class Freebase86m(LinkPredictionDataset):
 
             (self.output_directory / Path("Freebase")).rmdir()
 
-    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False):
+    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False, partitioning_method="contiguous", node_ordering="random"):
         converter = SparkEdgeListConverter if self.spark else TorchEdgeListConverter
         converter = converter(
             output_dir=self.output_directory,
@@ -46,7 +46,9 @@ class Freebase86m(LinkPredictionDataset):
             num_partitions=num_partitions,
             columns=[0, 2, 1],
             remap_ids=remap_ids,
-            partitioned_evaluation=partitioned_eval
+            partitioned_evaluation=partitioned_eval,
+            partitioning_method=partitioning_method,
+            node_ordering=node_ordering
         )
 
         return converter.convert()
@@ -33,7 +33,7 @@ class Friendster(LinkPredictionDataset):
                    node_feature_dim=32,
                    num_classes=50,
                    node_splits=[.1, .05, .05],
-                   partitioned_eval=False):
+                   partitioned_eval=False, partitioning_method="contiguous", node_ordering="random"):
         converter = SparkEdgeListConverter if self.spark else TorchEdgeListConverter
         converter = converter(
             output_dir=self.output_directory,
@@ -44,7 +44,9 @@ class Friendster(LinkPredictionDataset):
             num_partitions=num_partitions,
             splits=splits,
             remap_ids=remap_ids,
-            partitioned_evaluation=partitioned_eval
+            partitioned_evaluation=partitioned_eval,
+            partitioning_method=partitioning_method,
+            node_ordering=node_ordering
         )
 
         return converter.convert()
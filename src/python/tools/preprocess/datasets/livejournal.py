@@ -26,7 +26,7 @@ class Livejournal(LinkPredictionDataset):
     def preprocess(self,
                    num_partitions=1,
                    remap_ids=True,
-                   splits=[.9, .05, .05], sequential_train_nodes=False, partitioned_eval=False):
+                   splits=[.9, .05, .05], sequential_train_nodes=False, partitioned_eval=False, partitioning_method="contiguous", node_ordering="random"):
         converter = SparkEdgeListConverter if self.spark else TorchEdgeListConverter
         converter = converter(
             output_dir=self.output_directory,
@@ -37,7 +37,9 @@ class Livejournal(LinkPredictionDataset):
             num_partitions=num_partitions,
             splits=splits,
             remap_ids=remap_ids,
-            partitioned_evaluation=partitioned_eval
+            partitioned_evaluation=partitioned_eval,
+            partitioning_method=partitioning_method,
+            node_ordering=node_ordering
         )
 
         return converter.convert()
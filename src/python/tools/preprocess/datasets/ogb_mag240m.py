@@ -47,7 +47,7 @@ class OGBMag240M(NodeClassificationDataset):
             (self.output_directory / Path("mag240m_kddcup2021/processed/paper/node_feat.npy")).rename(self.input_node_feature_file)
             (self.output_directory / Path("mag240m_kddcup2021/processed/paper/node_label.npy")).rename(self.input_node_label_file)
 
-    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False):
+    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False, partitioning_method="contiguous", node_ordering="random"):
 
         citation_edges = np.load(self.input_cites_edge_list_file).astype(np.int32).transpose()
 
@@ -69,7 +69,9 @@ class OGBMag240M(NodeClassificationDataset):
             known_node_ids=[train_nodes, valid_nodes, test_nodes, np.arange(121751666, dtype=np.int32)], # not all nodes appear in the edges
             num_nodes=121751666,
             num_rels=1,
-            partitioned_evaluation=partitioned_eval
+            partitioned_evaluation=partitioned_eval,
+            partitioning_method=partitioning_method,
+            node_ordering=node_ordering
         )
 
         dataset_stats = converter.convert()
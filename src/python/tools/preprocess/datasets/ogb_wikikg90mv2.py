@@ -42,7 +42,7 @@ class OGBWikiKG90Mv2(LinkPredictionDataset):
             for file in (self.output_directory / Path("wikikg90m-v2/processed/")).iterdir():
                 file.rename(self.output_directory / Path(file.name))
 
-    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False):
+    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False, partitioning_method="contiguous", node_ordering="random"):
 
         train_edges = np.load(self.input_train_edges_file).astype(np.int32)
         valid_edges_sr = np.load(self.input_valid_edges_sr_file)
@@ -61,7 +61,9 @@ class OGBWikiKG90Mv2(LinkPredictionDataset):
             remap_ids=remap_ids,
             sequential_train_nodes=sequential_train_nodes,
             format="numpy",
-            partitioned_evaluation=partitioned_eval
+            partitioned_evaluation=partitioned_eval,
+            partitioning_method=partitioning_method,
+            node_ordering=node_ordering
         )
 
         dataset_stats = converter.convert()
@@ -38,7 +38,7 @@ class OGBLCitation2(LinkPredictionDataset):
             for file in (self.output_directory / Path("citation-v2/split/time")).iterdir():
                 file.rename(self.output_directory / Path(file.name))
 
-    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False):
+    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False, partitioning_method="contiguous", node_ordering="random"):
         train_idx = torch.load(self.input_train_edges_file)
         valid_idx = torch.load(self.input_valid_edges_file)
         test_idx = torch.load(self.input_test_edges_file)
@@ -60,7 +60,9 @@ class OGBLCitation2(LinkPredictionDataset):
             remap_ids=remap_ids,
             known_node_ids=[torch.arange(2927963)], # not all nodes appear in the edges, need to supply all node ids for the mapping to be correct
             format="numpy",
-            partitioned_evaluation=partitioned_eval
+            partitioned_evaluation=partitioned_eval,
+            partitioning_method=partitioning_method,
+            node_ordering=node_ordering
         )
 
         return converter.convert()
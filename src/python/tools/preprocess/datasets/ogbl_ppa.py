@@ -38,7 +38,7 @@ class OGBLPpa(LinkPredictionDataset):
             for file in (self.output_directory / Path("ppassoc/split/throughput")).iterdir():
                 file.rename(self.output_directory / Path(file.name))
 
-    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False):
+    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False, partitioning_method="contiguous", node_ordering="random"):
         train_idx = torch.load(self.input_train_edges_file).get("edge")
         valid_idx = torch.load(self.input_valid_edges_file).get("edge")
         test_idx = torch.load(self.input_test_edges_file).get("edge")
@@ -52,7 +52,9 @@ class OGBLPpa(LinkPredictionDataset):
             num_partitions=num_partitions,
             remap_ids=remap_ids,
             format="numpy",
-            partitioned_evaluation=partitioned_eval
+            partitioned_evaluation=partitioned_eval,
+            partitioning_method=partitioning_method,
+            node_ordering=node_ordering
         )
 
         return converter.convert()
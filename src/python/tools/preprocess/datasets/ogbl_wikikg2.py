@@ -37,7 +37,7 @@ class OGBLWikiKG2(LinkPredictionDataset):
             for file in (self.output_directory / Path("wikikg-v2/split/time")).iterdir():
                 file.rename(self.output_directory / Path(file.name))
 
-    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False):
+    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False, partitioning_method="contiguous", node_ordering="random"):
         train_idx = torch.load(self.input_train_edges_file)
         valid_idx = torch.load(self.input_valid_edges_file)
         test_idx = torch.load(self.input_test_edges_file)
@@ -61,7 +61,9 @@ class OGBLWikiKG2(LinkPredictionDataset):
             num_partitions=num_partitions,
             format="numpy",
             remap_ids=remap_ids,
-            partitioned_evaluation=partitioned_eval
+            partitioned_evaluation=partitioned_eval,
+            partitioning_method=partitioning_method,
+            node_ordering=node_ordering
         )
 
         return converter.convert()
@@ -60,7 +60,7 @@ class OGBNArxiv(NodeClassificationDataset):
             for file in (self.output_directory / Path("arxiv/split/time")).iterdir():
                 file.rename(self.output_directory / Path(file.name))
 
-    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False):
+    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False, partitioning_method="contiguous", node_ordering="random"):
 
         train_nodes = np.genfromtxt(self.input_train_nodes_file, delimiter=",").astype(np.int32)
         valid_nodes = np.genfromtxt(self.input_valid_nodes_file, delimiter=",").astype(np.int32)
@@ -76,7 +76,9 @@ class OGBNArxiv(NodeClassificationDataset):
             sequential_train_nodes=sequential_train_nodes,
             delim=",",
             known_node_ids=[train_nodes, valid_nodes, test_nodes],
-            partitioned_evaluation=partitioned_eval
+            partitioned_evaluation=partitioned_eval,
+            partitioning_method=partitioning_method,
+            node_ordering=node_ordering
         )
         dataset_stats = converter.convert()
 
@@ -56,7 +56,7 @@ class OGBNPapers100M(NodeClassificationDataset):
             for file in (self.output_directory / Path("papers100M-bin/split/time")).iterdir():
                 file.rename(self.output_directory / Path(file.name))
 
-    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False):
+    def preprocess(self, num_partitions=1, remap_ids=True, splits=None, sequential_train_nodes=False, partitioned_eval=False, partitioning_method="contiguous", node_ordering="random"):
         data_dict = np.load(self.input_edge_list_file)
 
         input_edges = torch.from_numpy(data_dict["edge_index"].astype(np.int32).transpose())
@@ -73,7 +73,9 @@ class OGBNPapers100M(NodeClassificationDataset):
             sequential_train_nodes=sequential_train_nodes,
             format="pytorch",
             known_node_ids=[train_nodes, valid_nodes, test_nodes],
-            partitioned_evaluation=partitioned_eval
+            partitioned_evaluation=partitioned_eval,
+            partitioning_method=partitioning_method,
+            node_ordering=node_ordering
         )
 
         dataset_stats = converter.convert()
@@ -0,0 +1,193 @@
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+
+import torch
+import marius as m
+
+
+@dataclass
+class HardwareProfile:
+    """
+    Measured throughput of the machine the tuned configuration will run on. Bandwidths are in bytes per second and times in seconds.
+    """
+    disk_read_bandwidth: float
+    disk_write_bandwidth: float
+    memory_bandwidth: float
+    batch_sample_time: float
+    batch_compute_time: float
+    num_cpus: int
+
+
+def measure_disk_bandwidth(directory, total_bytes=1 << 30, block_bytes=64 << 20):
+    """
+    Measures the sequential write and read bandwidth of the disk holding the directory, with block sizes similar to partition
+    reads and writes. The file is flushed and evicted from the page cache before it is read back, so reads hit the disk.
+    :return: (read bandwidth, write bandwidth)
+    """
+    block_bytes = min(block_bytes, total_bytes)
+    num_blocks = max(total_bytes // block_bytes, 1)
+    block = os.urandom(block_bytes)
+
+    fd, filename = tempfile.mkstemp(dir=directory, prefix="marius_tune_")
+    try:
+        t0 = time.time()
+        for i in range(num_blocks):
+            os.pwrite(fd, block, i * block_bytes)
+        os.fsync(fd)
+        write_time = time.time() - t0
+
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+        t0 = time.time()
+        for i in range(num_blocks):
+            os.pread(fd, block_bytes, i * block_bytes)
+        read_time = time.time() - t0
+    finally:
+        os.close(fd)
+        os.remove(filename)
+
+    num_bytes = num_blocks * block_bytes
+    return num_bytes / read_time, num_bytes / write_time
+
+
+def measure_memory_bandwidth(num_rows, row_dim, dtype=torch.float32, num_gathers=1 << 20, num_trials=3):
+    """
+    Measures the bandwidth of random row gathers from a host memory table, the access pattern of embedding and feature lookups.
+    The table should be larger than the CPU caches.
+    :return: Gathered bytes per second
+    """
+    table = torch.rand([num_rows, row_dim], dtype=dtype)
+    out = torch.empty([num_gathers, row_dim], dtype=dtype)
+
+    best = None
+    for _ in range(num_trials):
+        indices = torch.randint(num_rows, [num_gathers], dtype=torch.int64)
+        t0 = time.time()
+        torch.index_select(table, 0, indices, out=out)
+        elapsed = time.time() - t0
+        best = elapsed if best is None else min(best, elapsed)
+
+    return num_gathers * row_dim * out.element_size() / best
+
+
+def get_neighbors_per_layer(config):
+    num_neighbors = []
+    for layer in config.model.encoder.train_neighbor_sampling:
+        if layer.type == "ALL":
+            num_neighbors.append(-1)
+        else:
+            num_neighbors.append(layer.options.max_neighbors)
+    return num_neighbors
+
+
+def measure_batch_times(config, device, num_nodes=100000, num_edges=1000000, num_batches=20, warmup_batches=2):
+    """
+    Trains the model of the configuration on a random in-memory graph with the configured batch size and samplers.
+    The graph is scaled down, so storage does not affect the measurement.
+    :return: (seconds to sample and gather a batch with one loader thread, seconds to compute a batch on the device)
+    """
+    dataset = config.storage.dataset
+    num_nodes = min(num_nodes, dataset.num_nodes)
+    num_relations = dataset.num_relations
+    lp = config.model.learning_task == "LINK_PREDICTION"
+
+    if num_relations > 1:
+        edges = torch.stack([torch.randint(num_nodes, [num_edges]),
+                             torch.randint(num_relations, [num_edges]),
+                             torch.randint(num_nodes, [num_edges])], dim=1)
+    else:
+        edges = torch.randint(num_nodes, [num_edges, 2])
+
+    node_embeddings = None
+    node_features = None
+    for layer in config.model.encoder.layers[0]:
+        if layer.type == "EMBEDDING":
+            node_embeddings = torch.rand([num_nodes, layer.output_dim], dtype=torch.float32)
+        elif layer.type == "FEATURE":
+            node_features = torch.rand([num_nodes, dataset.node_feature_dim], dtype=torch.float32)
+
+    nbr_sampler = None
+    num_neighbors = get_neighbors_per_layer(config)
+    if len(num_neighbors) > 0:
+        nbr_sampler = m.data.samplers.LayeredNeighborSampler(num_neighbors=num_neighbors)
+
+    if lp:
+        neg = config.training.negative_sampling
+        neg_sampler = m.data.samplers.CorruptNodeNegativeSampler(num_chunks=neg.num_chunks,
+                                                                 num_negatives=neg.negatives_per_positive,
+                                                                 degree_fraction=neg.degree_fraction,
+                                                                 filtered=False)
+        dataloader = m.data.DataLoader(edges=edges,
+                                       node_embeddings=node_embeddings,
+                                       node_features=node_features,
+                                       batch_size=config.training.batch_size,
+                                       neg_sampler=neg_sampler,
+                                       nbr_sampler=nbr_sampler,
+                                       learning_task="lp",
+                                       train=True)
+    else:
+        dataloader = m.data.DataLoader(edges=edges,
+                                       nodes=torch.randperm(num_nodes),
+                                       node_embeddings=node_embeddings,
+                                       node_features=node_features,
+                                       node_labels=torch.randint(max(dataset.num_classes, 1), [num_nodes]),
+                                       batch_size=config.training.batch_size,
+                                       nbr_sampler=nbr_sampler,
+                                       learning_task="nc",
+                                       train=True)
+
+    model = m.nn.initModelFromConfig(config.model, [device], num_relations, True)
+
+    sample_time = 0
+    compute_time = 0
+    measured = 0
+    dataloader.initializeBatches()
+    while dataloader.hasNextBatch() and measured < num_batches:
+        t0 = time.time()
+        batch = dataloader.getBatch(device)
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        t1 = time.time()
+        model.train_batch(batch)
+        if node_embeddings is not None:
+            dataloader.updateEmbeddings(batch)
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        t2 = time.time()
+        dataloader.finishedBatch()
+
+        if warmup_batches > 0:
+            warmup_batches -= 1
+            continue
+
+        sample_time += t1 - t0
+        compute_time += t2 - t1
+        measured += 1
+
+    if measured == 0:
+        raise RuntimeError("The benchmark graph is too small for the configured batch size.")
+
+    return sample_time / measured, compute_time / measured
+
+
+def measure_hardware(config, disk_directory, device, disk_bytes=1 << 30, memory_table_bytes=1 << 30):
+    """
+    Runs all microbenchmarks for the configuration.
+    """
+    read_bandwidth, write_bandwidth = measure_disk_bandwidth(disk_directory, total_bytes=disk_bytes)
+
+    row_dim = max(config.model.encoder.embedding_dim, config.storage.dataset.node_feature_dim, 1)
+    num_rows = max(memory_table_bytes // (row_dim * 4), 1)
+    memory_bandwidth = measure_memory_bandwidth(num_rows, row_dim)
+
+    batch_sample_time, batch_compute_time = measure_batch_times(config, device)
+
+    return HardwareProfile(disk_read_bandwidth=read_bandwidth,
+                           disk_write_bandwidth=write_bandwidth,
+                           memory_bandwidth=memory_bandwidth,
+                           batch_sample_time=batch_sample_time,
+                           batch_compute_time=batch_compute_time,
+                           num_cpus=os.cpu_count())
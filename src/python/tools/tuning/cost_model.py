@@ -0,0 +1,294 @@
+import math
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import torch
+import marius as m
+
+from marius.tools.configuration.constants import PathConstants
+
+
+@dataclass
+class Candidate:
+    """
+    A storage and pipeline configuration together with its predicted memory use and epoch time. num_partitions is 1 when the
+    node tables are kept in memory.
+    """
+    num_partitions: int
+    buffer_capacity: int
+    fine_to_coarse_ratio: int
+    batch_loader_threads: int
+    batch_host_queue_size: int
+    batch_device_queue_size: int
+    staleness_bound: int
+    memory_bytes: float
+    epoch_time: float
+    partition_reads: int
+    partition_writes: int
+    throughput: float
+
+    @property
+    def partitioned(self):
+        return self.num_partitions > 1
+
+
+def dtype_size(dtype):
+    if dtype in ["long", "int64", "double", "float64"]:
+        return 8
+    if dtype in ["half", "float16"]:
+        return 2
+    return 4
+
+
+def is_link_prediction(config):
+    return config.model.learning_task == "LINK_PREDICTION"
+
+
+def uses_gnn(config):
+    return len(config.model.encoder.train_neighbor_sampling) > 0
+
+
+def get_node_row_bytes(config):
+    """
+    Bytes per node of the node tables which are partitioned on disk.
+    :return: (bytes read per node on a swap, bytes written back per node on a swap)
+    """
+    read_bytes = 0
+    write_bytes = 0
+
+    embedding_dim = config.model.encoder.embedding_dim
+    if embedding_dim > 0:
+        # embeddings and their optimizer state are swapped together
+        embedding_bytes = 2 * embedding_dim * dtype_size(config.storage.embeddings.options.dtype)
+        read_bytes += embedding_bytes
+        write_bytes += embedding_bytes
+
+    feature_dim = config.storage.dataset.node_feature_dim
+    if feature_dim > 0:
+        read_bytes += feature_dim * dtype_size(config.storage.features.options.dtype)
+
+    return read_bytes, write_bytes
+
+
+def get_nodes_per_batch(config):
+    """
+    Estimates the number of unique nodes gathered by a training batch.
+    """
+    batch_size = config.training.batch_size
+    if is_link_prediction(config):
+        neg = config.training.negative_sampling
+        nodes = 2 * batch_size + neg.num_chunks * neg.negatives_per_positive
+    else:
+        nodes = batch_size
+
+    # all-neighbor layers are counted with a typical degree
+    for layer in config.model.encoder.train_neighbor_sampling:
+        fanout = 10 if layer.type == "ALL" else layer.options.max_neighbors
+        nodes *= 1 + fanout
+
+    return min(nodes, config.storage.dataset.num_nodes)
+
+
+def estimate_memory(config, num_partitions, buffer_capacity, batch_host_queue_size, prefetching=True):
+    """
+    Estimates the host memory in bytes used by training with the node tables split into num_partitions partitions, of which
+    buffer_capacity are held in memory. Edges are assumed to be read from disk per edge bucket when the tables are partitioned.
+    """
+    dataset = config.storage.dataset
+    read_row_bytes, _ = get_node_row_bytes(config)
+
+    if num_partitions > 1:
+        partition_bytes = math.ceil(dataset.num_nodes / num_partitions) * read_row_bytes
+        buffered_partitions = buffer_capacity + (1 if prefetching else 0)
+        node_bytes = buffered_partitions * partition_bytes
+        buffer_fraction = buffer_capacity / num_partitions
+    else:
+        node_bytes = dataset.num_nodes * read_row_bytes
+        buffer_fraction = 1.0
+
+    edge_row_bytes = (3 if dataset.num_relations > 1 else 2) * dtype_size(config.storage.edges.options.dtype)
+    edge_bytes = dataset.num_edges * buffer_fraction ** 2 * edge_row_bytes
+    if uses_gnn(config):
+        # the in memory subgraph holds a source sorted and a destination sorted copy of the edges
+        edge_bytes *= 2
+
+    relation_bytes = 4 * dataset.num_relations * max(config.model.encoder.embedding_dim, 0) * 4
+    batch_bytes = batch_host_queue_size * get_nodes_per_batch(config) * read_row_bytes
+
+    return node_bytes + edge_bytes + relation_bytes + batch_bytes
+
+
+def get_train_nodes(config):
+    dataset = config.storage.dataset
+    train_nodes_file = Path(dataset.dataset_dir) / Path(PathConstants.train_nodes_path)
+
+    if train_nodes_file.exists():
+        np_dtype = np.int64 if dtype_size(config.storage.nodes.options.dtype) == 8 else np.int32
+        return torch.from_numpy(np.fromfile(train_nodes_file, dtype=np_dtype).astype(np.int64))
+
+    return torch.randperm(dataset.num_nodes)[:dataset.num_train]
+
+
+def get_ordering_work(config, num_partitions, buffer_capacity, fine_to_coarse_ratio, train_nodes=None):
+    """
+    Generates the buffer ordering used in training and the fraction of the epoch's training work done in each buffer state.
+    Edge buckets are assumed to be of equal size.
+    :return: (buffer states, work fraction per buffer state)
+    """
+    options = config.storage.embeddings.options
+
+    if is_link_prediction(config):
+        ordering = getattr(options, "edge_bucket_ordering", "NEW_BETA")
+        buffer_states, edge_buckets = m.data.getEdgeBucketOrdering(ordering,
+                                                                   num_partitions,
+                                                                   buffer_capacity,
+                                                                   fine_to_coarse_ratio,
+                                                                   0,
+                                                                   getattr(options, "randomly_assign_edge_buckets", True))
+        work = [e.size(0) for e in edge_buckets]
+    else:
+        ordering = getattr(options, "node_partition_ordering", "DISPERSED")
+        if train_nodes is None:
+            train_nodes = get_train_nodes(config)
+        buffer_states, nodes_per_state = m.data.getNodePartitionOrdering(ordering,
+                                                                         train_nodes,
+                                                                         config.storage.dataset.num_nodes,
+                                                                         num_partitions,
+                                                                         buffer_capacity,
+                                                                         fine_to_coarse_ratio,
+                                                                         0)
+        work = [n.size(0) for n in nodes_per_state]
+
+    total = max(sum(work), 1)
+    return buffer_states, [w / total for w in work]
+
+
+def count_admitted_partitions(buffer_states):
+    """
+    Counts the partitions read into the buffer when moving to each buffer state, starting from an empty buffer.
+    """
+    admitted = []
+    previous = set()
+    for state in buffer_states:
+        current = set(state.tolist())
+        admitted.append(len(current - previous))
+        previous = current
+    return admitted
+
+
+def predict_swap_epoch_time(admitted, work, train_time, partition_read_time, partition_write_time, buffer_capacity,
+                            prefetching=True):
+    """
+    Predicts the epoch time of training over a buffer ordering. A swap into a buffer state evicts and writes back as many
+    partitions as it admits. With prefetching, the swap into the next buffer state overlaps the training of the current one.
+    """
+    swap_times = [admitted[0] * partition_read_time]
+    for a in admitted[1:]:
+        swap_times.append(a * (partition_read_time + partition_write_time))
+
+    # the buffer is written back after the last state
+    final_write = buffer_capacity * partition_write_time
+    compute_times = [w * train_time for w in work]
+
+    if not prefetching:
+        return sum(swap_times) + sum(compute_times) + final_write
+
+    epoch_time = swap_times[0]
+    for i in range(len(compute_times)):
+        next_swap = swap_times[i + 1] if i + 1 < len(swap_times) else 0
+        epoch_time += max(compute_times[i], next_swap)
+
+    return epoch_time + final_write
+
+
+def tune_pipeline(config, profile, row_bytes):
+    """
+    Chooses the number of batch loader threads needed to keep the compute stage busy and queue sizes and a staleness bound just
+    large enough to hold the batches in flight.
+    :return: (batch_loader_threads, batch_host_queue_size, batch_device_queue_size, staleness_bound, seconds per batch)
+    """
+    gather_time = get_nodes_per_batch(config) * row_bytes / profile.memory_bandwidth
+    load_time = profile.batch_sample_time + gather_time
+    compute_time = profile.batch_compute_time
+
+    if config.training.pipeline.sync:
+        return 1, 2, 2, 1, load_time + compute_time
+
+    loader_threads = max(1, min(profile.num_cpus, math.ceil(load_time / max(compute_time, 1e-9))))
+    host_queue_size = max(2, loader_threads)
+    device_queue_size = 2
+    staleness_bound = loader_threads + host_queue_size + device_queue_size + config.training.pipeline.compute_threads
+
+    batch_time = max(compute_time, load_time / loader_threads)
+    return loader_threads, host_queue_size, device_queue_size, staleness_bound, batch_time
+
+
+def get_partition_candidates(config, max_partitions):
+    """
+    Enumerates (num_partitions, buffer_capacity, fine_to_coarse_ratio) settings supported by the configured ordering.
+    """
+    options = config.storage.embeddings.options
+    if is_link_prediction(config):
+        multi_level = getattr(options, "edge_bucket_ordering", "NEW_BETA") == "TWO_LEVEL_BETA"
+    else:
+        multi_level = getattr(options, "node_partition_ordering", "DISPERSED") == "DISPERSED"
+
+    ratios = [1, 2, 4, 8] if multi_level else [1]
+
+    num_partitions = 4
+    while num_partitions <= min(max_partitions, config.storage.dataset.num_nodes):
+        buffer_capacity = 2
+        while buffer_capacity < num_partitions:
+            for ratio in ratios:
+                if buffer_capacity % ratio == 0 and buffer_capacity // ratio >= 2:
+                    yield num_partitions, buffer_capacity, ratio
+            buffer_capacity *= 2
+        num_partitions *= 2
+
+
+def search(config, profile, memory_budget, max_partitions=256, prefetching=True):
+    """
+    Predicts the throughput of each storage configuration which fits in the memory budget.
+    :return: Candidates sorted by decreasing predicted throughput
+    """
+    dataset = config.storage.dataset
+    read_row_bytes, write_row_bytes = get_node_row_bytes(config)
+    num_batches = math.ceil(dataset.num_train / config.training.batch_size)
+
+    loader_threads, host_queue_size, device_queue_size, staleness_bound, batch_time = tune_pipeline(config, profile, read_row_bytes)
+    train_time = num_batches * batch_time
+
+    candidates = []
+
+    memory = estimate_memory(config, 1, 1, host_queue_size, prefetching)
+    if memory <= memory_budget:
+        candidates.append(Candidate(1, 1, 1, loader_threads, host_queue_size, device_queue_size, staleness_bound,
+                                    memory, train_time, 0, 0, dataset.num_train / train_time))
+
+    train_nodes = None
+    if not is_link_prediction(config):
+        train_nodes = get_train_nodes(config)
+
+    for num_partitions, buffer_capacity, ratio in get_partition_candidates(config, max_partitions):
+        memory = estimate_memory(config, num_partitions, buffer_capacity, host_queue_size, prefetching)
+        if memory > memory_budget:
+            continue
+
+        buffer_states, work = get_ordering_work(config, num_partitions, buffer_capacity, ratio, train_nodes)
+        admitted = count_admitted_partitions(buffer_states)
+
+        partition_nodes = math.ceil(dataset.num_nodes / num_partitions)
+        partition_read_time = partition_nodes * read_row_bytes / profile.disk_read_bandwidth
+        partition_write_time = partition_nodes * write_row_bytes / profile.disk_write_bandwidth
+
+        epoch_time = predict_swap_epoch_time(admitted, work, train_time, partition_read_time, partition_write_time,
+                                             buffer_capacity, prefetching)
+        reads = sum(admitted)
+        writes = reads if write_row_bytes > 0 else 0
+
+        candidates.append(Candidate(num_partitions, buffer_capacity, ratio, loader_threads, host_queue_size, device_queue_size,
+                                    staleness_bound, memory, epoch_time, reads, writes, dataset.num_train / epoch_time))
+
+    candidates.sort(key=lambda c: c.throughput, reverse=True)
+    return candidates
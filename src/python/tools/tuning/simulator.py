@@ -0,0 +1,194 @@
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import marius as m
+
+from marius.tools.configuration.constants import PathConstants
+from marius.tools.tuning.cost_model import count_admitted_partitions, get_node_row_bytes, get_train_nodes, is_link_prediction
+
+
+@dataclass
+class OrderingReport:
+    """
+    Result of replaying a buffer ordering over one epoch. Items are edges for link prediction and training nodes for node
+    classification. Times are only set if bandwidths and a throughput were given.
+    """
+    num_partitions: int
+    buffer_capacity: int
+    num_buffer_states: int
+    partitions_read: int
+    partitions_written: int
+    bytes_read: int
+    bytes_written: int
+    items_per_state: List[int] = field(default_factory=list)
+    subgraph_edges_per_state: List[int] = field(default_factory=list)
+    swap_times: List[float] = field(default_factory=list)
+    compute_times: List[float] = field(default_factory=list)
+
+    @property
+    def load_imbalance(self):
+        """
+        Ratio of the largest to the mean number of items of a buffer state. 1 is perfectly balanced.
+        """
+        if len(self.items_per_state) == 0 or sum(self.items_per_state) == 0:
+            return 1.0
+        return max(self.items_per_state) / np.mean(self.items_per_state)
+
+    @property
+    def total_swap_time(self):
+        return sum(self.swap_times)
+
+    @property
+    def exposed_swap_time(self):
+        """
+        Swap time not hidden by prefetching. The swap into each buffer state overlaps the training of the previous state,
+        the initial load and the final write back are always exposed.
+        """
+        if len(self.swap_times) == 0:
+            return 0.0
+
+        exposed = self.swap_times[0] + self.swap_times[-1]
+        for i in range(1, len(self.swap_times) - 1):
+            exposed += max(self.swap_times[i] - self.compute_times[i - 1], 0)
+        return exposed
+
+    @property
+    def prefetch_overlap(self):
+        """
+        Fraction of the swap time which prefetching can hide.
+        """
+        if self.total_swap_time == 0:
+            return 1.0
+        return 1 - self.exposed_swap_time / self.total_swap_time
+
+
+def read_edge_bucket_sizes(partition_offsets_file, num_partitions):
+    """
+    Reads the edge bucket sizes written by marius_preprocess, one size per line in row major order of (source partition,
+    destination partition).
+    :return: [num_partitions, num_partitions] array of edge bucket sizes
+    """
+    sizes = np.loadtxt(partition_offsets_file, dtype=np.int64, ndmin=1)
+    if sizes.shape[0] != num_partitions * num_partitions:
+        raise RuntimeError("{} holds {} edge buckets, expected {} for {} partitions. Preprocess the dataset with --num_partitions {}."
+                           .format(partition_offsets_file, sizes.shape[0], num_partitions * num_partitions, num_partitions,
+                                   num_partitions))
+    return sizes.reshape(num_partitions, num_partitions)
+
+
+def get_buffer_options(config):
+    if config.storage.embeddings.type == "PARTITION_BUFFER":
+        return config.storage.embeddings.options
+    if config.storage.features.type == "PARTITION_BUFFER":
+        return config.storage.features.options
+    raise RuntimeError("The configuration does not use the partition buffer, there is no ordering to simulate.")
+
+
+def simulate_ordering(config,
+                      partition_offsets_file=None,
+                      disk_read_bandwidth=None,
+                      disk_write_bandwidth=None,
+                      throughput=None):
+    """
+    Replays the training buffer ordering of a configuration without loading the graph.
+    :param config: Configuration which uses the partition buffer
+    :param partition_offsets_file: Edge bucket sizes of the training edges, defaults to those of the dataset. If the file does not
+                                   exist, edges are assumed to be spread evenly over the edge buckets.
+    :param disk_read_bandwidth: Disk read bandwidth in bytes per second, used to compute swap times
+    :param disk_write_bandwidth: Disk write bandwidth in bytes per second, defaults to the read bandwidth
+    :param throughput: Training throughput in items per second, used to compute the training time of each buffer state
+    :return: OrderingReport
+    """
+    options = get_buffer_options(config)
+    dataset = config.storage.dataset
+    num_partitions = options.num_partitions
+    buffer_capacity = options.buffer_capacity
+
+    if partition_offsets_file is None:
+        partition_offsets_file = Path(dataset.dataset_dir) / Path(PathConstants.train_edge_buckets_path)
+
+    if Path(partition_offsets_file).exists():
+        bucket_sizes = read_edge_bucket_sizes(partition_offsets_file, num_partitions)
+    else:
+        bucket_sizes = np.full([num_partitions, num_partitions], dataset.num_train / num_partitions ** 2)
+
+    if is_link_prediction(config):
+        buffer_states, edge_buckets = m.data.getEdgeBucketOrdering(options.edge_bucket_ordering,
+                                                                   num_partitions,
+                                                                   buffer_capacity,
+                                                                   options.fine_to_coarse_ratio,
+                                                                   options.num_cache_partitions,
+                                                                   options.randomly_assign_edge_buckets)
+        items_per_state = []
+        for buckets in edge_buckets:
+            buckets = buckets.numpy()
+            items_per_state.append(int(bucket_sizes[buckets[:, 0], buckets[:, 1]].sum()) if buckets.shape[0] > 0 else 0)
+    else:
+        buffer_states, nodes_per_state = m.data.getNodePartitionOrdering(options.node_partition_ordering,
+                                                                         get_train_nodes(config),
+                                                                         dataset.num_nodes,
+                                                                         num_partitions,
+                                                                         buffer_capacity,
+                                                                         options.fine_to_coarse_ratio,
+                                                                         options.num_cache_partitions)
+        items_per_state = [n.size(0) for n in nodes_per_state]
+
+    # the in memory subgraph of a buffer state holds the edges of all of its edge buckets
+    subgraph_edges_per_state = []
+    for state in buffer_states:
+        state = state.numpy()
+        subgraph_edges_per_state.append(int(bucket_sizes[np.ix_(state, state)].sum()))
+
+    admitted = count_admitted_partitions(buffer_states)
+    read_row_bytes, write_row_bytes = get_node_row_bytes(config)
+    partition_nodes = math.ceil(dataset.num_nodes / num_partitions)
+
+    partitions_read = sum(admitted)
+    partitions_written = partitions_read if write_row_bytes > 0 else 0
+
+    report = OrderingReport(num_partitions=num_partitions,
+                            buffer_capacity=buffer_capacity,
+                            num_buffer_states=len(buffer_states),
+                            partitions_read=partitions_read,
+                            partitions_written=partitions_written,
+                            bytes_read=partitions_read * partition_nodes * read_row_bytes,
+                            bytes_written=partitions_written * partition_nodes * write_row_bytes,
+                            items_per_state=items_per_state,
+                            subgraph_edges_per_state=subgraph_edges_per_state)
+
+    if disk_read_bandwidth is not None and throughput is not None:
+        if disk_write_bandwidth is None:
+            disk_write_bandwidth = disk_read_bandwidth
+
+        read_time = partition_nodes * read_row_bytes / disk_read_bandwidth
+        write_time = partition_nodes * write_row_bytes / disk_write_bandwidth
+
+        # the swap into a buffer state writes back as many partitions as it reads, the buffer is written back after the last state
+        report.swap_times = [admitted[0] * read_time] + [a * (read_time + write_time) for a in admitted[1:]]
+        report.swap_times.append(len(buffer_states[-1]) * write_time)
+        report.compute_times = [i / throughput for i in items_per_state]
+
+    return report
+
+
+def format_report(report):
+    lines = ["Buffer states: {}, num_partitions: {}, buffer_capacity: {}".format(report.num_buffer_states,
+                                                                                 report.num_partitions,
+                                                                                 report.buffer_capacity),
+             "Partitions read: {}, written: {}".format(report.partitions_read, report.partitions_written),
+             "Bytes read: {:.2f} GB, written: {:.2f} GB".format(report.bytes_read / (1 << 30), report.bytes_written / (1 << 30)),
+             "Items per buffer state: min {}, mean {:.1f}, max {}, load imbalance {:.2f}".format(min(report.items_per_state),
+                                                                                                 np.mean(report.items_per_state),
+                                                                                                 max(report.items_per_state),
+                                                                                                 report.load_imbalance),
+             "In memory subgraph edges per buffer state: max {}".format(max(report.subgraph_edges_per_state))]
+
+    if len(report.swap_times) > 0:
+        lines.append("Swap time: {:.2f} s, exposed with prefetching: {:.2f} s, prefetch overlap: {:.1f}%".format(
+            report.total_swap_time, report.exposed_swap_time, 100 * report.prefetch_overlap))
+        lines.append("Training time: {:.2f} s".format(sum(report.compute_times)))
+
+    return "\n".join(lines)
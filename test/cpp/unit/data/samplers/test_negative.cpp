@@ -244,4 +244,41 @@ TEST_F(CorruptNodeNegativeSamplerTest, TestFilter) {
     auto corrupt_filtered = std::make_shared<CorruptNodeNegativeSampler>(1, -1, 0.0, true);
     test_filtered_corruption_sampler(corrupt_filtered, graph, batch_edges);
     test_filtered_corruption_sampler(corrupt_filtered, typed_graph, batch_typed_edges);
-}
\ No newline at end of file
+}
+TEST_F(CorruptNodeNegativeSamplerTest, TestStaleRowsExcluded) {
+    // nodes 0 and 3 are pinned in rows 6 and 7, so their partition slot rows 0 and 3 hold stale copies
+    torch::Tensor local_map = torch::tensor({6, 1, 2, 7, 4, 5}, torch::kInt64);
+    torch::Tensor hot_edges = local_map.index_select(0, edges.flatten(0, 1)).view({-1, 2});
+    torch::Tensor hot_batch_edges = local_map.index_select(0, batch_edges.flatten(0, 1)).view({-1, 2});
+
+    torch::Tensor src_sorted_edges = hot_edges.index_select(0, hot_edges.select(1, 0).argsort(0));
+    torch::Tensor dst_sorted_edges = hot_edges.index_select(0, hot_edges.select(1, 1).argsort(0));
+    auto hot_graph = std::make_shared<MariusGraph>(src_sorted_edges, dst_sorted_edges, 8);
+    hot_graph->sortAllEdges(hot_edges);
+    hot_graph->valid_node_ids_ = torch::tensor({1, 2, 4, 5, 6, 7}, torch::kInt64);
+
+    auto is_stale = [](torch::Tensor sample) {
+        return (sample == 0).logical_or(sample == 3).any().item<bool>();
+    };
+
+    torch::Tensor sample;
+    torch::Tensor filter;
+    for (auto sampler : {std::make_shared<CorruptNodeNegativeSampler>(1, 100, 0.0, false),
+                         std::make_shared<CorruptNodeNegativeSampler>(3, 100, 0.5, false)}) {
+        for (bool inverse : {false, true}) {
+            std::tie(sample, filter) = sampler->getNegatives(hot_graph, hot_batch_edges, inverse);
+            ASSERT_EQ(sample.size(1), 100);
+            ASSERT_FALSE(is_stale(sample));
+            validate_filter_local(filter, sample, hot_batch_edges, inverse);
+        }
+    }
+
+    // filtered ranking scores each node exactly once
+    auto corrupt_filtered = std::make_shared<CorruptNodeNegativeSampler>(1, -1, 0.0, true);
+    for (bool inverse : {false, true}) {
+        std::tie(sample, filter) = corrupt_filtered->getNegatives(hot_graph, hot_batch_edges, inverse);
+        ASSERT_TRUE(sample.equal(hot_graph->valid_node_ids_.view({1, -1})));
+        ASSERT_FALSE(is_stale(sample));
+        validate_filter_global(filter, sample, hot_graph, hot_batch_edges, inverse);
+    }
+}
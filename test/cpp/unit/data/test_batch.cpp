@@ -0,0 +1,76 @@
+#include <gtest/gtest.h>
+#include <data/batch.h>
+
+TEST(BatchPoolTest, TestRecycle) {
+    shared_ptr<BatchPool> pool = std::make_shared<BatchPool>(2);
+
+    shared_ptr<Batch> batch = pool->acquire(true);
+    Batch *raw = batch.get();
+    batch->batch_id_ = 5;
+    batch->edges_ = torch::ones({10, 2}, torch::kInt64);
+    ASSERT_EQ(pool->getNumAllocated(), 1);
+    ASSERT_EQ(pool->getNumFree(), 0);
+
+    // dropping the last reference returns the batch to the free list
+    batch = nullptr;
+    ASSERT_EQ(pool->getNumFree(), 1);
+
+    batch = pool->acquire(false);
+    ASSERT_EQ(batch.get(), raw);
+    ASSERT_EQ(batch->train_, false);
+    ASSERT_EQ(batch->batch_id_, -1);
+    ASSERT_FALSE(batch->edges_.defined());
+    ASSERT_EQ(pool->getNumAllocated(), 1);
+    ASSERT_EQ(pool->getNumFree(), 0);
+}
+
+TEST(BatchPoolTest, TestMaxFree) {
+    shared_ptr<BatchPool> pool = std::make_shared<BatchPool>(2);
+
+    std::vector<shared_ptr<Batch>> batches;
+    for (int i = 0; i < 4; i++) {
+        batches.emplace_back(pool->acquire(true));
+    }
+    ASSERT_EQ(pool->getNumAllocated(), 4);
+
+    batches = {};
+    ASSERT_EQ(pool->getNumFree(), 2);
+    ASSERT_EQ(pool->getNumAllocated(), 2);
+
+    pool->clear();
+    ASSERT_EQ(pool->getNumFree(), 0);
+    ASSERT_EQ(pool->getNumAllocated(), 0);
+}
+
+TEST(BatchPoolTest, TestSetMaxFree) {
+    shared_ptr<BatchPool> pool = std::make_shared<BatchPool>(4);
+
+    std::vector<shared_ptr<Batch>> batches;
+    for (int i = 0; i < 4; i++) {
+        batches.emplace_back(pool->acquire(true));
+    }
+    batches = {};
+    ASSERT_EQ(pool->getNumFree(), 4);
+
+    // lowering the cap releases the idle batches beyond it
+    pool->setMaxFreeBatches(1);
+    ASSERT_EQ(pool->getNumFree(), 1);
+    ASSERT_EQ(pool->getNumAllocated(), 1);
+
+    for (int i = 0; i < 3; i++) {
+        batches.emplace_back(pool->acquire(true));
+    }
+    batches = {};
+    ASSERT_EQ(pool->getNumFree(), 1);
+    ASSERT_EQ(pool->getNumAllocated(), 1);
+}
+
+TEST(BatchPoolTest, TestOutlivesPool) {
+    shared_ptr<BatchPool> pool = std::make_shared<BatchPool>();
+    shared_ptr<Batch> batch = pool->acquire(true);
+
+    // batches which outlive their pool are freed normally
+    pool = nullptr;
+    batch->edges_ = torch::ones({10, 2}, torch::kInt64);
+    batch = nullptr;
+}
@@ -0,0 +1,56 @@
+#include <gtest/gtest.h>
+#include <nn/decoders/edge/ann_index.h>
+#include <nn/decoders/edge/distmult.h>
+#include <nn/decoders/edge/transe.h>
+
+void check_exhaustive_search_is_exact(shared_ptr<EdgeDecoder> decoder) {
+    int64_t num_nodes = 500;
+    int64_t num_queries = 20;
+    int64_t num_lists = 16;
+    int64_t k = 10;
+    int embedding_dim = 8;
+
+    // small integer valued embeddings keep the scores exact and comparable between the index and the reference
+    torch::Tensor embeddings = torch::randint(-3, 4, {num_nodes, embedding_dim}).to(torch::kFloat32);
+    torch::Tensor src = torch::randint(num_nodes, {num_queries}, torch::kInt64);
+    torch::Tensor rels = torch::zeros({num_queries}, torch::kInt64);
+
+    // probing every list scores every node
+    IVFIndex index(decoder, num_lists, num_lists);
+    index.build(embeddings, 5, 200, 64);
+
+    ASSERT_EQ(index.getNumNodes(), num_nodes);
+    ASSERT_EQ(index.list_offsets_[-1].item<int64_t>(), num_nodes);
+    ASSERT_TRUE(std::get<0>(index.list_ids_.sort()).equal(torch::arange(num_nodes)));
+
+    auto result = index.query(src, rels, k);
+    torch::Tensor scores = std::get<0>(result);
+    torch::Tensor ids = std::get<1>(result);
+
+    torch::NoGradGuard no_grad;
+    torch::Tensor queries = decoder->apply_relation(embeddings.index_select(0, src), decoder->select_relations(rels));
+    torch::Tensor all_scores = decoder->compute_scores(queries, embeddings.unsqueeze(0));
+
+    ASSERT_TRUE(torch::allclose(scores, std::get<0>(torch::topk(all_scores, k, 1))));
+    ASSERT_TRUE(torch::allclose(all_scores.gather(1, ids), scores));
+}
+
+TEST(TestAnnIndex, TestExhaustiveSearchDistMult) {
+    check_exhaustive_search_is_exact(std::make_shared<DistMult>(1, 8));
+}
+
+TEST(TestAnnIndex, TestExhaustiveSearchTransE) {
+    check_exhaustive_search_is_exact(std::make_shared<TransE>(1, 8));
+}
+
+TEST(TestAnnIndex, TestFewerCandidatesThanK) {
+    torch::Tensor embeddings = torch::randn({20, 4});
+
+    IVFIndex index(std::make_shared<DistMult>(1, 4), 4, 1);
+    index.build(embeddings);
+
+    // a single probed list holds fewer than k nodes, the remaining entries are padded
+    auto result = index.search(embeddings.narrow(0, 0, 3), 30);
+    ASSERT_EQ(std::get<1>(result).size(1), 30);
+    ASSERT_TRUE((std::get<1>(result) == -1).any().item<bool>());
+}
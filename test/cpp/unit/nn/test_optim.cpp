@@ -0,0 +1,64 @@
+#include <gtest/gtest.h>
+#include <nn/optim.h>
+
+TEST(TestSparseOptim, TestCoalesce) {
+    torch::Tensor indices = torch::tensor({3, 1, 3, 0}, torch::kInt64);
+    torch::Tensor gradients = torch::tensor({{1.0, 2.0}, {3.0, 4.0}, {5.0, 6.0}, {7.0, 8.0}}, torch::kFloat32);
+
+    auto tup = coalesceSparseGradients(indices, gradients);
+    torch::Tensor unique_indices = std::get<0>(tup);
+    torch::Tensor reduced = std::get<1>(tup);
+
+    ASSERT_TRUE(unique_indices.equal(torch::tensor({0, 1, 3}, torch::kInt64)));
+    ASSERT_TRUE(reduced.equal(torch::tensor({{7.0, 8.0}, {3.0, 4.0}, {6.0, 8.0}}, torch::kFloat32)));
+
+    // unique ids are passed through
+    torch::Tensor unique_input = torch::tensor({2, 0, 1}, torch::kInt64);
+    tup = coalesceSparseGradients(unique_input, gradients.narrow(0, 0, 3));
+    ASSERT_TRUE(std::get<0>(tup).equal(unique_input));
+}
+
+TEST(TestSparseOptim, TestAdagradStep) {
+    torch::Tensor params = torch::randn({5, 3}, torch::kFloat32);
+    torch::Tensor state = torch::rand({5, 3}, torch::kFloat32);
+    torch::Tensor indices = torch::tensor({4, 1, 4}, torch::kInt64);
+    torch::Tensor gradients = torch::randn({3, 3}, torch::kFloat32);
+    float lr = .1;
+
+    // reference: the unfused update rule applied to the coalesced gradients
+    torch::Tensor expected_params = params.clone();
+    torch::Tensor expected_state = state.clone();
+    torch::Tensor unique_indices = torch::tensor({1, 4}, torch::kInt64);
+    torch::Tensor reduced = torch::stack({gradients[1], gradients[0] + gradients[2]});
+    expected_state.index_add_(0, unique_indices, reduced.pow(2));
+    expected_params.index_add_(0, unique_indices, -lr * (reduced / (expected_state.index_select(0, unique_indices).sqrt() + 1e-10)));
+
+    sparseAdagradStep(params, state, indices, gradients, lr);
+
+    ASSERT_TRUE(state.allclose(expected_state));
+    ASSERT_TRUE(params.allclose(expected_params));
+
+    EXPECT_THROW(sparseAdagradStep(params, state, indices, gradients.narrow(0, 0, 2), lr), TensorSizeMismatchException);
+}
+
+TEST(TestSparseOptim, TestRowWiseAdagradStep) {
+    torch::Tensor params = torch::randn({6, 4}, torch::kFloat32);
+    torch::Tensor state = torch::rand({3, 1}, torch::kFloat32);
+    torch::Tensor indices = torch::tensor({5, 2}, torch::kInt64);
+    torch::Tensor gradients = torch::randn({2, 4}, torch::kFloat32);
+    float lr = .1;
+
+    // param rows 5 and 2 use state rows 0 and 2
+    torch::Tensor state_index_map = torch::tensor({-1, -1, 2, -1, -1, 0}, torch::kInt64);
+
+    torch::Tensor expected_params = params.clone();
+    torch::Tensor expected_state = state.clone();
+    torch::Tensor state_indices = torch::tensor({0, 2}, torch::kInt64);
+    expected_state.index_add_(0, state_indices, gradients.pow(2).mean(1, true));
+    expected_params.index_add_(0, indices, -lr * (gradients / (expected_state.index_select(0, state_indices).sqrt() + 1e-10)));
+
+    sparseAdagradStep(params, state, indices, gradients, lr, 1e-10, state_index_map);
+
+    ASSERT_TRUE(state.allclose(expected_state));
+    ASSERT_TRUE(params.allclose(expected_params));
+}
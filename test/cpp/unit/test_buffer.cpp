@@ -326,6 +326,106 @@ TEST_F(PartitionBufferTest, TestPartitionBufferGlobalMap) {
     ASSERT_EQ(exp_map.equal(pb->getGlobalToLocalMap(false)), true);
 }
 
+TEST_F(PartitionBufferTest, TestPartitionBufferHotNodes) {
+    int64_t num_hot_nodes = 15;
+    int64_t hot_offset = capacity * partition_size;
+    pb = new PartitionBuffer(capacity, num_partitions, fine_to_coarse_ratio, partition_size, embedding_size, total_embeddings, dtype, filename, false,
+                             num_hot_nodes);
+    pb->setBufferOrdering(buffer_states);
+    pb->load();
+
+    torch::Tensor exp_map = -torch::ones({total_embeddings}, torch::kInt64);
+    exp_map.slice(0, 0, num_hot_nodes) = torch::arange(hot_offset, hot_offset + num_hot_nodes);
+    exp_map.slice(0, num_hot_nodes, 20) = torch::arange(num_hot_nodes, 20);
+    ASSERT_EQ(exp_map.equal(pb->getGlobalToLocalMap(true)), true);
+
+    // pinned nodes keep their updates while their partitions are swapped out
+    torch::Tensor local_ids = torch::arange(hot_offset, hot_offset + num_hot_nodes);
+    torch::Tensor expected = rand_tensor_float32.narrow(0, 0, num_hot_nodes) + 1;
+    pb->indexAdd(local_ids, torch::ones({num_hot_nodes, embedding_size}, dtype));
+    while (pb->hasSwap()) {
+        pb->performNextSwap();
+    }
+    ASSERT_EQ(expected.equal(pb->indexRead(local_ids)), true);
+
+    // and are written back when the buffer is unloaded
+    pb->unload(true);
+    torch::Tensor file_data = torch::empty({total_embeddings, embedding_size}, dtype);
+    ASSERT_EQ(pread_wrapper(fd, file_data.data_ptr(), total_embeddings * embedding_size * dtype_size, 0), total_embeddings * embedding_size * dtype_size);
+    ASSERT_EQ(expected.equal(file_data.narrow(0, 0, num_hot_nodes)), true);
+    ASSERT_EQ(rand_tensor_float32.narrow(0, num_hot_nodes, total_embeddings - num_hot_nodes).equal(file_data.narrow(0, num_hot_nodes, total_embeddings - num_hot_nodes)), true);
+}
+
+TEST_F(PartitionBufferTest, TestPartitionBufferFlush) {
+    int64_t num_hot_nodes = 5;
+    int64_t checkpoint_state = 3;
+    pb = new PartitionBuffer(capacity, num_partitions, fine_to_coarse_ratio, partition_size, embedding_size, total_embeddings, dtype, filename, false,
+                             num_hot_nodes);
+    pb->setBufferOrdering(buffer_states);
+    pb->load();
+
+    torch::Tensor expected = rand_tensor_float32.clone();
+    torch::Tensor file_data = torch::empty({total_embeddings, embedding_size}, dtype);
+    int64_t file_bytes = total_embeddings * embedding_size * dtype_size;
+
+    for (int64_t state = 1;; state++) {
+        // the batches of a buffer state update every node in the buffer
+        torch::Tensor global_to_local = pb->getGlobalToLocalMap(true);
+        torch::Tensor global_ids = torch::nonzero(global_to_local >= 0).flatten();
+        torch::Tensor local_ids = global_to_local.index_select(0, global_ids);
+        torch::Tensor values = torch::ones({global_ids.size(0), embedding_size}, dtype);
+        pb->indexAdd(local_ids, values);
+        expected.index_add_(0, global_ids, values);
+
+        if (state == checkpoint_state) {
+            // a checkpoint at the swap writes the table while the partitions stay in the buffer
+            pb->flush();
+            ASSERT_EQ(pread_wrapper(fd, file_data.data_ptr(), file_bytes, 0), file_bytes);
+            ASSERT_TRUE(expected.equal(file_data));
+            ASSERT_TRUE(expected.equal(pb->readFileRows(0, total_embeddings)));
+            ASSERT_TRUE(expected.index_select(0, global_ids).equal(pb->indexRead(local_ids)));
+        }
+
+        if (!pb->hasSwap()) {
+            break;
+        }
+        pb->performNextSwap();
+    }
+
+    // training past the checkpoint keeps the updates made before it
+    pb->unload(true);
+    ASSERT_EQ(pread_wrapper(fd, file_data.data_ptr(), file_bytes, 0), file_bytes);
+    ASSERT_TRUE(expected.equal(file_data));
+}
+
+TEST_F(PartitionBufferTest, TestPartitionBufferFlushStriped) {
+    string directory = testing::TempDir();
+    pb = new PartitionBuffer(capacity, num_partitions, fine_to_coarse_ratio, partition_size, embedding_size, total_embeddings, dtype, filename, false,
+                             0, {directory, directory}, 3 * embedding_size * dtype_size);
+    pb->setBufferOrdering(buffer_states);
+    pb->load();
+
+    torch::Tensor global_to_local = pb->getGlobalToLocalMap(true);
+    torch::Tensor global_ids = torch::nonzero(global_to_local >= 0).flatten();
+    torch::Tensor values = torch::ones({global_ids.size(0), embedding_size}, dtype);
+    pb->indexAdd(global_to_local.index_select(0, global_ids), values);
+    torch::Tensor expected = rand_tensor_float32.clone();
+    expected.index_add_(0, global_ids, values);
+
+    torch::Tensor file_data = torch::empty({total_embeddings, embedding_size}, dtype);
+    int64_t file_bytes = total_embeddings * embedding_size * dtype_size;
+
+    // a flush leaves the writes in the stripes, where checkpoints read them, instead of copying the table back to the file
+    pb->flush();
+    ASSERT_TRUE(expected.equal(pb->readFileRows(0, total_embeddings)));
+    ASSERT_EQ(pread_wrapper(fd, file_data.data_ptr(), file_bytes, 0), file_bytes);
+    ASSERT_TRUE(rand_tensor_float32.equal(file_data));
+
+    pb->unload(true);
+    ASSERT_EQ(pread_wrapper(fd, file_data.data_ptr(), file_bytes, 0), file_bytes);
+    ASSERT_TRUE(expected.equal(file_data));
+}
+
 TEST_F(PartitionedFileTest, TestReadPartition) {
     int idx_offset = (num_partitions - 1) * partition_size;
     Partition p(num_partitions - 1, std::min(partition_size, total_embeddings - idx_offset), embedding_size, dtype, idx_offset, idx_offset * embedding_size * dtype_size);
@@ -366,6 +466,97 @@ TEST_F(PartitionedFileTest, TestWritePartition) {
     ASSERT_THROW(pf->writePartition(NULL, true), std::runtime_error);
 }
 
+TEST_F(PartitionedFileTest, TestLazyInitialization) {
+    // the first two partitions have never been written
+    torch::Tensor zeros = torch::zeros({2 * partition_size, embedding_size}, dtype);
+    ASSERT_NE(pwrite_wrapper(fd, zeros.data_ptr(), 2 * partition_size * embedding_size * dtype_size, 0), -1);
+
+    int num_initialized = 0;
+    pf->initialize_partition_ = [&num_initialized](Partition *partition) {
+        num_initialized++;
+        partition->tensor_.fill_(partition->partition_id_ + 1);
+    };
+    pf->initialized_ = std::vector<uint8_t>(num_partitions, false);
+
+    for (int i = 0; i < 3; i++) {
+        Partition p(i, partition_size, embedding_size, dtype, i * partition_size, i * partition_size * embedding_size * dtype_size);
+        torch::Tensor mem = torch::empty({partition_size, embedding_size}, dtype);
+        pf->readPartition(mem.data_ptr(), &p);
+
+        if (i < 2) {
+            ASSERT_TRUE(p.tensor_.eq(i + 1).all().item<bool>());
+            pf->writePartition(&p, false);
+        } else {
+            ASSERT_TRUE(p.tensor_.equal(rand_tensor_float32.narrow(0, i * partition_size, partition_size)));
+        }
+    }
+    ASSERT_EQ(num_initialized, 2);
+
+    // initialized partitions are read from the file
+    Partition p(0, partition_size, embedding_size, dtype, 0, 0);
+    torch::Tensor mem = torch::empty({partition_size, embedding_size}, dtype);
+    pf->readPartition(mem.data_ptr(), &p);
+    ASSERT_TRUE(p.tensor_.eq(1).all().item<bool>());
+    ASSERT_EQ(num_initialized, 2);
+}
+
+TEST_F(PartitionedFileTest, TestStripedPartitions) {
+    // stripes smaller than a partition and not aligned to rows, spread over three stripe files
+    int64_t stripe_size = 3 * embedding_size * dtype_size + 8;
+    string directory = testing::TempDir();
+    auto striped = new PartitionedFile(filename, num_partitions, partition_size, embedding_size, total_embeddings, dtype,
+                                       {directory, directory, directory}, stripe_size);
+    striped->loadStripes();
+    ASSERT_EQ(striped->striped_file_->getSize(), total_embeddings * embedding_size * dtype_size);
+
+    vector<Partition *> partitions;
+    vector<torch::Tensor> mems;
+    for (int i = 0; i < num_partitions; i++) {
+        int idx_offset = i * partition_size;
+        partitions.emplace_back(new Partition(i, std::min(partition_size, total_embeddings - idx_offset), embedding_size, dtype, idx_offset, idx_offset * embedding_size * dtype_size));
+        mems.emplace_back(torch::empty({partition_size, embedding_size}, dtype));
+        striped->readPartition(mems[i].data_ptr(), partitions[i]);
+        ASSERT_TRUE(partitions[i]->tensor_.equal(rand_tensor_float32.narrow(0, idx_offset, partitions[i]->partition_size_)));
+    }
+
+    // writes are held by the stripes until they are synced
+    partitions[1]->tensor_.fill_(7);
+    striped->writePartition(partitions[1], false);
+    torch::Tensor file_rows = torch::empty({partition_size, embedding_size}, dtype);
+    ASSERT_NE(pread_wrapper(fd, file_rows.data_ptr(), partitions[1]->total_size_, partitions[1]->file_offset_), -1);
+    ASSERT_TRUE(file_rows.equal(rand_tensor_float32.narrow(0, partition_size, partition_size)));
+
+    striped->readPartition(mems[1].data_ptr(), partitions[1]);
+    ASSERT_TRUE(partitions[1]->tensor_.eq(7).all().item<bool>());
+
+    // only the stripes holding the written partition are copied back
+    int64_t partition_stripes = (partitions[1]->total_size_ + stripe_size - 1) / stripe_size + 1;
+    ASSERT_GT(striped->striped_file_->getNumDirtyStripes(), 0);
+    ASSERT_LE(striped->striped_file_->getNumDirtyStripes(), partition_stripes);
+
+    torch::Tensor untouched = torch::full({partition_size, embedding_size}, 5, dtype);
+    ASSERT_NE(pwrite_wrapper(fd, untouched.data_ptr(), partitions[3]->total_size_, partitions[3]->file_offset_), -1);
+
+    striped->syncStripes();
+    ASSERT_EQ(striped->striped_file_->getNumDirtyStripes(), 0);
+    ASSERT_NE(pread_wrapper(fd, file_rows.data_ptr(), partitions[1]->total_size_, partitions[1]->file_offset_), -1);
+    ASSERT_TRUE(file_rows.eq(7).all().item<bool>());
+    ASSERT_NE(pread_wrapper(fd, file_rows.data_ptr(), partitions[2]->total_size_, partitions[2]->file_offset_), -1);
+    ASSERT_TRUE(file_rows.equal(rand_tensor_float32.narrow(0, 2 * partition_size, partition_size)));
+    ASSERT_NE(pread_wrapper(fd, file_rows.data_ptr(), partitions[3]->total_size_, partitions[3]->file_offset_), -1);
+    ASSERT_TRUE(file_rows.eq(5).all().item<bool>());
+
+    // the stripe files are removed with the partitioned file
+    string stripe_filename = directory + "/" + filename.substr(filename.find_last_of('/') + 1) + ".stripe0";
+    ASSERT_EQ(access(stripe_filename.c_str(), F_OK), 0);
+    delete striped;
+    ASSERT_NE(access(stripe_filename.c_str(), F_OK), 0);
+
+    for (Partition *partition : partitions) {
+        delete partition;
+    }
+}
+
 TEST_F(LookaheadBlockTest, TestMoveToBuffer) {
     for (int i = 0; i < num_partitions; i++) {
         int idx_offset = i * partition_size;
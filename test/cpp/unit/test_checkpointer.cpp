@@ -0,0 +1,102 @@
+#include <fcntl.h>
+#include <unistd.h>
+
+#include "gtest/gtest.h"
+#include "storage/checkpointer.h"
+#include "testing_util.h"
+
+class TableSnapshotTest : public ::testing::Test {
+   protected:
+    string filename;
+    int64_t num_rows;
+    int64_t dim;
+    int64_t block_size;
+    torch::Tensor table;
+
+    TableSnapshotTest() {
+        num_rows = 10;
+        dim = 4;
+        block_size = 3;
+    }
+
+    void SetUp() override {
+        filename = testing::TempDir() + "table_snapshot.bin";
+        table = torch::arange(num_rows * dim, torch::kFloat32).reshape({num_rows, dim});
+    }
+
+    void TearDown() override {
+        remove(filename.c_str());
+    }
+
+    std::function<torch::Tensor(int64_t, int64_t)> reader() {
+        torch::Tensor data = table;
+        return [data](int64_t offset, int64_t n) { return data.narrow(0, offset, n).clone(); };
+    }
+
+    torch::Tensor readOutput(int64_t rows) {
+        torch::Tensor output = torch::empty({rows, dim}, torch::kFloat32);
+        int fd = open(filename.c_str(), O_RDONLY);
+        pread_wrapper(fd, output.data_ptr(), rows * dim * sizeof(float), 0);
+        close(fd);
+        return output;
+    }
+};
+
+TEST_F(TableSnapshotTest, TestFullSnapshot) {
+    torch::Tensor expected = table.clone();
+    TableSnapshot snapshot(filename, torch::arange(4, torch::kInt64), block_size, num_rows, dim * sizeof(float), reader());
+
+    snapshot.preserveRows(torch::tensor({1, 9}, torch::kInt64));
+    table.index_fill_(0, torch::tensor({1, 9}, torch::kInt64), -1);
+
+    snapshot.write();
+    ASSERT_TRUE(readOutput(num_rows).equal(expected));
+}
+
+TEST_F(TableSnapshotTest, TestDeltaSnapshot) {
+    // blocks 1 and 3 hold rows [3, 6) and [9, 10)
+    torch::Tensor expected = torch::cat({table.narrow(0, 3, 3), table.narrow(0, 9, 1)});
+    TableSnapshot snapshot(filename, torch::tensor({3, 1}, torch::kInt64), block_size, num_rows, dim * sizeof(float), reader());
+
+    ASSERT_EQ(snapshot.getBlockIds(), std::vector<int64_t>({1, 3}));
+
+    snapshot.preserveBlock(1);
+    snapshot.preserveBlock(2);
+    table.fill_(-1);
+
+    snapshot.write();
+    ASSERT_TRUE(readOutput(4).narrow(0, 0, 3).equal(expected.narrow(0, 0, 3)));
+    ASSERT_FALSE(readOutput(4).narrow(0, 3, 1).equal(expected.narrow(0, 3, 1)));
+}
+
+TEST(DirtyBlocksTest, TestInMemoryDirtyBlocks) {
+    torch::Tensor data = torch::zeros({10, 2}, torch::kFloat32);
+    InMemory storage(data);
+    storage.trackDirtyBlocks(4);
+
+    // every block is dirty until the first checkpoint
+    ASSERT_TRUE(storage.takeDirtyBlocks().equal(torch::arange(3, torch::kInt64)));
+    ASSERT_EQ(storage.takeDirtyBlocks().size(0), 0);
+
+    storage.indexAdd(torch::tensor({5, 9}, torch::kInt64), torch::ones({2, 2}, torch::kFloat32));
+    ASSERT_TRUE(storage.takeDirtyBlocks().equal(torch::tensor({1, 2}, torch::kInt64)));
+}
+
+TEST(CheckpointMetadataTest, TestSubEpochMetadata) {
+    string directory = testing::TempDir();
+    Checkpointer checkpointer;
+
+    CheckpointMeta meta;
+    meta.num_epochs = 3;
+    meta.buffer_states_processed = 7;
+    meta.items_processed = 123456789012;
+    checkpointer.saveMetadata(directory, meta);
+
+    CheckpointMeta loaded = checkpointer.loadMetadata(directory);
+    ASSERT_EQ(loaded.num_epochs, 3);
+    ASSERT_EQ(loaded.parent, "");
+    ASSERT_EQ(loaded.buffer_states_processed, 7);
+    ASSERT_EQ(loaded.items_processed, 123456789012);
+
+    remove((directory + PathConstants::checkpoint_metadata_file).c_str());
+}
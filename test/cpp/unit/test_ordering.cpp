@@ -0,0 +1,63 @@
+#include "data/ordering.h"
+#include "gtest/gtest.h"
+#include "testing_util.h"
+
+// checks that each edge bucket is assigned to exactly one buffer state which holds both of its partitions
+void checkEdgeBucketAssignment(vector<torch::Tensor> buffer_states, vector<torch::Tensor> edge_buckets_per_buffer, int num_partitions) {
+    ASSERT_EQ(buffer_states.size(), edge_buckets_per_buffer.size());
+
+    torch::Tensor counts = torch::zeros({num_partitions, num_partitions}, torch::kInt64);
+    for (int i = 0; i < buffer_states.size(); i++) {
+        torch::Tensor in_buffer = torch::zeros({num_partitions}, torch::kBool);
+        in_buffer.index_fill_(0, buffer_states[i], true);
+
+        auto buckets = edge_buckets_per_buffer[i].accessor<int64_t, 2>();
+        for (int j = 0; j < edge_buckets_per_buffer[i].size(0); j++) {
+            ASSERT_TRUE(in_buffer[buckets[j][0]].item<bool>());
+            ASSERT_TRUE(in_buffer[buckets[j][1]].item<bool>());
+            counts[buckets[j][0]][buckets[j][1]] += 1;
+        }
+    }
+
+    ASSERT_TRUE(counts.eq(1).all().item<bool>());
+}
+
+TEST(OrderingTest, TestGreedyAssignment) {
+    auto tup = getEdgeBucketOrdering(EdgeBucketOrdering::NEW_BETA, 16, 4, 1, 0, false);
+    checkEdgeBucketAssignment(std::get<0>(tup), std::get<1>(tup), 16);
+}
+
+TEST(OrderingTest, TestRandomAssignment) {
+    auto tup = getEdgeBucketOrdering(EdgeBucketOrdering::NEW_BETA, 16, 4, 1, 0, true);
+    checkEdgeBucketAssignment(std::get<0>(tup), std::get<1>(tup), 16);
+}
+
+TEST(OrderingTest, TestDispersedNodeAssignment) {
+    torch::Tensor train_nodes = torch::randperm(1000, torch::kInt64).narrow(0, 0, 300);
+    auto tup = getNodePartitionOrdering(NodePartitionOrdering::DISPERSED, train_nodes, 1000, 8, 4, 1, 0);
+    vector<torch::Tensor> buffer_states = std::get<0>(tup);
+    vector<torch::Tensor> node_ids_per_buffer = std::get<1>(tup);
+
+    ASSERT_EQ(buffer_states.size(), node_ids_per_buffer.size());
+
+    // every training node is processed exactly once
+    torch::Tensor all_nodes = std::get<0>(torch::sort(torch::cat(node_ids_per_buffer)));
+    ASSERT_TRUE(all_nodes.equal(std::get<0>(torch::sort(train_nodes))));
+}
+
+TEST(OrderingTest, TestSaveLoad) {
+    string filename = testing::TempDir() + "ordering.pt";
+    auto tup = getEdgeBucketOrdering(EdgeBucketOrdering::NEW_BETA, 8, 4, 1, 0, true);
+    vector<torch::Tensor> buffer_states = std::get<0>(tup);
+    vector<torch::Tensor> edge_buckets_per_buffer = std::get<1>(tup);
+
+    saveOrdering(filename, buffer_states, edge_buckets_per_buffer);
+    auto loaded = loadOrdering(filename);
+    remove(filename.c_str());
+
+    ASSERT_EQ(std::get<0>(loaded).size(), buffer_states.size());
+    for (int i = 0; i < buffer_states.size(); i++) {
+        ASSERT_TRUE(std::get<0>(loaded)[i].equal(buffer_states[i]));
+        ASSERT_TRUE(std::get<1>(loaded)[i].equal(edge_buckets_per_buffer[i]));
+    }
+}
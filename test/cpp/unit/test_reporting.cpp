@@ -0,0 +1,77 @@
+#include <fstream>
+
+#include "configuration/constants.h"
+#include "gtest/gtest.h"
+#include "reporting/reporting.h"
+
+TEST(TestReporting, TestStreamingRankingMetrics) {
+    LinkPredictionReporter reporter;
+    std::vector<shared_ptr<RankingMetric>> metrics = {std::make_shared<MeanReciprocalRankMetric>(),
+                                                      std::make_shared<MeanRankMetric>(),
+                                                      std::make_shared<HitskMetric>(10)};
+
+    std::vector<torch::Tensor> all_ranks;
+    for (int i = 0; i < 5; i++) {
+        torch::Tensor pos_scores = torch::randn({100});
+        torch::Tensor neg_scores = torch::randn({100, 50});
+        all_ranks.emplace_back(reporter.computeRanks(pos_scores, neg_scores));
+    }
+    torch::Tensor ranks = torch::cat(all_ranks);
+
+    // the sums aggregated over batches give the same metric as computing it over all ranks at once
+    for (auto metric : metrics) {
+        double sum = 0;
+        for (auto batch_ranks : all_ranks) {
+            sum += metric->computeSum(batch_ranks);
+        }
+        ASSERT_NEAR(sum / ranks.size(0), metric->computeMetric(ranks).item<double>(), 1e-5);
+    }
+
+    CategoricalAccuracyMetric accuracy;
+    torch::Tensor y_true = torch::randint(5, {100}, torch::kInt64);
+    torch::Tensor y_pred = torch::randint(5, {100}, torch::kInt64);
+    ASSERT_NEAR(accuracy.computeSum(y_true, y_pred) / 100, accuracy.computeMetric(y_true, y_pred).item<double>(), 1e-5);
+}
+
+TEST(TestReporting, TestStreamingScoresOutput) {
+    LinkPredictionReporter reporter;
+    reporter.addMetric(std::make_shared<MeanReciprocalRankMetric>());
+
+    std::string directory = testing::TempDir();
+    reporter.startOutput(directory, true, true);
+
+    int num_batches = 4;
+    int batch_size = 50;
+    for (int i = 0; i < num_batches; i++) {
+        torch::Tensor edges = torch::randint(1000, {batch_size, 3}, torch::kInt64);
+        reporter.addResult(torch::randn({batch_size}), torch::randn({batch_size, 10}), edges);
+    }
+
+    // nothing is held in memory when the outputs are streamed
+    ASSERT_TRUE(reporter.per_batch_edges_.empty());
+    ASSERT_TRUE(reporter.per_batch_scores_.empty());
+
+    reporter.save(directory, true, true);
+
+    std::ifstream scores_stream(directory + PathConstants::output_scores_file);
+    std::string line;
+    std::getline(scores_stream, line);
+    ASSERT_EQ(line, "src,rel,dst,rank,score");
+
+    int num_lines = 0;
+    while (std::getline(scores_stream, line)) {
+        num_lines++;
+    }
+    ASSERT_EQ(num_lines, num_batches * batch_size);
+
+    remove((directory + PathConstants::output_scores_file).c_str());
+    remove((directory + PathConstants::output_metrics_file).c_str());
+}
+
+TEST(TestReporting, TestUndefinedNodeLabels) {
+    NodeClassificationReporter reporter;
+    reporter.addMetric(std::make_shared<CategoricalAccuracyMetric>());
+
+    torch::Tensor y_pred = torch::randn({10, 5});
+    ASSERT_THROW(reporter.addResult(torch::Tensor(), y_pred, torch::arange(10)), std::runtime_error);
+}
@@ -1,5 +1,6 @@
 #include <fcntl.h>
 #include <unistd.h>
+#include <thread>
 
 #include "configuration/config.h"
 #include "gtest/gtest.h"
@@ -261,6 +262,165 @@ TEST_F(FlatFileTest, TestFlatFileSortEdges) {
     remove(edges_data_path.c_str());
 }
 
+TEST_F(FlatFileTest, TestFlatFileIndexRead) {
+    for (int i = 0; i < dtype_size_array.size(); i++) {
+        FlatFile flat_file(filenames_array[i], 0, dim1_size, dtype_array[i]);
+        flat_file.append(rand_tensors_array[i]);
+        ASSERT_THROW(flat_file.indexRead(torch::arange(0, 10)), std::runtime_error);
+
+        flat_file.load();
+
+        // duplicate and consecutive ids
+        torch::Tensor indices = torch::tensor({5, 3, 4, 5, 45, 0, 44, 3}, torch::kInt64);
+        ASSERT_TRUE(flat_file.indexRead(indices).equal(rand_tensors_array[i].index_select(0, indices)));
+
+        // cache of 10 rows
+        flat_file.setRowCache(10 * dim1_size * dtype_size_array[i]);
+        shared_ptr<RowCache> row_cache = flat_file.getRowCache();
+        ASSERT_EQ(row_cache->getCapacity(), 10);
+
+        ASSERT_TRUE(flat_file.indexRead(indices).equal(rand_tensors_array[i].index_select(0, indices)));
+        ASSERT_EQ(row_cache->getHits(), 0);
+        ASSERT_EQ(row_cache->getMisses(), indices.size(0));
+
+        ASSERT_TRUE(flat_file.indexRead(indices).equal(rand_tensors_array[i].index_select(0, indices)));
+        ASSERT_EQ(row_cache->getHits(), indices.size(0));
+
+        // reading more rows than fit evicts cached rows
+        torch::Tensor all_indices = torch::randperm(dim0_size, torch::kInt64);
+        ASSERT_TRUE(flat_file.indexRead(all_indices).equal(rand_tensors_array[i].index_select(0, all_indices)));
+        ASSERT_TRUE(flat_file.indexRead(all_indices).equal(rand_tensors_array[i].index_select(0, all_indices)));
+
+        // writes invalidate the cache
+        torch::Tensor new_rows = getRandTensor(dim0_size, dim1_size, dtype_array[i]);
+        flat_file.rangePut(0, new_rows);
+        ASSERT_TRUE(flat_file.indexRead(indices).equal(new_rows.index_select(0, indices)));
+
+        flat_file.setRowCache(0);
+        ASSERT_EQ(flat_file.getRowCache(), nullptr);
+        flat_file.unload(false);
+    }
+}
+
+TEST_F(FlatFileTest, TestFlatFileStriping) {
+    for (int i = 0; i < dtype_size_array.size(); i++) {
+        FlatFile flat_file(filenames_array[i], 0, dim1_size, dtype_array[i]);
+        flat_file.append(rand_tensors_array[i]);
+
+        // stripes of a bit more than two rows over two directories
+        int64_t stripe_size = 2 * dim1_size * dtype_size_array[i] + 4;
+        flat_file.setStriping({testing::TempDir(), testing::TempDir()}, stripe_size);
+        flat_file.load();
+        ASSERT_EQ(flat_file.getStripedFile()->getSize(), dim0_size * dim1_size * dtype_size_array[i]);
+
+        ASSERT_TRUE(flat_file.range(0, dim0_size).equal(rand_tensors_array[i]));
+        ASSERT_TRUE(flat_file.range(3, 17).equal(rand_tensors_array[i].narrow(0, 3, 17)));
+
+        // writes go to both the file and the stripes
+        torch::Tensor new_rows = getRandTensor(5, dim1_size, dtype_array[i]);
+        flat_file.rangePut(7, new_rows);
+        ASSERT_TRUE(flat_file.range(7, 5).equal(new_rows));
+        flat_file.setStriping({}, 0);
+        ASSERT_TRUE(flat_file.range(7, 5).equal(new_rows));
+
+        flat_file.unload(false);
+    }
+}
+
+TEST_F(FlatFileTest, TestTieredStorage) {
+    for (int i = 0; i < dtype_size_array.size(); i++) {
+        FlatFile flat_file(filenames_array[i], 0, dim1_size, dtype_array[i]);
+        flat_file.append(rand_tensors_array[i]);
+
+        // blocks of 8 rows, one held in memory and two on the fast disk
+        int64_t block_bytes = 8 * dim1_size * dtype_size_array[i];
+        auto options = std::make_shared<TieredStorageOptions>();
+        options->dtype = dtype_array[i];
+        options->block_size = 8;
+        options->memory_capacity = block_bytes;
+        options->ssd_directory = testing::TempDir();
+        options->ssd_capacity = 2 * block_bytes;
+        options->rebalance_interval = 0;
+
+        TieredStorage tiered(filenames_array[i], dim0_size, dim1_size, options);
+        ASSERT_EQ(tiered.getMemoryCapacity(), 1);
+        ASSERT_EQ(tiered.getSsdCapacity(), 2);
+        tiered.load();
+
+        // nothing has been read yet, so all rows come from the backing file
+        torch::Tensor indices = torch::tensor({5, 3, 4, 5, 45, 0, 44, 17}, torch::kInt64);
+        ASSERT_TRUE(tiered.indexRead(indices).equal(rand_tensors_array[i].index_select(0, indices)));
+        ASSERT_EQ(tiered.getDiskReads(), indices.size(0));
+
+        // the most hinted block moves to memory and the two most hinted blocks to the fast disk, rows are read from the fastest tier
+        for (int j = 0; j < 3; j++) {
+            tiered.addAccessHint(torch::arange(0, 8));
+            tiered.addAccessHint(torch::arange(0, 16));
+        }
+        tiered.rebalance();
+        tiered.resetStats();
+
+        torch::Tensor all_indices = torch::randperm(dim0_size, torch::kInt64);
+        ASSERT_TRUE(tiered.indexRead(all_indices).equal(rand_tensors_array[i].index_select(0, all_indices)));
+        ASSERT_EQ(tiered.getMemoryReads(), 8);
+        ASSERT_EQ(tiered.getSsdReads(), 8);
+        ASSERT_EQ(tiered.getDiskReads(), dim0_size - 16);
+
+        // writes go through to every tier holding the rows
+        torch::Tensor put_indices = torch::tensor({2, 12, 40}, torch::kInt64);
+        torch::Tensor new_rows = getRandTensor(3, dim1_size, dtype_array[i]);
+        tiered.indexPut(put_indices, new_rows);
+        ASSERT_TRUE(tiered.indexRead(put_indices).equal(new_rows));
+
+        ASSERT_THROW(tiered.indexAdd(put_indices, new_rows), MariusRuntimeException);
+        tiered.unload(false);
+
+        flat_file.load();
+        ASSERT_TRUE(flat_file.indexRead(put_indices).equal(new_rows));
+        flat_file.unload(false);
+    }
+}
+
+TEST_F(FlatFileTest, TestTieredStorageConcurrentRebalance) {
+    FlatFile flat_file(filenames_array[0], 0, dim1_size, dtype_array[0]);
+    flat_file.append(rand_tensors_array[0]);
+
+    int64_t block_bytes = 8 * dim1_size * dtype_size_array[0];
+    auto options = std::make_shared<TieredStorageOptions>();
+    options->dtype = dtype_array[0];
+    options->block_size = 8;
+    options->memory_capacity = 2 * block_bytes;
+    options->ssd_directory = testing::TempDir();
+    options->ssd_capacity = 3 * block_bytes;
+    options->rebalance_interval = 0;
+
+    TieredStorage tiered(filenames_array[0], dim0_size, dim1_size, options);
+    tiered.load();
+
+    // rows are overwritten while blocks move between the tiers, no write may be lost by a block copied before it
+    torch::Tensor expected = rand_tensors_array[0].clone();
+    std::thread writer([this, &tiered, &expected] {
+        for (int j = 0; j < 200; j++) {
+            torch::Tensor put_indices = torch::randint(dim0_size, {4}, torch::kInt64);
+            put_indices = std::get<0>(torch::_unique(put_indices));
+            torch::Tensor new_rows = getRandTensor(put_indices.size(0), dim1_size, dtype_array[0]);
+            tiered.indexPut(put_indices, new_rows);
+            expected.index_copy_(0, put_indices, new_rows);
+        }
+    });
+
+    for (int j = 0; j < 50; j++) {
+        int64_t start = (j * 8) % (dim0_size - 16);
+        tiered.addAccessHint(torch::arange(start, start + 16));
+        tiered.rebalance();
+    }
+    writer.join();
+
+    torch::Tensor all_indices = torch::arange(dim0_size, torch::kInt64);
+    ASSERT_TRUE(tiered.indexRead(all_indices).equal(expected));
+    tiered.unload(false);
+}
+
 TEST_F(InMemoryTest, TestIndexRead) {
     for (int i = 0; i < dtype_size_array.size(); i++) {
         InMemory in_memory(filenames_array[i], rand_tensors_array[i], torch::kCPU);
@@ -294,6 +454,24 @@ TEST_F(InMemoryTest, TestIndexAdd) {
     }
 }
 
+TEST_F(InMemoryTest, TestIndexAddDuplicateIds) {
+    InMemory in_memory(filenames_array[3], rand_tensors_array[3], torch::kCPU);
+    in_memory.load();
+    in_memory.setRowLocks(16);
+
+    // repeated ids must all be applied, including when the updates are issued concurrently
+    torch::Tensor indices = torch::randint(dim0_size, {10 * dim0_size}, torch::kInt64);
+    torch::Tensor rand_values = torch::randint(1000, {indices.size(0), dim1_size}, torch::kFloat32);
+    torch::Tensor expected = rand_tensors_array[3].clone().index_add_(0, indices, rand_values).index_add_(0, indices, rand_values);
+
+    std::thread t1([&] { in_memory.indexAdd(indices, rand_values); });
+    std::thread t2([&] { in_memory.indexAdd(indices, rand_values); });
+    t1.join();
+    t2.join();
+
+    ASSERT_EQ(expected.equal(in_memory.indexRead(torch::arange(0, dim0_size))), true);
+}
+
 TEST_F(InMemoryTest, TestIndexPut) {
     // just iterate over torch::kFloat32, indexPut doesn't support any other dtype
     for (int i = 3; i < 4; i++) {
@@ -466,4 +644,28 @@ TEST_F(PartitionBufferStorageTest, TestIndexAdd) {
         rand_values = torch::Tensor();
         ASSERT_THROW(pbs.indexAdd(indices, rand_values), std::runtime_error);
     }
-}
\ No newline at end of file
+}
+TEST_F(PartitionBufferStorageTest, TestHotNodeDirtyBlocks) {
+    auto hot_options = std::make_shared<PartitionBufferOptions>(*options);
+    hot_options->num_hot_nodes = 15;
+
+    PartitionBufferStorage pbs(filenames_array[3], rand_tensors_array[3], hot_options);
+    pbs.setBufferOrdering(buffer_states);
+    pbs.load();
+    pbs.trackDirtyBlocks(partition_size);
+    pbs.takeDirtyBlocks();
+
+    // swap to buffer state {2, 3}, which does not hold the home partitions of the pinned nodes
+    for (int i = 0; i < 7; i++) {
+        pbs.performNextSwap();
+    }
+
+    // pinned node 12 lives in partition 1
+    int64_t hot_offset = pbs.buffer_->getHotOffset();
+    pbs.indexAdd(torch::tensor({hot_offset + 12}, torch::kInt64), torch::ones({1, dim1_size}, torch::kFloat32));
+    ASSERT_TRUE(pbs.takeDirtyBlocks().equal(torch::tensor({1, 2, 3}, torch::kInt64)));
+
+    // rows of the partition slots only dirty the partitions in the buffer
+    pbs.indexAdd(torch::tensor({0}, torch::kInt64), torch::ones({1, dim1_size}, torch::kFloat32));
+    ASSERT_TRUE(pbs.takeDirtyBlocks().equal(torch::tensor({2, 3}, torch::kInt64)));
+}
@@ -25,6 +25,29 @@ def run_configs(directory, partitioned_eval=False):
             m.manager.marius_train(config)
 
 
+def read_batches(config_file, eager):
+    torch.manual_seed(0)
+    _, dataloader = m.storage.init_from_config(config_file.__str__(), True)
+    dataloader.initializeBatches()
+
+    batches = []
+    while dataloader.hasNextBatch():
+        state_batches = [dataloader.getNextBatch()]
+
+        if eager:
+            # create every batch of the buffer state before sampling any of them, as initializeBatches used to
+            while dataloader.next_batch_start_idx < dataloader.num_batch_items:
+                state_batches.append(dataloader.getNextBatch())
+
+        for batch in state_batches:
+            dataloader.edgeSample(batch)
+            batches.append((batch.batch_id, batch.start_idx, batch.batch_size, batch.global_edges.clone()))
+            dataloader.finishedBatch()
+
+    dataloader.unloadStorage()
+    return batches
+
+
 # @pytest.mark.skip("Buffer tests currently flakey with python API")
 class TestLPBuffer(unittest.TestCase):
 
@@ -193,6 +216,31 @@ class TestLPBuffer(unittest.TestCase):
 
         run_configs(self.output_dir / Path(name), partitioned_eval=True)
 
+    @pytest.mark.skipif(os.environ.get("MARIUS_NO_BINDINGS", None) == "TRUE", reason="Requires building the bindings")
+    def test_lazy_batches(self):
+        name = "lazy_batches"
+        shutil.copytree(self.output_dir / Path("test_graph"), self.output_dir / Path(name))
+
+        generate_configs_for_dataset(self.output_dir / Path(name),
+                                     model_names=["distmult"],
+                                     storage_names=["part_buffer"],
+                                     training_names=["sync"],
+                                     evaluation_names=["sync"],
+                                     task="lp")
+
+        config_file = [self.output_dir / Path(name) / Path(f) for f in os.listdir(self.output_dir / Path(name)) if f.startswith("M-")][0]
+
+        lazy_batches = read_batches(config_file, eager=False)
+        eager_batches = read_batches(config_file, eager=True)
+
+        # each buffer state starts its batches from zero, so this checks the batches across swaps
+        assert sum([1 for b in lazy_batches if b[1] == 0]) > 1
+        assert len(lazy_batches) == len(eager_batches)
+
+        for lazy, eager in zip(lazy_batches, eager_batches):
+            assert lazy[:3] == eager[:3]
+            assert torch.equal(lazy[3], eager[3])
+
 
 class TestLPBufferNoRelations(unittest.TestCase):
 
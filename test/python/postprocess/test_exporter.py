@@ -0,0 +1,53 @@
+import unittest
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from marius.tools.postprocess.exporter import export_table, memmap_table
+from test.python.constants import TMP_TEST_DIR
+
+
+class TestExporter(unittest.TestCase):
+    num_rows = 1000
+    dim = 16
+
+    @classmethod
+    def setUp(self):
+        if not Path(TMP_TEST_DIR).exists():
+            Path(TMP_TEST_DIR).mkdir()
+
+        self.table = np.random.randn(self.num_rows, self.dim).astype(np.float32)
+        self.table.tofile(Path(TMP_TEST_DIR) / "embeddings.bin")
+
+        # raw ids are mapped to a permutation of the rows, as done by marius_preprocess
+        self.mapped_ids = np.random.permutation(self.num_rows)
+        self.raw_ids = np.array(["node_{}".format(i) for i in range(self.num_rows)])
+        pd.DataFrame({0: self.raw_ids, 1: self.mapped_ids}).to_csv(Path(TMP_TEST_DIR) / "node_mapping.txt", header=False, index=False)
+
+    @classmethod
+    def tearDown(self):
+        if Path(TMP_TEST_DIR).exists():
+            shutil.rmtree(Path(TMP_TEST_DIR))
+
+    def test_npy(self):
+        table = memmap_table(Path(TMP_TEST_DIR) / "embeddings.bin", self.num_rows, np.float32)
+        assert table.shape == (self.num_rows, self.dim)
+
+        output = export_table(table, TMP_TEST_DIR, "node_embeddings", "NPY", Path(TMP_TEST_DIR) / "node_mapping.txt", np.float16, chunk_size=64, num_workers=4)
+
+        exported = np.load(output)
+        assert exported.dtype == np.float16
+        np.testing.assert_array_equal(exported, self.table[self.mapped_ids].astype(np.float16))
+
+        ids = Path(TMP_TEST_DIR, "node_embeddings_ids.txt").read_text().split()
+        assert ids == self.raw_ids.tolist()
+
+    def test_csv(self):
+        table = memmap_table(Path(TMP_TEST_DIR) / "embeddings.bin", self.num_rows, np.float32)
+
+        output = export_table(table, TMP_TEST_DIR, "node_embeddings", "CSV", Path(TMP_TEST_DIR) / "node_mapping.txt", chunk_size=100, num_workers=3)
+
+        exported = pd.read_csv(output, header=None)
+        assert exported.iloc[:, 0].tolist() == self.raw_ids.tolist()
+        np.testing.assert_allclose(exported.iloc[:, 1:].to_numpy(), self.table[self.mapped_ids], rtol=1e-6)
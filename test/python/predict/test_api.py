@@ -0,0 +1,98 @@
+import unittest
+import shutil
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+from marius.tools.prediction.api import map_raw_edges, predict_lp, to_id_tensor
+from test.test_data.generate import generate_random_dataset
+from test.test_configs.generate_test_configs import generate_configs_for_dataset
+from test.python.constants import TMP_TEST_DIR
+import marius as m
+
+
+class TestInMemoryPredictLP(unittest.TestCase):
+    config_file = None
+
+    @classmethod
+    def setUp(self):
+
+        if not Path(TMP_TEST_DIR).exists():
+            Path(TMP_TEST_DIR).mkdir()
+
+        base_dir = TMP_TEST_DIR
+
+        num_nodes = 100
+        num_rels = 10
+        num_edges = 1000
+
+        name = "basic_lp"
+        generate_random_dataset(output_dir=base_dir / Path(name),
+                                num_nodes=num_nodes,
+                                num_edges=num_edges,
+                                num_rels=num_rels,
+                                splits=[.9, .05, .05],
+                                task="lp")
+
+        generate_configs_for_dataset(base_dir / Path(name),
+                                     model_names=["distmult"],
+                                     storage_names=["in_memory"],
+                                     training_names=["sync"],
+                                     evaluation_names=["sync"],
+                                     task="lp")
+
+        for filename in os.listdir(base_dir / Path(name)):
+            if filename.startswith("M-"):
+                self.config_file = base_dir / Path(name) / Path(filename)
+
+        config = m.config.loadConfig(self.config_file.__str__(), True)
+        m.manager.marius_train(config)
+
+    @classmethod
+    def tearDown(self):
+        if Path(TMP_TEST_DIR).exists():
+            shutil.rmtree(Path(TMP_TEST_DIR))
+
+    def test_numpy_input(self):
+        model = m.storage.load_model(self.config_file.__str__(), train=False)
+        graph_storage = m.storage.load_storage(self.config_file.__str__(), train=False)
+
+        edges = np.stack([np.arange(50), np.arange(50) % 10, np.arange(50, 100)], axis=1).astype(np.int64)
+
+        # contiguous int64 arrays are wrapped without a copy
+        assert to_id_tensor(edges).data_ptr() == edges.ctypes.data
+
+        scores, ranks = predict_lp(model, graph_storage, edges, batch_size=16)
+        assert scores.shape[0] == 50
+        assert ranks is None
+
+        scores, ranks = predict_lp(model, graph_storage, torch.from_numpy(edges), num_negs=-1, batch_size=16)
+        assert scores.shape[0] == 50
+        assert ranks.shape[0] == 50
+        assert (ranks >= 1).all()
+        assert (ranks <= 100).all()
+
+    def test_input_order(self):
+        model = m.storage.load_model(self.config_file.__str__(), train=False)
+        graph_storage = m.storage.load_storage(self.config_file.__str__(), train=False)
+
+        edges = torch.stack([torch.arange(20), torch.arange(20) % 10, torch.arange(99, 79, -1)], dim=1)
+        scores, ranks = predict_lp(model, graph_storage, edges, num_negs=-1, batch_size=8)
+
+        # the outputs of each row match the outputs of the row predicted on its own
+        for i in range(edges.shape[0]):
+            edge_scores, edge_ranks = predict_lp(model, graph_storage, edges[i:i + 1], num_negs=-1, batch_size=8)
+            assert torch.allclose(scores[i], edge_scores[0])
+            assert torch.equal(ranks[i], edge_ranks[0])
+
+    def test_raw_ids(self):
+        node_mapping_df = pd.DataFrame({0: ["n{}".format(i) for i in range(100)], 1: np.arange(100)[::-1]})
+        rel_mapping_df = pd.DataFrame({0: ["r{}".format(i) for i in range(10)], 1: np.arange(10)})
+
+        mapped = map_raw_edges(np.array([["n0", "r3", "n99"], ["n5", "r0", "n6"]]), node_mapping_df, rel_mapping_df)
+        assert mapped.tolist() == [[99, 3, 0], [94, 0, 93]]
+
+        with self.assertRaises(RuntimeError):
+            map_raw_edges(np.array([["n0", "r3", "missing"]]), node_mapping_df, rel_mapping_df)
@@ -3,8 +3,13 @@ import shutil
 import os
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import torch
+from omegaconf import OmegaConf
+from marius.tools.configuration.constants import PathConstants
 from marius.tools.marius_predict import run_predict, set_args
+from marius.tools.prediction.link_prediction import infer_lp, topk_lp
 from test.test_data.generate import generate_random_dataset
 from test.test_configs.generate_test_configs import generate_configs_for_dataset
 from test.python.constants import TMP_TEST_DIR
@@ -207,3 +212,199 @@ class TestPredictLP(unittest.TestCase):
 
     def test_lp_save_scores(self):
         pass
+
+
+class TestPredictTopK(unittest.TestCase):
+    config_file = None
+    num_nodes = 100
+    num_rels = 10
+
+    @classmethod
+    def setUp(self):
+
+        if not Path(TMP_TEST_DIR).exists():
+            Path(TMP_TEST_DIR).mkdir()
+
+        base_dir = TMP_TEST_DIR
+
+        name = "topk_lp"
+        generate_random_dataset(output_dir=base_dir / Path(name),
+                                num_nodes=self.num_nodes,
+                                num_edges=1000,
+                                num_rels=self.num_rels,
+                                splits=[.9, .05, .05],
+                                task="lp")
+
+        # the evaluation config filters negatives, top-k queries should only follow --filtered
+        generate_configs_for_dataset(base_dir / Path(name),
+                                     model_names=["distmult"],
+                                     storage_names=["in_memory"],
+                                     training_names=["sync"],
+                                     evaluation_names=["sync_filtered"],
+                                     task="lp")
+
+        for filename in os.listdir(base_dir / Path(name)):
+            if filename.startswith("M-"):
+                self.config_file = base_dir / Path(name) / Path(filename)
+
+        config = m.config.loadConfig(self.config_file.__str__(), True)
+        m.manager.marius_train(config)
+
+    @classmethod
+    def tearDown(self):
+        if Path(TMP_TEST_DIR).exists():
+            shutil.rmtree(Path(TMP_TEST_DIR))
+
+    def run_topk(self, filtered):
+        # one query for every (source, relation) pair, so every known edge is a result of some query
+        input_file = Path(TMP_TEST_DIR) / Path("topk_queries.csv")
+        queries = pd.DataFrame([[src, rel] for src in range(self.num_nodes) for rel in range(self.num_rels)])
+        queries.to_csv(input_file, header=False, index=False)
+
+        parser = set_args()
+        args = parser.parse_args(["--config", self.config_file.__str__(),
+                                  "--topk", str(self.num_nodes),
+                                  "--filtered", filtered,
+                                  "--input_file", input_file.__str__(),
+                                  "--input_format", "csv",
+                                  "--output_dir", TMP_TEST_DIR.__str__()])
+        run_predict(args)
+
+        return pd.read_csv(Path(TMP_TEST_DIR) / Path("topk.csv"))
+
+    def test_topk_unfiltered(self):
+        topk_df = self.run_topk("false")
+
+        # without filtering every node is returned for every query
+        assert topk_df.shape[0] == self.num_nodes * self.num_nodes * self.num_rels
+
+    def test_topk_filtered(self):
+        topk_df = self.run_topk("true")
+
+        # known edges are removed from the results
+        assert topk_df.shape[0] < self.num_nodes * self.num_nodes * self.num_rels
+
+    def test_topk_rows(self):
+        model = m.storage.load_model(self.config_file.__str__(), train=False)
+        graph_storage = m.storage.load_storage(self.config_file.__str__(), train=False)
+        graph_storage.setTestSet()
+
+        def run(queries, output_file):
+            topk_lp(model=model, graph_storage=graph_storage, output_file=output_file.__str__(), queries=queries, k=5, batch_size=16, filtered=False)
+            return pd.read_csv(output_file)
+
+        queries = torch.tensor([[src, rel] for src in range(self.num_nodes) for rel in range(3)])
+        topk_df = run(queries, Path(TMP_TEST_DIR) / Path("topk_all.csv"))
+        assert topk_df.shape[0] == queries.shape[0] * 5
+
+        # the results written for each (src, rel) match those of the query run on its own
+        for src, rel in queries[::17].tolist():
+            query_df = run(torch.tensor([[src, rel]]), Path(TMP_TEST_DIR) / Path("topk_single.csv"))
+            rows_df = topk_df[(topk_df["src"] == src) & (topk_df["rel"] == rel)].sort_values("rank")
+
+            assert rows_df["dst"].tolist() == query_df["dst"].tolist()
+            assert np.allclose(rows_df["score"].to_numpy(), query_df["score"].to_numpy())
+
+
+class TestPredictBufferRanking(unittest.TestCase):
+    config_file = None
+    num_hot_nodes = 0
+
+    @classmethod
+    def setUp(self):
+
+        if not Path(TMP_TEST_DIR).exists():
+            Path(TMP_TEST_DIR).mkdir()
+
+        base_dir = TMP_TEST_DIR
+
+        name = "buffer_ranking"
+        generate_random_dataset(output_dir=base_dir / Path(name),
+                                num_nodes=100,
+                                num_edges=1000,
+                                num_rels=10,
+                                num_partitions=8,
+                                partitioned_eval=True,
+                                splits=[.9, .05, .05],
+                                task="lp")
+
+        generate_configs_for_dataset(base_dir / Path(name),
+                                     model_names=["distmult"],
+                                     storage_names=["part_buffer"],
+                                     training_names=["sync"],
+                                     evaluation_names=["sync"],
+                                     task="lp")
+
+        for filename in os.listdir(base_dir / Path(name)):
+            if filename.startswith("M-"):
+                self.config_file = base_dir / Path(name) / Path(filename)
+
+        # evaluate over the buffer states so that candidates are the nodes in the partition buffer
+        config = OmegaConf.load(self.config_file)
+        config.storage.full_graph_evaluation = False
+        config.storage.embeddings.options.num_hot_nodes = self.num_hot_nodes
+        OmegaConf.save(config, self.config_file)
+
+        config = m.config.loadConfig(self.config_file.__str__(), True)
+        m.manager.marius_train(config)
+
+    @classmethod
+    def tearDown(self):
+        if Path(TMP_TEST_DIR).exists():
+            shutil.rmtree(Path(TMP_TEST_DIR))
+
+    def rank_test_edges(self, filtered, ranking_tile_size):
+        model = m.storage.load_model(self.config_file.__str__(), train=False)
+        graph_storage = m.storage.load_storage(self.config_file.__str__(), train=False)
+        graph_storage.setTestSet()
+
+        output_dir = Path(TMP_TEST_DIR) / Path("ranks_{}".format(ranking_tile_size))
+        output_dir.mkdir(exist_ok=True)
+
+        infer_lp(model=model,
+                 graph_storage=graph_storage,
+                 output_dir=output_dir.__str__() + "/",
+                 metrics=[],
+                 save_ranks=True,
+                 num_negs=-1,
+                 filtered=filtered,
+                 ranking_tile_size=ranking_tile_size)
+
+        ranks_df = pd.read_csv(output_dir / Path("scores.csv"))
+        return ranks_df.sort_values(list(ranks_df.columns)).reset_index(drop=True)
+
+    def compare_ranks(self, filtered):
+        dense_df = self.rank_test_edges(filtered, 0)
+
+        # a tile size which does not divide the number of nodes in the buffer leaves a partial last tile
+        tiled_df = self.rank_test_edges(filtered, 7)
+
+        edge_columns = [c for c in dense_df.columns if c != "rank"]
+        assert dense_df.shape == tiled_df.shape
+        assert dense_df[edge_columns].equals(tiled_df[edge_columns])
+
+        # scores computed with different matrix shapes may round differently, which can only flip ties
+        rank_diff = (dense_df["rank"] - tiled_df["rank"]).abs()
+        assert (rank_diff <= 1).all()
+        assert (rank_diff == 0).mean() > .95
+
+    def test_tiled_ranks_unfiltered(self):
+        self.compare_ranks(False)
+
+    def test_tiled_ranks_filtered(self):
+        self.compare_ranks(True)
+
+    def test_global_edge_ids(self):
+        ranks_df = self.rank_test_edges(True, 7)
+
+        # the outputs hold the test edges by their global node ids, not by their ids in the buffer or the batch
+        test_edges_path = self.config_file.parent / Path(PathConstants.test_edges_path)
+        test_edges = np.fromfile(test_edges_path, np.int32).reshape(-1, 3)
+        expected = set(map(tuple, test_edges.tolist()))
+        output = set(map(tuple, ranks_df[["src", "rel", "dst"]].to_numpy().tolist()))
+        assert output == expected
+
+
+class TestPredictBufferRankingHotNodes(TestPredictBufferRanking):
+    # partition slots keep stale copies of the pinned nodes, which must not be ranked as candidates
+    num_hot_nodes = 10
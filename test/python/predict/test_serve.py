@@ -0,0 +1,191 @@
+import unittest
+import shutil
+import os
+import threading
+from pathlib import Path
+
+import torch
+from marius.tools.prediction.server import Predictor, MicroBatcher, parse_request
+from test.test_data.generate import generate_random_dataset
+from test.test_configs.generate_test_configs import generate_configs_for_dataset
+from test.python.constants import TMP_TEST_DIR
+import marius as m
+
+
+class ShapeRecordingPredictor:
+    """
+    Stands in for a Predictor and records the shape of the ids of each call.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def score(self, edges):
+        self.calls.append(("score", edges.shape[1]))
+        return edges.sum(1).float()
+
+    def topk(self, queries, k):
+        self.calls.append(("topk", tuple(queries.shape[1:])))
+        return torch.zeros(queries.shape[0], k), torch.zeros(queries.shape[0], k, dtype=torch.int64)
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def test_mixed_request_shapes(self):
+        predictor = ShapeRecordingPredictor()
+        batcher = MicroBatcher(predictor, max_batch_size=1000, max_latency_ms=200)
+
+        bodies = [("score", {"edges": [[0, 1], [1, 2]]}),
+                  ("score", {"edges": [[0, 0, 1]]}),
+                  ("topk", {"nodes": [0, 1], "k": 2}),
+                  ("topk", {"nodes": [0], "relations": [1], "k": 3})]
+        results = [None] * len(bodies)
+
+        def send(i):
+            results[i] = batcher.submit(parse_request(*bodies[i]), timeout=60)
+
+        threads = [threading.Thread(target=send, args=(i,)) for i in range(len(bodies))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        batcher.stop()
+
+        assert torch.equal(results[0], torch.tensor([1.0, 3.0]))
+        assert torch.equal(results[1], torch.tensor([1.0]))
+        assert results[2][1].shape == torch.Size([2, 2])
+        assert results[3][1].shape == torch.Size([1, 3])
+
+        # each shape was run on its own
+        assert set(predictor.calls) == {("score", 2), ("score", 3), ("topk", ()), ("topk", (2,))}
+
+
+class TestServeLP(unittest.TestCase):
+    config_file = None
+
+    @classmethod
+    def setUp(self):
+
+        if not Path(TMP_TEST_DIR).exists():
+            Path(TMP_TEST_DIR).mkdir()
+
+        base_dir = TMP_TEST_DIR
+
+        num_nodes = 100
+        num_rels = 10
+        num_edges = 1000
+
+        name = "basic_lp"
+        generate_random_dataset(output_dir=base_dir / Path(name),
+                                num_nodes=num_nodes,
+                                num_edges=num_edges,
+                                num_rels=num_rels,
+                                splits=[.9, .05, .05],
+                                task="lp")
+
+        generate_configs_for_dataset(base_dir / Path(name),
+                                     model_names=["distmult"],
+                                     storage_names=["in_memory"],
+                                     training_names=["sync"],
+                                     evaluation_names=["sync"],
+                                     task="lp")
+
+        for filename in os.listdir(base_dir / Path(name)):
+            if filename.startswith("M-"):
+                self.config_file = base_dir / Path(name) / Path(filename)
+
+        config = m.config.loadConfig(self.config_file.__str__(), True)
+        m.manager.marius_train(config)
+
+    @classmethod
+    def tearDown(self):
+        if Path(TMP_TEST_DIR).exists():
+            shutil.rmtree(Path(TMP_TEST_DIR))
+
+    def test_concurrent_requests(self):
+        predictor = Predictor(self.config_file.__str__(), max_batch_size=1000)
+        batcher = MicroBatcher(predictor, max_batch_size=1000, max_latency_ms=50)
+
+        num_requests = 8
+        results = [None] * num_requests
+
+        def send(i):
+            if i % 2 == 0:
+                request = parse_request("score", {"edges": [[i, 0, i + 1], [i + 1, 1, i + 2]]})
+            else:
+                request = parse_request("topk", {"nodes": [i], "relations": [0], "k": i})
+            results[i] = batcher.submit(request, timeout=60)
+
+        threads = [threading.Thread(target=send, args=(i,)) for i in range(num_requests)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        batcher.stop()
+
+        for i in range(num_requests):
+            if i % 2 == 0:
+                assert results[i].shape == torch.Size([2])
+            else:
+                scores, ids = results[i]
+                # each request gets its own k even when batched with requests asking for more
+                assert ids.shape == torch.Size([1, i])
+                assert torch.all(scores[:, :-1] >= scores[:, 1:])
+
+    def test_micro_batch_order(self):
+        predictor = Predictor(self.config_file.__str__(), max_batch_size=1000)
+
+        # record the number of ids of each call, to check that requests were micro-batched together
+        score, topk = predictor.score, predictor.topk
+        sizes = []
+        predictor.score = lambda edges: sizes.append(edges.shape[0]) or score(edges)
+        predictor.topk = lambda queries, k: sizes.append(queries.shape[0]) or topk(queries, k)
+
+        batcher = MicroBatcher(predictor, max_batch_size=1000, max_latency_ms=500)
+
+        bodies = []
+        for i in range(8):
+            bodies.append(("score", {"edges": [[i, i, 99 - i], [2 * i, 0, i + 1], [i + 50, 3, i]]}))
+            bodies.append(("topk", {"nodes": [i, i + 20], "relations": [i, 1], "k": 5}))
+        results = [None] * len(bodies)
+
+        def send(i):
+            results[i] = batcher.submit(parse_request(*bodies[i]), timeout=60)
+
+        threads = [threading.Thread(target=send, args=(i,)) for i in range(len(bodies))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        batcher.stop()
+        assert max(sizes) > 3
+
+        # each request gets the same results as when it is run on its own
+        for body, result in zip(bodies, results):
+            request = parse_request(*body)
+            if request.request_type == "score":
+                assert torch.allclose(result, score(request.ids))
+            else:
+                scores, ids = topk(request.ids, request.k)
+                assert torch.allclose(result[0], scores)
+                assert torch.equal(result[1], ids)
+
+    def test_bad_request(self):
+        with self.assertRaises(ValueError):
+            parse_request("score", {"edges": [1, 2, 3]})
+
+        with self.assertRaises(ValueError):
+            parse_request("topk", {"nodes": [1], "k": 0})
+
+        # mismatched or malformed node and relation lists are rejected before they reach the batcher
+        with self.assertRaises(ValueError):
+            parse_request("topk", {"nodes": [1, 2], "relations": [0]})
+
+        with self.assertRaises(ValueError):
+            parse_request("topk", {"nodes": [[1, 2]], "relations": [[0, 1]]})
+
+        with self.assertRaises(ValueError):
+            parse_request("topk", {"nodes": [[1, 2]]})
@@ -2,7 +2,8 @@ import shutil
 import unittest
 from pathlib import Path
 from test.python.constants import TMP_TEST_DIR, TESTING_DATA_DIR
-from marius.tools.preprocess.converters.torch_converter import TorchEdgeListConverter
+from marius.tools.preprocess.converters.torch_converter import TorchEdgeListConverter, get_traversal_order
+from marius.tools.preprocess.converters.partitioners.torch_partitioner import label_propagation
 from marius.tools.configuration.marius_config import DatasetConfig
 from marius.tools.configuration.constants import PathConstants
 from omegaconf import OmegaConf, MISSING
@@ -427,6 +428,105 @@ class TestTorchConverter(unittest.TestCase):
                                         dtype=np.int32,
                                         num_partitions=100)
 
+    def test_label_propagation_partitions(self):
+        output_dir = Path(TMP_TEST_DIR) / Path("test_label_propagation_partitions")
+        output_dir.mkdir()
+
+        converter = TorchEdgeListConverter(
+            output_dir=output_dir,
+            train_edges=Path(TMP_TEST_DIR) / Path("train_edges.txt"),
+            delim=" ",
+            num_partitions=10,
+            partitioning_method="label_propagation"
+        )
+
+        converter.convert()
+
+        expected_stats = DatasetConfig()
+        expected_stats.dataset_dir = output_dir.__str__()
+        expected_stats.num_edges = 1000
+        expected_stats.num_nodes = 100
+        expected_stats.num_relations = 10
+        expected_stats.num_train = 1000
+
+        validate_partitioned_output_dir(output_dir=output_dir,
+                                        expected_stats=expected_stats,
+                                        dtype=np.int32,
+                                        num_partitions=10)
+
+        node_mapping = np.genfromtxt(output_dir / Path(PathConstants.node_mapping_path), delimiter=",").astype(np.int64)
+        assert np.array_equal(np.sort(node_mapping[:, 1]), np.arange(100))
+
+        with self.assertRaises(RuntimeError):
+            TorchEdgeListConverter(
+                output_dir=output_dir,
+                train_edges=Path(TMP_TEST_DIR) / Path("train_edges.txt"),
+                delim=" ",
+                num_partitions=10,
+                partitioning_method="label_propagation",
+                remap_ids=False,
+                num_nodes=100,
+                num_rels=10
+            )
+
+    def test_label_propagation(self):
+        # two cliques which start with three nodes each in the partition of the other clique
+        clique_a = torch.tensor([0, 1, 2, 3, 4, 5, 6, 10, 11, 12])
+        clique_b = torch.tensor([7, 8, 9, 13, 14, 15, 16, 17, 18, 19])
+        edges = []
+        for clique in [clique_a, clique_b]:
+            src, dst = torch.meshgrid(clique, clique, indexing="ij")
+            edges.append(torch.stack([src.flatten(), dst.flatten()], dim=1))
+        edges = torch.cat(edges)
+
+        partitions = label_propagation(edges, 20, 2)
+
+        assert torch.bincount(partitions).tolist() == [10, 10]
+        assert torch.unique(partitions[clique_a]).size(0) == 1
+        assert torch.unique(partitions[clique_b]).size(0) == 1
+
+    def test_node_ordering(self):
+        for node_ordering in ["degree", "bfs", "rcm"]:
+            output_dir = Path(TMP_TEST_DIR) / Path("test_node_ordering_{}".format(node_ordering))
+            output_dir.mkdir()
+
+            converter = TorchEdgeListConverter(
+                output_dir=output_dir,
+                train_edges=Path(TMP_TEST_DIR) / Path("train_edges.txt"),
+                delim=" ",
+                node_ordering=node_ordering
+            )
+
+            converter.convert()
+
+            expected_stats = DatasetConfig()
+            expected_stats.dataset_dir = output_dir.__str__()
+            expected_stats.num_edges = 1000
+            expected_stats.num_nodes = 100
+            expected_stats.num_relations = 10
+            expected_stats.num_train = 1000
+
+            validate_output_dir(output_dir=output_dir,
+                                expected_stats=expected_stats,
+                                dtype=np.int32,
+                                remap_ids=True)
+
+            node_mapping = np.genfromtxt(output_dir / Path(PathConstants.node_mapping_path), delimiter=",").astype(np.int64)
+            assert np.array_equal(np.sort(node_mapping[:, 1]), np.arange(100))
+
+            if node_ordering == "degree":
+                train_edges = np.fromfile(output_dir / Path(PathConstants.train_edges_path), np.int32).reshape(1000, -1)
+                degrees = np.bincount(np.concatenate([train_edges[:, 0], train_edges[:, -1]]), minlength=100)
+                assert np.all(np.diff(degrees) <= 0)
+
+    def test_traversal_order(self):
+        # path 3 - 0 - 4 - 1 - 2 and an isolated node 5
+        edges = torch.tensor([[3, 0], [0, 4], [4, 1], [1, 2]])
+
+        # breadth first search starts from the first highest degree node, Cuthill-McKee from the first lowest degree node
+        assert get_traversal_order(edges, 6).tolist() == [0, 4, 3, 1, 2, 5]
+        assert get_traversal_order(edges, 6, cuthill_mckee=True).tolist() == [2, 1, 4, 0, 3, 5]
+
     def test_no_remap(self):
 
         output_dir = Path(TMP_TEST_DIR) / Path("test_dtype")
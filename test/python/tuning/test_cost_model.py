@@ -0,0 +1,72 @@
+import unittest
+
+import torch
+from omegaconf import OmegaConf
+from marius.tools.tuning.benchmarks import HardwareProfile
+from marius.tools.tuning.cost_model import count_admitted_partitions, estimate_memory, predict_swap_epoch_time, search
+
+
+def get_config(sync=True):
+    return OmegaConf.create({
+        "model": {"learning_task": "LINK_PREDICTION",
+                  "encoder": {"embedding_dim": 50, "train_neighbor_sampling": []}},
+        "storage": {"dataset": {"dataset_dir": "", "num_nodes": 1000000, "num_edges": 10000000, "num_train": 10000000,
+                                "num_relations": 1, "node_feature_dim": -1},
+                    "edges": {"options": {"dtype": "int"}},
+                    "nodes": {"options": {"dtype": "int"}},
+                    "embeddings": {"type": "PARTITION_BUFFER",
+                                   "options": {"dtype": "float", "edge_bucket_ordering": "NEW_BETA",
+                                               "randomly_assign_edge_buckets": True}},
+                    "features": {"options": {"dtype": "float"}}},
+        "training": {"batch_size": 10000,
+                     "negative_sampling": {"num_chunks": 10, "negatives_per_positive": 500},
+                     "pipeline": {"sync": sync, "compute_threads": 1}}
+    })
+
+
+class TestCostModel(unittest.TestCase):
+
+    def test_count_admitted_partitions(self):
+        buffer_states = [torch.tensor([0, 1, 2]), torch.tensor([0, 1, 3]), torch.tensor([3, 4, 5])]
+        assert count_admitted_partitions(buffer_states) == [3, 1, 2]
+
+    def test_swap_epoch_time(self):
+        admitted = [2, 1, 1]
+        work = [.5, .25, .25]
+
+        # without prefetching, swaps and training are serialized
+        epoch_time = predict_swap_epoch_time(admitted, work, 8.0, 1.0, 1.0, 2, prefetching=False)
+        assert epoch_time == 2.0 + 2.0 + 2.0 + 8.0 + 2.0
+
+        # with prefetching, only the first read and the final write back are exposed
+        epoch_time = predict_swap_epoch_time(admitted, work, 8.0, 1.0, 1.0, 2, prefetching=True)
+        assert epoch_time == 2.0 + 4.0 + 2.0 + 2.0 + 2.0
+
+    def test_memory_decreases_with_partitions(self):
+        config = get_config()
+        in_memory = estimate_memory(config, 1, 1, 4)
+        partitioned = estimate_memory(config, 16, 4, 4)
+        assert partitioned < in_memory
+        assert estimate_memory(config, 16, 8, 4) > partitioned
+
+    def test_search_respects_budget(self):
+        config = get_config(sync=False)
+        profile = HardwareProfile(disk_read_bandwidth=1e9,
+                                  disk_write_bandwidth=1e9,
+                                  memory_bandwidth=1e10,
+                                  batch_sample_time=.02,
+                                  batch_compute_time=.01,
+                                  num_cpus=8)
+
+        budget = estimate_memory(config, 1, 1, 4) / 2
+        candidates = search(config, profile, budget, max_partitions=16)
+
+        assert len(candidates) > 0
+        for c in candidates:
+            assert c.partitioned
+            assert c.memory_bytes <= budget
+
+        best = candidates[0]
+        assert best.batch_loader_threads >= 2
+        assert best.staleness_bound >= best.batch_loader_threads
+        assert all(best.throughput >= c.throughput for c in candidates)
@@ -0,0 +1,48 @@
+import unittest
+import shutil
+from pathlib import Path
+
+import numpy as np
+from marius.tools.tuning.simulator import OrderingReport, read_edge_bucket_sizes
+from test.python.constants import TMP_TEST_DIR
+
+
+class TestSimulator(unittest.TestCase):
+
+    @classmethod
+    def setUp(self):
+        if not Path(TMP_TEST_DIR).exists():
+            Path(TMP_TEST_DIR).mkdir()
+
+    @classmethod
+    def tearDown(self):
+        if Path(TMP_TEST_DIR).exists():
+            shutil.rmtree(Path(TMP_TEST_DIR))
+
+    def test_read_edge_bucket_sizes(self):
+        offsets_file = Path(TMP_TEST_DIR) / "train_partition_offsets.txt"
+        np.savetxt(offsets_file, np.arange(9), fmt="%d")
+
+        sizes = read_edge_bucket_sizes(offsets_file, 3)
+        assert sizes.shape == (3, 3)
+        assert sizes[1, 2] == 5
+
+        with self.assertRaises(RuntimeError):
+            read_edge_bucket_sizes(offsets_file, 4)
+
+    def test_prefetch_overlap(self):
+        report = OrderingReport(num_partitions=4,
+                                buffer_capacity=2,
+                                num_buffer_states=3,
+                                partitions_read=4,
+                                partitions_written=4,
+                                bytes_read=0,
+                                bytes_written=0,
+                                items_per_state=[100, 100, 200],
+                                swap_times=[2.0, 2.0, 3.0, 2.0],
+                                compute_times=[1.0, 3.0, 2.0])
+
+        # the second swap is half hidden behind the first state, the third fully hidden behind the second
+        assert report.exposed_swap_time == 2.0 + 1.0 + 0.0 + 2.0
+        assert report.prefetch_overlap == 1 - 5.0 / 9.0
+        assert report.load_imbalance == 200 / (400 / 3)